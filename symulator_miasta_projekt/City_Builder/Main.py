@@ -2,6 +2,7 @@ import sys
 import os
 import logging
 import time
+import sqlite3
 
 # Dodaj aktualny katalog do ścieżki Pythona
 # os.path.dirname() - pobiera katalog z pełnej ścieżki pliku
@@ -35,7 +36,11 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QPushButton, QLabel, QMenuBar, QStatusBar, QMessageBox, QDialog)
 from PyQt6.QtCore import Qt, QTimer
 from core.game_engine import GameEngine
+from core.save_format import SAVE_EXTENSION
+from core.autosave import AutosaveService
 from gui.map_canvas import MapCanvas
+from gui.sprite_cache import SpriteCache
+from gui.texture_atlas import TextureAtlas
 from gui.build_panel import BuildPanel
 from core.events import EventManager
 from gui.event_dialog import EventDialog
@@ -103,14 +108,35 @@ class MainWindow(QMainWindow):
         
         # Utwórz silnik gry - główny system zarządzający logiką gry
         self.game_engine = GameEngine(map_width=map_width, map_height=map_height)
+        # W trybie debugowania silnik co turę weryfikuje księgę agregatów budynków
+        self.game_engine.ledger_debug = config_manager.get('advanced_settings.debug_mode', False)
+        self.game_engine.save_compression = config_manager.get('game_settings.save_compression', 'gzip')
+        if config_manager.get('game_settings.population_model', 'groups') == 'cohorts':
+            self.game_engine.population.enable_cohort_model()  # przedziały wieku x klasy społeczne
         
         # Utwórz główny widget i układ (layout) interfejsu
         central_widget = QWidget()                    # główny widget zawierający wszystkie elementy
         self.setCentralWidget(central_widget)         # ustaw jako centralny widget okna
         main_layout = QHBoxLayout(central_widget)     # poziomy układ (elementy obok siebie)
         
+        # Atlas tekstur - wszystkie obrazki z assets/tiles wczytane raz, dla każdego poziomu powiększenia
+        zoom_levels = config_manager.get('ui_settings.zoom_levels', [1.0])
+        tile_size = config_manager.get('ui_settings.tile_size', 32)
+        self.texture_atlas = TextureAtlas(
+            cell_sizes=[round(tile_size * level) for level in zoom_levels],
+            cache_dir=os.path.join(os.path.dirname(__file__), 'cache', 'atlas')
+        ).load()
+        
+        # Cache obrazków budynków - warianty per rotacja i poziom powiększenia, zapisywane na dysk
+        self.sprite_cache = SpriteCache(
+            max_size=config_manager.get('performance_settings.cache_size', 100),
+            zoom_levels=zoom_levels,
+            cache_dir=os.path.join(os.path.dirname(__file__), 'cache', 'sprites'),
+            atlas=self.texture_atlas
+        )
+        
         # Utwórz canvas (płótno) z mapą miasta
-        self.map_canvas = MapCanvas(self.game_engine.city_map)  # przekaż mapę z silnika gry
+        self.map_canvas = MapCanvas(self.game_engine.city_map, self.sprite_cache)  # przekaż mapę z silnika gry
         # Zainicjalizuj zasoby w map_canvas (potrzebne do wyświetlania)
         self.map_canvas.resources = self.game_engine.economy.get_resource_amount('money')
         # Dodaj canvas do układu z stretch=3 (zajmie 3/5 szerokości okna)
@@ -123,8 +149,8 @@ class MainWindow(QMainWindow):
         
         # Initialize economy panel
         buildings = self.game_engine.get_all_buildings()
-        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
+        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
+        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
         tax_rates = self.game_engine.economy.tax_rates
         self.build_panel.update_economy_panel(income, expenses, tax_rates)
         
@@ -154,8 +180,19 @@ class MainWindow(QMainWindow):
         self.game_timer.timeout.connect(self.update_game)
         self.game_timer.start(15000)  # Update every 15 seconds
         
+        # Autozapis i zapis gry w tle - serializacja i zapis na dysk w wątku roboczym
+        self.autosave_service = AutosaveService(
+            self.game_engine,
+            os.path.join(os.path.dirname(__file__), 'saves'),
+            interval=config_manager.get('game_settings.auto_save_interval', 300),
+            slots=config_manager.get('game_settings.auto_save_slots', 3)
+        )
+        self.autosave_timer = QTimer()
+        self.autosave_timer.timeout.connect(self.check_autosave)
+        self.autosave_timer.start(1000)  # sprawdzaj co sekundę (interwał liczy usługa)
+        
         # Create event manager
-        self.event_manager = EventManager()
+        self.event_manager = EventManager(rng=self.game_engine.random_streams.get('events'))
         
         # Create reports panel
         self.reports_panel = ReportsPanel()
@@ -164,8 +201,14 @@ class MainWindow(QMainWindow):
         self.technology_tree = TechnologyManager()
         self.technology_panel = TechnologyPanel(self.technology_tree, self.game_engine)
         
-        # Create database instance
-        self.database = Database()
+        # Create database instance - zapisy tur zatwierdzane w tle jedną transakcją
+        self.database = Database(
+            config_manager.get('database_settings.db_path', 'city_builder.db'),
+            background=config_manager.get('database_settings.background_writer', True)
+        )
+        
+        # Szereg czasowy historii tej rozgrywki w bazie danych (pełna historia dla raportów)
+        self.start_history()
         
         # Create objectives system
         self.objective_manager = ObjectiveManager()
@@ -272,6 +315,13 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             self.game_engine = GameEngine(map_width=60, map_height=60)
+            self.game_engine.ledger_debug = config_manager.get('advanced_settings.debug_mode', False)
+            self.game_engine.save_compression = config_manager.get('game_settings.save_compression', 'gzip')
+            if config_manager.get('game_settings.population_model', 'groups') == 'cohorts':
+                self.game_engine.population.enable_cohort_model()  # przedziały wieku x klasy społeczne
+            self.autosave_service.game_engine = self.game_engine
+            self.event_manager.rng = self.game_engine.random_streams.get('events')  # strumień nowej gry
+            self.start_history()
             self.map_canvas.city_map = self.game_engine.city_map
             self.map_canvas.draw_map()
             
@@ -326,9 +376,9 @@ class MainWindow(QMainWindow):
                 # Użyj oczyszczonej nazwy
                 clean_filename = validation_result.cleaned_data
                 
-                # Add .json extension if not present
-                if not clean_filename.endswith('.json'):
-                    clean_filename += '.json'
+                # Add save extension if not present
+                if not clean_filename.endswith(SAVE_EXTENSION):
+                    clean_filename += SAVE_EXTENSION
                 
                 # Sprawdzenie czy plik już istnieje
                 filepath = os.path.join(saves_dir, clean_filename)
@@ -347,13 +397,10 @@ class MainWindow(QMainWindow):
                     warning_msg = "Ostrzeżenia:\n" + "\n".join(validation_result.warnings)
                     QMessageBox.information(self, 'Ostrzeżenia', warning_msg)
                 
-                # Zapisz grę z obsługą błędów
+                # Zapisz grę w tle - wynik pokaże check_autosave()
                 try:
-                    success = self.game_engine.save_game(filepath)
-                    if success:
-                        QMessageBox.information(self, 'Zapisz Grę', f'Gra zapisana jako {clean_filename}')
-                    else:
-                        QMessageBox.warning(self, 'Zapisz Grę', 'Nie udało się zapisać gry - sprawdź logi aplikacji')
+                    self.autosave_service.save(filepath)
+                    self.status_bar.showMessage(f'💾 Zapisywanie gry: {clean_filename}...')
                 except Exception as save_error:
                     import traceback
                     error_details = str(save_error)
@@ -397,14 +444,14 @@ class MainWindow(QMainWindow):
             self, 
             'Wybierz zapis gry', 
             saves_dir, 
-            'Pliki zapisów (*.json);;Wszystkie pliki (*)'
+            'Pliki zapisów (*.sav *.json);;Wszystkie pliki (*)'
         )
         
         if filepath:
             validator = get_validation_system()
             
-            # Walidacja pliku JSON przed wczytaniem
-            file_validation = validator.validate_json_file(filepath)
+            # Walidacja pliku zapisu przed wczytaniem (format 2.0 lub stary JSON)
+            file_validation = validator.validate_save_file(filepath)
             
             if not file_validation.is_valid:
                 error_msg = "Błędy w pliku zapisu:\n" + "\n".join(file_validation.errors)
@@ -449,8 +496,8 @@ class MainWindow(QMainWindow):
                 
                 # Update economy panel
                 buildings = self.game_engine.get_all_buildings()
-                income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-                expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
+                income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
+                expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
                 tax_rates = self.game_engine.economy.tax_rates
                 self.build_panel.update_economy_panel(income, expenses, tax_rates)
                 
@@ -483,15 +530,8 @@ class MainWindow(QMainWindow):
                 self.objectives_panel.objective_completed.connect(self.on_objective_completed)
                 
                 # Clear reports history for loaded game
-                self.reports_panel.history_data = {
-                    'turns': [],
-                    'population': [],
-                    'budget': [],
-                    'satisfaction': [],
-                    'unemployment': [],
-                    'income': [],
-                    'expenses': []
-                }
+                self.reports_panel.reset_history()
+                self.start_history('Wczytana gra')
                 self.reports_panel.update_charts()
                 
                 self.update_status_bar()
@@ -560,8 +600,8 @@ class MainWindow(QMainWindow):
             
             # --- Nowy kod: aktualizacja panelu ekonomii ---
             buildings = self.game_engine.get_all_buildings()
-            income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-            expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
+            income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
+            expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
             tax_rates = self.game_engine.economy.tax_rates
             self.build_panel.update_economy_panel(income, expenses, tax_rates)
         
@@ -585,7 +625,10 @@ class MainWindow(QMainWindow):
                 return
             
             # Update game engine (handles economy, population, etc.)
-            self.game_engine.update_turn()
+            # TurnContext - budynki, dochody, wydatki i demografia policzone raz na turę
+            context = self.game_engine.update_turn()
+            if context is None:  # gra wstrzymana - brak nowej tury do pokazania i zapisania
+                return
             
             # Update diplomacy system if exists
             if hasattr(self.game_engine, 'diplomacy_manager'):
@@ -628,19 +671,20 @@ class MainWindow(QMainWindow):
                                 self.game_engine.add_alert(f"🏳️ Wojna z {city.name} zakończona - zbyt długo trwała", priority="info")
                             else:
                                 self.game_engine.add_alert(f"🏳️ Wojna z {city.name} zakończona - wyczerpanie wojenne", priority="info")
+                context.refresh_budget(self.game_engine)  # koszty wojenne zmieniły budżet
             
             # Update UI elements
             self.update_status_bar()
             
             # Update build panel resources
             self.build_panel.update_resources(self.game_engine.economy)
-            self.map_canvas.resources = self.game_engine.economy.get_resource_amount('money')
+            self.map_canvas.resources = context.money
             
             # Update building availability
             self.build_panel.refresh_building_availability()
             
             # Update city level information
-            current_pop = self.game_engine.population.get_total_population()
+            current_pop = context.population
             next_level_pop = self.game_engine.get_next_level_requirement()
             self.build_panel.update_city_level_info(
                 self.game_engine.city_level,
@@ -649,40 +693,25 @@ class MainWindow(QMainWindow):
             )
             
             # Update economy panel
-            buildings = self.game_engine.get_all_buildings()
-            income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-            expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
             tax_rates = self.game_engine.economy.tax_rates
-            self.build_panel.update_economy_panel(income, expenses, tax_rates)
+            self.build_panel.update_economy_panel(context.income, context.expenses, tax_rates)
             
             # Update objectives system
-            game_state = {
-                'turn': self.game_engine.turn,
-                'population': self.game_engine.population.get_total_population(),
-                'money': self.game_engine.economy.get_resource_amount('money'),
-                'satisfaction': self.game_engine.population.get_average_satisfaction(),
-                'buildings': self.game_engine.get_all_buildings(),
-                'unlocked_technologies': [tech.name for tech in self.technology_tree.technologies.values() if tech.is_researched]
-            }
+            game_state = context.game_state()
+            game_state['unlocked_technologies'] = [
+                tech.name for tech in self.technology_tree.technologies.values() if tech.is_researched
+            ]
             self.objectives_panel.update_objectives(game_state)
             
-            # Update reports with proper data including loan payments
-            buildings = self.game_engine.get_all_buildings()
-            income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-            expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
-            
-            # Include loan payments in expenses
-            monthly_payments = sum(loan.monthly_payment for loan in self.game_engine.finance_manager.active_loans)
-            actual_expenses = expenses + monthly_payments
-            
+            # Update reports with proper data including loan payments (context.total_expenses)
             self.reports_panel.add_data_point(
-                turn=self.game_engine.turn,
-                population=self.game_engine.population.get_total_population(),
-                budget=self.game_engine.economy.get_resource_amount('money'),
-                satisfaction=self.game_engine.population.get_average_satisfaction(),
-                unemployment=self.game_engine.population.get_unemployment_rate(),
-                income=income,
-                expenses=actual_expenses
+                turn=context.turn,
+                population=context.population,
+                budget=context.money,
+                satisfaction=context.satisfaction,
+                unemployment=context.unemployment_rate,
+                income=context.income,
+                expenses=context.total_expenses
             )
             self.reports_panel.update_charts()
             
@@ -705,29 +734,30 @@ class MainWindow(QMainWindow):
                     
                     # Show event result
                     self.game_engine.add_alert(f"Wydarzenie: {event.title} - Wybrano: {selected_option}")
+                    context.refresh(self.game_engine)  # skutki wydarzenia zmieniły populację i budżet
             
-            # Save game state - naprawiam odwołania
-            self.database.save_game_state(
-                self.game_engine.population.get_total_population(),
-                self.game_engine.economy.get_resource_amount('money'),
-                int(self.game_engine.population.get_average_satisfaction()),
-                str(self.game_engine.economy.get_resource_amount('money'))  # Konwertuję na string
-            )
-
-            # Save history - naprawiam odwołania
-            self.database.save_history(
-                self.game_engine.turn,
-                self.game_engine.population.get_total_population(),
-                self.game_engine.economy.get_resource_amount('money'),
-                int(self.game_engine.population.get_average_satisfaction()),
-                str(self.game_engine.economy.get_resource_amount('money'))  # Konwertuję na string
-            )
+            # Zapisy tury buforowane i zatwierdzane jedną transakcją (zamiast commit po każdym)
+            with self.database.turn():
+                # Save game state - naprawiam odwołania
+                self.database.save_game_state(
+                    context.population,
+                    context.money,
+                    int(context.satisfaction),
+                    str(context.money)  # Konwertuję na string
+                )
 
-            # Save statistics - naprawiam odwołania
-            self.database.save_statistics('population', self.game_engine.population.get_total_population())
-            self.database.save_statistics('money', self.game_engine.economy.get_resource_amount('money'))
-            self.database.save_statistics('satisfaction', int(self.game_engine.population.get_average_satisfaction()))
-            self.database.save_statistics('resources', self.game_engine.economy.get_resource_amount('money'))
+                # Szereg czasowy historii (zakresy i agregacja po stronie bazy danych) -
+                # zastępuje dawne tabele history i statistics, które rosły z każdą turą
+                self.database.record_turn(
+                    self.history_save_id,
+                    context.turn,
+                    population=context.population,
+                    money=context.money,
+                    satisfaction=context.satisfaction,
+                    unemployment=context.unemployment_rate,
+                    income=context.income,
+                    expenses=context.total_expenses
+                )
 
             # Check for bankruptcy and end game if needed
             if self.game_engine.economy.is_bankrupt(game_engine=self.game_engine):
@@ -741,7 +771,7 @@ class MainWindow(QMainWindow):
             update_time = time.time() - start_time
             game_logger.log_performance('game_update', update_time, {
                 'population': current_pop,
-                'buildings': len(self.game_engine.get_all_buildings())
+                'buildings': len(context.buildings)
             })
             
         except Exception as e:
@@ -791,6 +821,36 @@ class MainWindow(QMainWindow):
             game_logger.log_error(e, f'apply_event_effect_{effect_type}')
             return False
     
+    def check_autosave(self):
+        """Uruchamia autozapis gdy minął interwał i pokazuje wyniki zapisów w tle"""
+        self.autosave_service.tick()
+        
+        for result in self.autosave_service.poll_results():
+            filename = os.path.basename(result.filepath)
+            if result.success:
+                message = f'Autozapis: {filename}' if result.autosave else f'Gra zapisana jako {filename}'
+                self.status_bar.showMessage(f'💾 {message}', 5000)
+            elif result.autosave:
+                game_logger.get_logger('autosave').error(f'Autosave failed: {result.error}')
+                self.status_bar.showMessage(f'❌ Błąd autozapisu: {result.error}', 10000)
+            else:
+                QMessageBox.warning(self, 'Zapisz Grę', f'Nie udało się zapisać gry:\n{result.error}')
+    
+    def start_history(self, name='Nowa gra'):
+        """Rozpoczyna nowy szereg czasowy historii w bazie danych i podłącza go do raportów"""
+        self.history_save_id = self.database.start_save(name)
+        self.reports_panel.set_history_source(self.database, self.history_save_id)
+    
+    def closeEvent(self, event):
+        """Przy zamykaniu okna dokończ zapisy wykonywane w tle i zapisz cache obrazków"""
+        self.autosave_service.shutdown()
+        try:
+            self.database.close()
+        except sqlite3.Error as e:  # błąd ostatnich zapisów tury w tle
+            game_logger.get_logger('database').error(f'Database write failed: {e}')
+        self.sprite_cache.persist()
+        super().closeEvent(event)
+    
     def update_status_bar(self):
         """Update status bar with current city information"""
         summary = self.game_engine.get_city_summary()
@@ -846,8 +906,8 @@ class MainWindow(QMainWindow):
         
         # Natychmiast odśwież panel ekonomii
         buildings = self.game_engine.get_all_buildings()
-        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
+        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
+        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
         tax_rates = self.game_engine.economy.tax_rates
         self.build_panel.update_economy_panel(income, expenses, tax_rates)
         self.update_status_bar()
@@ -861,8 +921,8 @@ class MainWindow(QMainWindow):
             self.update_status_bar()
             # Przelicz koszty i dochody po usunięciu budynku
             buildings = self.game_engine.get_all_buildings()
-            income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-            expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
+            income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
+            expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
             tax_rates = self.game_engine.economy.tax_rates
             self.build_panel.update_economy_panel(income, expenses, tax_rates)
             self.map_canvas.draw_map()
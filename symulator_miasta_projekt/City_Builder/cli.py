@@ -33,6 +33,7 @@ from core.config_manager import get_config_manager
 from core.logger import setup_logging, get_game_logger
 from core.functional_utils import validate_game_data
 from core.game_engine import GameEngine
+from core.save_format import SAVE_EXTENSION, SAVE_EXTENSIONS
 from core.city_map import CityMap
 from core.tile import Building, BuildingType, TerrainType
 from core.population import PopulationManager
@@ -59,6 +60,7 @@ class CityBuilderCLI:
             'save': self.save_game,
             'load': self.load_game,
             'next': self.next_turn,
+            'simulate': self.simulate_turns,
             'map': self.show_map,
             'buildings': self.list_buildings,
             'population': self.show_population,
@@ -135,6 +137,12 @@ class CityBuilderCLI:
             default=300,
             help='Interwał automatycznego zapisu w sekundach (domyślnie: 300)'
         )
+        game_group.add_argument(
+            '--seed', 
+            type=int, 
+            metavar='N',
+            help='Ziarno gry - ta sama wartość daje powtarzalną rozgrywkę (domyślnie: losowe)'
+        )
         
         # Ustawienia interfejsu
         ui_group = parser.add_argument_group('Ustawienia interfejsu')
@@ -238,6 +246,32 @@ class CityBuilderCLI:
             metavar='DAYS',
             help='Usuń logi starsze niż podana liczba dni'
         )
+        tools_group.add_argument(
+            '--balance', 
+            type=str, 
+            metavar='FILE',
+            help='Uruchom symulacje Monte Carlo scenariuszy i zapisz wyniki do pliku .npz'
+        )
+        tools_group.add_argument(
+            '--balance-runs', 
+            type=int, 
+            metavar='N',
+            default=100,
+            help='Liczba przebiegów na scenariusz dla --balance (domyślnie: 100)'
+        )
+        tools_group.add_argument(
+            '--balance-turns', 
+            type=int, 
+            metavar='N',
+            default=200,
+            help='Limit tur pojedynczego przebiegu dla --balance (domyślnie: 200)'
+        )
+        tools_group.add_argument(
+            '--workers', 
+            type=int, 
+            metavar='N',
+            help='Liczba procesów dla --balance (domyślnie: liczba rdzeni)'
+        )
         
         # Informacje
         info_group = parser.add_argument_group('Informacje')
@@ -293,8 +327,8 @@ class CityBuilderCLI:
             save_path = Path(args.load_game)
             if not save_path.exists():
                 errors['load_game'] = [f'Plik zapisu nie istnieje: {args.load_game}']
-            elif not save_path.suffix.lower() == '.json':
-                errors['load_game'] = ['Plik zapisu musi mieć rozszerzenie .json']
+            elif save_path.suffix.lower() not in SAVE_EXTENSIONS:
+                errors['load_game'] = ['Plik zapisu musi mieć rozszerzenie .sav lub .json']
         
         # Walidacja pliku konfiguracji
         if hasattr(args, 'import_config') and args.import_config:
@@ -332,6 +366,10 @@ class CityBuilderCLI:
             True jeśli zastosowano pomyślnie
         """
         try:
+            # Ziarno gry - teren mapy powstaje w konstruktorze, więc potrzebny jest nowy silnik
+            if hasattr(args, 'seed') and args.seed is not None:
+                self.game_engine = GameEngine(seed=args.seed)
+            
             # Ustawienia gry
             if hasattr(args, 'difficulty') and args.difficulty:
                 self.game_engine.difficulty = args.difficulty
@@ -436,6 +474,9 @@ class CityBuilderCLI:
             elif hasattr(args, 'system_info') and args.system_info:
                 return self._show_system_info()
             
+            elif hasattr(args, 'balance') and args.balance:
+                return self._run_balance(args)
+            
             else:
                 # Uruchom grę
                 return self._start_game(args)
@@ -527,7 +568,7 @@ class CityBuilderCLI:
                 print("Brak katalogu z zapisami")
                 return 0
             
-            save_files = list(saves_dir.glob('*.json'))
+            save_files = [f for extension in SAVE_EXTENSIONS for f in saves_dir.glob(f'*{extension}')]
             if not save_files:
                 print("Brak zapisanych gier")
                 return 0
@@ -555,6 +596,30 @@ class CityBuilderCLI:
             print(f"Błąd czyszczenia logów: {e}")
             return 1
     
+    def _run_balance(self, args: argparse.Namespace) -> int:
+        """Uruchamia symulacje Monte Carlo wszystkich scenariuszy."""
+        try:
+            from core.scenario_runner import run_monte_carlo, summarize_results
+            
+            start_time = time.time()
+            results = run_monte_carlo(runs_per_scenario=args.balance_runs, max_turns=args.balance_turns,
+                                      base_seed=args.seed or 0, workers=args.workers,
+                                      output_path=args.balance)
+            elapsed = time.time() - start_time
+            
+            print(f"=== Symulacje scenariuszy ({len(results['seed'])} przebiegów, {elapsed:.1f}s) ===")
+            for scenario_id, stats in summarize_results(results).items():
+                turns = stats['turns_to_completion']
+                median = f"{turns['p50']:.0f}" if turns else "-"
+                print(f"{scenario_id:<30} ukończone {stats['completion_rate']:>6.1%}  "
+                      f"przegrane {stats['failure_rate']:>6.1%}  bankructwa {stats['bankruptcy_rate']:>6.1%}  "
+                      f"mediana tur {median}")
+            print(f"✅ Wyniki zapisane do {args.balance}")
+            return 0
+        except Exception as e:
+            print(f"Błąd symulacji scenariuszy: {e}")
+            return 1
+    
     def _show_system_info(self) -> int:
         """Pokazuje informacje o systemie."""
         try:
@@ -684,6 +749,7 @@ class CityBuilderCLI:
             'save <nazwa>': 'Zapisuje grę pod podaną nazwą',
             'load <nazwa>': 'Wczytuje zapisaną grę',
             'next': 'Przechodzi do następnej tury',
+            'simulate <tury>': 'Przewija grę o podaną liczbę tur (bez alertów)',
             'map': 'Wyświetla mapę miasta (ASCII)',
             'buildings': 'Lista dostępnych typów budynków',
             'population': 'Pokazuje statystyki populacji',
@@ -916,8 +982,8 @@ class CityBuilderCLI:
         
         money = self.game_engine.economy.get_resource_amount('money')
         buildings = self.game_engine.get_all_buildings()
-        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population)
-        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population)
+        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
+        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population, self.game_engine.city_map.ledger)
         
         print(f"💰 Budżet: ${money:,.2f}")
         print(f"📈 Miesięczne dochody: ${income:,.2f}")
@@ -972,8 +1038,8 @@ class CityBuilderCLI:
             return
         
         filename = args[0]
-        if not filename.endswith('.json'):
-            filename += '.json'
+        if not filename.endswith(SAVE_EXTENSION):
+            filename += SAVE_EXTENSION
         
         # Utwórz pełną ścieżkę
         import os
@@ -998,12 +1064,13 @@ class CityBuilderCLI:
             return
         
         filename = args[0]
-        if not filename.endswith('.json'):
-            filename += '.json'
         
-        # Utwórz pełną ścieżkę
+        # Utwórz pełną ścieżkę (bez rozszerzenia: najpierw .sav, potem stary .json)
         import os
         saves_dir = os.path.join(os.path.dirname(__file__), 'saves')
+        if not filename.endswith(SAVE_EXTENSIONS):
+            candidates = [filename + extension for extension in SAVE_EXTENSIONS]
+            filename = next((c for c in candidates if os.path.exists(os.path.join(saves_dir, c))), candidates[0])
         filepath = os.path.join(saves_dir, filename)
         
         if not os.path.exists(filepath):
@@ -1045,6 +1112,32 @@ class CityBuilderCLI:
             for alert in self.game_engine.alerts[-3:]:  # Pokaż 3 ostatnie
                 print(f"  • {alert}")
     
+    def simulate_turns(self, args: List[str]):
+        """
+        Przewija grę o wiele tur w trybie bezgłowym (GameEngine.simulate).
+        
+        Args:
+            args: [liczba_tur]
+        """
+        if len(args) != 1 or not args[0].isdigit():
+            print("❌ Użycie: simulate <liczba_tur>")
+            return
+        
+        n_turns = int(args[0])
+        old_turn = self.game_engine.turn
+        start_time = time.time()
+        # Przewijana jest gra gracza - osiągnięcia i oferty handlowe pozostają włączone
+        metrics = self.game_engine.simulate(n_turns, {'achievements': True})
+        elapsed = time.time() - start_time
+        
+        print(f"\n⏩ SYMULACJA: Tura {old_turn} → Tura {self.game_engine.turn} ({elapsed:.2f}s)")
+        print("-" * 40)
+        if len(metrics['turn']) == 0:
+            return
+        print(f"💰 Budżet: ${metrics['money'][-1]:,.0f} (min ${metrics['money'].min():,.0f})")
+        print(f"👥 Populacja: {int(metrics['population'][-1]):,} (max {int(metrics['population'].max()):,})")
+        print(f"😊 Zadowolenie: {metrics['satisfaction'][-1]:.1f}%")
+    
     def quit_game(self, args: List[str]):
         """Kończy grę."""
         print("\n👋 Dziękujemy za grę w City Builder!")
@@ -8,12 +8,28 @@ Implementuje osiągnięcia za realizację określonych celów rozwojowych:
 - Ukryte osiągnięcia
 - System powiadomień
 - Statystyki gracza
+
+Osiągnięcia deklarują, od których kluczy statystyk zależą (stat / depends_on),
+więc w każdej turze sprawdzane są tylko te, których dane wejściowe się
+zmieniły. Osiągnięcia progowe (np. populacja >= 1000) trzymane są w kolejności
+progów - testowany jest tylko najbliższy nieosiągnięty próg danej statystyki.
 """
 from enum import Enum
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
 from datetime import datetime
+from copy import copy
 import json
+import logging
+import operator
+
+# Porównania dostępne dla osiągnięć progowych (statystyka <porównanie> próg)
+COMPARISONS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+}
 
 class AchievementCategory(Enum):
     """
@@ -67,14 +83,38 @@ class Achievement:
     condition_function: Optional[Callable] = None  # funkcja sprawdzająca warunek
     condition_data: Dict[str, Any] = None          # dodatkowe dane dla warunku
     
+    # Osiągnięcie progowe: stats[stat] <comparison> threshold
+    stat: Optional[str] = None                     # klucz statystyki progu
+    threshold: Optional[float] = None              # wartość progu
+    comparison: str = '>='                         # porównanie z COMPARISONS
+    depends_on: Optional[Tuple[str, ...]] = None   # klucze statystyk warunku (None = sprawdzaj co turę)
+    
     def __post_init__(self):
         """
         Metoda wywoływana po inicjalizacji.
         
-        Ustawia domyślne wartości jeśli nie zostały podane.
+        Ustawia domyślne wartości jeśli nie zostały podane. Dla osiągnięć
+        progowych tworzy funkcję warunku i ustawia zależność od statystyki.
         """
         if self.condition_data is None:
             self.condition_data = {}
+        if self.stat is not None:
+            if self.comparison not in COMPARISONS:
+                raise ValueError(f"Nieznane porównanie osiągnięcia {self.id}: {self.comparison}")
+            self.depends_on = (self.stat,)
+            if self.condition_function is None:
+                self.condition_function = self._check_threshold
+        elif self.depends_on is not None:
+            self.depends_on = tuple(self.depends_on)
+    
+    @property
+    def is_threshold(self) -> bool:
+        """Czy osiągnięcie jest progowe (indeksowane w kolejności progów)."""
+        return self.stat is not None and self.condition_function == self._check_threshold
+    
+    def _check_threshold(self, stats: Dict[str, Any]) -> bool:
+        """Warunek osiągnięcia progowego - brak statystyki oznacza niespełniony próg."""
+        return self.stat in stats and COMPARISONS[self.comparison](stats[self.stat], self.threshold)
 
 class AchievementManager:
     """
@@ -98,6 +138,13 @@ class AchievementManager:
         self.unlocked_achievements = []     # lista odblokowanych osiągnięć
         self.total_points = 0              # łączna liczba zdobytych punktów
         self.notification_queue = []        # kolejka powiadomień o nowych osiągnięciach
+        self.logger = logging.getLogger('achievements')
+        
+        # Indeks zależności: klucz statystyki -> osiągnięcia do sprawdzenia po jego zmianie
+        self._thresholds: Dict[str, Dict[str, List[Achievement]]] = {}  # stat -> porównanie -> zablokowane progi
+        self._dependents: Dict[str, List[Achievement]] = {}  # stat -> osiągnięcia z własnym warunkiem
+        self._unindexed: List[Achievement] = []   # bez depends_on - sprawdzane w każdej turze
+        self._last_stats: Dict[str, Any] = {}     # wartości statystyk z poprzedniego sprawdzenia
         
         self._initialize_achievements()     # utwórz wszystkie osiągnięcia
     
@@ -119,7 +166,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.COMMON,
                 "points": 10,
                 "icon": "👤",
-                "condition": lambda stats: stats.get('population', 0) >= 1
+                "stat": "population",
+                "threshold": 1
             },
             {
                 "id": "small_town",
@@ -129,7 +177,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.COMMON,
                 "points": 25,
                 "icon": "🏘️",
-                "condition": lambda stats: stats.get('population', 0) >= 100
+                "stat": "population",
+                "threshold": 100
             },
             {
                 "id": "growing_city",
@@ -139,7 +188,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 50,
                 "icon": "🏙️",
-                "condition": lambda stats: stats.get('population', 0) >= 500
+                "stat": "population",
+                "threshold": 500
             },
             {
                 "id": "big_city",
@@ -149,7 +199,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 75,
                 "icon": "🌆",
-                "condition": lambda stats: stats.get('population', 0) >= 1000
+                "stat": "population",
+                "threshold": 1000
             },
             {
                 "id": "metropolis",
@@ -159,7 +210,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 150,
                 "icon": "🌃",
-                "condition": lambda stats: stats.get('population', 0) >= 5000
+                "stat": "population",
+                "threshold": 5000
             },
             {
                 "id": "megacity",
@@ -169,7 +221,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.EPIC,
                 "points": 300,
                 "icon": "🏙️",
-                "condition": lambda stats: stats.get('population', 0) >= 10000
+                "stat": "population",
+                "threshold": 10000
             },
             
             # === KATEGORIA: EKONOMIA ===
@@ -181,7 +234,9 @@ class AchievementManager:
                 "rarity": AchievementRarity.COMMON,
                 "points": 10,
                 "icon": "💰",
-                "condition": lambda stats: stats.get('money', 0) > 0
+                "stat": "money",
+                "threshold": 0,
+                "comparison": ">"
             },
             {
                 "id": "wealthy",
@@ -191,7 +246,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 50,
                 "icon": "💵",
-                "condition": lambda stats: stats.get('money', 0) >= 10000
+                "stat": "money",
+                "threshold": 10000
             },
             {
                 "id": "millionaire",
@@ -201,7 +257,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 200,
                 "icon": "💎",
-                "condition": lambda stats: stats.get('money', 0) >= 1000000
+                "stat": "money",
+                "threshold": 1000000
             },
             {
                 "id": "tax_master",
@@ -211,7 +268,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 75,
                 "icon": "🏛️",
-                "condition": lambda stats: stats.get('total_tax_collected', 0) >= 100000
+                "stat": "total_tax_collected",
+                "threshold": 100000
             },
             {
                 "id": "zero_unemployment",
@@ -221,7 +279,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 150,
                 "icon": "💼",
-                "condition": lambda stats: stats.get('unemployment_streak', 0) >= 10
+                "stat": "unemployment_streak",
+                "threshold": 10
             },
             
             # === KATEGORIA: BUDOWNICTWO ===
@@ -233,7 +292,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.COMMON,
                 "points": 10,
                 "icon": "🏠",
-                "condition": lambda stats: stats.get('buildings_built', 0) >= 1
+                "stat": "buildings_built",
+                "threshold": 1
             },
             {
                 "id": "builder",
@@ -243,7 +303,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 50,
                 "icon": "🏗️",
-                "condition": lambda stats: stats.get('buildings_built', 0) >= 50
+                "stat": "buildings_built",
+                "threshold": 50
             },
             {
                 "id": "architect",
@@ -253,7 +314,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 100,
                 "icon": "📐",
-                "condition": lambda stats: stats.get('buildings_built', 0) >= 200
+                "stat": "buildings_built",
+                "threshold": 200
             },
             {
                 "id": "master_builder",
@@ -263,7 +325,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.EPIC,
                 "points": 200,
                 "icon": "👷",
-                "condition": lambda stats: len(stats.get('building_types_built', [])) >= 20
+                "condition": lambda stats: len(stats.get('building_types_built', [])) >= 20,
+                "depends_on": ("building_types_built",)
             },
             {
                 "id": "city_planner",
@@ -273,7 +336,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 150,
                 "icon": "🗺️",
-                "condition": lambda stats: stats.get('road_efficiency', 0) >= 0.9
+                "stat": "road_efficiency",
+                "threshold": 0.9
             },
             
             # === KATEGORIA: TECHNOLOGIA ===
@@ -285,7 +349,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.COMMON,
                 "points": 25,
                 "icon": "🔬",
-                "condition": lambda stats: stats.get('technologies_researched', 0) >= 1
+                "stat": "technologies_researched",
+                "threshold": 1
             },
             {
                 "id": "tech_enthusiast",
@@ -295,7 +360,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 75,
                 "icon": "⚗️",
-                "condition": lambda stats: stats.get('technologies_researched', 0) >= 10
+                "stat": "technologies_researched",
+                "threshold": 10
             },
             {
                 "id": "tech_master",
@@ -305,7 +371,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.LEGENDARY,
                 "points": 500,
                 "icon": "🚀",
-                "condition": lambda stats: stats.get('technologies_researched', 0) >= 25
+                "stat": "technologies_researched",
+                "threshold": 25
             },
             
             # === KATEGORIA: ŚRODOWISKO ===
@@ -317,7 +384,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 75,
                 "icon": "🌳",
-                "condition": lambda stats: stats.get('parks_built', 0) >= 20
+                "stat": "parks_built",
+                "threshold": 20
             },
             {
                 "id": "eco_warrior",
@@ -327,7 +395,9 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 150,
                 "icon": "♻️",
-                "condition": lambda stats: stats.get('pollution_level', 100) <= 0
+                "stat": "pollution_level",
+                "threshold": 0,
+                "comparison": "<="
             },
             {
                 "id": "renewable_energy",
@@ -337,7 +407,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.EPIC,
                 "points": 250,
                 "icon": "⚡",
-                "condition": lambda stats: stats.get('renewable_energy_percent', 0) >= 100
+                "stat": "renewable_energy_percent",
+                "threshold": 100
             },
             
             # === KATEGORIA: HANDEL ===
@@ -349,7 +420,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.COMMON,
                 "points": 25,
                 "icon": "🤝",
-                "condition": lambda stats: stats.get('trades_completed', 0) >= 1
+                "stat": "trades_completed",
+                "threshold": 1
             },
             {
                 "id": "trade_baron",
@@ -359,7 +431,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 150,
                 "icon": "💼",
-                "condition": lambda stats: stats.get('trades_completed', 0) >= 100
+                "stat": "trades_completed",
+                "threshold": 100
             },
             {
                 "id": "diplomatic_relations",
@@ -369,7 +442,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.EPIC,
                 "points": 300,
                 "icon": "🤝",
-                "condition": lambda stats: stats.get('allied_cities', 0) >= 6
+                "stat": "allied_cities",
+                "threshold": 6
             },
             
             # === KATEGORIA: SPECJALNE ===
@@ -381,7 +455,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.RARE,
                 "points": 200,
                 "icon": "🌪️",
-                "condition": lambda stats: stats.get('disasters_survived', 0) >= 10
+                "stat": "disasters_survived",
+                "threshold": 10
             },
             {
                 "id": "crisis_manager",
@@ -391,7 +466,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 100,
                 "icon": "🚨",
-                "condition": lambda stats: stats.get('crisis_events_resolved', 0) >= 50
+                "stat": "crisis_events_resolved",
+                "threshold": 50
             },
             {
                 "id": "perfectionist",
@@ -401,7 +477,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.LEGENDARY,
                 "points": 500,
                 "icon": "⭐",
-                "condition": lambda stats: stats.get('perfect_happiness_streak', 0) >= 50
+                "stat": "perfect_happiness_streak",
+                "threshold": 50
             },
             
             # === KATEGORIA: KAMIENIE MILOWE ===
@@ -413,7 +490,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.UNCOMMON,
                 "points": 100,
                 "icon": "📅",
-                "condition": lambda stats: stats.get('turns_played', 0) >= 100
+                "stat": "turns_played",
+                "threshold": 100
             },
             {
                 "id": "millennium",
@@ -423,7 +501,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.LEGENDARY,
                 "points": 1000,
                 "icon": "🏆",
-                "condition": lambda stats: stats.get('turns_played', 0) >= 1000
+                "stat": "turns_played",
+                "threshold": 1000
             },
             {
                 "id": "achievement_hunter",
@@ -433,7 +512,8 @@ class AchievementManager:
                 "rarity": AchievementRarity.EPIC,
                 "points": 250,
                 "icon": "🎯",
-                "condition": lambda stats: stats.get('achievements_unlocked_percent', 0) >= 50
+                "stat": "achievements_unlocked_percent",
+                "threshold": 50
             },
             {
                 "id": "completionist",
@@ -444,7 +524,8 @@ class AchievementManager:
                 "points": 1000,
                 "icon": "👑",
                 "hidden": True,
-                "condition": lambda stats: stats.get('achievements_unlocked_percent', 0) >= 100
+                "stat": "achievements_unlocked_percent",
+                "threshold": 100
             }
         ]
         
@@ -459,12 +540,64 @@ class AchievementManager:
                 points=ach_data["points"],
                 icon=ach_data.get("icon", "🏆"),
                 hidden=ach_data.get("hidden", False),
-                condition_function=ach_data.get("condition")
+                condition_function=ach_data.get("condition"),
+                stat=ach_data.get("stat"),
+                threshold=ach_data.get("threshold"),
+                comparison=ach_data.get("comparison", ">="),
+                depends_on=ach_data.get("depends_on")
             )
-            self.achievements[achievement.id] = achievement
+            self.add_achievement(achievement)
+    
+    def add_achievement(self, achievement: Achievement):
+        """
+        Rejestruje osiągnięcie (także dodane przez mody) i dodaje je do indeksu zależności.
+        
+        Osiągnięcie bez stat i depends_on sprawdzane jest w każdej turze.
+        """
+        self.achievements[achievement.id] = achievement
+        if not achievement.is_unlocked:
+            self._index_achievement(achievement)
+    
+    def _index_achievement(self, achievement: Achievement):
+        if achievement.condition_function is None:
+            return
+        if achievement.is_threshold:
+            pending = self._thresholds.setdefault(achievement.stat, {}).setdefault(achievement.comparison, [])
+            pending.append(achievement)
+            # Najbliższy próg na końcu listy: malejąco dla >= i >, rosnąco dla <= i <
+            pending.sort(key=lambda ach: ach.threshold, reverse=achievement.comparison in ('>=', '>'))
+        elif achievement.depends_on is None:
+            self._unindexed.append(achievement)
+        else:
+            for key in achievement.depends_on:
+                self._dependents.setdefault(key, []).append(achievement)
+    
+    def _rebuild_index(self):
+        """Odbudowuje indeks zablokowanych osiągnięć (np. po wczytaniu stanu)."""
+        self._thresholds.clear()
+        self._dependents.clear()
+        self._unindexed.clear()
+        self._last_stats.clear()  # pierwsze sprawdzenie po wczytaniu obejmie wszystkie statystyki
+        for achievement in self.achievements.values():
+            if not achievement.is_unlocked:
+                self._index_achievement(achievement)
+    
+    def _changed_stats(self, game_stats: Dict[str, Any]) -> List[str]:
+        """Klucze statystyk zmienionych od poprzedniego sprawdzenia (kopie zbiorów i list do porównań)."""
+        changed = []
+        for key, value in game_stats.items():
+            if key not in self._last_stats or self._last_stats[key] != value:
+                changed.append(key)
+                self._last_stats[key] = copy(value) if isinstance(value, (set, list, dict)) else value
+        return changed
     
     def check_achievements(self, game_stats: Dict[str, Any]) -> List[Achievement]:
-        """Sprawdza i odblokowuje osiągnięcia na podstawie statystyk gry"""
+        """
+        Sprawdza i odblokowuje osiągnięcia na podstawie statystyk gry.
+        
+        Sprawdzane są tylko osiągnięcia zależne od statystyk zmienionych od
+        poprzedniego wywołania (oraz osiągnięcia bez zadeklarowanych zależności).
+        """
         newly_unlocked = []
         
         # Dodaj procent odblokowanych osiągnięć do statystyk
@@ -472,14 +605,39 @@ class AchievementManager:
         unlocked_count = len(self.unlocked_achievements)
         game_stats['achievements_unlocked_percent'] = (unlocked_count / total_achievements) * 100 if total_achievements > 0 else 0
         
-        for achievement in self.achievements.values():
-            if not achievement.is_unlocked and achievement.condition_function:
+        changed = self._changed_stats(game_stats)
+        candidates = list(self._unindexed)
+        for key in changed:
+            # Osiągnięcia progowe - tylko najbliższy próg, kolejne dopiero gdy poprzedni spełniony
+            for comparison, pending in self._thresholds.get(key, {}).items():
+                compare = COMPARISONS[comparison]
                 try:
-                    if achievement.condition_function(game_stats):
-                        self._unlock_achievement(achievement)
-                        newly_unlocked.append(achievement)
-                except Exception as e:
-                    print(f"Błąd sprawdzania osiągnięcia {achievement.id}: {e}")
+                    while pending and (pending[-1].is_unlocked or compare(game_stats[key], pending[-1].threshold)):
+                        achievement = pending.pop()
+                        if not achievement.is_unlocked:
+                            self._unlock_achievement(achievement)
+                            newly_unlocked.append(achievement)
+                except TypeError as e:
+                    self.logger.warning(f"Błąd sprawdzania progu statystyki {key}: {e}")
+            candidates.extend(self._dependents.get(key, ()))
+        
+        checked = set()
+        for achievement in candidates:
+            if achievement.is_unlocked or achievement.id in checked:
+                continue
+            checked.add(achievement.id)
+            try:
+                if achievement.condition_function(game_stats):
+                    self._unlock_achievement(achievement)
+                    newly_unlocked.append(achievement)
+            except Exception as e:
+                self.logger.warning(f"Błąd sprawdzania osiągnięcia {achievement.id}: {e}")
+        
+        # Odblokowane osiągnięcia z własnym warunkiem nie są już potrzebne w indeksie
+        if any(not ach.is_threshold for ach in newly_unlocked):
+            self._unindexed = [ach for ach in self._unindexed if not ach.is_unlocked]
+            for key, dependents in self._dependents.items():
+                self._dependents[key] = [ach for ach in dependents if not ach.is_unlocked]
         
         return newly_unlocked
     
@@ -598,4 +756,6 @@ class AchievementManager:
                     try:
                         achievement.unlock_date = datetime.fromisoformat(unlock_date_str)
                     except ValueError:
-                        achievement.unlock_date = None 
\ No newline at end of file
+                        achievement.unlock_date = None
+        
+        self._rebuild_index()
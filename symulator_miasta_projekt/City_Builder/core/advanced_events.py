@@ -9,9 +9,11 @@ Każde wydarzenie ma swoje warunki wystąpienia, wybory gracza i konsekwencje.
 # === IMPORTY POTRZEBNE DLA SYSTEMU WYDARZEŃ ===
 from enum import Enum                                    # Do tworzenia wyliczeń (kategorie, nasilenie)
 from dataclasses import dataclass                        # Do prostego tworzenia klas danych
-from typing import Dict, List, Optional, Callable        # Dla typowania - poprawia czytelność kodu
+from typing import Dict, List, Optional, Callable, Tuple  # Dla typowania - poprawia czytelność kodu
+from collections import OrderedDict                      # Cache prawdopodobieństw (LRU)
 import random                                            # Do losowania wydarzeń i wyborów
 import math                                              # Do obliczeń matematycznych (prawdopodobieństwa)
+import numpy as np                                       # Wektorowe prawdopodobieństwa wszystkich wydarzeń
 
 class EventCategory(Enum):
     """
@@ -173,6 +175,156 @@ class GameEvent:
         # Wszystkie warunki spełnione - wydarzenie może wystąpić
         return True
 
+# === STAŁE MODYFIKATORÓW PRAWDOPODOBIEŃSTWA ===
+POPULATION_SCALED_CATEGORIES = (EventCategory.CRIME, EventCategory.SOCIAL, EventCategory.ENVIRONMENTAL)
+POVERTY_SCALED_CATEGORIES = (EventCategory.CRIME, EventCategory.HEALTH)
+POPULATION_PER_MODIFIER = 5000      # 5000 mieszkańców = 1x (dla kategorii zależnych od populacji)
+MAX_POPULATION_MODIFIER = 2.0       # maksymalny modyfikator populacji
+DISSATISFACTION_LEVEL = 50          # poniżej tego zadowolenia rośnie szansa wydarzeń społecznych
+POVERTY_MONEY = 5000                # poniżej tej kwoty rośnie szansa przestępczości i chorób
+POVERTY_MODIFIER = 1.5
+
+class EventTable:
+    """
+    Tablica wszystkich wydarzeń w układzie kolumnowym (tablice NumPy).
+    
+    Zamiast wywoływać can_occur() i calculate_event_probability() dla każdego
+    wydarzenia osobno, prawdopodobieństwa wszystkich wydarzeń liczone są jedną
+    operacją wektorową ze stanu gry. Cachowane są możliwe wydarzenia (warunki
+    can_occur) według przedziałów stanu wyznaczonych przez progi warunków -
+    dopóki populacja, budżet i zadowolenie nie przekroczą żadnego progu,
+    warunki nie są sprawdzane od nowa. Modyfikatory populacji, niezadowolenia
+    i biedy są tanie i nakładane przy każdym wywołaniu tylko na możliwe wydarzenia.
+    """
+    
+    def __init__(self, events: List[GameEvent], cache_size: int = 128):
+        self.events = list(events)
+        self.ids = [event.id for event in self.events]
+        self.cache_size = cache_size
+        self.hits = 0                                        # trafienia cache (statystyka)
+        self._cache: "OrderedDict[tuple, Tuple[np.ndarray, ...]]" = OrderedDict()
+        
+        def column(attribute):
+            return np.array([getattr(event, attribute) for event in self.events], dtype=np.float64)
+        
+        self.base_probability = column('base_probability')
+        self.min_population = column('min_population')
+        self.max_population = column('max_population')
+        self.min_money = column('min_money')
+        self.min_satisfaction = column('min_satisfaction')
+        self.max_satisfaction = column('max_satisfaction')
+        
+        # Maski kategorii dla modyfikatorów
+        categories = [event.category for event in self.events]
+        self.population_scaled = np.array([c in POPULATION_SCALED_CATEGORIES for c in categories], dtype=bool)
+        self.dissatisfaction_scaled = np.array([c == EventCategory.SOCIAL for c in categories], dtype=bool)
+        self.poverty_scaled = np.array([c in POVERTY_SCALED_CATEGORIES for c in categories], dtype=bool)
+        
+        # Macierze wymagań: wydarzenie x nazwa wymaganego budynku / technologii
+        self.building_names, self.required_buildings = self._requirement_matrix('required_buildings')
+        self.technology_names, self.required_technologies = self._requirement_matrix('required_technologies')
+        
+        # Progi warunków wyznaczające przedziały stanu dla klucza cache
+        self._population_breaks = np.unique(np.concatenate([self.min_population, self.max_population]))
+        self._money_breaks = np.unique(self.min_money)
+        self._satisfaction_breaks = np.unique(np.concatenate([self.min_satisfaction, self.max_satisfaction]))
+    
+    def __len__(self) -> int:
+        return len(self.events)
+    
+    def _requirement_matrix(self, attribute: str) -> Tuple[List[str], np.ndarray]:
+        names = sorted({name for event in self.events for name in getattr(event, attribute)})
+        matrix = np.zeros((len(self.events), len(names)), dtype=bool)
+        for row, event in enumerate(self.events):
+            for name in getattr(event, attribute):
+                matrix[row, names.index(name)] = True
+        return names, matrix
+    
+    @staticmethod
+    def _bucket(breaks: np.ndarray, value: float) -> Tuple[int, int]:
+        """Przedział wartości względem progów (para rozróżnia też wartość równą progowi)."""
+        return int(np.searchsorted(breaks, value, 'left')), int(np.searchsorted(breaks, value, 'right'))
+    
+    def probabilities(self, game_state: Dict) -> np.ndarray:
+        """
+        Prawdopodobieństwa wszystkich wydarzeń w kolejności self.ids.
+        
+        Wartości są takie same jak z AdvancedEventManager.calculate_event_probability().
+        """
+        population = game_state.get('population', 0)
+        money = game_state.get('money', 0)
+        satisfaction = game_state.get('satisfaction', 50)
+        building_types = {b.get('type', '') for b in game_state.get('buildings', [])} if self.building_names else set()
+        tech_ids = {t.get('id', '') for t in game_state.get('technologies', [])} if self.technology_names else set()
+        has_buildings = tuple(name in building_types for name in self.building_names)
+        has_technologies = tuple(name in tech_ids for name in self.technology_names)
+        
+        key = (
+            self._bucket(self._population_breaks, population),
+            self._bucket(self._money_breaks, money),
+            self._bucket(self._satisfaction_breaks, satisfaction),
+            has_buildings, has_technologies,
+        )
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+        else:
+            cached = self._possible_events(population, money, satisfaction, has_buildings, has_technologies)
+            self._cache[key] = cached
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        indices, base, population_scaled, dissatisfaction_scaled, poverty_scaled = cached
+        
+        # Modyfikatory populacji, niezadowolenia i biedy (kolejność jak w calculate_event_probability)
+        possible = base.copy()
+        possible[population_scaled] *= min(MAX_POPULATION_MODIFIER, population / POPULATION_PER_MODIFIER)
+        if satisfaction < DISSATISFACTION_LEVEL:
+            possible[dissatisfaction_scaled] *= 1 + (DISSATISFACTION_LEVEL - satisfaction) / 100
+        if money < POVERTY_MONEY:
+            possible[poverty_scaled] *= POVERTY_MODIFIER
+        probabilities = np.zeros(len(self.events))
+        probabilities[indices] = np.minimum(1.0, possible)
+        return probabilities
+    
+    def _possible_events(self, population: float, money: float, satisfaction: float,
+                         has_buildings: Tuple[bool, ...], has_technologies: Tuple[bool, ...]) -> Tuple[np.ndarray, ...]:
+        """
+        Warunki wystąpienia (can_occur) dla wszystkich wydarzeń naraz.
+        
+        Returns:
+            Tuple: (indeksy możliwych wydarzeń, ich bazowe prawdopodobieństwa,
+                maski kategorii populacji, niezadowolenia i biedy dla tych wydarzeń)
+        """
+        possible = ((self.min_population <= population) & (population <= self.max_population)
+                    & (money >= self.min_money)
+                    & (self.min_satisfaction <= satisfaction) & (satisfaction <= self.max_satisfaction))
+        if self.building_names:
+            possible &= ~(self.required_buildings & ~np.array(has_buildings)).any(axis=1)
+        if self.technology_names:
+            possible &= ~(self.required_technologies & ~np.array(has_technologies)).any(axis=1)
+        indices = np.flatnonzero(possible)
+        return (indices, self.base_probability[indices], self.population_scaled[indices],
+                self.dissatisfaction_scaled[indices], self.poverty_scaled[indices])
+    
+    def sample(self, probabilities: np.ndarray, rng: random.Random) -> Optional[int]:
+        """
+        Losuje indeks wydarzenia lub None.
+        
+        Wydarzenie występuje z prawdopodobieństwem, że zaszłoby choć jedno
+        z niezależnych wydarzeń (1 - iloczyn (1 - p)), a konkretne wydarzenie
+        wybierane jest z wagami równymi ich prawdopodobieństwom.
+        """
+        if not len(probabilities):
+            return None
+        any_event = 1.0 - float(np.prod(1.0 - probabilities))
+        if rng.random() >= any_event:
+            return None
+        cumulative = np.cumsum(probabilities)
+        index = int(np.searchsorted(cumulative, rng.random() * cumulative[-1], side='right'))
+        return min(index, len(probabilities) - 1)
+
+
 class AdvancedEventManager:
     """
     Zaawansowany menedżer wydarzeń zarządzający całym systemem wydarzeń.
@@ -185,19 +337,26 @@ class AdvancedEventManager:
     - Śledzenie historii wydarzeń
     """
     
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
         """
         Konstruktor menedżera wydarzeń.
         
         Inicjalizuje wszystkie struktury danych potrzebne do zarządzania wydarzeniami
         i tworzy kompletną listę wszystkich dostępnych wydarzeń w grze.
+        
+        Args:
+            rng: strumień losowości wydarzeń (domyślnie nowy, nieziarnowany)
         """
+        self.rng = rng if rng is not None else random.Random()  # RandomStreams 'advanced_events'
+        
         # === GŁÓWNE STRUKTURY DANYCH ===
         self.events: Dict[str, GameEvent] = {}        # Słownik wszystkich wydarzeń: {id: GameEvent}
         self.active_events: List[Dict] = []           # Lista aktualnie aktywnych wydarzeń
         self.event_history: List[Dict] = []           # Historia wszystkich wydarzeń (dla statystyk)
-        self.event_probabilities: Dict[str, float] = {}  # Cachowane prawdopodobieństwa wydarzeń
+        self._event_probabilities: Dict[str, float] = {}  # Prawdopodobieństwa wydarzeń z ostatniego losowania
+        self._last_draw: Optional[Tuple[List[str], np.ndarray]] = None  # (identyfikatory, tablica) - słownik budowany leniwie
         self.long_term_effects: Dict[str, Dict] = {}  # Długoterminowe efekty wydarzeń
+        self._event_table: Optional[EventTable] = None  # Kolumnowa tablica wydarzeń (budowana leniwie)
         
         # === INICJALIZACJA SYSTEMU ===
         self._initialize_events()                     # Wywołaj metodę tworzącą wszystkie wydarzenia
@@ -220,6 +379,36 @@ class AdvancedEventManager:
         # WYDARZENIA SPOŁECZNE
         self._create_social_events()                  # Wywołaj metodę tworzącą wydarzenia społeczne
     
+    def add_event(self, event: GameEvent):
+        """
+        Dodaje (lub zastępuje) wydarzenie, np. z moda.
+        
+        Unieważnia tablicę wydarzeń - zostanie zbudowana od nowa przy następnym losowaniu.
+        """
+        self.events[event.id] = event
+        self._event_table = None
+    
+    @property
+    def event_probabilities(self) -> Dict[str, float]:
+        """Niezerowe prawdopodobieństwa wydarzeń z ostatniego losowania (słownik budowany przy odczycie)."""
+        if self._last_draw is not None:
+            ids, probabilities = self._last_draw
+            self._event_probabilities = {ids[i]: float(probabilities[i]) for i in np.flatnonzero(probabilities)}
+            self._last_draw = None
+        return self._event_probabilities
+    
+    @event_probabilities.setter
+    def event_probabilities(self, probabilities: Dict[str, float]):
+        self._event_probabilities = probabilities
+        self._last_draw = None
+    
+    @property
+    def event_table(self) -> EventTable:
+        """Tablica wydarzeń do wektorowego liczenia prawdopodobieństw (przebudowywana po zmianie self.events)."""
+        if self._event_table is None or len(self._event_table) != len(self.events):
+            self._event_table = EventTable(self.events.values())
+        return self._event_table
+    
     def _create_natural_disasters(self):
         """
         Tworzy katastrofy naturalne - najpoważniejsze wydarzenia w grze.
@@ -339,6 +528,9 @@ class AdvancedEventManager:
         """
         Oblicza prawdopodobieństwo wystąpienia wydarzenia na podstawie stanu gry.
         
+        Wersja dla pojedynczego wydarzenia - trigger_random_event() liczy
+        te same wartości dla wszystkich wydarzeń naraz (EventTable.probabilities).
+        
         Args:
             event: Obiekt wydarzenia do sprawdzenia
             game_state: Słownik ze statystykami gry
@@ -390,25 +582,18 @@ class AdvancedEventManager:
         Returns:
             Optional[Dict]: Instancja wydarzenia lub None jeśli nic nie wystąpiło
         """
-        # Lista wydarzeń które mogą wystąpić w tej turze
-        available_events = []
-        
-        # === SPRAWDŹ KAŻDE WYDARZENIE ===
-        # Iteruj przez wszystkie dostępne wydarzenia
-        for event in self.events.values():
-            # Oblicz prawdopodobieństwo wystąpienia tego wydarzenia
-            probability = self.calculate_event_probability(event, game_state)
-            # Jeśli prawdopodobieństwo > 0 i los się powiódł, dodaj do dostępnych
-            if probability > 0 and random.random() < probability:
-                available_events.append(event)                    # Dodaj do listy możliwych wydarzeń
-        
-        # Jeśli nie ma dostępnych wydarzeń, nic się nie dzieje
-        if not available_events:
-            return None
+        # === PRAWDOPODOBIEŃSTWA WSZYSTKICH WYDARZEŃ ===
+        # Jedna operacja wektorowa (z cache, jeśli stan nie przekroczył żadnego progu)
+        table = self.event_table
+        probabilities = table.probabilities(game_state)
+        self._last_draw = (table.ids, probabilities)
         
         # === WYBIERZ WYDARZENIE ===
-        # Wybierz losowe wydarzenie z dostępnych (preferuj bardziej prawdopodobne)
-        event = random.choice(available_events)
+        # Losowanie ważone prawdopodobieństwami (None jeśli nic nie wystąpiło)
+        index = table.sample(probabilities, self.rng)
+        if index is None:
+            return None
+        event = table.events[index]
         
         # === UTWÓRZ INSTANCJĘ WYDARZENIA ===
         # Utwórz słownik z danymi wydarzenia dla tej tury
@@ -0,0 +1,173 @@
+"""
+Automatyczny zapis gry w tle.
+
+AutosaveService dzieli zapis na dwie części:
+- migawka stanu (GameEngine.create_save_snapshot) - kopia surowych danych
+  (teren, krotki budynków, słowniki podsystemów) w wątku gry
+- kodowanie mapy i szablonów budynków, walidacja, serializacja, kompresja
+  i zapis na dysk - w wątku roboczym, więc interfejs nie zamarza przy
+  zapisie dużych map
+
+Autozapisy trafiają do rotacyjnych slotów (autosave_1.sav, autosave_2.sav, ...),
+każdy nowy autozapis nadpisuje najstarszy slot. Zapis jest atomowy
+(patrz save_format.write_save_file), więc awaria w trakcie zapisu nie niszczy
+poprzedniej wersji slotu.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .save_format import SAVE_EXTENSION
+
+AUTOSAVE_PREFIX = 'autosave_'
+
+
+@dataclass
+class SaveResult:
+    """
+    Wynik zapisu wykonanego w tle.
+
+    Attributes:
+        filepath (str): ścieżka zapisanego pliku
+        success (bool): czy zapis się powiódł
+        autosave (bool): True dla autozapisu, False dla zapisu na żądanie gracza
+        error (str): opis błędu zapisu (None gdy sukces)
+        validation_errors (List[str]): błędy walidacji danych (zapis i tak wykonany)
+    """
+    filepath: str
+    success: bool
+    autosave: bool
+    error: Optional[str] = None
+    validation_errors: Optional[List[str]] = None
+
+
+class AutosaveService:
+    """
+    Usługa autozapisu i zapisu w tle dla GameEngine.
+
+    Metody tick(), autosave(), save() i poll_results() wywoływane są z wątku
+    gry (np. z QTimer); zapis na dysk wykonuje jeden wątek roboczy, więc
+    kolejne zapisy wykonują się po kolei.
+    """
+
+    def __init__(self, game_engine, saves_dir: str, interval: float = 300, slots: int = 3,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            game_engine: silnik gry (można go podmienić atrybutem game_engine, np. po nowej grze)
+            saves_dir: katalog zapisów
+            interval: odstęp między autozapisami w sekundach (0 = autozapis wyłączony)
+            slots: liczba rotacyjnych slotów autozapisu
+            clock: źródło czasu (do testów)
+        """
+        if slots < 1:
+            raise ValueError("Liczba slotów autozapisu musi być dodatnia")
+
+        self.game_engine = game_engine
+        self.saves_dir = saves_dir
+        self.interval = interval
+        self.slots = slots
+        self.clock = clock
+        self.logger = logging.getLogger('autosave')
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autosave')
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []          # zapisy jeszcze nie odebrane przez poll_results
+        self._autosave_future: Optional[Future] = None  # ostatni autozapis (tylko wątek gry)
+        self._last_autosave = clock()
+        self._next_slot = self._find_oldest_slot()
+
+    def slot_path(self, slot: int) -> str:
+        """Zwraca ścieżkę pliku slotu autozapisu (numeracja od 1)."""
+        return os.path.join(self.saves_dir, f"{AUTOSAVE_PREFIX}{slot}{SAVE_EXTENSION}")
+
+    def _find_oldest_slot(self) -> int:
+        """Wybiera slot do nadpisania: pierwszy nieistniejący, a jeśli wszystkie są zajęte - najstarszy."""
+        oldest_slot, oldest_mtime = 1, None
+        for slot in range(1, self.slots + 1):
+            path = self.slot_path(slot)
+            if not os.path.exists(path):
+                return slot
+            mtime = os.path.getmtime(path)
+            if oldest_mtime is None or mtime < oldest_mtime:
+                oldest_slot, oldest_mtime = slot, mtime
+        return oldest_slot
+
+    def is_due(self) -> bool:
+        """Czy minął już interwał autozapisu."""
+        return self.interval > 0 and self.clock() - self._last_autosave >= self.interval
+
+    def tick(self) -> Optional[Future]:
+        """
+        Wykonuje autozapis, jeśli minął interwał i poprzedni autozapis się zakończył.
+
+        Returns:
+            Future | None: zadanie zapisu lub None jeśli autozapis nie był potrzebny
+        """
+        if not self.is_due() or self.autosave_in_progress():
+            return None
+        return self.autosave()
+
+    def autosave_in_progress(self) -> bool:
+        """Czy ostatni autozapis nadal trwa w wątku roboczym."""
+        return self._autosave_future is not None and not self._autosave_future.done()
+
+    def autosave(self) -> Future:
+        """Zapisuje grę do kolejnego slotu autozapisu (w tle)."""
+        filepath = self.slot_path(self._next_slot)
+        self._next_slot = self._next_slot % self.slots + 1
+        self._last_autosave = self.clock()
+        self._autosave_future = self._submit(filepath, autosave=True)
+        return self._autosave_future
+
+    def save(self, filepath: str) -> Future:
+        """Zapisuje grę do wskazanego pliku (zapis gracza, w tle)."""
+        return self._submit(filepath, autosave=False)
+
+    def _submit(self, filepath: str, autosave: bool) -> Future:
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        engine = self.game_engine
+        snapshot = engine.create_save_snapshot()  # jedyna część wykonywana w wątku gry
+        future = self._executor.submit(self._write, engine, snapshot, filepath, autosave)
+        with self._lock:
+            self._pending.append(future)
+        return future
+
+    def _write(self, engine, snapshot, filepath: str, autosave: bool) -> SaveResult:
+        """Zapis w wątku roboczym - nie dotyka stanu silnika poza migawką."""
+        try:
+            validation_errors = engine.write_save_snapshot(snapshot, filepath)
+            result = SaveResult(filepath, True, autosave, validation_errors=validation_errors)
+        except Exception as e:
+            self.logger.error(f"Błąd zapisu w tle {filepath}: {e}")
+            result = SaveResult(filepath, False, autosave, error=str(e))
+        return result
+
+    def poll_results(self) -> List[SaveResult]:
+        """
+        Zwraca wyniki zakończonych zapisów (każdy tylko raz).
+
+        Wywoływana z wątku gry - np. aby pokazać komunikat na pasku stanu.
+        """
+        with self._lock:
+            done, pending = [], []
+            for future in self._pending:
+                (done if future.done() else pending).append(future)
+            self._pending = pending
+        return [future.result() for future in done]
+
+    def wait(self, timeout: Optional[float] = None) -> List[SaveResult]:
+        """Czeka na zakończenie wszystkich zleconych zapisów i zwraca ich wyniki."""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout=timeout)
+        return self.poll_results()
+
+    def shutdown(self):
+        """Kończy wątek roboczy po wykonaniu zleconych zapisów (np. przy zamykaniu aplikacji)."""
+        self._executor.shutdown(wait=True)
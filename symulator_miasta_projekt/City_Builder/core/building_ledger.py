@@ -0,0 +1,229 @@
+"""
+Księga agregatów budynków (building ledger).
+
+Przechowuje sumy efektów wszystkich budynków na mapie:
+- podaż dla każdej potrzeby mieszkańców (mieszkania, praca, zdrowie...)
+- produkcję i konsumpcję każdego zasobu
+- bazę podatkową dla każdej klasy podatkowej
+- łączny koszt utrzymania budynków
+
+Sumy są aktualizowane w O(1) przy stawianiu, usuwaniu budynku i zmianie
+jego efektów, więc kod wykonywany co turę nie musi przechodzić przez
+wszystkie budynki. Metoda verify() pozwala w trybie debugowania porównać
+księgę z pełnym przeliczeniem.
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+# Potrzeby mieszkańców i efekty budynków, które je zaspokajają
+NEED_EFFECTS = {
+    'housing': ('population',),              # mieszkania
+    'jobs': ('jobs',),                       # miejsca pracy
+    'healthcare': ('health',),               # opieka zdrowotna
+    'education': ('education',),             # edukacja
+    'safety': ('safety',),                   # bezpieczeństwo
+    'entertainment': ('happiness',),         # rozrywka (tylko parki i stadiony)
+    'transport': ('traffic', 'walkability')  # transport (drogi i chodniki)
+}
+
+# Typy budynków, których efekt 'happiness' liczy się jako rozrywka
+ENTERTAINMENT_TYPES = ('park', 'stadium')
+
+# Klasy podatkowe: (fragmenty nazwy typu budynku, część kosztu jako dochód bazowy)
+# ZNACZNIE zwiększone dochody z budynków dla lepszej rozgrywki
+TAX_CLASSES = (
+    ('commercial', ('commercial', 'shop', 'mall'), 0.12),      # Zwiększone z 0.08 na 0.12 (12%!)
+    ('industrial', ('industrial', 'factory'), 0.10),           # Zwiększone z 0.07 na 0.10 (10%!)
+    ('residential', ('residential', 'house', 'apartment'), 0.08)  # Zwiększone z 0.05 na 0.08 (8%!)
+)
+DEFAULT_TAX_CLASS = ('residential', 0.08)  # wszystkie inne budynki - traktowane jak mieszkalne
+
+# BARDZO niskie koszty utrzymania
+SERVICE_TYPES = ('park', 'school', 'hospital', 'university', 'police', 'fire')
+SERVICE_MAINTENANCE_RATE = 0.0005  # Zmniejszone z 0.002 na 0.0005 (0.05%!)
+DEFAULT_MAINTENANCE_RATE = 0.0003  # Zmniejszone z 0.0015 na 0.0003 (0.03%!)
+
+
+def building_need_supply(building) -> Dict[str, float]:
+    """
+    Oblicza podaż dla potrzeb mieszkańców zapewnianą przez jeden budynek.
+
+    Args:
+        building: budynek z atrybutami effects i building_type
+
+    Returns:
+        Dict[str, float]: {nazwa_potrzeby: podaż} (tylko niezerowe wpisy)
+    """
+    effects = building.effects
+    building_type = building.building_type.value
+    supply = {}
+
+    for need_name, effect_names in NEED_EFFECTS.items():
+        if not any(name in effects for name in effect_names):
+            continue
+        if need_name == 'entertainment' and not any(t in building_type for t in ENTERTAINMENT_TYPES):
+            continue
+        supply[need_name] = sum(effects.get(name, 0) for name in effect_names)
+
+    return supply
+
+
+def building_tax_base(building) -> Tuple[str, float]:
+    """
+    Zwraca klasę podatkową budynku i jego dochód bazowy (przed stawką podatku).
+
+    Returns:
+        Tuple[str, float]: (klasa_podatkowa, dochód_bazowy)
+    """
+    building_type = building.building_type.value
+    for tax_class, type_fragments, income_rate in TAX_CLASSES:
+        if any(fragment in building_type for fragment in type_fragments):
+            return tax_class, building.cost * income_rate
+
+    tax_class, income_rate = DEFAULT_TAX_CLASS
+    return tax_class, building.cost * income_rate
+
+
+def building_maintenance(building) -> float:
+    """Zwraca koszt utrzymania budynku na turę."""
+    building_type = building.building_type.value
+    if any(service in building_type for service in SERVICE_TYPES):
+        return building.cost * SERVICE_MAINTENANCE_RATE
+    return building.cost * DEFAULT_MAINTENANCE_RATE
+
+
+@dataclass
+class BuildingContribution:
+    """Wkład pojedynczego budynku w sumy księgi (zapamiętany przy dodaniu)."""
+    need_supply: Dict[str, float]
+    resource_flows: Dict[str, float]  # efekt -> wartość (dodatnia = produkcja, ujemna = konsumpcja)
+    tax_class: str
+    taxable_base: float
+    maintenance: float
+
+    @classmethod
+    def from_building(cls, building) -> 'BuildingContribution':
+        """Tworzy wkład na podstawie aktualnych efektów i kosztu budynku."""
+        tax_class, taxable_base = building_tax_base(building)
+        return cls(
+            need_supply=building_need_supply(building),
+            resource_flows=dict(building.effects),
+            tax_class=tax_class,
+            taxable_base=taxable_base,
+            maintenance=building_maintenance(building)
+        )
+
+
+@dataclass
+class BuildingLedger:
+    """
+    Zagregowane efekty wszystkich budynków na mapie.
+
+    Wkłady budynków są przechowywane pod kluczem kafla głównego, dzięki czemu
+    usunięcie budynku odejmuje dokładnie to, co zostało dodane - nawet jeśli
+    słownik efektów budynku został w międzyczasie zmieniony.
+    """
+    need_supply: Dict[str, float] = field(default_factory=lambda: {need: 0 for need in NEED_EFFECTS})
+    production: Dict[str, float] = field(default_factory=dict)    # zasób -> produkcja na turę
+    consumption: Dict[str, float] = field(default_factory=dict)   # zasób -> konsumpcja na turę
+    taxable_base: Dict[str, float] = field(default_factory=lambda: {name: 0.0 for name, _, _ in TAX_CLASSES})
+    maintenance: float = 0.0
+    _contributions: Dict[Tuple[int, int], BuildingContribution] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_buildings(cls, buildings: Iterable) -> 'BuildingLedger':
+        """
+        Tworzy księgę przeliczając od zera listę budynków.
+
+        Używane gdy kod dostaje zwykłą listę budynków zamiast księgi
+        oraz do weryfikacji księgi w trybie debugowania.
+        """
+        ledger = cls()
+        for index, building in enumerate(buildings):
+            if building is None:
+                continue
+            ledger.add_building((index, -1), building)
+        return ledger
+
+    def __len__(self) -> int:
+        return len(self._contributions)
+
+    def add_building(self, anchor: Tuple[int, int], building) -> None:
+        """Dodaje wkład budynku stojącego na kaflu głównym anchor."""
+        contribution = BuildingContribution.from_building(building)
+        self._contributions[anchor] = contribution
+        self._apply(contribution, 1)
+
+    def remove_building(self, anchor: Tuple[int, int]) -> None:
+        """Odejmuje wkład budynku stojącego na kaflu głównym anchor."""
+        contribution = self._contributions.pop(anchor, None)
+        if contribution is None:
+            return
+
+        if not self._contributions:
+            self.clear()  # pusta mapa - wyzeruj sumy dokładnie (bez błędów zaokrągleń)
+        else:
+            self._apply(contribution, -1)
+
+    def update_building(self, anchor: Tuple[int, int], building) -> None:
+        """Przelicza wkład budynku po zmianie jego efektów lub kosztu."""
+        self.remove_building(anchor)
+        self.add_building(anchor, building)
+
+    def clear(self) -> None:
+        """Zeruje wszystkie sumy."""
+        self.need_supply = {need: 0 for need in NEED_EFFECTS}
+        self.production = {}
+        self.consumption = {}
+        self.taxable_base = {name: 0.0 for name, _, _ in TAX_CLASSES}
+        self.maintenance = 0.0
+        self._contributions.clear()
+
+    def _apply(self, contribution: BuildingContribution, sign: int) -> None:
+        """Dodaje (sign=1) lub odejmuje (sign=-1) wkład budynku od sum."""
+        for need_name, value in contribution.need_supply.items():
+            self.need_supply[need_name] += sign * value
+
+        for effect, value in contribution.resource_flows.items():
+            if value > 0:
+                self.production[effect] = self.production.get(effect, 0) + sign * value
+            else:
+                self.consumption[effect] = self.consumption.get(effect, 0) + sign * abs(value)
+
+        self.taxable_base[contribution.tax_class] = (
+            self.taxable_base.get(contribution.tax_class, 0.0) + sign * contribution.taxable_base)
+        self.maintenance += sign * contribution.maintenance
+
+    def verify(self, buildings: Iterable, tolerance: float = 1e-6) -> List[str]:
+        """
+        Porównuje księgę z pełnym przeliczeniem podanych budynków.
+
+        Args:
+            buildings: wszystkie budynki na mapie
+            tolerance: dopuszczalna różnica bezwzględna (błędy zaokrągleń)
+
+        Returns:
+            List[str]: opisy rozbieżności (pusta lista = księga poprawna)
+        """
+        expected = BuildingLedger.from_buildings(buildings)
+        mismatches = []
+
+        if len(expected) != len(self):
+            mismatches.append(f"building count: ledger={len(self)}, recomputed={len(expected)}")
+
+        sections = [
+            ('need_supply', self.need_supply, expected.need_supply),
+            ('production', self.production, expected.production),
+            ('consumption', self.consumption, expected.consumption),
+            ('taxable_base', self.taxable_base, expected.taxable_base),
+            ('maintenance', {'total': self.maintenance}, {'total': expected.maintenance})
+        ]
+        for section, actual_values, expected_values in sections:
+            for key in set(actual_values) | set(expected_values):
+                actual = actual_values.get(key, 0)
+                wanted = expected_values.get(key, 0)
+                if not math.isclose(actual, wanted, rel_tol=1e-9, abs_tol=tolerance):
+                    mismatches.append(f"{section}[{key}]: ledger={actual}, recomputed={wanted}")
+
+        return mismatches
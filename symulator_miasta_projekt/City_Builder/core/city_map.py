@@ -1,78 +1,85 @@
 import random
-from .tile import Tile, TerrainType
+from typing import Dict, List, Tuple
+import numpy as np
+from .tile import Tile, TerrainType, Building, BuildingType, TERRAIN_CODES, TERRAIN_TYPES
+from .building_ledger import BuildingLedger
+from .coverage import ServiceCoverage
+
+# Tereny, na których nie można budować
+UNBUILDABLE_TERRAIN = (TerrainType.WATER, TerrainType.MOUNTAIN)
 
 class CityMap:
     """
     Klasa reprezentująca mapę miasta.
-    Zawiera siatkę kafelków (tiles) z różnymi typami terenu.
+    
+    Dane kafelków przechowywane są jako struktura tablic NumPy o kształcie
+    (width, height), indeksowanych [x, y]:
+    - terrain: kod typu terenu (uint8, patrz TERRAIN_TYPES)
+    - occupied: maska kafelków zajętych przez budynki
+    - building_ids: identyfikator budynku na kafelku (-1 = brak)
+    - main_tile: maska kafelków głównych budynków (wolne kafelki mają True)
+    Obiekty Tile zwracane przez get_tile() są lekkimi widokami na te tablice.
+    
+    Licznik version rośnie przy każdej zmianie terenu lub budynków - widoki
+    mapy porównują tablice tylko wtedy, gdy się zmienił. Kod zapisujący
+    bezpośrednio do tablic musi wywołać mark_changed().
     """
-    def __init__(self, width: int = 50, height: int = 50):
+    def __init__(self, width: int = 50, height: int = 50, rng: random.Random = None):
         """
         Konstruktor - inicjalizuje nową mapę miasta.
         
         Args:
             width (int): szerokość mapy w kafelkach (domyślnie 50)
             height (int): wysokość mapy w kafelkach (domyślnie 50)
+            rng (random.Random): strumień losowości dla generowania terenu
+                (domyślnie nowy, nieziarnowany)
         """
         self.width = width  # szerokość mapy
         self.height = height  # wysokość mapy
-        self.grid = self._create_grid()  # tworzy siatkę kafelków (wywołuje metodę _create_grid)
-        self.selected_tile = None  # aktualnie zaznaczony kafelek (na początku żaden)
-        
-    def _create_grid(self) -> list[list[Tile]]:
-        """
-        Tworzy dwuwymiarową siatkę kafelków z losowym terenem.
+        self.rng = rng if rng is not None else random.Random()  # losowość terenu (RandomStreams 'city_map')
         
-        Returns:
-            list[list[Tile]]: dwuwymiarowa lista kafelków
-            
-        Uwaga: podkreślnik (_) na początku nazwy oznacza, że to metoda prywatna
-        (używana tylko wewnątrz klasy)
-        """
-        grid = []  # pusta lista, która będzie zawierać wszystkie rzędy kafelków
-        
-        # Najpierw wypełnij wszystko trawą
-        # Zewnętrzna pętla - dla każdej kolumny (x)
-        for x in range(self.width):  # range(50) tworzy liczby od 0 do 49
-            row = []  # nowy rząd kafelków
-            # Wewnętrzna pętla - dla każdego rzędu (y)
-            for y in range(self.height):
-                # Dodaj nowy kafelek z trawą na pozycji (x, y)
-                row.append(Tile(x, y, TerrainType.GRASS))
-            # Dodaj ukończony rząd do głównej siatki
-            grid.append(row)
+        # Tablice danych kafelków (struktura tablic zamiast listy list obiektów Tile)
+        shape = (width, height)
+        self.terrain = np.full(shape, TERRAIN_CODES[TerrainType.GRASS], dtype=np.uint8)  # kod terenu
+        self.occupied = np.zeros(shape, dtype=bool)             # czy kafelek zajęty przez budynek
+        self.building_ids = np.full(shape, -1, dtype=np.int32)  # id budynku na kafelku (-1 = brak)
+        self.main_tile = np.ones(shape, dtype=bool)             # czy kafel główny budynku
+        self.version = 0  # licznik zmian terenu i budynków
+        self._add_natural_features()  # losowy teren (woda, góry, piasek)
+        self.selected_tile = None  # aktualnie zaznaczony kafelek (na początku żaden)
         
-        # Dodaj naturalne elementy terenu (góry, wodę, piasek)
-        self._add_natural_features(grid)
+        # Rejestr postawionych budynków - pozwala wyliczać budynki w O(liczba budynków)
+        # zamiast przechodzić przez wszystkie kafelki mapy (O(szerokość * wysokość))
+        self.buildings: Dict[Tuple[int, int], Building] = {}  # kafel główny (x, y) -> budynek
+        self.buildings_by_type: Dict[BuildingType, Dict[Tuple[int, int], Building]] = {}  # typ -> {kafel główny: budynek}
+        self._building_anchors: Dict[int, Tuple[int, int]] = {}  # id budynku -> kafel główny
+        self._building_footprints: Dict[int, Tuple[slice, slice]] = {}  # id budynku -> wycinek tablic
+        self._next_building_id = 0
+        self.ledger = BuildingLedger()  # sumy efektów, podatków i kosztów utrzymania wszystkich budynków
+        self.coverage = ServiceCoverage(width, height)  # warstwy zasięgu usług i rozmieszczenie mieszkańców
         
-        return grid  # zwróć gotową siatkę
-    
-    def _add_natural_features(self, grid: list[list[Tile]]):
+    def _add_natural_features(self):
         """
         Dodaje naturalne elementy do mapy (woda, góry, piasek).
         
-        Args:
-            grid: dwuwymiarowa lista kafelków do modyfikacji
-            
-        Ta metoda nie zwraca nic (void), ale modyfikuje przekazaną siatkę
+        Ta metoda nie zwraca nic (void), ale modyfikuje tablicę terenu mapy
         """
         # Dodaj zbiorniki wodne
         # Parametry: typ terenu, liczba klastrów, maksymalny rozmiar, prawdopodobieństwo rozprzestrzeniania
-        self._add_terrain_clusters(grid, TerrainType.WATER, 5, 10, 0.7)
+        self._add_terrain_clusters(TerrainType.WATER, 5, 10, 0.7)
         
         # Dodaj góry
-        self._add_terrain_clusters(grid, TerrainType.MOUNTAIN, 3, 5, 0.6)
+        self._add_terrain_clusters(TerrainType.MOUNTAIN, 3, 5, 0.6)
         
         # Dodaj obszary piaszczyste
-        self._add_terrain_clusters(grid, TerrainType.SAND, 4, 8, 0.5)
+        self._add_terrain_clusters(TerrainType.SAND, 4, 8, 0.5)
     
-    def _add_terrain_clusters(self, grid: list[list[Tile]], terrain_type: TerrainType, 
+    def _add_terrain_clusters(self, terrain_type: TerrainType, 
                             num_clusters: int, max_size: int, spread_prob: float):
         """
         Dodaje klastry (skupiska) określonego typu terenu.
         
         Args:
-            grid: siatka kafelków
             terrain_type: typ terenu do dodania (WATER, MOUNTAIN, SAND)
             num_clusters: ile klastrów utworzyć
             max_size: maksymalny rozmiar każdego klastra
@@ -81,19 +88,18 @@ class CityMap:
         # Pętla tworząca określoną liczbę klastrów
         for _ in range(num_clusters):  # _ oznacza, że nie używamy zmiennej iteracji
             # Wybierz losowy punkt początkowy
-            start_x = random.randint(0, self.width - 1)  # losowa liczba między 0 a width-1
-            start_y = random.randint(0, self.height - 1)  # losowa liczba między 0 a height-1
+            start_x = self.rng.randint(0, self.width - 1)  # losowa liczba między 0 a width-1
+            start_y = self.rng.randint(0, self.height - 1)  # losowa liczba między 0 a height-1
             
             # Utwórz klaster rozpoczynający się od tego punktu
-            self._grow_cluster(grid, start_x, start_y, terrain_type, max_size, spread_prob)
+            self._grow_cluster(start_x, start_y, terrain_type, max_size, spread_prob)
     
-    def _grow_cluster(self, grid: list[list[Tile]], x: int, y: int, 
+    def _grow_cluster(self, x: int, y: int, 
                      terrain_type: TerrainType, max_size: int, spread_prob: float):
         """
         Rozrasta klaster terenu z punktu początkowego (algorytm rekurencyjny).
         
         Args:
-            grid: siatka kafelków
             x, y: współrzędne aktualnego kafelka
             terrain_type: typ terenu do umieszczenia
             max_size: ile jeszcze kafelków można dodać (zmniejsza się z każdym wywołaniem)
@@ -107,11 +113,11 @@ class CityMap:
             return  # zakończ funkcję (nie rób nic więcej)
             
         # Zmieniaj tylko kafelki z trawą (nie nadpisuj innych typów terenu)
-        if grid[x][y].terrain_type != TerrainType.GRASS:
+        if self.terrain[x, y] != TERRAIN_CODES[TerrainType.GRASS]:
             return  # zakończ jeśli to nie trawa
             
         # Zmień kafelek na nowy typ terenu
-        grid[x][y] = Tile(x, y, terrain_type)
+        self.terrain[x, y] = TERRAIN_CODES[terrain_type]
         
         # Spróbuj rozprzestrzenić się we wszystkich kierunkach (góra, dół, lewo, prawo)
         # Lista krotek (tuple) reprezentujących przesunięcia: (delta_x, delta_y)
@@ -121,10 +127,14 @@ class CityMap:
             # Sprawdź czy nowe współrzędne są w granicach mapy
             # AND (operator and) - wszystkie warunki muszą być spełnione
             if (0 <= nx < self.width and 0 <= ny < self.height and 
-                random.random() < spread_prob):  # random.random() zwraca liczbę 0.0-1.0
+                self.rng.random() < spread_prob):  # random() zwraca liczbę 0.0-1.0
                 
                 # Rekurencyjne wywołanie - funkcja wywołuje samą siebie z nowymi parametrami
-                self._grow_cluster(grid, nx, ny, terrain_type, max_size - 1, spread_prob)
+                self._grow_cluster(nx, ny, terrain_type, max_size - 1, spread_prob)
+    
+    def mark_changed(self) -> None:
+        """Zwiększa licznik zmian mapy (po zmianie terenu lub budynków)."""
+        self.version += 1
     
     def get_tile(self, x: int, y: int) -> Tile | None:
         """
@@ -138,7 +148,7 @@ class CityMap:
         """
         # Sprawdź czy współrzędne są w dozwolonych granicach
         if 0 <= x < self.width and 0 <= y < self.height:
-            return self.grid[x][y]  # zwróć kafelek z siatki
+            return Tile(self, x, y)  # widok kafelka na tablicach mapy
         return None  # zwróć None jeśli poza granicami
     
     def select_tile(self, x: int, y: int) -> None:
@@ -172,3 +182,203 @@ class CityMap:
             Tile | None: zaznaczony kafelek lub None jeśli nic nie jest zaznaczone
         """
         return self.selected_tile  # po prostu zwróć wartość atrybutu
+    
+    def add_building(self, x: int, y: int, building: Building) -> List[Tuple[int, int]]:
+        """
+        Stawia budynek na mapie i rejestruje go w rejestrze budynków.
+        
+        Metoda nie sprawdza czy budowa jest możliwa - walidacja należy do
+        GameEngine.can_build(). Zajmuje wszystkie kafelki budynku, pierwszy
+        z nich (lewy górny róg) staje się kafelkiem głównym.
+        
+        Args:
+            x, y: współrzędne lewego górnego rogu budynku
+            building: budynek do postawienia
+            
+        Returns:
+            List[Tuple[int, int]]: lista zajętych kafelków (x, y)
+        """
+        anchor = (x, y)
+        occupied_tiles = building.get_occupied_tiles(x, y)
+        
+        # Prostokąt budynku przycięty do granic mapy - zajęcie kafelków to
+        # przypisanie na wycinkach tablic zamiast pętli po obiektach Tile
+        width, height = building.get_building_size()
+        footprint = (slice(max(x, 0), min(x + width, self.width)),
+                     slice(max(y, 0), min(y + height, self.height)))
+        building_id = self._next_building_id
+        self._next_building_id += 1
+        
+        self.building_ids[footprint] = building_id
+        self.occupied[footprint] = True
+        self.main_tile[footprint] = False
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.main_tile[x, y] = True  # tylko pierwszy kafel jest główny
+        self._building_anchors[building_id] = anchor
+        self._building_footprints[building_id] = footprint
+        
+        # Zarejestruj budynek (po kaflu głównym i w kubełku jego typu)
+        self.buildings[anchor] = building
+        self.buildings_by_type.setdefault(building.building_type, {})[anchor] = building
+        self.ledger.add_building(anchor, building)
+        self.coverage.add_building(anchor, building)
+        self.mark_changed()
+        return occupied_tiles
+    
+    def remove_building(self, x: int, y: int) -> Tuple[Tuple[int, int], Building] | None:
+        """
+        Usuwa budynek zajmujący podany kafelek (główny lub pomocniczy).
+        
+        Args:
+            x, y: współrzędne dowolnego kafelka zajętego przez budynek
+            
+        Returns:
+            tuple | None: (kafel_główny, budynek) lub None jeśli kafelek jest pusty
+        """
+        building_id = self._building_id_at(x, y)
+        if building_id < 0:
+            return None
+        
+        anchor = self._building_anchors.pop(building_id)
+        footprint = self._building_footprints.pop(building_id)
+        building = self.buildings.pop(anchor)
+        bucket = self.buildings_by_type.get(building.building_type)
+        if bucket is not None:
+            bucket.pop(anchor, None)
+            if not bucket:
+                del self.buildings_by_type[building.building_type]
+        self.ledger.remove_building(anchor)
+        self.coverage.remove_building(anchor)
+        
+        # Zwolnij kafelki budynku (tylko te, które nadal do niego należą)
+        owned = self.building_ids[footprint] == building_id
+        self.building_ids[footprint][owned] = -1
+        self.occupied[footprint][owned] = False
+        self.main_tile[footprint][owned] = True  # reset do wartości domyślnej
+        self.mark_changed()
+        
+        return anchor, building
+    
+    def clear_buildings(self) -> None:
+        """Usuwa wszystkie budynki z mapy (teren pozostaje bez zmian)."""
+        self.building_ids.fill(-1)
+        self.occupied.fill(False)
+        self.main_tile.fill(True)
+        
+        self.buildings.clear()
+        self.buildings_by_type.clear()
+        self._building_anchors.clear()
+        self._building_footprints.clear()
+        self.ledger.clear()
+        self.coverage.clear()
+        self.mark_changed()
+    
+    def rebuild_ledger(self) -> None:
+        """Przelicza księgę agregatów i mapy zasięgu usług od zera na podstawie rejestru budynków."""
+        self.ledger.clear()
+        for anchor, building in self.buildings.items():
+            self.ledger.add_building(anchor, building)
+        self.coverage.rebuild(self.buildings.items())
+    
+    def update_building_effects(self, x: int, y: int, effects: dict) -> bool:
+        """
+        Zmienia efekty budynku zajmującego kafelek (x, y) i aktualizuje księgę agregatów.
+        
+        Args:
+            x, y: współrzędne dowolnego kafelka budynku
+            effects: nowy słownik efektów budynku
+            
+        Returns:
+            bool: True jeśli budynek został znaleziony
+        """
+        anchor = self.get_building_anchor(x, y)
+        if anchor is None:
+            return False
+        
+        building = self.buildings[anchor]
+        building.effects = effects
+        self.ledger.update_building(anchor, building)
+        self.coverage.update_building(anchor, building)
+        return True
+    
+    def get_building_anchor(self, x: int, y: int) -> Tuple[int, int] | None:
+        """
+        Zwraca współrzędne kafelka głównego budynku zajmującego kafelek (x, y).
+        
+        Returns:
+            Tuple[int, int] | None: kafel główny lub None jeśli kafelek jest wolny
+        """
+        building_id = self._building_id_at(x, y)
+        if building_id < 0:
+            return None
+        return self._building_anchors[building_id]
+    
+    def get_building_at(self, x: int, y: int) -> Building | None:
+        """
+        Zwraca budynek zajmujący kafelek (x, y) - główny lub pomocniczy.
+        
+        Returns:
+            Building | None: budynek lub None jeśli kafelek jest wolny
+        """
+        anchor = self.get_building_anchor(x, y)
+        if anchor is None:
+            return None
+        return self.buildings[anchor]
+    
+    def _building_id_at(self, x: int, y: int) -> int:
+        """Zwraca identyfikator budynku na kafelku lub -1 (także poza mapą)."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.building_ids[x, y])
+        return -1
+    
+    def get_buildable_mask(self) -> np.ndarray:
+        """
+        Zwraca maskę kafelków, na których można postawić budynek 1x1.
+        
+        Kafelek jest wolny gdy nie jest zajęty i nie jest wodą ani górami.
+        
+        Returns:
+            np.ndarray: tablica bool o kształcie (width, height)
+        """
+        unbuildable = np.isin(self.terrain, [TERRAIN_CODES[t] for t in UNBUILDABLE_TERRAIN])
+        return ~self.occupied & ~unbuildable
+    
+    def count_terrain(self) -> Dict[TerrainType, int]:
+        """
+        Zlicza kafelki każdego typu terenu.
+        
+        Returns:
+            Dict[TerrainType, int]: słownik {typ_terenu: liczba_kafelków}
+        """
+        counts = np.bincount(self.terrain.ravel(), minlength=len(TERRAIN_TYPES))
+        return {terrain: int(counts[code]) for code, terrain in enumerate(TERRAIN_TYPES)}
+    
+    def get_all_buildings(self) -> List[Building]:
+        """
+        Zwraca listę wszystkich budynków na mapie (każdy budynek raz).
+        
+        Returns:
+            List[Building]: budynki w kolejności stawiania
+        """
+        return list(self.buildings.values())
+    
+    def get_buildings_by_type(self, building_type: BuildingType) -> List[Building]:
+        """
+        Zwraca budynki danego typu.
+        
+        Args:
+            building_type: typ budynku z wyliczenia BuildingType
+            
+        Returns:
+            List[Building]: budynki danego typu
+        """
+        return list(self.buildings_by_type.get(building_type, {}).values())
+    
+    def count_buildings_by_type(self) -> Dict[str, int]:
+        """
+        Zlicza budynki według typu bez przechodzenia przez listę budynków.
+        
+        Returns:
+            Dict[str, int]: słownik {wartość_typu: liczba_budynków}
+        """
+        return {building_type.value: len(bucket) for building_type, bucket in self.buildings_by_type.items()}
@@ -0,0 +1,238 @@
+"""
+Kohortowy model populacji na tablicach NumPy.
+
+Populacja przechowywana jest jako macierz liczebności: przedziały wieku
+x klasy społeczne. Jedna tura to kilka operacji na tej macierzy:
+- zgony - śmiertelność zależna od wieku
+- urodzenia - płodność zależna od wieku, dzieci w klasie rodziców
+- starzenie - część każdego przedziału przechodzi do następnego
+- edukacja i zatrudnienie - macierze przejść między klasami dla każdego przedziału
+- migracja - saldo rozkładane według profilu migrantów
+
+Koszt tury nie zależy od liczby mieszkańców (macierz ma stały rozmiar),
+więc model nadaje się także do populacji liczonych w milionach.
+PopulationManager używa go opcjonalnie (enable_cohort_model).
+"""
+from typing import Dict
+
+import numpy as np
+
+from .population import SocialClass
+
+# Przedziały wieku: (etykieta, dolna granica, szerokość w latach; None = bez górnej granicy)
+AGE_BANDS = (
+    ('0-4', 0, 5),
+    ('5-14', 5, 10),
+    ('15-24', 15, 10),
+    ('25-44', 25, 20),
+    ('45-64', 45, 20),
+    ('65-79', 65, 15),
+    ('80+', 80, None),
+)
+SOCIAL_CLASSES = tuple(SocialClass)
+
+# Udział przedziałów w grupach wiekowych PopulationGroup.age_distribution
+AGE_GROUP_BANDS = {
+    'young': (0.2, 0.4, 0.4, 0, 0, 0, 0),      # 0-25 lat (proporcjonalnie do szerokości)
+    'adult': (0, 0, 0, 0.5, 0.5, 0, 0),        # 26-65 lat
+    'elderly': (0, 0, 0, 0, 0, 0.75, 0.25),    # 65+ lat
+}
+DEFAULT_AGE_DISTRIBUTION = {'young': 30, 'adult': 50, 'elderly': 20}
+
+# Względna śmiertelność i płodność przedziałów (normalizowane na profilu początkowym)
+RELATIVE_MORTALITY = np.array([0.002, 0.0005, 0.001, 0.002, 0.008, 0.03, 0.12])
+RELATIVE_FERTILITY = np.array([0, 0, 0.4, 1.0, 0.05, 0, 0])
+# Profil wieku migrantów (głównie młodzi dorośli)
+MIGRANT_PROFILE = np.array([0.1, 0.1, 0.3, 0.4, 0.1, 0, 0])
+WORKING_AGE = np.array([False, False, True, True, True, False, False])  # 15-64 lata
+
+# Przejścia edukacyjne na turę: (przedział, z klasy, do klasy, część)
+# Zapisy na studia (ENROLMENT) skalowane są zadowoleniem z edukacji
+ENROLMENT = (
+    ('15-24', SocialClass.WORKER, SocialClass.STUDENT, 0.05),
+    ('15-24', SocialClass.UNEMPLOYED, SocialClass.STUDENT, 0.05),
+)
+GRADUATION = (
+    ('15-24', SocialClass.STUDENT, SocialClass.MIDDLE_CLASS, 0.1),
+    ('25-44', SocialClass.STUDENT, SocialClass.MIDDLE_CLASS, 0.3),
+    ('25-44', SocialClass.STUDENT, SocialClass.WORKER, 0.1),
+    ('45-64', SocialClass.STUDENT, SocialClass.WORKER, 0.5),
+    ('25-44', SocialClass.MIDDLE_CLASS, SocialClass.UPPER_CLASS, 0.01),
+    ('45-64', SocialClass.MIDDLE_CLASS, SocialClass.UPPER_CLASS, 0.01),
+)
+
+MAX_POPULATION_DECLINE = 0.02  # maksymalny spadek populacji w turze (jak w modelu grup)
+
+
+def _band(label: str) -> int:
+    return [band[0] for band in AGE_BANDS].index(label)
+
+
+def _class(social_class: SocialClass) -> int:
+    return SOCIAL_CLASSES.index(social_class)
+
+
+class CohortModel:
+    """
+    Liczebności populacji w macierzy przedziały wieku x klasy społeczne.
+
+    Liczebności są zmiennoprzecinkowe (przepływy są ułamkami przedziałów),
+    class_totals() zaokrągla je do liczebności grup PopulationManager.
+    """
+
+    def __init__(self, counts: np.ndarray, years_per_turn: float = 1.0):
+        self.counts = np.asarray(counts, dtype=np.float64).reshape(len(AGE_BANDS), len(SOCIAL_CLASSES))
+        self.years_per_turn = years_per_turn
+        # Część przedziału przechodząca do następnego w turze
+        self.aging_rate = np.array([years_per_turn / width if width else 0.0 for _, _, width in AGE_BANDS])
+
+        # Śmiertelność i płodność względne - średnia 1.0 na profilu domyślnym,
+        # więc na starcie łączne urodzenia/zgony są takie jak w modelu grup
+        default_profile = self.age_profile(DEFAULT_AGE_DISTRIBUTION)
+        self.mortality = RELATIVE_MORTALITY / (RELATIVE_MORTALITY @ default_profile)
+        self.fertility = RELATIVE_FERTILITY / (RELATIVE_FERTILITY @ default_profile)
+
+        self._enrolment = self._transition_matrix(ENROLMENT)
+        self._graduation = self._transition_matrix(GRADUATION)
+
+    @staticmethod
+    def age_profile(age_distribution: Dict[str, float]) -> np.ndarray:
+        """Udział przedziałów wieku dla rozkładu young/adult/elderly (suma 1)"""
+        profile = sum(np.array(AGE_GROUP_BANDS[name]) * share for name, share in age_distribution.items()
+                      if name in AGE_GROUP_BANDS)
+        total = np.sum(profile)
+        return profile / total if total > 0 else np.array(AGE_GROUP_BANDS['adult'], dtype=np.float64)
+
+    @classmethod
+    def from_groups(cls, groups: Dict, years_per_turn: float = 1.0) -> 'CohortModel':
+        """Tworzy model z grup PopulationGroup (rozkład wieku każdej grupy na przedziały)"""
+        counts = np.zeros((len(AGE_BANDS), len(SOCIAL_CLASSES)))
+        for social_class, group in groups.items():
+            profile = cls.age_profile(group.age_distribution or DEFAULT_AGE_DISTRIBUTION)
+            counts[:, _class(social_class)] = profile * group.count
+        return cls(counts, years_per_turn)
+
+    def _transition_matrix(self, transitions) -> np.ndarray:
+        """Przepływy klas (przedział x z klasy x do klasy) - bez przekątnej"""
+        matrix = np.zeros((len(AGE_BANDS), len(SOCIAL_CLASSES), len(SOCIAL_CLASSES)))
+        for band, source, target, share in transitions:
+            matrix[_band(band), _class(source), _class(target)] = share
+        return matrix
+
+    def _apply_transitions(self, flows: np.ndarray):
+        """Przenosi część liczebności między klasami (flows: przedział x z x do)"""
+        moved = self.counts[:, :, None] * flows
+        self.counts += moved.sum(axis=1) - moved.sum(axis=2)
+
+    def total(self) -> float:
+        return float(self.counts.sum())
+
+    def class_totals(self) -> Dict[SocialClass, int]:
+        """Liczebności klas społecznych (zaokrąglone)"""
+        return {social_class: int(round(total))
+                for social_class, total in zip(SOCIAL_CLASSES, self.counts.sum(axis=0).tolist())}
+
+    def step(self, birth_rate: float, death_rate: float, migration: float,
+             job_finding_rate: float = 0.0, education_factor: float = 1.0) -> Dict[str, float]:
+        """
+        Jedna tura modelu.
+
+        Args:
+            birth_rate: urodzenia na mieszkańca w turze (dla profilu domyślnego)
+            death_rate: zgony na mieszkańca w turze (dla profilu domyślnego)
+            migration: saldo migracji (osoby, ujemne - emigracja)
+            job_finding_rate: część bezrobotnych w wieku produkcyjnym znajdujących pracę
+            education_factor: mnożnik zapisów na studia (np. zadowolenie z edukacji / 100)
+        Returns:
+            Dict: urodzenia, zgony i migracja w tej turze
+        """
+        start_total = self.total()
+        if start_total <= 0:
+            return {'births': 0.0, 'deaths': 0.0, 'migration': 0.0}
+
+        # Zgony i urodzenia (dzieci w klasie rodziców)
+        deaths = self.counts * np.minimum(1.0, death_rate * self.mortality)[:, None]
+        births = (self.counts * (birth_rate * self.fertility)[:, None]).sum(axis=0)
+        self.counts -= deaths
+
+        # Starzenie - przejście do następnego przedziału wieku
+        aging = self.counts * self.aging_rate[:, None]
+        self.counts -= aging
+        self.counts[1:] += aging[:-1]
+        self.counts[0] += births
+
+        # Edukacja i zatrudnienie (przejścia między klasami)
+        flows = self._enrolment * education_factor + self._graduation
+        flows[WORKING_AGE, _class(SocialClass.UNEMPLOYED), _class(SocialClass.WORKER)] += job_finding_rate
+        self._apply_transitions(flows)
+
+        migration = self._migrate(migration)
+
+        # Zabezpieczenie przed drastycznym spadkiem populacji
+        end_total = self.total()
+        if end_total < start_total * (1 - MAX_POPULATION_DECLINE):
+            self.counts *= start_total * (1 - MAX_POPULATION_DECLINE) / end_total
+        return {'births': float(births.sum()), 'deaths': float(deaths.sum()), 'migration': migration}
+
+    def _migrate(self, migration: float) -> float:
+        """Rozkłada saldo migracji według profilu migrantów i struktury klas (bez bezrobotnych)"""
+        if migration == 0:
+            return 0.0
+        class_share = self.counts.sum(axis=0)
+        class_share[_class(SocialClass.UNEMPLOYED)] = 0
+        if class_share.sum() <= 0:
+            return 0.0
+        profile = np.outer(MIGRANT_PROFILE, class_share / class_share.sum())
+        if migration < 0:
+            # Emigracja nie może przekroczyć liczebności komórek
+            change = np.maximum(-self.counts, migration * profile)
+        else:
+            change = migration * profile
+        self.counts += change
+        return float(change.sum())
+
+    def add_people(self, count: float, social_class: SocialClass = SocialClass.WORKER):
+        """
+        Natychmiastowa zmiana populacji (np. nowe mieszkania, wydarzenia).
+
+        Dodawani mieszkańcy trafiają do klasy social_class według profilu
+        migrantów, usuwani - proporcjonalnie z całej populacji.
+        """
+        if count >= 0:
+            self.counts[:, _class(social_class)] += count * MIGRANT_PROFILE
+        else:
+            total = self.total()
+            if total > 0:
+                self.counts *= max(0.0, 1 + count / total)
+
+    def demographics(self) -> Dict:
+        """Rozszerzone statystyki demograficzne (rozkład wieku, mediana, obciążenie demograficzne)"""
+        by_age = self.counts.sum(axis=1)
+        total = float(by_age.sum())
+        children = float(by_age[:_band('15-24')].sum())
+        elderly = float(by_age[_band('65-79'):].sum())
+        working = total - children - elderly
+        return {
+            'age_bands': {label: round(count) for (label, _, _), count in zip(AGE_BANDS, by_age.tolist())},
+            'median_age': self._median_age(by_age, total),
+            'dependency_ratio': (children + elderly) / working if working > 0 else 0.0,
+            'working_age': round(working),
+        }
+
+    @staticmethod
+    def _median_age(by_age: np.ndarray, total: float) -> float:
+        """Mediana wieku przy równomiernym rozkładzie wieku w przedziale (80+ jako 80-100)"""
+        if total <= 0:
+            return 0.0
+        cumulative = np.cumsum(by_age)
+        band = int(np.searchsorted(cumulative, total / 2))
+        _, lower, width = AGE_BANDS[band]
+        before = cumulative[band] - by_age[band]
+        return lower + (width or 20) * (total / 2 - before) / by_age[band]
+
+    def save_to_dict(self) -> Dict:
+        return {'counts': self.counts.tolist(), 'years_per_turn': self.years_per_turn}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CohortModel':
+        return cls(np.array(data['counts']), data.get('years_per_turn', 1.0))
@@ -79,6 +79,9 @@ class ConfigManager:
             "game_settings": {
                 "default_map_size": {"width": 60, "height": 60},  # domyślny rozmiar mapy w kafelkach
                 "auto_save_interval": 300,                        # automatyczny zapis co 5 minut (300 sekund)
+                "auto_save_slots": 3,                             # liczba rotacyjnych slotów autozapisu
+                "save_compression": "gzip",                       # kompresja zapisów: gzip/lzma/none
+                "population_model": "groups",                     # model populacji: groups/cohorts (przedziały wieku)
                 "difficulty": "Normal",                           # poziom trudności: Easy/Normal/Hard
                 "language": "pl",                                 # język interfejsu (kod ISO 639-1)
                 "enable_sound": True,                             # czy włączyć dźwięki w grze
@@ -107,7 +110,8 @@ class ConfigManager:
             "database_settings": {
                 "db_path": "city_builder.db",                    # ścieżka do pliku bazy danych SQLite
                 "backup_interval": 3600,                         # interwał kopii zapasowych w sekundach (1 godzina)
-                "max_backups": 5                                 # maksymalna liczba przechowywanych kopii zapasowych
+                "max_backups": 5,                                # maksymalna liczba przechowywanych kopii zapasowych
+                "background_writer": True                        # zatwierdzanie zapisów tur w wątku w tle
             },
             # === USTAWIENIA EKSPORTU ===
             "export_settings": {
@@ -0,0 +1,250 @@
+"""
+Mapy zasięgu usług publicznych (szkoły, szpitale, policja, straż, parki).
+
+Dla każdej potrzeby mieszkańców obsługiwanej przez budynki usługowe
+utrzymywana jest warstwa (width, height) z dostępem do usługi na kafelku:
+każdy budynek dodaje jądro o promieniu zasięgu swojego typu (1.0 do połowy
+promienia, dalej liniowy spadek do 0 za promieniem). Warstwa mieszkańców
+zawiera populację budynków mieszkalnych w ich środkach.
+
+Podaż usługi liczona jest z uwzględnieniem położenia: część podaży budynków
+usługowych (z księgi agregatów) jest mnożona przez udział mieszkańców
+w zasięgu usługi (ważony dostępem, maks. 1.0 na kafelek).
+
+Warstwy aktualizowane są przyrostowo przy stawianiu i usuwaniu budynku
+(dodanie/odjęcie jądra na wycinku), a rebuild() przelicza je od zera
+splotem rozmieszczenia budynków z jądrami (FFT NumPy o rozmiarze z małymi
+czynnikami pierwszymi, widma jąder zapamiętywane).
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .building_ledger import NEED_EFFECTS
+from .tile import BuildingType
+
+# Typ budynku usługowego -> (obsługiwana potrzeba, promień zasięgu w kafelkach)
+SERVICE_COVERAGE = {
+    BuildingType.SCHOOL: ('education', 8),
+    BuildingType.UNIVERSITY: ('education', 12),
+    BuildingType.HOSPITAL: ('healthcare', 10),
+    BuildingType.POLICE: ('safety', 8),
+    BuildingType.FIRE_STATION: ('safety', 8),
+    BuildingType.PARK: ('entertainment', 5),
+    BuildingType.STADIUM: ('entertainment', 10),
+}
+COVERAGE_NEEDS = tuple(sorted({need for need, _ in SERVICE_COVERAGE.values()}))
+MAX_RADIUS = max(radius for _, radius in SERVICE_COVERAGE.values())
+# rebuild() splata grupę przez FFT, gdy jądra jej budynków pokrywają łącznie
+# więcej niż tyle powierzchni mapy - rzadsze grupy są szybsze do nałożenia wprost
+FFT_MIN_KERNEL_AREA = 2.0
+
+
+def coverage_kernel(radius: int) -> np.ndarray:
+    """
+    Jądro zasięgu (2r+1, 2r+1): pełny dostęp (1.0) do połowy promienia,
+    dalej liniowy spadek z odległością, 0 za promieniem.
+    """
+    offsets = np.arange(-radius, radius + 1)
+    distance = np.hypot(offsets[:, None], offsets[None, :])
+    falloff = (radius + 1 - distance) / (radius + 1 - radius // 2)
+    return np.clip(falloff, 0, 1) * (distance <= radius)
+
+
+def fast_fft_length(n: int) -> int:
+    """Najmniejsza długość >= n o czynnikach 2, 3 i 5 (szybka FFT, jak scipy.fft.next_fast_len)"""
+    while True:
+        m = n
+        for factor in (2, 3, 5):
+            while m % factor == 0:
+                m //= factor
+        if m == 1:
+            return n
+        n += 1
+
+
+def building_center(anchor: Tuple[int, int], building) -> Tuple[int, int]:
+    """Środkowy kafelek budynku (dla budynków wielokafelkowych)"""
+    width, height = building.get_building_size()
+    return anchor[0] + width // 2, anchor[1] + height // 2
+
+
+class ServiceCoverage:
+    """
+    Warstwy zasięgu usług i rozmieszczenia mieszkańców na mapie.
+
+    Jak BuildingLedger - wkład budynku zapamiętywany jest pod kluczem kafla
+    głównego, więc usunięcie odejmuje dokładnie to, co zostało dodane.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.layers: Dict[str, np.ndarray] = {need: np.zeros((width, height)) for need in COVERAGE_NEEDS}
+        self.residents = np.zeros((width, height))
+        self.service_supply: Dict[str, float] = {need: 0.0 for need in COVERAGE_NEEDS}
+        # kafel główny -> (środek, potrzeba, promień, podaż, mieszkańcy)
+        self._contributions: Dict[Tuple[int, int], Tuple] = {}
+        self._kernels: Dict[int, np.ndarray] = {}
+        # Rozmiar FFT dla rebuild() - wystarczy zapas MAX_RADIUS, by splot cykliczny nie zawijał
+        self._fft_shape = (fast_fft_length(width + MAX_RADIUS), fast_fft_length(height + MAX_RADIUS))
+        self._kernel_spectra: Dict[int, np.ndarray] = {}
+        self._shares: Dict[str, float] = {}  # cache udziałów mieszkańców w zasięgu
+
+    def _kernel(self, radius: int) -> np.ndarray:
+        kernel = self._kernels.get(radius)
+        if kernel is None:
+            kernel = self._kernels[radius] = coverage_kernel(radius)
+        return kernel
+
+    @staticmethod
+    def _contribution(anchor: Tuple[int, int], building) -> Tuple:
+        need, radius = SERVICE_COVERAGE.get(building.building_type, (None, 0))
+        effects = building.effects
+        # Podaż jak building_need_supply() - typy usług rozrywki to parki i stadiony
+        supply = sum(effects.get(name, 0) for name in NEED_EFFECTS[need]) if need else 0
+        residents = max(0, effects.get('population', 0))
+        return building_center(anchor, building), need, radius, supply, residents
+
+    def _stamp(self, layer: np.ndarray, center: Tuple[int, int], radius: int, sign: float):
+        """Dodaje (sign=1) lub odejmuje (sign=-1) jądro na wycinku warstwy przyciętym do mapy"""
+        x, y = center
+        x0, x1 = max(0, x - radius), min(self.width, x + radius + 1)
+        y0, y1 = max(0, y - radius), min(self.height, y + radius + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        kernel = self._kernel(radius)
+        layer[x0:x1, y0:y1] += sign * kernel[x0 - x + radius:x1 - x + radius, y0 - y + radius:y1 - y + radius]
+
+    def _apply(self, contribution: Tuple, sign: float):
+        (x, y), need, radius, supply, residents = contribution
+        if need is not None:
+            self._stamp(self.layers[need], (x, y), radius, sign)
+            self.service_supply[need] += sign * supply
+        if residents and 0 <= x < self.width and 0 <= y < self.height:
+            self.residents[x, y] += sign * residents
+        self._shares.clear()
+
+    def add_building(self, anchor: Tuple[int, int], building):
+        """Dolicza budynek postawiony z kaflem głównym anchor (O(promień²))"""
+        if anchor in self._contributions:
+            self.remove_building(anchor)
+        contribution = self._contribution(anchor, building)
+        if contribution[1] is None and not contribution[4]:
+            return  # ani usługa, ani mieszkania
+        self._contributions[anchor] = contribution
+        self._apply(contribution, 1.0)
+
+    def remove_building(self, anchor: Tuple[int, int]):
+        """Odejmuje wkład budynku zapamiętany przy dodaniu"""
+        contribution = self._contributions.pop(anchor, None)
+        if contribution is not None:
+            self._apply(contribution, -1.0)
+
+    def update_building(self, anchor: Tuple[int, int], building):
+        """Przelicza wkład budynku po zmianie jego efektów"""
+        self.remove_building(anchor)
+        self.add_building(anchor, building)
+
+    def clear(self):
+        for layer in self.layers.values():
+            layer.fill(0)
+        self.residents.fill(0)
+        self.service_supply = {need: 0.0 for need in COVERAGE_NEEDS}
+        self._contributions.clear()
+        self._shares.clear()
+
+    def rebuild(self, buildings: Iterable[Tuple[Tuple[int, int], object]], use_fft: Optional[bool] = None):
+        """
+        Przelicza wszystkie warstwy od zera.
+
+        Budynki grupowane są według pary (potrzeba, promień). Gęsta grupa przechodzi
+        jedną transformację FFT, jest mnożona przez zapamiętane widmo jądra
+        i sumowana w widmie potrzeby - na potrzebę przypada jedna transformacja
+        odwrotna, a koszt zależy od rozmiaru mapy, nie od liczby budynków.
+        Rzadkie grupy (FFT_MIN_KERNEL_AREA) nakładają jądra wprost jak add_building.
+
+        Args:
+            buildings: pary (kafel główny, budynek), np. CityMap.buildings.items()
+            use_fft: wymusza splot FFT (True) lub nakładanie jąder (False) dla
+                wszystkich grup; domyślnie wybór według kosztu
+        """
+        self.clear()
+        placements: Dict[Tuple[str, int], List[Tuple[int, int]]] = {}  # środki budynków grupy
+        for anchor, building in buildings:
+            contribution = self._contribution(anchor, building)
+            (x, y), need, radius, supply, residents = contribution
+            if need is None and not residents:
+                continue
+            self._contributions[anchor] = contribution
+            inside = 0 <= x < self.width and 0 <= y < self.height
+            if need is not None:
+                self.service_supply[need] += supply
+                if inside:
+                    placements.setdefault((need, radius), []).append((x, y))
+            if residents and inside:
+                self.residents[x, y] += residents
+
+        spectra: Dict[str, np.ndarray] = {}
+        for (need, radius), centers in placements.items():
+            dense = len(centers) * (2 * radius + 1) ** 2 > FFT_MIN_KERNEL_AREA * self.width * self.height
+            if not (dense if use_fft is None else use_fft):
+                for center in centers:
+                    self._stamp(self.layers[need], center, radius, 1.0)
+                continue
+            grid = np.zeros((self.width, self.height))
+            np.add.at(grid, tuple(np.array(centers).T), 1)
+            spectrum = np.fft.rfft2(grid, self._fft_shape) * self._kernel_spectrum(radius)
+            if need in spectra:
+                spectra[need] += spectrum
+            else:
+                spectra[need] = spectrum
+        for need, spectrum in spectra.items():
+            layer = np.fft.irfft2(spectrum, self._fft_shape)[:self.width, :self.height]
+            self.layers[need] += np.where(layer > 1e-9, layer, 0.0)
+
+    def _kernel_spectrum(self, radius: int) -> np.ndarray:
+        """
+        Widmo jądra o rozmiarze _fft_shape (zapamiętywane).
+
+        Środek jądra leży w (0, 0), a ujemne przesunięcia zawijają się na koniec
+        tablicy, więc splot cykliczny nie przesuwa warstwy względem mapy.
+        """
+        spectrum = self._kernel_spectra.get(radius)
+        if spectrum is None:
+            padded = np.zeros(self._fft_shape)
+            padded[:2 * radius + 1, :2 * radius + 1] = self._kernel(radius)
+            padded = np.roll(padded, (-radius, -radius), axis=(0, 1))
+            spectrum = self._kernel_spectra[radius] = np.fft.rfft2(padded)
+        return spectrum
+
+    def access(self, need: str) -> np.ndarray:
+        """Dostęp do usługi na kafelkach (0.0-1.0)"""
+        return np.minimum(1.0, self.layers[need])
+
+    def served_share(self, need: str) -> float:
+        """
+        Udział mieszkańców w zasięgu usługi (ważony dostępem).
+
+        Bez budynków mieszkalnych na mapie położenie mieszkańców nie jest znane -
+        zwraca 1.0 (cała podaż się liczy).
+        """
+        share = self._shares.get(need)
+        if share is None:
+            total = self.residents.sum()
+            if total <= 0:
+                share = 1.0
+            else:
+                share = float((self.residents * self.access(need)).sum() / total)
+            self._shares[need] = share
+        return share
+
+    def weighted_supply(self, need: str, total_supply: float) -> float:
+        """
+        Podaż potrzeby z uwzględnieniem zasięgu.
+
+        Część podaży z budynków usługowych mnożona jest przez served_share,
+        pozostała część (np. z innych budynków) liczy się w całości.
+        """
+        service_supply = min(self.service_supply.get(need, 0.0), total_supply)
+        return total_supply - service_supply + service_supply * self.served_share(need)
@@ -58,10 +58,11 @@ class DiplomaticMission:
     started_turn: int  # Numer tury rozpoczęcia
     description: str  # Opis misji
     
-    def calculate_success(self, relationship_points: int, city_reputation: int) -> bool:
+    def calculate_success(self, relationship_points: int, city_reputation: int, rng=random) -> bool:
         """
         Oblicza czy misja zakończy się sukcesem na podstawie szansy bazowej,
         relacji z miastem i reputacji gracza.
+        rng - źródło losowości (strumień DiplomacyManager, domyślnie moduł random).
         """
         base_chance = self.success_chance  # Bazowa szansa sukcesu
         # Modyfikator za relacje
@@ -84,7 +85,7 @@ class DiplomaticMission:
         }
         base_chance += mission_difficulty.get(self.mission_type, 0)
         # Losowy rzut - czy misja się powiodła
-        return random.random() < max(0.1, min(0.9, base_chance))
+        return rng.random() < max(0.1, min(0.9, base_chance))
 
 @dataclass
 class War:
@@ -105,16 +106,17 @@ class War:
     war_exhaustion: float  # Wyczerpanie wojną (0-1)
     active: bool = True  # Czy wojna jest aktywna
     
-    def calculate_battle_outcome(self) -> Dict:
+    def calculate_battle_outcome(self, rng=random) -> Dict:
         """
         Oblicza wynik bitwy na podstawie sił stron i losowości.
         Zwraca słownik z informacjami o wyniku bitwy.
+        rng - źródło losowości (strumień DiplomacyManager, domyślnie moduł random).
         """
         strength_ratio = self.our_strength / max(self.enemy_strength, 1)  # Stosunek sił
         win_chance = 0.5 + (strength_ratio - 1) * 0.2  # Bazowa szansa wygranej
         win_chance = max(0.1, min(0.9, win_chance))  # Ograniczenie szansy do 10-90%
-        victory = random.random() < win_chance  # Czy wygraliśmy?
-        base_casualties = random.randint(10, 50)  # Bazowe straty
+        victory = rng.random() < win_chance  # Czy wygraliśmy?
+        base_casualties = rng.randint(10, 50)  # Bazowe straty
         if victory:
             our_casualties = int(base_casualties * 0.3)  # Mniejsze straty własne
             enemy_casualties = int(base_casualties * 1.2)  # Większe straty przeciwnika
@@ -124,7 +126,7 @@ class War:
         self.casualties_us += our_casualties  # Dodaj straty do sumy
         self.casualties_enemy += enemy_casualties
         self.war_exhaustion = min(1.0, self.war_exhaustion + 0.05)  # Zwiększ wyczerpanie
-        battle_cost = random.randint(1000, 5000)  # Koszt bitwy
+        battle_cost = rng.randint(1000, 5000)  # Koszt bitwy
         self.economic_cost += battle_cost
         return {
             'victory': victory,  # Czy wygraliśmy bitwę
@@ -139,7 +141,7 @@ class DiplomaticCity:
     Rozszerzona klasa miasta z systemem dyplomatycznym.
     Przechowuje wszystkie informacje o relacjach, sile, preferencjach i stanie wojny.
     """
-    def __init__(self, city_id: str, name: str, specialization=None):
+    def __init__(self, city_id: str, name: str, specialization=None, rng=random):
         self.city_id = city_id  # Unikalny identyfikator miasta
         self.name = name  # Nazwa miasta
         self.specialization = specialization  # Specjalizacja miasta (np. przemysł, kultura)
@@ -147,9 +149,9 @@ class DiplomaticCity:
         self.relationship_status = RelationshipStatus.NEUTRAL  # Status relacji (enum)
         self.trade_volume = 0.0  # Wolumen handlu z miastem
         self.reputation = 50  # Reputacja miasta (0-100)
-        self.military_strength = random.randint(500, 1500)  # Siła militarna miasta (losowana)
-        self.economic_power = random.randint(1000, 5000)  # Siła ekonomiczna miasta (losowana)
-        self.population = random.randint(10000, 100000)  # Populacja miasta (losowana)
+        self.military_strength = rng.randint(500, 1500)  # Siła militarna miasta (losowana)
+        self.economic_power = rng.randint(1000, 5000)  # Siła ekonomiczna miasta (losowana)
+        self.population = rng.randint(10000, 100000)  # Populacja miasta (losowana)
         self.last_interaction_turn = 0  # Ostatnia tura interakcji
         # Dyplomatyczne
         self.alliance_expires_turn = None  # Tura wygaśnięcia sojuszu
@@ -158,9 +160,9 @@ class DiplomaticCity:
         self.peace_treaty_expires = None  # Tura wygaśnięcia pokoju
         self.trade_embargo = False  # Czy obowiązuje embargo handlowe
         # Preferencje dyplomatyczne
-        self.aggression_level = random.uniform(0.2, 0.8)  # Skłonność do konfliktów (losowana)
-        self.cooperation_level = random.uniform(0.3, 0.9)  # Skłonność do współpracy (losowana)
-        self.economic_focus = random.uniform(0.4, 1.0)     # Priorytet ekonomii (losowany)
+        self.aggression_level = rng.uniform(0.2, 0.8)  # Skłonność do konfliktów (losowana)
+        self.cooperation_level = rng.uniform(0.3, 0.9)  # Skłonność do współpracy (losowana)
+        self.economic_focus = rng.uniform(0.4, 1.0)     # Priorytet ekonomii (losowany)
 
     def update_relationship(self, points_change: int, turn: int):
         """
@@ -202,7 +204,8 @@ class DiplomacyManager:
     Menedżer systemu dyplomatycznego.
     Zarządza wszystkimi miastami, misjami, wojnami i reputacją gracza.
     """
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
+        self.rng = rng if rng is not None else random.Random()  # Strumień losowości (RandomStreams 'diplomacy')
         self.cities: Dict[str, DiplomaticCity] = {}  # Słownik miast dyplomatycznych
         self.active_missions: List[DiplomaticMission] = []  # Aktywne misje
         self.mission_history: List[DiplomaticMission] = []  # Historia misji
@@ -227,7 +230,7 @@ class DiplomacyManager:
             ("culturalis", "Culturalis", "cultural")
         ]
         for city_id, name, specialization in cities_data:
-            self.cities[city_id] = DiplomaticCity(city_id, name, specialization)
+            self.cities[city_id] = DiplomaticCity(city_id, name, specialization, rng=self.rng)
 
     def create_mission(self, target_city: str, mission_type: MissionType, investment: float = 0) -> Optional[DiplomaticMission]:
         """
@@ -409,7 +412,7 @@ class DiplomacyManager:
             mission.remaining_turns -= 1  # Zmniejsz liczbę pozostałych tur
             if mission.remaining_turns <= 0:
                 city = self.cities[mission.target_city]
-                success = mission.calculate_success(city.relationship_points, self.diplomatic_reputation)
+                success = mission.calculate_success(city.relationship_points, self.diplomatic_reputation, self.rng)
                 if success:
                     mission.status = MissionStatus.COMPLETED
                     self._apply_mission_rewards(mission, city, turn)
@@ -459,7 +462,7 @@ class DiplomacyManager:
             elif penalty_type == 'reputation':
                 self.diplomatic_reputation = max(0, self.diplomatic_reputation + int(value))
             elif penalty_type == 'war_risk':
-                if random.random() < value:
+                if self.rng.random() < value:
                     self._declare_war(city.city_id, WarType.IDEOLOGICAL, turn)
 
     def declare_war(self, target_city: str, war_type: WarType, turn: int) -> Tuple[bool, str]:
@@ -521,7 +524,7 @@ class DiplomacyManager:
         for war in self.active_wars:
             if war.active:
                 if (turn - war.started_turn) % 3 == 0:
-                    battle_result = war.calculate_battle_outcome()
+                    battle_result = war.calculate_battle_outcome(self.rng)
                     war_results.append({
                         'war': war,
                         'battle_result': battle_result,
@@ -558,7 +561,7 @@ class DiplomacyManager:
         territory = terms.get('territory', False)
         if territory:
             base_chance -= 0.3
-        if random.random() < base_chance:
+        if self.rng.random() < base_chance:
             self._end_war(target_city, turn)
             city.update_relationship(20, turn)
             return True, f"Pokój z {city.name} został zawarty"
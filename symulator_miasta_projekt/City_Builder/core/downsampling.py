@@ -0,0 +1,140 @@
+"""
+Redukcja liczby punktów długich serii danych do rozdzielczości wykresu.
+
+Wykres o szerokości W pikseli nie pokaże więcej niż ~W punktów, a gra może
+trwać tysiące tur. Zamiast rysować wszystkie punkty seria jest redukowana
+do szerokości wykresu metodą zachowującą szczyty:
+- LTTB (Largest-Triangle-Three-Buckets) - z każdego przedziału wybierany jest
+  punkt tworzący największy trójkąt z sąsiednimi przedziałami (kształt linii)
+- obwiednia min/max - z każdego przedziału minimum i maksimum (skrajne wartości)
+
+Funkcje zwracają indeksy wybranych punktów, więc kilka serii ze wspólną osią X
+(np. numery tur) można zredukować do wspólnego zbioru indeksów.
+"""
+from collections import OrderedDict
+from typing import Dict, Sequence
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], threshold: int) -> np.ndarray:
+    """
+    Wybiera threshold punktów serii metodą Largest-Triangle-Three-Buckets.
+
+    Pierwszy i ostatni punkt są zawsze zachowane.
+
+    Returns:
+        np.ndarray: rosnące indeksy wybranych punktów
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Granice threshold - 2 przedziałów punktów środkowych (1 .. n-2)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    edges = np.append(edges, n)  # "następny przedział" dla ostatniego to sam ostatni punkt
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0  # punkt wybrany w poprzednim przedziale
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Podwojone pola trójkątów (a, kandydat, średnia następnego przedziału)
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: Sequence[float], buckets: int) -> np.ndarray:
+    """
+    Wybiera z każdego z buckets przedziałów indeks minimum i maksimum (obwiednia).
+
+    Pierwszy i ostatni punkt są zawsze zachowane.
+
+    Returns:
+        np.ndarray: rosnące, unikalne indeksy (co najwyżej 2 * buckets + 2)
+    """
+    n = len(y)
+    if 2 * buckets >= n or buckets < 1:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, n, buckets + 1).astype(np.intp)
+    selected = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        chunk = y[start:end]
+        selected.append(start + int(np.argmin(chunk)))
+        selected.append(start + int(np.argmax(chunk)))
+    return np.unique(selected)
+
+
+def downsample_indices(x: Sequence[float], y: Sequence[float], width: int, method: str = 'lttb') -> np.ndarray:
+    """
+    Indeksy punktów serii zredukowanej do szerokości wykresu width (w pikselach).
+
+    Args:
+        x, y: wartości osi X i serii
+        width: szerokość wykresu - docelowa liczba punktów
+        method: 'lttb' lub 'minmax' (minmax daje 2 punkty na przedział, więc width // 2 przedziałów)
+    """
+    if method == 'lttb':
+        return lttb_indices(x, y, width)
+    if method == 'minmax':
+        return minmax_indices(y, max(1, width // 2))
+    raise ValueError(f"Nieznana metoda redukcji punktów: {method}")
+
+
+class DownsampleCache:
+    """
+    Cache zredukowanych serii - klucz to (nazwa serii, okno danych, szerokość, metoda).
+
+    Okno danych opisane jest pierwszym i ostatnim X oraz liczbą punktów; historia
+    tur jest tylko dopisywana, więc to samo okno oznacza te same dane i kolejne
+    odświeżenia wykresu bez nowej tury nie liczą redukcji od nowa. Gdy historia
+    zostaje zastąpiona (nowa gra, wczytanie zapisu), właściciel musi wywołać clear().
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+
+    def indices(self, name: str, x: Sequence[float], y: Sequence[float], width: int,
+                method: str = 'lttb') -> np.ndarray:
+        """Indeksy punktów zredukowanej serii name (z cache, jeśli okno się nie zmieniło)."""
+        if len(x) == 0:
+            return np.arange(0)
+        key = (name, x[0], x[-1], len(x), int(width), method)
+        indices = self._entries.get(key)
+        if indices is None:
+            indices = downsample_indices(x, y, width, method)
+            self._entries[key] = indices
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)  # usuń najdawniej używane okno
+        else:
+            self._entries.move_to_end(key)
+        return indices
+
+    def downsample(self, x: Sequence[float], series: Dict[str, Sequence[float]], width: int,
+                   method: str = 'lttb') -> np.ndarray:
+        """
+        Wspólne indeksy dla kilku serii ze wspólną osią X.
+
+        Suma zbiorów indeksów wybranych dla każdej serii - zachowuje szczyty
+        każdej z nich, a liczba punktów zależy od width, nie od długości serii.
+        """
+        if len(x) <= width:
+            return np.arange(len(x))
+        selected = [self.indices(name, x, values, width, method) for name, values in series.items()]
+        return np.unique(np.concatenate(selected)) if selected else np.arange(len(x))
+
+    def clear(self):
+        """Usuwa wszystkie okna - wywoływane przy zastąpieniu danych serii."""
+        self._entries.clear()
@@ -36,10 +36,14 @@ class EventManager:
     - Śledzenie historii wydarzeń
     - Zastosowanie efektów decyzji gracza
     """
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
         """
         Konstruktor - inicjalizuje wszystkie dostępne wydarzenia w grze.
+        
+        Args:
+            rng (random.Random): strumień losowości wyboru wydarzeń (RandomStreams 'events')
         """
+        self.rng = rng if rng is not None else random.Random()
         # Lista wszystkich możliwych wydarzeń w grze
         self.events = [
             # KATASTROFY - wydarzenia negatywne wymagające szybkiej reakcji
@@ -212,12 +216,12 @@ class EventManager:
         Returns:
             Event: wybrane wydarzenie do przeprowadzenia
         """
-        # Podstawowa implementacja - wybiera całkowicie losowe wydarzenie
-        event = random.choice(self.events)  # random.choice() wybiera losowy element z listy
-        
-        # Można dodać logikę wyboru wydarzenia na podstawie stanu gry
+        # Logika wyboru wydarzenia na podstawie stanu gry
         if game_state:
             event = self._select_contextual_event(game_state)
+        else:
+            # Podstawowa implementacja - wybiera całkowicie losowe wydarzenie
+            event = self.rng.choice(self.events)  # choice() wybiera losowy element z listy
         
         # Zapisz w historii wydarzeń dla statystyk
         self.event_history.append({
@@ -262,8 +266,8 @@ class EventManager:
                 suitable_events.append(event)
             else:
                 # Dodaj wszystkie inne wydarzenia z mniejszym prawdopodobieństwem
-                # random.random() zwraca liczbę między 0.0 a 1.0
-                if random.random() < 0.3:  # 30% szansy na dodanie
+                # random() zwraca liczbę między 0.0 a 1.0
+                if self.rng.random() < 0.3:  # 30% szansy na dodanie
                     suitable_events.append(event)
         
         # Jeśli nie ma odpowiednich wydarzeń, wybierz z wszystkich dostępnych
@@ -271,7 +275,7 @@ class EventManager:
             suitable_events = self.events
         
         # Zwróć losowe wydarzenie z odpowiednich
-        return random.choice(suitable_events)
+        return self.rng.choice(suitable_events)
     
     def apply_decision_effects(self, event, decision):
         """
@@ -148,10 +148,14 @@ class FinanceManager:
     - Porady finansowe dla gracza
     """
     
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
         """
         Inicjalizuje system finansowy z pustymi listami i domyślnymi wartościami.
+        
+        Args:
+            rng (random.Random): strumień losowości decyzji bankowych (RandomStreams 'finance')
         """
+        self.rng = rng if rng is not None else random.Random()
         self.active_loans: List[Loan] = []  # aktywne pożyczki
         self.loan_history: List[Loan] = []  # historia spłaconych pożyczek
         self.financial_reports: List[FinancialReport] = []  # historia raportów
@@ -407,7 +411,7 @@ class FinanceManager:
         """Zaciąga pożyczkę"""
         approval_chance = loan_offer['approval_chance']
         
-        if random.random() > approval_chance:
+        if self.rng.random() > approval_chance:
             return False, "Wniosek o pożyczkę został odrzucony"
         
         loan = Loan(
@@ -478,8 +482,8 @@ class FinanceManager:
         }
     
     def generate_financial_report(self, turn: int, economy, population_manager, 
-                                buildings: List) -> FinancialReport:
-        """Generuje raport finansowy"""
+                                buildings: List, ledger=None) -> FinancialReport:
+        """Generuje raport finansowy (ledger - opcjonalna księga agregatów budynków)"""
         
         # Oblicz aktywa
         money = economy.get_resource_amount('money')
@@ -490,8 +494,8 @@ class FinanceManager:
         total_liabilities = sum(loan.remaining_amount for loan in self.active_loans)
         
         # Oblicz dochody i wydatki
-        income = economy.calculate_taxes(buildings, population_manager)
-        expenses = economy.calculate_expenses(buildings, population_manager)
+        income = economy.calculate_taxes(buildings, population_manager, ledger)
+        expenses = economy.calculate_expenses(buildings, population_manager, ledger)
         loan_payments = sum(loan.monthly_payment for loan in self.active_loans)
         total_expenses = expenses + loan_payments
         
@@ -8,8 +8,41 @@ from .trade import TradeManager
 from .achievements import AchievementManager
 from .finance import FinanceManager
 from .scenarios import ScenarioManager
+from .random_streams import RandomStreams
+from .turn_context import TurnContext
+from .save_format import (SAVE_FORMAT_VERSION, building_rows, copy_containers, decode_buildings,
+                          decode_terrain, encode_building_rows, encode_terrain, read_save_file,
+                          write_save_file)
 import time
-from copy import deepcopy
+import numpy as np
+
+# Metryki zbierane co turę przez GameEngine.simulate() (kolejność kolumn wyniku)
+SIMULATION_METRICS = (
+    'turn', 'population', 'money', 'income', 'expenses',
+    'satisfaction', 'unemployment_rate', 'buildings', 'city_level'
+)
+
+# Opcje trybu bezgłowego - domyślnie wyłączone jest to, co służy tylko graczowi
+# (prezentacja i statystyki); systemy wpływające na rozgrywkę działają jak w update_turn
+DEFAULT_SIMULATION_OPTIONS = {
+    'metrics': SIMULATION_METRICS,   # zbierane metryki
+    'alerts': False,                 # alerty dla gracza (osiągnięcia, scenariusz, sytuacje krytyczne)
+    'financial_reports': False,      # przechowywanie raportów finansowych w FinanceManager
+    'economy_history': False,        # historia ekonomii i alerty o zmianach dochodów
+    'scenario': True,                # sprawdzanie celów aktywnego scenariusza
+    'achievements': False,           # sprawdzanie osiągnięć (włącza też 'statistics')
+    'statistics': False,             # statystyki dla osiągnięć i raportów (_update_enhanced_statistics)
+    'trade_market': True,            # ceny rynkowe i oferty miast - wpływają na rozgrywkę
+    'demographics': False,           # pełna demografia w TurnContext (metryki liczone bez niej)
+    'policy': None,                  # callable(engine) wywoływany przed każdą turą (np. strategia budowy)
+    'stop_on_scenario_end': False,   # przerwij po ukończeniu lub przegraniu scenariusza
+    'stop_on_bankruptcy': False      # przerwij gdy miasto zbankrutuje (Economy.is_bankrupt)
+}
+
+# Opcje zwykłej tury gry (update_turn) - wszystkie systemy włączone
+INTERACTIVE_TURN_OPTIONS = dict(DEFAULT_SIMULATION_OPTIONS, alerts=True, financial_reports=True,
+                                economy_history=True, achievements=True, statistics=True,
+                                demographics=True)
 
 class GameEngine:
     """
@@ -24,24 +57,30 @@ class GameEngine:
     - Zbieranie statystyk i osiągnięć
     """
     
-    def __init__(self, map_width: int = 60, map_height: int = 60):
+    def __init__(self, map_width: int = 60, map_height: int = 60, seed: Optional[int] = None):
         """
         Konstruktor silnika gry.
         
         Args:
             map_width (int): szerokość mapy w kafelkach (domyślnie 60)
             map_height (int): wysokość mapy w kafelkach (domyślnie 60)
+            seed (int): ziarno gry - ta sama wartość daje powtarzalną rozgrywkę
+                (domyślnie losowe, zapisywane w pliku gry)
         """
+        # Strumienie losowości podsystemów wyprowadzone z jednego ziarna gry
+        self.random_streams = RandomStreams(seed)
+        
         # Podstawowe systemy gry
-        self.city_map = CityMap(map_width, map_height)    # mapa miasta z kafelkami
+        self.city_map = CityMap(map_width, map_height,
+                                rng=self.random_streams.get('city_map'))  # mapa miasta z kafelkami
         self.economy = Economy()                          # system ekonomiczny (pieniądze, zasoby)
-        self.population = PopulationManager()             # zarządzanie ludnością
+        self.population = PopulationManager(rng=self.random_streams.get('population'))  # zarządzanie ludnością
         
         # Zaawansowane systemy dodane w późniejszych fazach
         self.technology_manager = TechnologyManager()     # drzewo technologii
-        self.trade_manager = TradeManager()               # handel z innymi miastami
+        self.trade_manager = TradeManager(rng=self.random_streams.get('trade'))  # handel z innymi miastami
         self.achievement_manager = AchievementManager()   # system osiągnięć
-        self.finance_manager = FinanceManager()           # system finansowy i pożyczek
+        self.finance_manager = FinanceManager(rng=self.random_streams.get('finance'))  # system finansowy i pożyczek
         self.scenario_manager = ScenarioManager()         # scenariusze i tryby gry
         
         # Stan gry
@@ -107,6 +146,8 @@ class GameEngine:
         
         # System alertów i powiadomień
         self.alerts = []                              # lista aktualnych alertów dla gracza
+        self.alerts_enabled = True                    # False w trybie bezgłowym (simulate)
+        self.last_turn_context: Optional[TurnContext] = None  # migawka ostatniej tury
         
         # Aktualny scenariusz
         self.current_scenario = None                  # obecnie uruchomiony scenariusz
@@ -115,6 +156,12 @@ class GameEngine:
         self.special_sandbox_mode = False             # Tryb nieograniczonych środków
         self.bankruptcy_disabled = False              # Wyłączenie bankructwa
         
+        # Tryb debugowania księgi agregatów - co turę porównuje księgę z pełnym przeliczeniem
+        self.ledger_debug = False
+        
+        # Kompresja plików zapisu: 'gzip', 'lzma' lub 'none' (patrz core/save_format.py)
+        self.save_compression = 'gzip'
+        
     def get_all_buildings(self) -> List[Building]:
         """
         Pobiera wszystkie budynki z mapy miasta.
@@ -122,20 +169,12 @@ class GameEngine:
         Returns:
             List[Building]: lista wszystkich budynków znajdujących się na mapie
             
-        Ta metoda przechodzi przez każdy kafelek na mapie i zbiera wszystkie budynki.
+        Budynki pochodzą z rejestru CityMap (kafel główny -> budynek), więc koszt
+        jest proporcjonalny do liczby budynków, a nie do rozmiaru mapy.
+        Budynek wielokafelkowy występuje na liście tylko raz.
         Jest używana do aktualizacji ekonomii, populacji i innych systemów.
         """
-        buildings = []  # pusta lista na budynki
-        
-        # Przejdź przez wszystkie kafelki na mapie (podwójna pętla)
-        for x in range(self.city_map.width):          # dla każdej kolumny
-            for y in range(self.city_map.height):     # dla każdego rzędu
-                tile = self.city_map.get_tile(x, y)   # pobierz kafelek na pozycji (x, y)
-                # Sprawdź czy kafelek istnieje i czy ma budynek
-                if tile and tile.building:
-                    buildings.append(tile.building)   # dodaj budynek do listy
-        
-        return buildings  # zwróć listę wszystkich budynków
+        return self.city_map.get_all_buildings()
     
     def can_build(self, x: int, y: int, building: Building) -> tuple[bool, str]:
         """
@@ -221,21 +260,8 @@ class GameEngine:
             return False
         
         # KROK 2: Zajmij wszystkie kafelki potrzebne dla budynku
-        occupied_tiles = building.get_occupied_tiles(x, y)  # lista wszystkich kafelków budynku
-        
-        # Ustaw budynek na wszystkich kaflach (główny + pomocnicze)
-        for i, (tile_x, tile_y) in enumerate(occupied_tiles):
-            tile = self.city_map.get_tile(tile_x, tile_y)
-            
-            # Pierwszy kafel (indeks 0) to główny kafel budynku
-            if i == 0:
-                tile.building = building  # główny kafel ma pełny obiekt budynku
-                tile.is_main_tile = True  # oznacz jako główny kafel
-            else:
-                tile.building = building  # pomocnicze kafle też mają referencję do budynku
-                tile.is_main_tile = False  # oznacz jako pomocniczy kafel
-            
-            tile.is_occupied = True  # zaznacz kafel jako zajęty
+        # CityMap ustawia budynek na kaflach (główny + pomocnicze) i rejestruje go
+        self.city_map.add_building(x, y, building)
         
         # KROK 3: Zastosuj natychmiastowe efekty budynku
         # Jeśli budynek mieszkalny - dodaj populację od razu
@@ -267,32 +293,15 @@ class GameEngine:
         if not tile or not tile.building:
             return False
         
-        building = tile.building
+        # Usuń budynek z mapy - rejestr CityMap zna kafel główny,
+        # więc kliknięcie na pomocniczy kafel nie wymaga przeszukiwania sąsiedztwa
+        removed = self.city_map.remove_building(x, y)
+        if removed is None:
+            return False
+        _, building = removed
         building_name = building.name
         building_cost = building.cost
         
-        # Znajdź wszystkie kafle zajęte przez budynek
-        # Jeśli kliknięto pomocniczy kafel, znajdź główny kafel
-        main_tile = tile
-        main_x, main_y = x, y
-        
-        # Jeśli to nie główny kafel, znajdź główny kafel tego budynku
-        if hasattr(tile, 'is_main_tile') and not tile.is_main_tile:
-            # Przeszukaj pobliskie kafle aby znaleźć główny kafel tego samego budynku
-            for search_x in range(max(0, x - 4), min(self.city_map.width, x + 5)):
-                for search_y in range(max(0, y - 4), min(self.city_map.height, y + 5)):
-                    search_tile = self.city_map.get_tile(search_x, search_y)
-                    if (search_tile and search_tile.building == building and 
-                        hasattr(search_tile, 'is_main_tile') and search_tile.is_main_tile):
-                        main_tile = search_tile
-                        main_x, main_y = search_x, search_y
-                        break
-                if main_tile != tile:
-                    break
-        
-        # Pobierz wszystkie kafle zajęte przez budynek
-        occupied_tiles = building.get_occupied_tiles(main_x, main_y)
-        
         # Usuwanie efektów budynku
         if hasattr(building, 'effects'):
             effects = building.effects
@@ -303,21 +312,13 @@ class GameEngine:
             if 'jobs' in effects:
                 pass
         
-        # Usuń budynek ze wszystkich kafelków
-        for tile_x, tile_y in occupied_tiles:
-            tile_to_clear = self.city_map.get_tile(tile_x, tile_y)
-            if tile_to_clear and tile_to_clear.building == building:
-                tile_to_clear.building = None
-                tile_to_clear.is_occupied = False
-                tile_to_clear.is_main_tile = True  # Reset do domyślnej wartości
-        
         # Refund half the cost
         refund = building_cost * 0.5
         self.economy.earn_money(refund)
         
         # Wymuś pełną aktualizację niektórych systemów/statystyk
         buildings = self.get_all_buildings()
-        self.population.calculate_needs(buildings)
+        self.population.calculate_needs(buildings, self.city_map.ledger, self.city_map.coverage)
         self.population.update_population_dynamics()
         self.update_city_level()
         
@@ -325,12 +326,17 @@ class GameEngine:
         self.add_alert(f"Sprzedano {building_name}{building_size_text} za ${refund:,.0f}")
         return True
     
+    @property
+    def game_seed(self) -> int:
+        """Ziarno gry, z którego wyprowadzone są strumienie losowości podsystemów."""
+        return self.random_streams.game_seed
+    
     def get_adjusted_cost(self, base_cost: float) -> float:
         """Get cost adjusted for difficulty"""
         modifier = self.difficulty_modifiers[self.difficulty]["cost_multiplier"]
         return base_cost * modifier
     
-    def update_turn(self):
+    def update_turn(self) -> Optional[TurnContext]:
         """
         Aktualizuje wszystkie systemy gry o jedną turę.
         
@@ -344,35 +350,138 @@ class GameEngine:
         3. Systemy zaawansowane (technologie, handel, finanse)
         4. Scenariusze i osiągnięcia (ocena postępu)
         5. Sprawdzenie sytuacji krytycznych
+        
+        Returns:
+            TurnContext | None: migawka stanu miasta po turze (budynki, dochody,
+                wydatki, demografia) dla paneli, celów, raportów i zapisu do bazy;
+                None gdy gra jest wstrzymana
         """
         if self.paused:  # jeśli gra wstrzymana, nie aktualizuj
-            return
+            return None
+        
+        return self._process_turn(INTERACTIVE_TURN_OPTIONS)
+    
+    def simulate(self, n_turns: int, options: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+        """
+        Bezgłowe przewijanie gry o wiele tur (balansowanie scenariuszy, testy).
+        
+        Wykonuje tę samą logikę co update_turn() - przy tym samym ziarnie daje
+        tę samą rozgrywkę - ale pomija to, co służy tylko graczowi: alerty,
+        formatowanie komunikatów, przechowywanie raportów finansowych, historię
+        ekonomii, osiągnięcia i ich statystyki oraz pełną demografię
+        i podsumowanie miasta. Wszystko to można włączyć opcjami
+        (DEFAULT_SIMULATION_OPTIONS). Stan pauzy jest ignorowany - symulacja
+        to jawne wywołanie.
+        
+        Większość czasu tury zajmuje sama logika gry (populacja, ekonomia,
+        rynek handlu), więc tura bezgłowa jest około 1,5x szybsza od
+        update_turn() (ok. 0,4 wobec 0,6 ms na mapie 30x30).
+        
+        Args:
+            n_turns (int): liczba tur do wykonania
+            options (Dict): nadpisania DEFAULT_SIMULATION_OPTIONS, np.
+                {'metrics': ('turn', 'money'), 'alerts': True, 'policy': strategia}
+        
+        Returns:
+            Dict[str, np.ndarray]: metryka -> tablica wartości dla kolejnych tur
+                (krótsza niż n_turns, gdy symulację przerwał koniec scenariusza
+                lub bankructwo)
+        
+        Raises:
+            ValueError: ujemna liczba tur lub nieznana opcja/metryka
+        """
+        if n_turns < 0:
+            raise ValueError(f"n_turns must be non-negative, got {n_turns}")
+        
+        turn_options = dict(DEFAULT_SIMULATION_OPTIONS)
+        if options:
+            unknown = set(options) - set(DEFAULT_SIMULATION_OPTIONS)
+            if unknown:
+                raise ValueError(f"Unknown simulation options: {sorted(unknown)}")
+            turn_options.update(options)
+        
+        metrics = tuple(turn_options['metrics'])
+        unknown = [name for name in metrics if name not in SIMULATION_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown simulation metrics: {unknown}")
+        
+        values = np.zeros((n_turns, len(metrics)), dtype=np.float64)
+        alerts_enabled = self.alerts_enabled
+        self.alerts_enabled = turn_options['alerts']
+        policy = turn_options['policy']
+        completed_turns = 0
+        try:
+            for row in range(n_turns):
+                if policy is not None:
+                    policy(self)
+                result = self._process_turn(turn_options)
+                values[row] = [self._turn_metric(name, result) for name in metrics]
+                completed_turns += 1
+                
+                scenario_update = result.scenario
+                if turn_options['stop_on_scenario_end'] and (
+                        scenario_update.get('completed') or scenario_update.get('failed')):
+                    break
+                if turn_options['stop_on_bankruptcy'] and self.economy.is_bankrupt(game_engine=self):
+                    break
+        finally:
+            self.alerts_enabled = alerts_enabled
+        
+        return {name: values[:completed_turns, column] for column, name in enumerate(metrics)}
+    
+    def _turn_metric(self, name: str, context: TurnContext) -> float:
+        """Zwraca wartość jednej metryki SIMULATION_METRICS po zakończonej turze."""
+        if name == 'buildings':
+            return len(context.buildings)
+        return getattr(context, name)  # pozostałe metryki to pola TurnContext
+    
+    def _process_turn(self, options: Dict) -> TurnContext:
+        """
+        Wykonuje jedną turę gry (wspólna logika update_turn() i simulate()).
+        
+        Args:
+            options (Dict): opcje tury w formacie DEFAULT_SIMULATION_OPTIONS
+        
+        Returns:
+            TurnContext: migawka stanu miasta po turze
+        """
         
         # KROK 1: Pobierz wszystkie budynki z mapy (potrzebne dla wszystkich systemów)
         buildings = self.get_all_buildings()
+        ledger = self.city_map.ledger  # sumy efektów budynków utrzymywane przy budowie/sprzedaży
+        if self.ledger_debug:
+            self._verify_ledger(buildings)
         
         # KROK 2: Aktualizuj system populacji (pierwszy, bo inne systemy zależą od niego)
-        self.population.calculate_needs(buildings)  # oblicz potrzeby mieszkańców na podstawie budynków
+        self.population.calculate_needs(buildings, ledger, self.city_map.coverage)  # potrzeby mieszkańców (z zasięgiem usług)
         self.population.update_population_dynamics()  # aktualizuj wzrost/spadek populacji
         self.update_city_level()  # sprawdź czy miasto awansowało na wyższy poziom
         
         # KROK 3: Aktualizuj ekonomię (podatki zależą od populacji)
-        self.economy.update_turn(buildings, self.population)  # przelicz podatki, koszty utrzymania
+        income, expenses = self.economy.update_turn(  # przelicz podatki, koszty utrzymania
+            buildings, self.population, ledger, record_history=options['economy_history'])
+        # Migawka tury - demografia i liczniki budynków liczone raz dla wszystkich odbiorców
+        context = TurnContext.capture(self, buildings, income, expenses,
+                                      demographics=options['demographics'])
         
         # KROK 4: Aktualizuj zaawansowane systemy
         self.technology_manager.update_research()  # postęp badań naukowych
         self.trade_manager.current_turn = self.turn  # zsynchronizuj numer tury
-        self.trade_manager.update_turn()  # przetwórz kontrakty handlowe
+        self.trade_manager.update_turn(  # rozlicz kontrakty handlowe w zasobach i budżecie
+            self.economy, market=options['trade_market'])
         
         # KROK 5: Aktualizuj system finansowy (kredyty, rating)
         self.finance_manager.calculate_credit_score(self.economy, self.population)  # oblicz rating kredytowy
         loan_payments = self.finance_manager.process_loan_payments(self.economy, self.turn)  # spłaty pożyczek
-        financial_report = self.finance_manager.generate_financial_report(
-            self.turn, self.economy, self.population, buildings)  # wygeneruj raport finansowy
+        if options['financial_reports']:
+            self.finance_manager.generate_financial_report(
+                self.turn, self.economy, self.population, buildings, ledger)  # wygeneruj raport finansowy
+        context.refresh_budget(self)  # handel i spłaty pożyczek zmieniły budżet
         
         # KROK 6: Aktualizuj postęp scenariusza (jeśli aktywny)
-        if self.scenario_manager.current_scenario:
-            game_state = self.get_city_summary()  # pobierz aktualny stan miasta
+        scenario_update = {}
+        if options['scenario'] and self.scenario_manager.current_scenario:
+            game_state = self._scenario_game_state(context)  # pobierz aktualny stan miasta
             scenario_update = self.scenario_manager.update_scenario(game_state)  # sprawdź postęp
             if scenario_update.get('completed'):  # scenariusz ukończony
                 self.add_alert(f"🎯 Scenariusz ukończony: {self.scenario_manager.current_scenario.title}!", 
@@ -382,30 +491,71 @@ class GameEngine:
                              priority="critical")
         
         # KROK 7: Aktualizuj statystyki gry (dla osiągnięć i raportów)
-        self._update_enhanced_statistics(buildings)
+        if options['statistics'] or options['achievements']:
+            self._update_enhanced_statistics(context)
         
         # KROK 8: Sprawdź osiągnięcia (na podstawie aktualnych statystyk)
-        newly_unlocked = self.achievement_manager.check_achievements(self.statistics)
-        for achievement in newly_unlocked:  # powiadom o nowych osiągnięciach
-            self.add_alert(f"🏆 Osiągnięcie odblokowane: {achievement.name}!", priority="achievement")
+        if options['achievements']:
+            newly_unlocked = self.achievement_manager.check_achievements(self.statistics)
+            for achievement in newly_unlocked:  # powiadom o nowych osiągnięciach
+                self.add_alert(f"🏆 Osiągnięcie odblokowane: {achievement.name}!", priority="achievement")
         
         # KROK 9: Sprawdź sytuacje krytyczne (długi, niezadowolenie, braki)
-        self._check_critical_situations()
+        if self.alerts_enabled:
+            self._check_critical_situations()
         
         # KROK 10: Zakończ turę (zwiększ licznik tur)
         self.turn += 1  # przejdź do następnej tury
         self.statistics['turns_played'] = self.turn  # aktualizuj statystyki
+        
+        context.turn = self.turn
+        context.scenario = scenario_update
+        self.last_turn_context = context
+        return context
     
-    def _update_enhanced_statistics(self, buildings: List[Building]):
+    def _scenario_game_state(self, context: TurnContext) -> Dict:
+        """
+        Stan miasta potrzebny do oceny celów scenariusza.
+        
+        Zawiera te same wartości co get_city_summary() dla kluczy sprawdzanych
+        przez ScenarioObjective, ale bez budowania demografii, zasobów i alertów.
+        """
+        return {
+            'turn': context.turn,
+            'money': context.money,
+            'population': context.population,
+            'satisfaction': context.satisfaction
+        }
+    
+    def _verify_ledger(self, buildings: List[Building]) -> List[str]:
+        """
+        Porównuje księgę agregatów CityMap z pełnym przeliczeniem budynków.
+        
+        Przy rozbieżności loguje ostrzeżenie i odbudowuje księgę, aby dalsza
+        rozgrywka korzystała z poprawnych sum.
+        
+        Returns:
+            List[str]: opisy znalezionych rozbieżności
+        """
+        mismatches = self.city_map.ledger.verify(buildings)
+        if mismatches:
+            import logging
+            logger = logging.getLogger('game_engine')
+            logger.warning(f"Building ledger out of sync at turn {self.turn}: {mismatches}")
+            self.city_map.rebuild_ledger()
+        return mismatches
+    
+    def _update_enhanced_statistics(self, context: TurnContext):
         """Update enhanced statistics for achievements"""
+        buildings = context.buildings
         # Basic population stats
-        current_pop = self.population.get_total_population()
+        current_pop = context.population
         if current_pop > self.statistics['max_population']:
             self.statistics['max_population'] = current_pop
         
         # Current population for achievements
         self.statistics['population'] = current_pop
-        self.statistics['money'] = self.economy.get_resource_amount('money')
+        self.statistics['money'] = context.money
         
         # Technology stats
         self.statistics['technologies_researched'] = len(self.technology_manager.get_researched_technologies())
@@ -422,14 +572,14 @@ class GameEngine:
         self.statistics['allied_cities'] = allied_count
         
         # Unemployment tracking for achievements
-        unemployment_rate = self.population.get_unemployment_rate()
+        unemployment_rate = context.unemployment_rate
         if unemployment_rate == 0:
             self.statistics['unemployment_streak'] += 1
         else:
             self.statistics['unemployment_streak'] = 0
         
         # Happiness tracking
-        satisfaction = self.population.get_average_satisfaction()
+        satisfaction = context.satisfaction
         if satisfaction >= 100:
             self.statistics['perfect_happiness_streak'] += 1
         else:
@@ -439,7 +589,8 @@ class GameEngine:
         # This would need to be tracked in economy system
         
         # Environmental stats (placeholder - would need actual implementation)
-        self.statistics['pollution_level'] = max(0, 50 - len([b for b in buildings if b.building_type == BuildingType.PARK]))
+        parks_count = context.building_counts.get(BuildingType.PARK, 0)
+        self.statistics['pollution_level'] = max(0, 50 - parks_count)
         
         # Count renewable energy buildings
         renewable_buildings = [b for b in buildings if 'renewable' in b.name.lower() or 'solar' in b.name.lower() or 'wind' in b.name.lower()]
@@ -479,6 +630,8 @@ class GameEngine:
     
     def add_alert(self, message: str, priority: str = "info"):
         """Add an alert message"""
+        if not self.alerts_enabled:  # tryb bezgłowy (simulate) - alerty wyłączone
+            return
         alert = {
             'message': message,
             'priority': priority,
@@ -519,7 +672,6 @@ class GameEngine:
     
     def get_city_summary(self) -> Dict:
         """Get a comprehensive summary of city status"""
-        buildings = self.get_all_buildings()
         demographics = self.population.get_demographics()
         resources = self.economy.get_resource_summary()
         
@@ -541,8 +693,8 @@ class GameEngine:
             'demographics': demographics,
             
             # Infrastructure
-            'total_buildings': len(buildings),
-            'building_types': self._count_building_types(buildings),
+            'total_buildings': len(self.city_map.buildings),
+            'building_types': self.city_map.count_buildings_by_type(),
             'needs': self.population.needs,
             
             # Statistics
@@ -550,99 +702,22 @@ class GameEngine:
             'alerts': self.get_recent_alerts()
         }
     
-    def _count_building_types(self, buildings: List[Building]) -> Dict[str, int]:
-        """Count buildings by type"""
-        counts = {}
-        for building in buildings:
-            building_type = building.building_type.value
-            counts[building_type] = counts.get(building_type, 0) + 1
-        return counts
-    
     def save_game(self, filepath: str) -> bool:
         """Save game state to file with validation"""
-        from .validation_system import get_validation_system
-        
         try:
-            import json
             import os
             
-            validator = get_validation_system()
-            
             # Walidacja ścieżki pliku
             if not isinstance(filepath, str) or not filepath:
                 self.add_alert("Nieprawidłowa ścieżka pliku", priority="warning")
                 return False
             
-            # Prepare statistics for JSON serialization (convert set to list)
-            statistics_for_save = self.statistics.copy()
-            if 'building_types_built' in statistics_for_save and isinstance(statistics_for_save['building_types_built'], set):
-                statistics_for_save['building_types_built'] = list(statistics_for_save['building_types_built'])
-            
-            save_data = {
-                'version': '1.0',
-                'turn': self.turn,
-                'difficulty': self.difficulty,
-                'statistics': statistics_for_save,
-                'alerts': self.alerts,
-                'city_level': self.city_level,
-                
-                # Map data
-                'map': {
-                    'width': self.city_map.width,
-                    'height': self.city_map.height,
-                    'tiles': []
-                },
-                
-                # Economy data
-                'economy': self.economy.save_to_dict(),
-                
-                # Population data
-                'population': self.population.save_to_dict()
-            }
-            
-            # Save tile data
-            for x in range(self.city_map.width):
-                for y in range(self.city_map.height):
-                    tile = self.city_map.get_tile(x, y)
-                    tile_data = {
-                        'x': x,
-                        'y': y,
-                        'terrain_type': tile.terrain_type.value,
-                        'is_occupied': tile.is_occupied,
-                        'building': None
-                    }
-                    
-                    if tile.building:
-                        tile_data['building'] = {
-                            'name': tile.building.name,
-                            'building_type': tile.building.building_type.value,
-                            'cost': tile.building.cost,
-                            'effects': tile.building.effects,
-                            'rotation': tile.building.rotation
-                        }
-                    
-                    save_data['map']['tiles'].append(tile_data)
-            
-            # Walidacja danych przed zapisem
-            save_validation = validator.validate_game_save_data(save_data)
-            
-            if not save_validation.is_valid:
-                error_msg = "Błędy walidacji danych zapisu: " + "; ".join(save_validation.errors)
+            snapshot = self.create_save_snapshot()
+            validation_errors = self.write_save_snapshot(snapshot, filepath)
+            if validation_errors:
+                # Możemy kontynuować mimo błędów walidacji, ale informujemy gracza
+                error_msg = "Błędy walidacji danych zapisu: " + "; ".join(validation_errors)
                 self.add_alert(error_msg, priority="warning")
-                # Możemy kontynuować mimo ostrzeżeń, ale logujemy błędy
-                import logging
-                logger = logging.getLogger('game_engine')
-                logger.warning(f"Save validation errors: {save_validation.errors}")
-            
-            # Loguj ostrzeżenia
-            if save_validation.warnings:
-                import logging
-                logger = logging.getLogger('game_engine')
-                logger.info(f"Save validation warnings: {save_validation.warnings}")
-            
-            # Save to file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False)
             
             filename = os.path.basename(filepath)
             self.add_alert(f"Gra zapisana jako {filename}")
@@ -652,16 +727,87 @@ class GameEngine:
             self.add_alert(f"Błąd zapisu gry: {str(e)}", priority="warning")
             return False
     
+    def create_save_snapshot(self) -> Dict:
+        """
+        Tworzy niezależną kopię stanu gry do zapisu.
+        
+        Wywoływana w wątku gry, więc kopiuje tylko surowe dane: tablicę terenu,
+        krotki budynków (building_rows) i kontenery słowników podsystemów.
+        Kodowanie mapy, szablony budynków i walidacja należą do
+        write_save_snapshot(), która może działać w innym wątku.
+        """
+        # Prepare statistics for JSON serialization (convert set to list)
+        statistics_for_save = self.statistics.copy()
+        if 'building_types_built' in statistics_for_save and isinstance(statistics_for_save['building_types_built'], set):
+            statistics_for_save['building_types_built'] = list(statistics_for_save['building_types_built'])
+        
+        return {
+            'version': SAVE_FORMAT_VERSION,
+            'game_seed': self.random_streams.game_seed,
+            'turn': self.turn,
+            'difficulty': self.difficulty,
+            'statistics': copy_containers(statistics_for_save),
+            'alerts': copy_containers(self.alerts),
+            'city_level': self.city_level,
+            
+            # Map data - kodowana dopiero w save_document()
+            'map': {
+                'width': self.city_map.width,
+                'height': self.city_map.height,
+                'terrain': self.city_map.terrain.copy(),
+                'buildings': building_rows(self.city_map.buildings)
+            },
+            
+            # Stan podsystemów (osobna sekcja)
+            'subsystems': {
+                'economy': copy_containers(self.economy.save_to_dict()),
+                'population': copy_containers(self.population.save_to_dict())
+            }
+        }
+    
+    @staticmethod
+    def save_document(snapshot: Dict) -> Dict:
+        """Dokument formatu 2.0 z migawki - teren kodowany RLE, budynki w kolumnach z szablonami."""
+        map_data = snapshot['map']
+        return dict(snapshot, map={
+            'width': map_data['width'],
+            'height': map_data['height'],
+            'terrain': encode_terrain(map_data['terrain']),
+            'buildings': encode_building_rows(map_data['buildings'])
+        })
+    
+    def write_save_snapshot(self, snapshot: Dict, filepath: str) -> List[str]:
+        """
+        Koduje migawkę, waliduje ją i zapisuje do pliku (atomowo).
+        
+        Nie zmienia stanu silnika, więc może działać w wątku roboczym
+        (AutosaveService). Błędy zapisu zgłaszane są wyjątkiem.
+        
+        Returns:
+            List[str]: błędy walidacji (zapis i tak jest wykonywany)
+        """
+        import logging
+        from .validation_system import get_validation_system
+        
+        logger = logging.getLogger('game_engine')
+        document = self.save_document(snapshot)
+        save_validation = get_validation_system().validate_game_save_data(document)
+        if not save_validation.is_valid:
+            logger.warning(f"Save validation errors: {save_validation.errors}")
+        if save_validation.warnings:
+            logger.info(f"Save validation warnings: {save_validation.warnings}")
+        
+        write_save_file(filepath, document, self.save_compression)
+        return save_validation.errors
+    
     def load_game(self, filepath: str) -> bool:
         """Load game state from file"""
         try:
-            import json
             import os
-            from .city_map import CityMap, TerrainType
-            from .tile import Building, BuildingType
+            from .city_map import CityMap
             
-            with open(filepath, 'r', encoding='utf-8') as f:
-                save_data = json.load(f)
+            # Dokument w formacie 2.0 (zapisy 1.0 są konwertowane przy odczycie)
+            save_data = read_save_file(filepath)
             
             # Load basic game state
             self.turn = save_data.get('turn', 0)
@@ -675,37 +821,27 @@ class GameEngine:
             self.alerts = save_data.get('alerts', [])
             self.city_level = save_data.get('city_level', 1)
             
+            # Odtwórz strumienie losowości (starsze zapisy nie mają ziarna - zostaje obecne)
+            if 'game_seed' in save_data:
+                self.random_streams.reseed(save_data['game_seed'], turn=self.turn)
+            
             # Load map
             map_data = save_data.get('map', {})
-            self.city_map = CityMap(map_data.get('width', 60), map_data.get('height', 60))
-            
-            # Load tiles
-            for tile_data in map_data.get('tiles', []):
-                x, y = tile_data['x'], tile_data['y']
-                tile = self.city_map.get_tile(x, y)
-                
-                if tile:
-                    tile.terrain_type = TerrainType(tile_data['terrain_type'])
-                    tile.is_occupied = tile_data['is_occupied']
-                    
-                    if tile_data['building']:
-                        building_data = tile_data['building']
-                        building = Building(
-                            building_data['name'],
-                            BuildingType(building_data['building_type']),
-                            building_data['cost'],
-                            building_data['effects']
-                        )
-                        building.rotation = building_data.get('rotation', 0)
-                        tile.building = building
+            self.city_map = CityMap(map_data.get('width', 60), map_data.get('height', 60),
+                                    rng=self.random_streams.get('city_map'))
             
-            # Load economy
-            if 'economy' in save_data:
-                self.economy.load_from_dict(save_data['economy'])
+            # Load terrain and buildings (add_building rejestruje budynek i zajmuje kafelki)
+            self.city_map.terrain[:, :] = decode_terrain(map_data['terrain'],
+                                                         self.city_map.width, self.city_map.height)
+            for x, y, building in decode_buildings(map_data.get('buildings', {})):
+                self.city_map.add_building(x, y, building)
             
-            # Load population
-            if 'population' in save_data:
-                self.population.load_from_dict(save_data['population'])
+            # Load subsystems
+            subsystems = save_data.get('subsystems', {})
+            if 'economy' in subsystems:
+                self.economy.load_from_dict(subsystems['economy'])
+            if 'population' in subsystems:
+                self.population.load_from_dict(subsystems['population'])
             
             filename = os.path.basename(filepath)
             self.add_alert(f"Gra wczytana: {filename}")
@@ -943,11 +1079,8 @@ class GameEngine:
         # Reset populacji
         self.population.reset_to_initial_state()
         
-        # Reset miasta - wyczyść mapę
-        for x in range(self.city_map.width):
-            for y in range(self.city_map.height):
-                if self.city_map.get_tile(x, y).building:
-                    self.city_map.get_tile(x, y).building = None
+        # Reset miasta - wyczyść mapę (kafelki i rejestr budynków)
+        self.city_map.clear_buildings()
         
         # Reset poziomu miasta
         self.city_level = 1
@@ -7,10 +7,20 @@ Implementuje:
 - Nagrody za ukończenie celów
 - Śledzenie postępu
 - Limity czasowe
+
+Cele opisane są deklaratywnie (metryka, porównanie, długość serii, filtry
+typów budynków) i kompilowane raz - przy dodaniu do menedżera - do funkcji
+oceniających. W każdej turze wszystkie funkcje korzystają ze wspólnych metryk
+i histogramu typów budynków, więc kolejne cele nie dodają przeglądania listy
+budynków.
 """
+from collections import Counter
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 from dataclasses import dataclass
+import operator
+
+from .tile import BuildingType
 
 class ObjectiveType(Enum):
     """
@@ -59,6 +69,15 @@ class Objective:
     turns_remaining: Optional[int] = None  # pozostałe tury
     prerequisites: List[str] = None   # lista ID celów wymaganych
     
+    # Deklaratywny opis sposobu oceny celu (kompilowany przez ObjectiveManager)
+    metric: Optional[str] = None      # metryka z METRICS / STATEFUL_METRICS (None = według typu celu)
+    comparator: str = '>='            # porównanie: metryki z progiem (seria) lub wartości z celem
+    threshold: Optional[float] = None # próg serii - wtedy target_value to liczba kolejnych tur
+    building_filters: Tuple[Tuple[str, ...], ...] = ()  # grupy fragmentów nazw typów budynków
+    building_cap: Optional[int] = None  # maks. liczba budynków liczona z jednej grupy
+    params: Dict[str, Any] = None     # parametry metryk ze stanem (np. progi faz)
+    state: Dict[str, Any] = None      # stan oceny między turami (serie, fazy)
+    
     def __post_init__(self):
         """
         Metoda wywoływana po inicjalizacji obiektu.
@@ -67,8 +86,156 @@ class Objective:
         """
         if self.prerequisites is None:
             self.prerequisites = []  # pusta lista prerekvizytów
+        if self.params is None:
+            self.params = {}
+        if self.state is None:
+            self.state = {}
         if self.time_limit:
             self.turns_remaining = self.time_limit  # ustaw pozostały czas
+    
+    def is_met(self) -> bool:
+        """Czy bieżąca wartość spełnia cel (dla serii: liczba kolejnych tur >= target_value)."""
+        if self.threshold is not None:
+            return self.current_value >= self.target_value
+        return COMPARATORS[self.comparator](self.current_value, self.target_value)
+
+
+COMPARATORS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+}
+
+# Metryki liczone raz na turę ze stanu gry (ObjectiveManager._turn_metrics)
+METRICS = ('population', 'money', 'satisfaction', 'technologies', 'buildings')
+
+# Domyślna metryka celów bez jawnie podanej metryki
+DEFAULT_METRICS = {
+    ObjectiveType.POPULATION: 'population',
+    ObjectiveType.ECONOMY: 'money',
+    ObjectiveType.SATISFACTION: 'satisfaction',
+    ObjectiveType.BUILDINGS: 'buildings',
+    ObjectiveType.TECHNOLOGY: 'technologies',
+}
+
+BUILDING_TYPE_VALUES = tuple(building_type.value for building_type in BuildingType)
+
+Evaluator = Callable[[Dict[str, Any]], float]
+
+
+def _building_groups(filters: Tuple[Tuple[str, ...], ...]) -> List[FrozenSet[str]]:
+    """
+    Zamienia grupy fragmentów nazw na zbiory typów budynków.
+    
+    Grupy są rozłączne - typ pasujący do kilku grup liczony jest w pierwszej.
+    """
+    assigned = set()
+    groups = []
+    for fragments in filters:
+        types = frozenset(value for value in BUILDING_TYPE_VALUES
+                          if value not in assigned and any(fragment in value for fragment in fragments))
+        assigned |= types
+        groups.append(types)
+    return groups
+
+
+def _population_growth(objective: Objective) -> Evaluator:
+    """Przyrost populacji od pierwszej oceny celu."""
+    def evaluate(metrics):
+        population = metrics['population']
+        start = objective.state.setdefault('start_population', population)
+        return max(0, population - start)
+    return evaluate
+
+
+def _money_cycles(objective: Objective) -> Evaluator:
+    """Liczba cykli: budżet poniżej params['low'], a następnie powyżej params['high']."""
+    low, high = objective.params['low'], objective.params['high']
+    
+    def evaluate(metrics):
+        money = metrics['money']
+        state = objective.state
+        if money < low:
+            state['in_low_phase'] = True
+        elif money > high and state.get('in_low_phase'):
+            state['in_low_phase'] = False
+            state['cycles'] = state.get('cycles', 0) + 1
+        return state.get('cycles', 0)
+    return evaluate
+
+
+def _population_recovery(objective: Objective) -> Evaluator:
+    """1 gdy populacja spadła poniżej params['low'], a potem osiągnęła params['high']."""
+    low, high = objective.params['low'], objective.params['high']
+    
+    def evaluate(metrics):
+        population = metrics['population']
+        phase = objective.state.get('phase', 'waiting_for_fall')
+        if phase == 'waiting_for_fall' and population < low:
+            phase = 'fell'
+        elif phase == 'fell' and population >= high:
+            phase = 'risen'
+        objective.state['phase'] = phase
+        return 1 if phase == 'risen' else 0
+    return evaluate
+
+
+# Metryki ze stanem przechowywanym w Objective.state
+STATEFUL_METRICS = {
+    'population_growth': _population_growth,
+    'money_cycles': _money_cycles,
+    'population_recovery': _population_recovery,
+}
+
+
+def compile_objective(objective: Objective) -> Optional[Evaluator]:
+    """
+    Kompiluje deklaratywny opis celu do funkcji metryki tury -> bieżąca wartość.
+    
+    Returns:
+        Optional[Callable]: funkcja oceniająca lub None, gdy cel nie ma metryki
+            (wartość ustawiana jest wtedy z zewnątrz)
+    
+    Raises:
+        ValueError: nieznana metryka lub porównanie
+    """
+    if objective.comparator not in COMPARATORS:
+        raise ValueError(f"Nieznane porównanie celu {objective.id}: {objective.comparator}")
+    metric = objective.metric
+    if metric is None:  # filtry budynków oznaczają metrykę 'buildings'
+        metric = 'buildings' if objective.building_filters else DEFAULT_METRICS.get(objective.objective_type)
+    if metric is None:
+        return None
+    if metric in STATEFUL_METRICS:
+        return STATEFUL_METRICS[metric](objective)
+    if metric not in METRICS:
+        raise ValueError(f"Nieznana metryka celu {objective.id}: {metric}")
+    
+    if metric == 'buildings' and objective.building_filters:
+        groups = _building_groups(objective.building_filters)
+        cap = objective.building_cap
+        
+        def value(metrics):
+            histogram = metrics['building_histogram']
+            counts = (sum(histogram.get(building_type, 0) for building_type in group) for group in groups)
+            return sum(min(count, cap) if cap is not None else count for count in counts)
+    else:
+        def value(metrics):
+            return metrics[metric]
+    
+    if objective.threshold is None:
+        return value
+    
+    # Seria - liczba kolejnych tur, w których metryka spełnia warunek progu
+    compare = COMPARATORS[objective.comparator]
+    threshold = objective.threshold
+    
+    def streak(metrics):
+        turns = objective.state.get('streak', 0) + 1 if compare(value(metrics), threshold) else 0
+        objective.state['streak'] = turns
+        return turns
+    return streak
 
 class ObjectiveManager:
     """
@@ -92,6 +259,7 @@ class ObjectiveManager:
         self.completed_objectives = []    # lista ukończonych celów
         self.failed_objectives = []       # lista nieudanych celów
         self.current_turn = 0            # aktualna tura gry
+        self._evaluators: Dict[str, Optional[Evaluator]] = {}  # skompilowane funkcje oceny celów
         
         # Inicjalizuj podstawowe cele
         self._initialize_objectives()
@@ -133,6 +301,7 @@ class ObjectiveManager:
             description="Zbuduj szkołę, szpital i 15 domów",
             objective_type=ObjectiveType.BUILDINGS,
             target_value=17,  # 2 usługi + 15 domów
+            building_filters=(("school", "hospital", "house"),),
             reward_money=1500,
             reward_satisfaction=10,
             reward_description="Bonus za podstawowe usługi"
@@ -144,6 +313,7 @@ class ObjectiveManager:
             description="Zbuduj 20 segmentów dróg",
             objective_type=ObjectiveType.INFRASTRUCTURE,
             target_value=20,
+            building_filters=(("road",),),
             reward_money=1000,
             reward_satisfaction=5,
             reward_description="Bonus za pierwszą infrastrukturę"
@@ -168,7 +338,8 @@ class ObjectiveManager:
             title="Zadowoleni Mieszkańcy",
             description="Utrzymaj zadowolenie powyżej 75% przez 15 tur",
             objective_type=ObjectiveType.SATISFACTION,
-            target_value=75,
+            target_value=15,                      # seria: 15 kolejnych tur ...
+            threshold=75,                         # ... z zadowoleniem >= 75%
             time_limit=15,                        # limit czasowy: 15 tur
             reward_money=2500,
             reward_satisfaction=15,
@@ -224,6 +395,9 @@ class ObjectiveManager:
             description="Przetrwaj 5 tur z budżetem poniżej 1000$",
             objective_type=ObjectiveType.SURVIVAL,
             target_value=5,
+            metric="money",
+            comparator="<",
+            threshold=1000,
             reward_money=5000,
             reward_satisfaction=25,
             reward_description="Bonus za przetrwanie kryzysu"
@@ -237,6 +411,7 @@ class ObjectiveManager:
             description="Zbuduj 50 segmentów dróg",
             objective_type=ObjectiveType.INFRASTRUCTURE,
             target_value=50,
+            building_filters=(("road",),),
             reward_money=3000,
             reward_satisfaction=8,
             reward_description="Bonus za rozwiniętą sieć drogową",
@@ -250,6 +425,8 @@ class ObjectiveManager:
             description="Zbuduj po 5 budynków każdego typu (mieszkalne, przemysłowe, usługowe)",
             objective_type=ObjectiveType.BUILDINGS,
             target_value=15,  # 5+5+5
+            building_filters=(("house", "apartment"), ("factory", "warehouse"), ("shop", "office")),
+            building_cap=5,
             reward_money=4000,
             reward_satisfaction=12,
             reward_description="Bonus za zróżnicowaną ekonomię",
@@ -276,7 +453,8 @@ class ObjectiveManager:
             title="Efektywne Miasto",
             description="Utrzymaj zadowolenie powyżej 80% przez 20 tur",
             objective_type=ObjectiveType.SATISFACTION,
-            target_value=80,
+            target_value=20,
+            threshold=80,
             time_limit=20,
             reward_money=8000,
             reward_satisfaction=20,
@@ -318,6 +496,7 @@ class ObjectiveManager:
             description="Zwiększ populację o 1000 mieszkańców w ciągu 15 tur",
             objective_type=ObjectiveType.GROWTH,
             target_value=1000,
+            metric="population_growth",
             time_limit=15,
             reward_money=10000,
             reward_satisfaction=18,
@@ -346,6 +525,8 @@ class ObjectiveManager:
             description="Przetrwaj 3 okresy z budżetem poniżej 5000$ i powyżej 50000$",
             objective_type=ObjectiveType.CHALLENGE,
             target_value=3,
+            metric="money_cycles",
+            params={"low": 5000, "high": 50000},
             reward_money=15000,
             reward_satisfaction=30,
             reward_description="Bonus za przetrwanie wahań ekonomicznych",
@@ -358,7 +539,8 @@ class ObjectiveManager:
             title="Mistrz Zadowolenia",
             description="Utrzymaj zadowolenie powyżej 90% przez 30 tur",
             objective_type=ObjectiveType.SATISFACTION,
-            target_value=90,
+            target_value=30,
+            threshold=90,
             time_limit=30,
             reward_money=20000,
             reward_satisfaction=40,
@@ -400,6 +582,7 @@ class ObjectiveManager:
             description="Zbuduj 200 segmentów dróg i 50 budynków usługowych",
             objective_type=ObjectiveType.INFRASTRUCTURE,
             target_value=250,  # 200 + 50
+            building_filters=(("road",), ("school", "hospital", "police", "fire", "park")),
             reward_money=30000,
             reward_satisfaction=35,
             reward_description="Bonus za króla infrastruktury",
@@ -414,6 +597,9 @@ class ObjectiveManager:
             description="Przetrwaj 10 tur z zadowoleniem poniżej 30%",
             objective_type=ObjectiveType.SURVIVAL,
             target_value=10,
+            metric="satisfaction",
+            comparator="<",
+            threshold=30,
             reward_money=12000,
             reward_satisfaction=40,
             reward_description="Bonus za przetrwanie katastrofy",
@@ -426,7 +612,9 @@ class ObjectiveManager:
             title="Miasto Feniks",
             description="Odbuduj miasto: spadnij poniżej 500 mieszkańców, a następnie osiągnij 3000",
             objective_type=ObjectiveType.CHALLENGE,
-            target_value=1,  # Specjalny cel - sprawdzany osobno
+            target_value=1,
+            metric="population_recovery",
+            params={"low": 500, "high": 3000},
             reward_money=25000,
             reward_satisfaction=50,
             reward_description="Bonus za odbudowę miasta z popiołów",
@@ -438,9 +626,36 @@ class ObjectiveManager:
         self._update_objective_availability()
     
     def add_objective(self, objective: Objective):
-        """Dodaje cel do managera"""
+        """Dodaje cel do managera i kompiluje jego funkcję oceny"""
+        self._evaluators[objective.id] = compile_objective(objective)
         self.objectives[objective.id] = objective
     
+    def _turn_metrics(self, game_state: Dict) -> Dict[str, Any]:
+        """
+        Metryki tury wspólne dla wszystkich celów.
+        
+        Histogram typów budynków pochodzi z game_state['building_counts']
+        (TurnContext), a bez niego liczony jest jednym przejściem po liście budynków.
+        """
+        buildings = game_state.get('buildings', [])
+        counts = game_state.get('building_counts')
+        if counts is not None:
+            histogram = {getattr(building_type, 'value', str(building_type)).lower(): count
+                         for building_type, count in counts.items()}
+        else:
+            histogram = Counter(
+                building.building_type.value.lower() if hasattr(building, 'building_type') else str(building).lower()
+                for building in buildings
+            )
+        return {
+            'population': game_state.get('population', 0),
+            'money': game_state.get('money', 0),
+            'satisfaction': game_state.get('satisfaction', 0),
+            'technologies': len(game_state.get('unlocked_technologies', [])),
+            'buildings': len(buildings),
+            'building_histogram': histogram,
+        }
+    
     def update_objectives(self, game_state: Dict):
         """Aktualizuje postęp wszystkich celów na podstawie stanu gry"""
         self.current_turn = game_state.get('turn', 0)
@@ -449,202 +664,20 @@ class ObjectiveManager:
         if self.current_turn < 2:
             return
         
+        metrics = self._turn_metrics(game_state)
         for obj_id, objective in self.objectives.items():
             if objective.status != ObjectiveStatus.ACTIVE:
                 continue
             
-            # Aktualizuj wartość bieżącą na podstawie typu celu
-            if objective.objective_type == ObjectiveType.POPULATION:
-                objective.current_value = game_state.get('population', 0)
-            
-            elif objective.objective_type == ObjectiveType.ECONOMY:
-                objective.current_value = game_state.get('money', 0)
-            
-            elif objective.objective_type == ObjectiveType.SATISFACTION:
-                satisfaction = game_state.get('satisfaction', 0)
-                if obj_id == "happy_citizens":
-                    # Specjalna logika dla celu zadowolenia
-                    if satisfaction >= objective.target_value:
-                        if not hasattr(objective, 'satisfaction_turns'):
-                            objective.satisfaction_turns = 0
-                        objective.satisfaction_turns += 1
-                        objective.current_value = objective.satisfaction_turns
-                    else:
-                        objective.satisfaction_turns = 0
-                        objective.current_value = 0
-                elif obj_id == "efficient_city":
-                    # Cel efektywnego miasta
-                    if satisfaction >= objective.target_value:
-                        if not hasattr(objective, 'efficiency_turns'):
-                            objective.efficiency_turns = 0
-                        objective.efficiency_turns += 1
-                        objective.current_value = objective.efficiency_turns
-                    else:
-                        objective.efficiency_turns = 0
-                        objective.current_value = 0
-                elif obj_id == "satisfaction_master":
-                    # Cel mistrza zadowolenia
-                    if satisfaction >= objective.target_value:
-                        if not hasattr(objective, 'master_turns'):
-                            objective.master_turns = 0
-                        objective.master_turns += 1
-                        objective.current_value = objective.master_turns
-                    else:
-                        objective.master_turns = 0
-                        objective.current_value = 0
-                else:
-                    objective.current_value = satisfaction
-            
-            elif objective.objective_type == ObjectiveType.BUILDINGS:
-                buildings = game_state.get('buildings', [])
-                if obj_id == "first_services":
-                    # Policz szkoły, szpitale i domy
-                    service_count = 0
-                    house_count = 0
-                    for building in buildings:
-                        building_type = building.building_type.value.lower() if hasattr(building, 'building_type') else str(building).lower()
-                        
-                        if 'school' in building_type or 'hospital' in building_type:
-                            service_count += 1
-                        elif 'house' in building_type:
-                            house_count += 1
-                    
-                    objective.current_value = service_count + house_count
-                elif obj_id == "diverse_economy":
-                    # Policz różne typy budynków
-                    residential = 0
-                    industrial = 0
-                    commercial = 0
-                    
-                    for building in buildings:
-                        building_type = building.building_type.value.lower() if hasattr(building, 'building_type') else str(building).lower()
-                        
-                        if 'house' in building_type or 'apartment' in building_type:
-                            residential += 1
-                        elif 'factory' in building_type or 'warehouse' in building_type:
-                            industrial += 1
-                        elif 'shop' in building_type or 'office' in building_type:
-                            commercial += 1
-                    
-                    # Sprawdź czy każdy typ ma co najmniej 5 budynków
-                    if residential >= 5 and industrial >= 5 and commercial >= 5:
-                        objective.current_value = 15  # Cel osiągnięty
-                    else:
-                        objective.current_value = min(residential, 5) + min(industrial, 5) + min(commercial, 5)
-                else:
-                    objective.current_value = len(buildings)
-            
-            elif objective.objective_type == ObjectiveType.TECHNOLOGY:
-                technologies = game_state.get('unlocked_technologies', [])
-                objective.current_value = len(technologies)
-            
-            elif objective.objective_type == ObjectiveType.SURVIVAL:
-                if obj_id == "crisis_survival":
-                    money = game_state.get('money', 0)
-                    if money < 1000:
-                        if not hasattr(objective, 'crisis_turns'):
-                            objective.crisis_turns = 0
-                        objective.crisis_turns += 1
-                        objective.current_value = objective.crisis_turns
-                    else:
-                        if hasattr(objective, 'crisis_turns'):
-                            objective.crisis_turns = 0
-                        objective.current_value = 0
-                elif obj_id == "disaster_survivor":
-                    satisfaction = game_state.get('satisfaction', 0)
-                    if satisfaction < 30:
-                        if not hasattr(objective, 'disaster_turns'):
-                            objective.disaster_turns = 0
-                        objective.disaster_turns += 1
-                        objective.current_value = objective.disaster_turns
-                    else:
-                        if hasattr(objective, 'disaster_turns'):
-                            objective.disaster_turns = 0
-                        objective.current_value = 0
-            
-            elif objective.objective_type == ObjectiveType.INFRASTRUCTURE:
-                buildings = game_state.get('buildings', [])
-                if obj_id == "road_network":
-                    # Policz drogi
-                    road_count = 0
-                    for building in buildings:
-                        building_type = building.building_type.value.lower() if hasattr(building, 'building_type') else str(building).lower()
-                        
-                        if 'road' in building_type:
-                            road_count += 1
-                    
-                    objective.current_value = road_count
-                elif obj_id == "infrastructure_king":
-                    # Policz drogi i budynki usługowe
-                    road_count = 0
-                    service_count = 0
-                    
-                    for building in buildings:
-                        building_type = building.building_type.value.lower() if hasattr(building, 'building_type') else str(building).lower()
-                        
-                        if 'road' in building_type:
-                            road_count += 1
-                        elif any(service in building_type for service in ['school', 'hospital', 'police', 'fire', 'park']):
-                            service_count += 1
-                    
-                    objective.current_value = road_count + service_count
-            
-            elif objective.objective_type == ObjectiveType.GROWTH:
-                if obj_id == "population_boom":
-                    current_pop = game_state.get('population', 0)
-                    if not hasattr(objective, 'start_population'):
-                        objective.start_population = current_pop
-                        objective.current_value = 0
-                    else:
-                        growth = current_pop - objective.start_population
-                        objective.current_value = max(0, growth)
-            
-            elif objective.objective_type == ObjectiveType.EFFICIENCY:
-                # Cele efektywności - obecnie obsługiwane w SATISFACTION
-                pass
-            
-            elif objective.objective_type == ObjectiveType.CHALLENGE:
-                if obj_id == "economic_rollercoaster":
-                    money = game_state.get('money', 0)
-                    if not hasattr(objective, 'rollercoaster_cycles'):
-                        objective.rollercoaster_cycles = 0
-                        objective.in_low_phase = False
-                        objective.in_high_phase = False
-                    
-                    # Sprawdź fazy ekonomiczne
-                    if money < 5000 and not objective.in_low_phase:
-                        objective.in_low_phase = True
-                        objective.in_high_phase = False
-                    elif money > 50000 and objective.in_low_phase and not objective.in_high_phase:
-                        objective.in_high_phase = True
-                        objective.rollercoaster_cycles += 1
-                        objective.in_low_phase = False
-                    elif money < 5000 and objective.in_high_phase:
-                        objective.in_high_phase = False
-                    
-                    objective.current_value = objective.rollercoaster_cycles
-                
-                elif obj_id == "phoenix_city":
-                    current_pop = game_state.get('population', 0)
-                    if not hasattr(objective, 'phoenix_phase'):
-                        objective.phoenix_phase = "waiting_for_fall"  # waiting_for_fall, fell, rising
-                        objective.min_population = current_pop
-                    
-                    if objective.phoenix_phase == "waiting_for_fall":
-                        if current_pop < 500:
-                            objective.phoenix_phase = "fell"
-                            objective.min_population = current_pop
-                    elif objective.phoenix_phase == "fell":
-                        if current_pop >= 3000:
-                            objective.phoenix_phase = "risen"
-                            objective.current_value = 1
-                    
-                    # Jeśli populacja spadnie ponownie, resetuj
-                    if current_pop < objective.min_population:
-                        objective.min_population = current_pop
+            # Aktualizuj wartość bieżącą skompilowaną funkcją oceny celu
+            if obj_id not in self._evaluators:  # cel wpisany bezpośrednio do słownika objectives
+                self._evaluators[obj_id] = compile_objective(objective)
+            evaluate = self._evaluators[obj_id]
+            if evaluate is not None:
+                objective.current_value = evaluate(metrics)
             
             # Sprawdź czy cel został ukończony
-            if objective.current_value >= objective.target_value:
+            if objective.is_met():
                 self._complete_objective(obj_id)
             
             # Sprawdź limit czasu
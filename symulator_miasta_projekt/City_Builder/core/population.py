@@ -3,6 +3,8 @@ from dataclasses import dataclass
 from enum import Enum
 import random
 
+from .building_ledger import BuildingLedger
+
 
 class SocialClass(Enum):
     """
@@ -63,13 +65,19 @@ class PopulationManager:
     - Wpływ budynków na populację
     """
     
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
         """
         Konstruktor menedżera populacji.
         
         Inicjalizuje wszystkie grupy społeczne z ich parametrami startowymi,
         ustawienia wzrostu populacji oraz system potrzeb mieszkańców.
+        
+        Args:
+            rng (random.Random): strumień losowości dynamiki populacji
+                (domyślnie nowy, nieziarnowany)
         """
+        self.rng = rng if rng is not None else random.Random()  # RandomStreams 'population'
+        
         # Grupy populacji z ich charakterystykami (starszy system - do usunięcia)
         self.population_groups = {
             'workers': {'size': 100, 'income': 1000, 'tax_rate': 0.2, 'satisfaction': 0.5},
@@ -149,6 +157,26 @@ class PopulationManager:
             'transport': {'current': 0, 'demand': 0, 'satisfaction': 50}       # transport
         }
         
+        # Opcjonalny model kohortowy (przedziały wieku x klasy, core/cohorts.py)
+        self.cohorts = None
+        
+    def enable_cohort_model(self, years_per_turn: float = 1.0):
+        """
+        Włącza kohortowy model populacji (CohortModel).
+        
+        Urodzenia, zgony, starzenie, edukacja, zatrudnienie i migracja liczone są
+        na macierzy przedziały wieku x klasy społeczne, a liczebności grup
+        (self.groups) są z niej uzupełniane po każdej zmianie.
+        """
+        from .cohorts import CohortModel
+        self.cohorts = CohortModel.from_groups(self.groups, years_per_turn)
+        self._sync_cohort_groups()
+    
+    def _sync_cohort_groups(self):
+        """Przepisuje liczebności klas z modelu kohortowego do grup społecznych"""
+        for social_class, count in self.cohorts.class_totals().items():
+            self.groups[social_class].count = count
+    
     def get_total_population(self) -> int:
         """
         Pobiera całkowitą liczbę mieszkańców miasta.
@@ -202,52 +230,28 @@ class PopulationManager:
         
         return weighted_satisfaction / total_pop
     
-    def calculate_needs(self, buildings: List):
-        """Calculate population needs based on current infrastructure"""
+    def calculate_needs(self, buildings: List, ledger: BuildingLedger = None, coverage=None):
+        """
+        Calculate population needs based on current infrastructure.
+        
+        Podaż potrzeb pochodzi z księgi agregatów (BuildingLedger) utrzymywanej
+        przez CityMap. Bez księgi podaż jest przeliczana z listy budynków.
+        Z mapami zasięgu (ServiceCoverage) podaż budynków usługowych liczy się
+        tylko w części odpowiadającej mieszkańcom w ich zasięgu.
+        """
         total_pop = self.get_total_population()
         
         if total_pop == 0:
             return
         
-        # Reset current supply
-        for need in self.needs.values():
-            need['current'] = 0
+        if ledger is None:
+            ledger = BuildingLedger.from_buildings(buildings)
         
-        # Calculate supply from buildings
-        for building in buildings:
-            if not building or not hasattr(building, 'effects'):
-                continue
-                
-            effects = building.effects
-            building_type = building.building_type.value
-            
-            # Housing supply
-            if 'population' in effects:
-                self.needs['housing']['current'] += effects['population']
-            
-            # Jobs supply  
-            if 'jobs' in effects:
-                self.needs['jobs']['current'] += effects['jobs']
-            
-            # Healthcare supply
-            if 'health' in effects:
-                self.needs['healthcare']['current'] += effects['health']
-            
-            # Education supply
-            if 'education' in effects:
-                self.needs['education']['current'] += effects['education']
-            
-            # Safety supply
-            if 'safety' in effects:
-                self.needs['safety']['current'] += effects['safety']
-            
-            # Entertainment supply
-            if 'happiness' in effects and ('park' in building_type or 'stadium' in building_type):
-                self.needs['entertainment']['current'] += effects['happiness']
-            
-            # Transport supply
-            if 'traffic' in effects or 'walkability' in effects:
-                self.needs['transport']['current'] += effects.get('traffic', 0) + effects.get('walkability', 0)
+        # Supply from buildings (read from ledger)
+        for need_name, need in self.needs.items():
+            need['current'] = ledger.need_supply.get(need_name, 0)
+            if coverage is not None and need_name in coverage.layers:
+                need['current'] = coverage.weighted_supply(need_name, need['current'])
         
         # Calculate demand based on population
         self.needs['housing']['demand'] = total_pop
@@ -281,13 +285,17 @@ class PopulationManager:
         # Natural population change - adjusted by satisfaction
         satisfaction_multiplier = max(0.5, avg_satisfaction / 100)  # Zwiększony minimalny mnożnik z 0.2 na 0.5
         
+        if self.cohorts is not None:
+            self._update_cohort_dynamics(avg_satisfaction, satisfaction_multiplier, housing_bonus)
+            return
+        
         # Przyrost naturalny - zmniejszona losowość
-        births = int(total_pop * self.birth_rate * satisfaction_multiplier * (1 + housing_bonus) * random.uniform(0.95, 1.05))
-        deaths = int(total_pop * self.death_rate * (2 - satisfaction_multiplier) * random.uniform(0.95, 1.05))
+        births = int(total_pop * self.birth_rate * satisfaction_multiplier * (1 + housing_bonus) * self.rng.uniform(0.95, 1.05))
+        deaths = int(total_pop * self.death_rate * (2 - satisfaction_multiplier) * self.rng.uniform(0.95, 1.05))
         
         # Migracja - znacznie bardziej stabilna
         migration_rate = ((avg_satisfaction - 20) / 100 + housing_bonus) * self.migration_factor  # Obniżony próg z 30 na 20
-        migration = int(total_pop * migration_rate * random.uniform(0.95, 1.05))
+        migration = int(total_pop * migration_rate * self.rng.uniform(0.95, 1.05))
         
         net_change = births - deaths + migration
         
@@ -304,6 +312,24 @@ class PopulationManager:
         # Update satisfaction based on needs
         self._update_satisfaction()
     
+    def _update_cohort_dynamics(self, avg_satisfaction: float, satisfaction_multiplier: float,
+                                housing_bonus: float):
+        """Tura modelu kohortowego - te same współczynniki co w modelu grup, stosowane do macierzy"""
+        migration_rate = ((avg_satisfaction - 20) / 100 + housing_bonus) * self.migration_factor
+        employment_ratio = self._employment_ratio()
+        self.cohorts.step(
+            birth_rate=self.birth_rate * satisfaction_multiplier * (1 + housing_bonus) * self.rng.uniform(0.95, 1.05),
+            death_rate=self.death_rate * (2 - satisfaction_multiplier) * self.rng.uniform(0.95, 1.05),
+            migration=self.cohorts.total() * migration_rate * self.rng.uniform(0.95, 1.05),
+            job_finding_rate=(employment_ratio or 0) * 0.1,  # jak w _update_employment
+            education_factor=self.needs['education']['satisfaction'] / 100
+        )
+        self._sync_cohort_groups()
+        
+        # Przepływ bezrobotnych do pracy jest już w modelu - tylko wskaźniki zatrudnienia
+        self._update_employment(move_unemployed=False)
+        self._update_satisfaction()
+    
     def _distribute_population_change(self, net_change: int):
         """Distribute population change across social classes"""
         if net_change == 0:
@@ -319,13 +345,13 @@ class PopulationManager:
                 continue  # Handle unemployment separately
                 
             proportion = group.count / total_pop
-            change = int(net_change * proportion * random.uniform(0.9, 1.1))  # Zmniejszona losowość z 0.7-1.3 na 0.9-1.1
+            change = int(net_change * proportion * self.rng.uniform(0.9, 1.1))  # Zmniejszona losowość z 0.7-1.3 na 0.9-1.1
             
             new_count = max(0, group.count + change)
             group.count = new_count
     
-    def _update_employment(self):
-        """Update employment rates based on available jobs"""
+    def _employment_ratio(self):
+        """Stosunek miejsc pracy do siły roboczej (maks. 1.0) lub None bez siły roboczej"""
         total_jobs = self.needs['jobs']['current']
         total_workforce = sum(
             group.count for group in self.groups.values()
@@ -333,9 +359,15 @@ class PopulationManager:
         )
         
         if total_workforce == 0:
-            return
+            return None
             
-        employment_ratio = min(1.0, total_jobs / total_workforce)
+        return min(1.0, total_jobs / total_workforce)
+    
+    def _update_employment(self, move_unemployed: bool = True):
+        """Update employment rates based on available jobs"""
+        employment_ratio = self._employment_ratio()
+        if employment_ratio is None:
+            return
         
         #Polimorfizm 
         # Update employment rates
@@ -343,6 +375,8 @@ class PopulationManager:
             if social_class == SocialClass.STUDENT:
                 continue
             elif social_class == SocialClass.UNEMPLOYED:
+                if not move_unemployed:
+                    continue
                 # Some unemployed might find jobs
                 jobs_found = int(group.count * employment_ratio * 0.1)  # 10% chance
                 group.count = max(0, group.count - jobs_found)
@@ -405,8 +439,8 @@ class PopulationManager:
             group.satisfaction = max(20, min(100, new_satisfaction))  # Zwiększony minimalny poziom z 10 na 20
     
     def get_demographics(self) -> Dict:
-        """Get demographic statistics"""
-        return {
+        """Get demographic statistics (z modelem kohortowym także rozkład wieku w 'cohorts')"""
+        demographics = {
             'total_population': self.get_total_population(),
             'unemployment_rate': self.get_unemployment_rate(),
             'average_satisfaction': self.get_average_satisfaction(),
@@ -421,10 +455,13 @@ class PopulationManager:
             },
             'needs': self.needs
         }
+        if self.cohorts is not None:
+            demographics['cohorts'] = self.cohorts.demographics()
+        return demographics
     
     def save_to_dict(self) -> Dict:
         """Save population state to dictionary"""
-        return {
+        data = {
             'groups': {
                 class_name.value: {
                     'social_class': group.social_class.value,
@@ -441,6 +478,9 @@ class PopulationManager:
             'death_rate': self.death_rate,
             'migration_factor': self.migration_factor
         }
+        if self.cohorts is not None:
+            data['cohorts'] = self.cohorts.save_to_dict()
+        return data
     
     def load_from_dict(self, data: Dict):
         """Load population state from dictionary"""
@@ -467,9 +507,20 @@ class PopulationManager:
             
         if 'migration_factor' in data:
             self.migration_factor = data['migration_factor']
+        
+        if 'cohorts' in data:
+            from .cohorts import CohortModel
+            self.cohorts = CohortModel.from_dict(data['cohorts'])
+            self._sync_cohort_groups()
+        elif self.cohorts is not None:
+            self.enable_cohort_model(self.cohorts.years_per_turn)
 
     def add_instant_population(self, value: int):
         """Instantly add population to the WORKER group (default for new housing)."""
+        if self.cohorts is not None:
+            self.cohorts.add_people(value, SocialClass.WORKER)
+            self._sync_cohort_groups()
+            return
         if SocialClass.WORKER in self.groups:
             self.groups[SocialClass.WORKER].count += value
         else:
@@ -537,3 +588,7 @@ class PopulationManager:
             'average_satisfaction': 0.0,
             'population_growth': 0.0
         }
+        
+        # Model kohortowy odtwarzany z początkowych grup
+        if self.cohorts is not None:
+            self.enable_cohort_model(self.cohorts.years_per_turn)
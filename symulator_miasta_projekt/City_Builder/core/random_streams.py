@@ -0,0 +1,74 @@
+"""
+Deterministyczne strumienie liczb losowych dla podsystemów gry.
+
+Każdy podsystem (mapa, populacja, handel, wydarzenia, dyplomacja) losuje
+z własnego obiektu random.Random, którego ziarno jest wyprowadzane z jednego
+ziarna gry. Dzięki temu:
+- ta sama gra (ziarno) zawsze przebiega tak samo - powtarzalne testy wydajności
+  i porównania regresji update_turn
+- dodatkowe losowania w jednym podsystemie nie zmieniają przebiegu pozostałych
+- ziarno zapisywane jest w pliku gry i odtwarzane przy wczytaniu
+"""
+import hashlib
+import random
+from typing import Dict, Optional
+
+# Strumienie używane przez podsystemy gry
+STREAM_NAMES = ('city_map', 'population', 'trade', 'advanced_events', 'diplomacy', 'events', 'finance')
+
+
+def derive_seed(game_seed: int, stream_name: str, turn: int = 0) -> int:
+    """
+    Wyprowadza ziarno strumienia z ziarna gry.
+
+    Używa SHA-256 zamiast hash(), bo hash() napisów jest losowany przy każdym
+    uruchomieniu Pythona - ziarna muszą być takie same we wszystkich procesach.
+
+    Args:
+        game_seed: ziarno gry
+        stream_name: nazwa strumienia (podsystemu)
+        turn: tura, od której strumień jest odtwarzany (po wczytaniu gry)
+    """
+    digest = hashlib.sha256(f"{game_seed}:{stream_name}:{turn}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def new_game_seed() -> int:
+    """Losuje ziarno dla nowej gry (niezależnie od stanu globalnego modułu random)."""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+class RandomStreams:
+    """
+    Zbiór nazwanych strumieni random.Random wyprowadzonych z jednego ziarna gry.
+
+    Podsystemy przechowują referencje do swoich strumieni, dlatego reseed()
+    zmienia ziarno istniejących obiektów w miejscu zamiast tworzyć nowe.
+    """
+
+    def __init__(self, game_seed: Optional[int] = None):
+        self.game_seed = game_seed if game_seed is not None else new_game_seed()
+        self.turn = 0                                  # tura, od której odtworzono strumienie
+        self._streams: Dict[str, random.Random] = {}
+
+    def get(self, stream_name: str) -> random.Random:
+        """Zwraca strumień o podanej nazwie (tworzy go przy pierwszym użyciu)."""
+        stream = self._streams.get(stream_name)
+        if stream is None:
+            stream = random.Random(derive_seed(self.game_seed, stream_name, self.turn))
+            self._streams[stream_name] = stream
+        return stream
+
+    def reseed(self, game_seed: int, turn: int = 0):
+        """
+        Ustawia nowe ziarno gry dla wszystkich strumieni.
+
+        Args:
+            game_seed: ziarno gry (np. wczytane z zapisu)
+            turn: aktualna tura - wczytana gra kontynuuje deterministycznie
+                względem pary (ziarno, tura)
+        """
+        self.game_seed = game_seed
+        self.turn = turn
+        for stream_name, stream in self._streams.items():
+            stream.seed(derive_seed(game_seed, stream_name, turn))
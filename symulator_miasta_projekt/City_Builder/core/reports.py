@@ -16,6 +16,8 @@ from dataclasses import dataclass
 from enum import Enum
 from unittest.mock import Mock
 
+from .downsampling import DownsampleCache
+
 class ReportType(Enum):
     """Typy raportów"""
     FINANCIAL = "financial"
@@ -207,6 +209,9 @@ class ReportManager:
         self.reports_generated = 0
         self.export_directory = "exports"
         self.reports_history: List[BaseReport] = []
+        # Serie w raportach (dla wykresów) redukowane do chart_points punktów
+        self.chart_points = 200
+        self.downsample_cache = DownsampleCache()
         
         # Utwórz katalog eksportu jeśli nie istnieje
         os.makedirs(self.export_directory, exist_ok=True)
@@ -396,6 +401,9 @@ class ReportManager:
         if avg_unemployment > 0.1:
             recommendations.append("Wysokie bezrobocie - zbuduj więcej miejsc pracy")
         
+        turns, population, satisfaction, unemployment = self._chart_series(
+            'population', turns, population=population, satisfaction=satisfaction, unemployment=unemployment
+        )
         data = {
             'turns': turns,
             'population': population,
@@ -447,6 +455,9 @@ class ReportManager:
         if money[-1] < 10000:
             recommendations.append("Niski poziom gotówki - zwiększ podatki lub zmniejsz wydatki")
         
+        turns, money, income, expenses, net_income, debt = self._chart_series(
+            'economic', turns, money=money, income=income, expenses=expenses, net_income=net_income, debt=debt
+        )
         data = {
             'turns': turns,
             'money': money,
@@ -469,6 +480,22 @@ class ReportManager:
             recommendations
         )
     
+    def _chart_series(self, report_name: str, turns: List, **series) -> Tuple:
+        """
+        Redukuje serie raportu do chart_points punktów (LTTB, zachowuje szczyty).
+
+        Trendy i średnie liczone są wcześniej z pełnych serii - redukowane są
+        tylko serie przekazywane do wykresów.
+
+        Returns:
+            Tuple: (tury, *serie) w kolejności argumentów
+        """
+        named = {f"{report_name}.{name}": values for name, values in series.items()}
+        indices = self.downsample_cache.downsample(turns, named, self.chart_points)
+        if len(indices) == len(turns):
+            return (turns, *series.values())
+        return tuple([values[i] for i in indices] for values in (turns, *series.values()))
+
     def create_chart(self, report_data: ReportData, save_path: str = None) -> str:
         """Tworzy wykres na podstawie danych raportu"""
         plt.figure(figsize=(12, 8))
@@ -666,4 +693,26 @@ class ReportManager:
     def load_from_dict(self, data: Dict):
         """Wczytuje stan ze słownika"""
         self.historical_data = data.get('historical_data', [])
-        self.reports_generated = data.get('reports_generated', 0) 
\ No newline at end of file
+        self.reports_generated = data.get('reports_generated', 0) 
+        self.downsample_cache.clear()  # te same tury mogą mieć inne wartości
+    
+    def load_history_from_database(self, database, save_id: int, buckets: int = 200):
+        """
+        Wczytuje historię rozgrywki z szeregu czasowego w bazie danych.
+
+        Historia agregowana jest w bazie do co najwyżej buckets przedziałów
+        (średnie wartości), więc nawet bardzo długa gra daje tyle rekordów,
+        ile mieści historical_data.
+        """
+        rows = database.query_history(save_id, buckets=buckets)
+        self.historical_data = []
+        self.downsample_cache.clear()
+        for i, turn in enumerate(rows['turns']):
+            self.record_turn_data(turn, {
+                'population': rows['population'][i],
+                'money': rows['money'][i],
+                'satisfaction': rows['satisfaction'][i],
+                'unemployment_rate': rows['unemployment'][i],
+                'income': rows['income'][i],
+                'expenses': rows['expenses'][i],
+            })
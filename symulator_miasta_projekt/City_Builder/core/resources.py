@@ -1,7 +1,9 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from dataclasses import dataclass, field
 import json
 
+from .building_ledger import BuildingLedger
+
 @dataclass
 class ResourceData:
     """Represents a single resource type"""
@@ -141,13 +143,15 @@ class Economy:
         
         return self.get_resource_amount('money') <= debt_limit
     
-    def calculate_taxes(self, buildings: List, population_manager=None) -> float:
+    def calculate_taxes(self, buildings: List, population_manager=None, ledger: BuildingLedger = None) -> float:
         """
         Oblicza dochody podatkowe z budynków i pracującej populacji (znacznie zwiększone).
         
         Args:
             buildings (List): lista budynków w mieście
             population_manager: menedżer populacji (opcjonalnie)
+            ledger (BuildingLedger): księga agregatów budynków (opcjonalnie) -
+                gdy podana, baza podatkowa nie jest przeliczana z listy budynków
             
         Returns:
             float: całkowite dochody podatkowe na turę
@@ -166,31 +170,14 @@ class Economy:
                 for social, group in population_manager.groups.items()  # dla każdej grupy społecznej
                 if social.value not in ['student', 'unemployed']        # pomijaj studentów i bezrobotnych
             )
-        # Przejdź przez wszystkie budynki i oblicz podatki
-        for building in buildings:
-            # Sprawdź czy budynek istnieje i ma typ
-            if not building or not hasattr(building, 'building_type'):
-                continue  # pomiń ten budynek
-                
-            building_type = building.building_type.value  # pobierz typ budynku jako string
-            
-            # ZNACZNIE zwiększone dochody z budynków dla lepszej rozgrywki
-            if 'commercial' in building_type or 'shop' in building_type or 'mall' in building_type:
-                # Budynki komercyjne - generują 12% swojej wartości jako dochód bazowy
-                base_income = building.cost * 0.12  # Zwiększone z 0.08 na 0.12 (12%!)
-                total_tax += base_income * self.tax_rates['commercial']  # zastosuj stawkę podatkową
-            elif 'industrial' in building_type or 'factory' in building_type:
-                # Budynki przemysłowe - generują 10% swojej wartości jako dochód bazowy
-                base_income = building.cost * 0.10  # Zwiększone z 0.07 na 0.10 (10%!)
-                total_tax += base_income * self.tax_rates['industrial']
-            elif 'residential' in building_type or 'house' in building_type or 'apartment' in building_type:
-                # Budynki mieszkalne - generują 8% swojej wartości jako dochód bazowy
-                base_income = building.cost * 0.08  # Zwiększone z 0.05 na 0.08 (8%!)
-                total_tax += base_income * self.tax_rates['residential']
-            else:
-                # Wszystkie inne budynki - traktowane jak mieszkalne
-                base_income = building.cost * 0.08  # Zwiększone z 0.05 na 0.08 (8%!)
-                total_tax += base_income * self.tax_rates['residential']
+        
+        if ledger is None:
+            ledger = BuildingLedger.from_buildings(buildings)
+        
+        # Podatek od budynków: dochód bazowy każdej klasy (komercyjna 12%, przemysłowa 10%,
+        # mieszkalna 8% wartości budynków) razy stawka podatkowa tej klasy
+        for tax_class, base_income in ledger.taxable_base.items():
+            total_tax += base_income * self.tax_rates.get(tax_class, 0)
                 
         # Dodaj podatek dochodowy od zatrudnionych mieszkańców
         # Każdy zatrudniony mieszkaniec płaci 75$ podatku na turę
@@ -198,13 +185,14 @@ class Economy:
         
         return total_tax  # zwróć całkowity podatek
     
-    def calculate_expenses(self, buildings: List, population_manager=None) -> float:
+    def calculate_expenses(self, buildings: List, population_manager=None, ledger: BuildingLedger = None) -> float:
         """
         Oblicza koszty utrzymania miasta (drastycznie zmniejszone dla lepszej rozgrywki).
         
         Args:
             buildings (List): lista budynków w mieście
             population_manager: menedżer populacji (opcjonalnie)
+            ledger (BuildingLedger): księga agregatów budynków (opcjonalnie)
             
         Returns:
             float: całkowite koszty utrzymania na turę
@@ -212,58 +200,58 @@ class Economy:
         Koszty zostały specjalnie zmniejszone aby gra była bardziej przystępna
         i gracz nie musiał walczyć z nieustannymi problemami finansowymi.
         """
-        total_expenses = 0
-        for building in buildings:
-            if not building:
-                continue
-            building_type = building.building_type.value
-            # BARDZO niskie koszty utrzymania
-            if any(service in building_type for service in ['park', 'school', 'hospital', 'university', 'police', 'fire']):
-                maintenance_cost = building.cost * 0.0005  # Zmniejszone z 0.002 na 0.0005 (0.05%!)
-            else:
-                maintenance_cost = building.cost * 0.0003  # Zmniejszone z 0.0015 na 0.0003 (0.03%!)
-            total_expenses += maintenance_cost
+        if ledger is None:
+            ledger = BuildingLedger.from_buildings(buildings)
+        
+        # BARDZO niskie koszty utrzymania (usługi publiczne 0.05%, pozostałe 0.03% wartości)
+        total_expenses = ledger.maintenance
         # BARDZO niski koszt mieszkańca
         if population_manager:
             total_pop = population_manager.get_total_population()
             total_expenses += total_pop * 0.05  # Zmniejszone z 0.2 na 0.05 (25% poprzedniej wartości!)
         return total_expenses
     
-    def update_turn(self, buildings: List, population_manager=None):
-        """Update resources at the end of each turn"""
+    def update_turn(self, buildings: List, population_manager=None, ledger: BuildingLedger = None,
+                    record_history: bool = True) -> Tuple[float, float]:
+        """
+        Update resources at the end of each turn.
+        
+        record_history=False pomija historię dla raportów i alerty o zmianach
+        dochodów (tryb bezgłowy GameEngine.simulate).
+        
+        Returns:
+            Tuple[float, float]: (dochód z podatków, wydatki) w tej turze
+        """
+        if ledger is None:
+            ledger = BuildingLedger.from_buildings(buildings)
+        
         # Calculate income and expenses
-        tax_income = self.calculate_taxes(buildings, population_manager)
-        total_expenses = self.calculate_expenses(buildings, population_manager)
+        tax_income = self.calculate_taxes(buildings, population_manager, ledger)
+        total_expenses = self.calculate_expenses(buildings, population_manager, ledger)
         
         # Sprawdź czy są znaczące zmiany dochodów
-        self._check_income_changes(tax_income, total_expenses)
+        if record_history:
+            self._check_income_changes(tax_income, total_expenses)
         
         # Update money
         net_income = tax_income - total_expenses
         self.earn_money(net_income)
         # Update resource production/consumption
-        self._update_resource_flows(buildings)
+        self._update_resource_flows(buildings, ledger)
         # Store history for reports
-        self._record_history()
+        if record_history:
+            self._record_history()
+        return tax_income, total_expenses
     
-    def _update_resource_flows(self, buildings: List):
+    def _update_resource_flows(self, buildings: List, ledger: BuildingLedger = None):
         """Update resource production and consumption"""
-        # Reset production/consumption rates
-        for resource in self.resources.values():
-            resource.production_rate = 0
-            resource.consumption_rate = 0
-        
-        # Calculate from buildings
-        for building in buildings:
-            if not building or not hasattr(building, 'effects'):
-                continue
-                
-            for effect, value in building.effects.items():
-                if effect in self.resources:
-                    if value > 0:
-                        self.resources[effect].production_rate += value
-                    else:
-                        self.resources[effect].consumption_rate += abs(value)
+        if ledger is None:
+            ledger = BuildingLedger.from_buildings(buildings)
+        
+        # Production/consumption rates come straight from the ledger
+        for resource_name, resource in self.resources.items():
+            resource.production_rate = ledger.production.get(resource_name, 0)
+            resource.consumption_rate = ledger.consumption.get(resource_name, 0)
         
         # Apply production/consumption
         for resource_name, resource in self.resources.items():
@@ -271,7 +259,8 @@ class Economy:
                 continue
                 
             net_change = resource.production_rate - resource.consumption_rate
-            self.modify_resource(resource_name, net_change)
+            if net_change:  # brak zmiany - pomiń walidację i zaokrąglanie
+                self.modify_resource(resource_name, net_change)
     
     def _record_history(self):
         """Record current state for historical analysis"""
@@ -0,0 +1,264 @@
+"""
+Kompaktowy, wersjonowany format zapisu gry.
+
+Format 2.0 zastępuje zapis JSON "jeden słownik na kafelek" (format 1.0):
+- teren mapy zapisany jest jako RLE (kodowanie długości serii) tablicy kodów
+  terenu CityMap.terrain - duże jednolite obszary zajmują kilka bajtów
+- budynki zapisane są raz na kafel główny, w kolumnach, a powtarzające się
+  definicje budynków (nazwa, typ, koszt, efekty, rozmiar) jako szablony
+- stan podsystemów (ekonomia, populacja) trafia do osobnej sekcji 'subsystems'
+- cały dokument JSON jest kompresowany (gzip lub lzma); rodzaj kompresji
+  rozpoznawany jest przy odczycie po nagłówku pliku
+
+Pliki w formacie 1.0 (zwykły JSON) są nadal wczytywane - read_save_file()
+konwertuje je do formatu 2.0.
+"""
+import base64
+import gzip
+import json
+import lzma
+import os
+import tempfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .tile import Building, BuildingType, TerrainType, TERRAIN_CODES
+
+SAVE_FORMAT_VERSION = '2.0'
+SAVE_EXTENSION = '.sav'            # rozszerzenie zapisów w formacie 2.0
+LEGACY_SAVE_EXTENSION = '.json'    # rozszerzenie zapisów w formacie 1.0
+SAVE_EXTENSIONS = (SAVE_EXTENSION, LEGACY_SAVE_EXTENSION)
+
+# Obsługiwane kompresje i nagłówki (magic bytes) rozpoznawane przy odczycie
+COMPRESSIONS = ('gzip', 'lzma', 'none')
+GZIP_MAGIC = b'\x1f\x8b'
+LZMA_MAGIC = b'\xfd7zXZ\x00'
+
+
+def encode_terrain(terrain: np.ndarray) -> Dict[str, str]:
+    """
+    Koduje tablicę kodów terenu jako serie (wartość, długość).
+
+    Tablica spłaszczana jest w kolejności [x, y] (x * height + y).
+
+    Returns:
+        Dict[str, str]: {'values': base64 uint8, 'lengths': base64 uint32 little-endian}
+    """
+    flat = np.ascontiguousarray(terrain, dtype=np.uint8).ravel()
+    if flat.size == 0:
+        return {'values': '', 'lengths': ''}
+
+    # Początki serii - miejsca, w których zmienia się kod terenu
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [flat.size]))).astype('<u4')
+    return {
+        'values': base64.b64encode(flat[starts].tobytes()).decode('ascii'),
+        'lengths': base64.b64encode(lengths.tobytes()).decode('ascii'),
+    }
+
+
+def decode_terrain(data: Dict[str, str], width: int, height: int) -> np.ndarray:
+    """
+    Odtwarza tablicę kodów terenu (width, height) z serii RLE.
+
+    Raises:
+        ValueError: jeśli serie nie pokrywają dokładnie całej mapy
+    """
+    values = np.frombuffer(base64.b64decode(data['values']), dtype=np.uint8)
+    lengths = np.frombuffer(base64.b64decode(data['lengths']), dtype='<u4')
+    if len(values) != len(lengths) or int(lengths.sum()) != width * height:
+        raise ValueError("Uszkodzone dane terenu w zapisie gry")
+    return np.repeat(values, lengths).reshape(width, height)
+
+
+def building_rows(buildings: Dict[Tuple[int, int], Building]) -> List[tuple]:
+    """
+    Kopiuje dane budynków do późniejszego kodowania (encode_building_rows).
+
+    Jedna krotka (x, y, nazwa, typ, koszt, efekty, rozmiar, rotacja) na kafel
+    główny, z własną kopią słownika efektów - bez kodowania i szablonów,
+    więc kopia jest tania, a dalsze zmiany mapy jej nie dotyczą.
+    """
+    return [(x, y, building.name, building.building_type, building.cost,
+             dict(building.effects), tuple(building.size), building.rotation)
+            for (x, y), building in buildings.items()]
+
+
+def encode_buildings(buildings: Dict[Tuple[int, int], Building]) -> Dict[str, list]:
+    """
+    Koduje budynki (kafel główny -> budynek) w kolumnach z tabelą szablonów.
+
+    Budynki o tej samej nazwie, typie, koszcie, efektach i rozmiarze
+    wskazują na jeden szablon, więc tysiące domów zajmują jeden wpis.
+    """
+    return encode_building_rows(building_rows(buildings))
+
+
+def encode_building_rows(rows: List[tuple]) -> Dict[str, list]:
+    """Koduje krotki z building_rows() w kolumnach z tabelą szablonów (jak encode_buildings)."""
+    templates = []
+    template_index = {}
+    columns = {'x': [], 'y': [], 'template': [], 'rotation': []}
+
+    for x, y, name, building_type, cost, effects, size, rotation in rows:
+        template = {
+            'name': name,
+            'building_type': building_type.value,
+            'cost': cost,
+            'effects': effects,
+            'size': list(size)
+        }
+        key = json.dumps(template, sort_keys=True)
+        if key not in template_index:
+            template_index[key] = len(templates)
+            templates.append(template)
+
+        columns['x'].append(x)
+        columns['y'].append(y)
+        columns['template'].append(template_index[key])
+        columns['rotation'].append(rotation)
+
+    return {'templates': templates, **columns}
+
+
+def copy_containers(value):
+    """
+    Kopiuje zagnieżdżone słowniki i listy (stan podsystemów w migawce zapisu).
+
+    Wartości skalarne są niezmienne i pozostają współdzielone - to wystarcza,
+    aby dalsza rozgrywka nie zmieniała migawki, a jest tańsze od deepcopy.
+    """
+    if isinstance(value, dict):
+        return {key: copy_containers(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_containers(item) for item in value]
+    return value
+
+
+def decode_buildings(data: Dict[str, list]) -> List[Tuple[int, int, Building]]:
+    """
+    Odtwarza budynki z kolumn zapisu.
+
+    Returns:
+        List[Tuple[int, int, Building]]: (x, y, budynek) w kolejności zapisu
+    """
+    templates = data.get('templates', [])
+    buildings = []
+    for x, y, template_id, rotation in zip(data.get('x', []), data.get('y', []),
+                                          data.get('template', []), data.get('rotation', [])):
+        template = templates[template_id]
+        building = Building(
+            template['name'],
+            BuildingType(template['building_type']),
+            template['cost'],
+            dict(template['effects']),  # każdy budynek ma własny słownik efektów
+            size=tuple(template.get('size', (1, 1)))
+        )
+        building.rotation = rotation
+        buildings.append((x, y, building))
+    return buildings
+
+
+def upgrade_legacy_save(save_data: Dict) -> Dict:
+    """
+    Konwertuje zapis w formacie 1.0 (lista kafelków) do formatu 2.0.
+
+    Budynek tworzony jest tylko z kafla głównego. Starsze zapisy nie mają
+    'is_main_tile' - wtedy każdy kafel z budynkiem to osobny budynek.
+    """
+    map_data = save_data.get('map', {})
+    width, height = map_data.get('width', 60), map_data.get('height', 60)
+
+    terrain = np.full((width, height), TERRAIN_CODES[TerrainType.GRASS], dtype=np.uint8)
+    buildings = {}
+    for tile_data in map_data.get('tiles', []):
+        x, y = tile_data['x'], tile_data['y']
+        if not (0 <= x < width and 0 <= y < height):
+            continue
+        terrain[x, y] = TERRAIN_CODES[TerrainType(tile_data['terrain_type'])]
+
+        building_data = tile_data.get('building')
+        if building_data and tile_data.get('is_main_tile', True):
+            building = Building(
+                building_data['name'],
+                BuildingType(building_data['building_type']),
+                building_data['cost'],
+                building_data['effects'],
+                size=tuple(building_data.get('size', (1, 1)))
+            )
+            building.rotation = building_data.get('rotation', 0)
+            buildings[(x, y)] = building
+
+    document = {key: value for key, value in save_data.items()
+                if key not in ('map', 'economy', 'population')}
+    document['version'] = SAVE_FORMAT_VERSION
+    document['map'] = {
+        'width': width,
+        'height': height,
+        'terrain': encode_terrain(terrain),
+        'buildings': encode_buildings(buildings)
+    }
+    document['subsystems'] = {name: save_data[name] for name in ('economy', 'population')
+                              if name in save_data}
+    return document
+
+
+def write_save_file(filepath: str, document: Dict, compression: str = 'gzip') -> None:
+    """
+    Zapisuje dokument zapisu do pliku z wybraną kompresją.
+
+    Zapis jest atomowy: dane trafiają do pliku tymczasowego w tym samym
+    katalogu, który po zapisaniu na dysk podmienia docelowy plik (os.replace).
+    Przerwany zapis nigdy nie zostawia uszkodzonego pliku zapisu.
+
+    Args:
+        filepath: ścieżka pliku
+        document: dokument w formacie 2.0
+        compression: 'gzip' (szybki, domyślny), 'lzma' (mniejszy plik) lub 'none'
+
+    Raises:
+        ValueError: nieznany rodzaj kompresji
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Nieznana kompresja zapisu: {compression}")
+
+    payload = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if compression == 'gzip':
+        payload = gzip.compress(payload, compresslevel=6)
+    elif compression == 'lzma':
+        payload = lzma.compress(payload)
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(filepath) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_save_file(filepath: str) -> Dict:
+    """
+    Wczytuje plik zapisu (dowolna kompresja, format 1.0 lub 2.0).
+
+    Returns:
+        Dict: dokument w formacie 2.0
+    """
+    with open(filepath, 'rb') as f:
+        payload = f.read()
+
+    if payload.startswith(GZIP_MAGIC):
+        payload = gzip.decompress(payload)
+    elif payload.startswith(LZMA_MAGIC):
+        payload = lzma.decompress(payload)
+
+    save_data = json.loads(payload.decode('utf-8'))
+    if 'tiles' in save_data.get('map', {}):
+        return upgrade_legacy_save(save_data)
+    return save_data
@@ -0,0 +1,282 @@
+"""
+Równoległy runner Monte Carlo dla scenariuszy City Builder.
+
+Uruchamia wiele niezależnych rozgrywek (GameEngine) dla każdego scenariusza
+z ScenarioManager, sterowanych wymienną strategią budowy, i zbiera:
+- odsetek ukończonych i przegranych scenariuszy
+- rozkład liczby tur potrzebnych do ukończenia
+- odsetek bankructw
+
+Każdy przebieg to osobne zadanie dla ProcessPoolExecutor, więc obliczenia
+skalują się liniowo z liczbą rdzeni. Wyniki wszystkich przebiegów trafiają
+do jednego pliku kolumnowego .npz (jedna tablica NumPy na kolumnę).
+"""
+import copy
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .game_engine import GameEngine
+from .scenarios import ScenarioManager
+from .tile import Building, BuildingType
+
+# Wyniki pojedynczego przebiegu
+OUTCOME_COMPLETED = 'completed'   # wszystkie obowiązkowe cele osiągnięte
+OUTCOME_FAILED = 'failed'         # przekroczony limit czasu / warunek porażki scenariusza
+OUTCOME_BANKRUPT = 'bankrupt'     # dług przekroczył limit bankructwa
+OUTCOME_TIMEOUT = 'timeout'       # koniec limitu tur symulacji bez rozstrzygnięcia
+
+# Kolumny pliku wynikowego (kolejność zapisu)
+RESULT_COLUMNS = (
+    'scenario', 'seed', 'outcome', 'turns', 'completion_turn',
+    'final_money', 'min_money', 'final_population', 'max_population', 'buildings'
+)
+
+# Budynki stawiane przez BalancedBuildPolicy dla każdej potrzeby - od najlepszego
+# (nazwa, typ, koszt, efekty, warunek odblokowania, rozmiar) - wartości jak w BuildPanel
+POLICY_BUILDINGS = {
+    'housing': [
+        ("Blok", BuildingType.RESIDENTIAL, 800, {"population": 70, "happiness": 10}, {"city_level": 3}, (2, 2)),
+        ("Dom", BuildingType.HOUSE, 500, {"population": 35, "happiness": 12}, None, (1, 1)),
+    ],
+    'jobs': [
+        ("Fabryka", BuildingType.FACTORY, 1500, {"production": 40, "jobs": 35, "pollution": -5},
+         {"city_level": 4}, (2, 2)),
+        ("Sklep", BuildingType.SHOP, 800, {"commerce": 20, "jobs": 12}, None, (1, 1)),
+    ],
+    'healthcare': [
+        ("Szpital", BuildingType.HOSPITAL, 2000, {"health": 35, "jobs": 25, "happiness": 12},
+         {"city_level": 5}, (2, 3)),
+    ],
+    'education': [
+        ("Szkoła", BuildingType.SCHOOL, 1500, {"education": 30, "jobs": 20, "happiness": 10},
+         {"city_level": 3}, (2, 2)),
+    ],
+    'safety': [
+        ("Policja", BuildingType.POLICE, 1800, {"safety": 35, "jobs": 15, "happiness": 8},
+         {"city_level": 4}, (1, 2)),
+    ],
+    'entertainment': [
+        ("Park", BuildingType.PARK, 800, {"happiness": 20, "environment": 15}, {"city_level": 2}, (2, 2)),
+    ],
+    'transport': [
+        ("Droga", BuildingType.ROAD, 100, {"traffic": 2}, None, (1, 1)),
+    ],
+}
+
+
+class BalancedBuildPolicy:
+    """
+    Prosta strategia budowy dla symulacji bezgłowych.
+
+    Przed każdą turą stawia budynek dla najsłabiej zaspokojonej potrzeby
+    mieszkańców (najlepszy odblokowany wariant z POLICY_BUILDINGS), o ile po
+    zakupie w kasie zostaje rezerwa. Strategią może być dowolny obiekt
+    wywoływalny policy(engine) - musi tylko dać się zserializować (pickle),
+    aby trafić do procesów roboczych.
+    """
+
+    def __init__(self, reserve: float = 2000.0, builds_per_turn: int = 1):
+        self.reserve = reserve                  # minimalna kwota pozostawiana w kasie
+        self.builds_per_turn = builds_per_turn  # maksymalna liczba budynków na turę
+        self._cursor = 0                        # pierwszy kafelek (x * height + y) wart sprawdzenia
+
+    def __call__(self, engine: GameEngine):
+        for _ in range(self.builds_per_turn):
+            building = self._choose_building(engine)
+            if building is None or not self._place(engine, building):
+                return
+
+    def _choose_building(self, engine: GameEngine) -> Optional[Building]:
+        """Wybiera budynek dla potrzeby o najniższym zadowoleniu."""
+        needs = engine.population.needs
+        for need_name in sorted(POLICY_BUILDINGS, key=lambda name: needs.get(name, {}).get('satisfaction', 100)):
+            for name, building_type, cost, effects, unlock_condition, size in POLICY_BUILDINGS[need_name]:
+                building = Building(name, building_type, cost, dict(effects),
+                                    unlock_condition=unlock_condition, size=size)
+                if not engine.is_building_unlocked(building)[0]:
+                    continue
+                if engine.economy.get_resource_amount('money') - engine.get_adjusted_cost(cost) < self.reserve:
+                    return None  # najpilniejsza potrzeba jest za droga - poczekaj na pieniądze
+                return building
+        return None
+
+    def _place(self, engine: GameEngine, building: Building) -> bool:
+        """Stawia budynek na pierwszym wolnym miejscu od kursora."""
+        city_map = engine.city_map
+        # Indeksy (x * height + y) wolnych kafelków od kursora - jedna operacja na masce
+        # zamiast sprawdzania kafelek po kafelku
+        candidates = np.flatnonzero(city_map.get_buildable_mask().ravel()[self._cursor:]) + self._cursor
+
+        for index in candidates:
+            x, y = divmod(int(index), city_map.height)
+            if engine.can_build(x, y, building)[0]:
+                engine.place_building(x, y, building)
+                self._cursor = int(candidates[0])  # wolne kafelki przed kursorem już nie istnieją
+                return True
+
+        if len(candidates) == 0:
+            self._cursor = city_map.width * city_map.height  # mapa zapełniona
+        return False
+
+
+def run_scenario_once(scenario_id: str, seed: int, max_turns: int,
+                      policy: Optional[Callable] = None,
+                      map_size: Tuple[int, int] = (30, 30)) -> Dict:
+    """
+    Rozgrywa jeden scenariusz w trybie bezgłowym.
+
+    Args:
+        scenario_id: identyfikator scenariusza z ScenarioManager
+        seed: ziarno losowości przebiegu
+        max_turns: limit tur symulacji
+        policy: strategia budowy policy(engine) (domyślnie BalancedBuildPolicy)
+        map_size: (szerokość, wysokość) mapy
+
+    Returns:
+        Dict: jeden wiersz wyników (klucze jak RESULT_COLUMNS)
+    """
+    policy = copy.deepcopy(policy) if policy is not None else BalancedBuildPolicy()
+
+    engine = GameEngine(*map_size, seed=seed)
+    engine.alerts_enabled = False
+    engine.scenario_manager.scenarios[scenario_id].unlocked = True  # oceniamy także zablokowane
+    success, message = engine.start_scenario(scenario_id)
+    if not success:
+        raise ValueError(message)
+
+    metrics = engine.simulate(max_turns, {
+        'metrics': ('money', 'population'),
+        'policy': policy,
+        'stop_on_scenario_end': True,
+        'stop_on_bankruptcy': True
+    })
+
+    scenario = engine.scenario_manager.current_scenario
+    if scenario.completed:
+        outcome = OUTCOME_COMPLETED
+    elif engine.economy.is_bankrupt(game_engine=engine):
+        outcome = OUTCOME_BANKRUPT
+    elif scenario.check_failure(engine.get_city_summary()):
+        outcome = OUTCOME_FAILED
+    else:
+        outcome = OUTCOME_TIMEOUT
+
+    money = metrics['money']
+    population = metrics['population']
+    return {
+        'scenario': scenario_id,
+        'seed': seed,
+        'outcome': outcome,
+        'turns': engine.turn,
+        'completion_turn': engine.turn if outcome == OUTCOME_COMPLETED else -1,
+        'final_money': engine.economy.get_resource_amount('money'),
+        'min_money': float(money.min()) if len(money) else engine.economy.get_resource_amount('money'),
+        'final_population': engine.population.get_total_population(),
+        'max_population': float(population.max()) if len(population) else 0.0,
+        'buildings': len(engine.city_map.buildings)
+    }
+
+
+def _run_task(task: Tuple) -> Dict:
+    """Punkt wejścia procesu roboczego (zadanie przekazywane jako krotka)."""
+    return run_scenario_once(*task)
+
+
+def run_monte_carlo(scenario_ids: Optional[Iterable[str]] = None, runs_per_scenario: int = 100,
+                    max_turns: int = 200, policy: Optional[Callable] = None, base_seed: int = 0,
+                    workers: Optional[int] = None, map_size: Tuple[int, int] = (30, 30),
+                    output_path: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Uruchamia runs_per_scenario przebiegów dla każdego scenariusza.
+
+    Args:
+        scenario_ids: scenariusze do oceny (domyślnie wszystkie)
+        runs_per_scenario: liczba przebiegów na scenariusz
+        max_turns: limit tur pojedynczego przebiegu
+        policy: strategia budowy (obiekt wywoływalny, serializowalny)
+        base_seed: ziarno pierwszego przebiegu - kolejne dostają base_seed + numer zadania
+        workers: liczba procesów (None = liczba rdzeni, 0 = bez procesów, w bieżącym wątku)
+        map_size: (szerokość, wysokość) mapy
+        output_path: plik .npz na wyniki (None = nie zapisuj)
+
+    Returns:
+        Dict[str, np.ndarray]: kolumny wyników (RESULT_COLUMNS), jeden wiersz na przebieg
+    """
+    if scenario_ids is None:
+        scenario_ids = list(ScenarioManager().scenarios)
+    run_scenarios = [scenario_id for scenario_id in scenario_ids for _ in range(runs_per_scenario)]
+    tasks = [(scenario_id, base_seed + index, max_turns, policy, map_size)
+             for index, scenario_id in enumerate(run_scenarios)]
+
+    logger = logging.getLogger('scenario_runner')
+    logger.info(f"Monte Carlo: {len(tasks)} runs, max {max_turns} turns, workers={workers}")
+
+    if workers == 0:
+        rows = [_run_task(task) for task in tasks]
+    else:
+        workers = workers or os.cpu_count() or 1
+        # Paczki zadań zmniejszają narzut komunikacji między procesami
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(_run_task, tasks, chunksize=chunksize))
+
+    columns = _rows_to_columns(rows)
+    if output_path:
+        np.savez_compressed(output_path, **columns)
+        logger.info(f"Monte Carlo results saved to {output_path}")
+    return columns
+
+
+def _rows_to_columns(rows: List[Dict]) -> Dict[str, np.ndarray]:
+    """Zamienia listę wierszy wyników na kolumny NumPy."""
+    dtypes = {
+        'scenario': str, 'outcome': str,
+        'seed': np.int64, 'turns': np.int32, 'completion_turn': np.int32, 'buildings': np.int32
+    }
+    return {column: np.array([row[column] for row in rows], dtype=dtypes.get(column, np.float64))
+            for column in RESULT_COLUMNS}
+
+
+def load_results(path: str) -> Dict[str, np.ndarray]:
+    """Wczytuje kolumny wyników zapisane przez run_monte_carlo."""
+    with np.load(path) as data:
+        return {column: data[column] for column in data.files}
+
+
+def summarize_results(columns: Dict[str, np.ndarray]) -> Dict[str, Dict]:
+    """
+    Agreguje wyniki przebiegów dla każdego scenariusza.
+
+    Returns:
+        Dict[str, Dict]: scenariusz -> {'runs', 'completion_rate', 'failure_rate',
+            'bankruptcy_rate', 'timeout_rate', 'turns_to_completion'}
+            gdzie turns_to_completion to {'mean', 'p10', 'p50', 'p90'} lub None
+    """
+    summary = {}
+    for scenario_id in np.unique(columns['scenario']):
+        mask = columns['scenario'] == scenario_id
+        outcomes = columns['outcome'][mask]
+        runs = int(mask.sum())
+        completion_turns = columns['completion_turn'][mask][outcomes == OUTCOME_COMPLETED]
+
+        turns_to_completion = None
+        if len(completion_turns):
+            p10, p50, p90 = np.percentile(completion_turns, [10, 50, 90])
+            turns_to_completion = {
+                'mean': float(completion_turns.mean()),
+                'p10': float(p10), 'p50': float(p50), 'p90': float(p90)
+            }
+
+        summary[str(scenario_id)] = {
+            'runs': runs,
+            'completion_rate': float(np.mean(outcomes == OUTCOME_COMPLETED)),
+            'failure_rate': float(np.mean(outcomes == OUTCOME_FAILED)),
+            'bankruptcy_rate': float(np.mean(outcomes == OUTCOME_BANKRUPT)),
+            'timeout_rate': float(np.mean(outcomes == OUTCOME_TIMEOUT)),
+            'turns_to_completion': turns_to_completion
+        }
+    return summary
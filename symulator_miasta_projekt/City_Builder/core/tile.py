@@ -15,6 +15,10 @@ class TerrainType(Enum):
     ROAD = "road"        # droga - infrastruktura transportowa
     SIDEWALK = "sidewalk"  # chodnik - infrastruktura dla pieszych
 
+# Kody terenu przechowywane w tablicy CityMap.terrain (uint8) i odwrotne mapowanie
+TERRAIN_TYPES = tuple(TerrainType)                                   # kod -> TerrainType
+TERRAIN_CODES = {terrain: code for code, terrain in enumerate(TERRAIN_TYPES)}  # TerrainType -> kod
+
 class BuildingType(Enum):
     """
     Wyliczenie typów budynków dostępnych w grze.
@@ -248,7 +252,12 @@ class Building:
 
 class Tile:
     """
-    Klasa reprezentująca pojedynczy kafelek (płytkę) na mapie miasta.
+    Lekki widok pojedynczego kafelka (płytki) na mapie miasta.
+    
+    Dane wszystkich kafelków przechowuje CityMap w tablicach NumPy
+    (struktura tablic: teren, zajętość, identyfikator budynku, kafel główny).
+    Tile nie kopiuje tych danych - jego właściwości czytają tablice mapy,
+    dlatego obiekt jest tani w tworzeniu i zawsze aktualny.
     
     Każdy kafelek ma:
     - Współrzędne (x, y) na mapie
@@ -257,21 +266,53 @@ class Tile:
     - Status zajętości
     - Informację czy to główny kafel budynku (dla budynków wielokafelkowych)
     """
-    def __init__(self, x: int, y: int, terrain_type: TerrainType = TerrainType.GRASS):
+    __slots__ = ('city_map', 'x', 'y')  # brak __dict__ - widok zajmuje kilkadziesiąt bajtów
+    
+    def __init__(self, city_map, x: int, y: int):
         """
-        Konstruktor kafelka.
+        Konstruktor widoku kafelka (tworzony przez CityMap.get_tile).
         
         Args:
+            city_map (CityMap): mapa przechowująca dane kafelka
             x (int): współrzędna X na mapie
             y (int): współrzędna Y na mapie
-            terrain_type (TerrainType): typ terenu (domyślnie trawa)
         """
+        self.city_map = city_map            # mapa z tablicami danych
         self.x = x                          # pozycja X na mapie
         self.y = y                          # pozycja Y na mapie
-        self.terrain_type = terrain_type    # typ terenu
-        self.building = None                # budynek na kafelku (None = brak)
-        self.is_occupied = False            # czy kafelek jest zajęty
-        self.is_main_tile = True            # czy to główny kafel budynku (dla budynków >1x1)
+    
+    @property
+    def terrain_type(self) -> TerrainType:
+        """Typ terenu kafelka."""
+        return TERRAIN_TYPES[self.city_map.terrain[self.x, self.y]]
+    
+    @terrain_type.setter
+    def terrain_type(self, terrain_type: TerrainType):
+        self.city_map.terrain[self.x, self.y] = TERRAIN_CODES[terrain_type]
+        self.city_map.mark_changed()
+    
+    @property
+    def building(self):
+        """Budynek na kafelku (None = brak)."""
+        return self.city_map.get_building_at(self.x, self.y)
+    
+    @property
+    def is_occupied(self) -> bool:
+        """Czy kafelek jest zajęty przez budynek."""
+        return bool(self.city_map.occupied[self.x, self.y])
+    
+    @property
+    def is_main_tile(self) -> bool:
+        """Czy to główny kafel budynku (dla budynków >1x1); wolne kafelki zwracają True."""
+        return bool(self.city_map.main_tile[self.x, self.y])
+    
+    def __eq__(self, other) -> bool:
+        """Dwa widoki są równe, gdy wskazują ten sam kafelek tej samej mapy."""
+        return (isinstance(other, Tile) and self.city_map is other.city_map
+                and self.x == other.x and self.y == other.y)
+    
+    def __hash__(self) -> int:
+        return hash((id(self.city_map), self.x, self.y))
         
     def get_image_path(self) -> str | None:
         """
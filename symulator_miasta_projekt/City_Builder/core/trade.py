@@ -12,9 +12,13 @@ Funkcje systemu:
 from enum import Enum
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
+import bisect
+import heapq
 import random
 import time
 
+import numpy as np
+
 class TradeGoodType(Enum):
     """
     Typy towarów dostępnych w handlu międzymiastowym.
@@ -89,6 +93,7 @@ class TradeOffer:
     is_buying: bool  # True = miasto kupuje od nas, False = miasto sprzedaje nam
     expires_turn: int  # tura, po której oferta wygasa
     relationship_bonus: float = 0.0  # bonus cenowy za dobre relacje
+    good_id: str = ""  # id towaru (np. "steel") - do sprzężenia popytu/podaży rynku
 
 @dataclass
 class TradeContract:
@@ -107,6 +112,89 @@ class TradeContract:
     remaining_turns: int  # pozostałe tury do końca kontraktu
     is_buying: bool  # czy kupujemy (True) czy sprzedajemy (False)
 
+# Bonus/kara cenowa za relacje dyplomatyczne
+RELATIONSHIP_PRICE_MODIFIERS = {
+    RelationshipStatus.HOSTILE: 1.5,      # 50% drożej
+    RelationshipStatus.UNFRIENDLY: 1.2,   # 20% drożej
+    RelationshipStatus.NEUTRAL: 1.0,      # standardowa cena
+    RelationshipStatus.FRIENDLY: 0.9,     # 10% taniej
+    RelationshipStatus.ALLIED: 0.8        # 20% taniej
+}
+
+class TradeOrderBook:
+    """
+    Księga aktywnych ofert handlowych.
+    
+    Oferty są indeksowane:
+    - po id (słownik, w kolejności dodania)
+    - po cenie - wszystkie oferty i osobno oferty każdego typu towaru
+      (posortowane listy kluczy (cena, numer kolejny), wstawianie przez bisect)
+    - po turze wygaśnięcia (kopiec min)
+    
+    Akceptacja oferty, pobranie ofert danego towaru i usuwanie wygasłych ofert
+    nie wymagają przeglądania ani sortowania wszystkich ofert. Cena i tura
+    wygaśnięcia oferty nie mogą się zmieniać po jej dodaniu.
+    """
+    
+    def __init__(self):
+        self._offers: Dict[str, TradeOffer] = {}  # {offer_id: TradeOffer} w kolejności dodania
+        self._keys: Dict[str, Tuple[float, int]] = {}  # {offer_id: (cena, numer kolejny)}
+        self._by_price: List[Tuple[float, int, str]] = []  # wszystkie oferty wg ceny
+        self._by_good: Dict[TradeGoodType, List[Tuple[float, int, str]]] = {}  # oferty towaru wg ceny
+        self._expiry: List[Tuple[int, int, str]] = []  # kopiec (expires_turn, numer kolejny, offer_id)
+        self._sequence = 0  # numer kolejny - przy równej cenie zachowuje kolejność dodania
+    
+    def __len__(self) -> int:
+        return len(self._offers)
+    
+    def __iter__(self):
+        return iter(list(self._offers.values()))
+    
+    def __contains__(self, offer_id: str) -> bool:
+        return offer_id in self._offers
+    
+    def get(self, offer_id: str) -> Optional[TradeOffer]:
+        return self._offers.get(offer_id)
+    
+    def add(self, offer: TradeOffer):
+        """Dodaje ofertę (oferta o tym samym id jest zastępowana)"""
+        if offer.id in self._offers:
+            self.remove(offer.id)
+        key = (offer.price_per_unit, self._sequence)
+        self._sequence += 1
+        self._offers[offer.id] = offer
+        self._keys[offer.id] = key
+        entry = key + (offer.id,)
+        bisect.insort(self._by_price, entry)
+        bisect.insort(self._by_good.setdefault(offer.good_type, []), entry)
+        heapq.heappush(self._expiry, (offer.expires_turn, key[1], offer.id))
+    
+    def remove(self, offer_id: str) -> Optional[TradeOffer]:
+        """Usuwa ofertę i zwraca ją (None jeśli nie istnieje)"""
+        offer = self._offers.pop(offer_id, None)
+        if offer is None:
+            return None
+        entry = self._keys.pop(offer_id) + (offer_id,)
+        for entries in (self._by_price, self._by_good[offer.good_type]):
+            del entries[bisect.bisect_left(entries, entry)]
+        # Wpis w kopcu wygaśnięć jest pomijany dopiero przy jego zdjęciu (expire)
+        return offer
+    
+    def expire(self, turn: int) -> List[TradeOffer]:
+        """Usuwa oferty z expires_turn <= turn i zwraca je"""
+        expired = []
+        while self._expiry and self._expiry[0][0] <= turn:
+            _, sequence, offer_id = heapq.heappop(self._expiry)
+            key = self._keys.get(offer_id)
+            if key is not None and key[1] == sequence:  # oferta nie została już zaakceptowana
+                expired.append(self.remove(offer_id))
+        return expired
+    
+    def sorted_offers(self, good_type: TradeGoodType = None) -> List[TradeOffer]:
+        """Oferty posortowane rosnąco po cenie (opcjonalnie tylko danego towaru)"""
+        entries = self._by_good.get(good_type, []) if good_type else self._by_price
+        return [self._offers[offer_id] for _, _, offer_id in entries]
+
 class TradingCity:
     """
     Reprezentuje miasto handlowe - partnera w handlu.
@@ -191,17 +279,252 @@ class TradingCity:
         # Bazowy modyfikator na podstawie specjalizacji miasta
         base_modifier = self.price_modifiers.get(good_type, 1.0)
         
-        # Bonus/kara za relacje dyplomatyczne
-        relationship_bonus = {
-            RelationshipStatus.HOSTILE: 1.5,      # 50% drożej
-            RelationshipStatus.UNFRIENDLY: 1.2,   # 20% drożej
-            RelationshipStatus.NEUTRAL: 1.0,      # standardowa cena
-            RelationshipStatus.FRIENDLY: 0.9,     # 10% taniej
-            RelationshipStatus.ALLIED: 0.8        # 20% taniej
+        # Pomnóż przez bonus/karę za relacje dyplomatyczne
+        return base_modifier * RELATIONSHIP_PRICE_MODIFIERS[self.relationship]
+
+# Zasoby Economy, w których rozliczane są kontrakty danego typu towaru
+# (technologia i usługi nie mają magazynu - rozliczane są tylko pieniądze)
+CONTRACT_RESOURCES = {
+    TradeGoodType.FOOD: 'food',
+    TradeGoodType.MATERIALS: 'materials',
+    TradeGoodType.ENERGY: 'energy',
+    TradeGoodType.LUXURY: 'luxury_goods',
+}
+
+class SettlementLedger:
+    """
+    Zwarta księga rozliczeń kontraktów.
+    
+    Jeden wiersz na rozliczenie kontraktu w turze, zapisany w kolumnowych
+    tablicach NumPy powiększanych dwukrotnie po zapełnieniu (zamiast listy
+    słowników). Identyfikatory kontraktów przechowywane są raz, a wiersze
+    odwołują się do nich indeksem.
+    """
+    
+    COLUMNS = (('turn', np.int32), ('contract', np.int32), ('requested', np.int32),
+               ('filled', np.int32), ('value', np.float64))
+    
+    def __init__(self, capacity: int = 256):
+        self.contract_ids: List[str] = []  # indeks -> id kontraktu
+        self._contract_index: Dict[str, int] = {}
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def _intern(self, contract_id: str) -> int:
+        index = self._contract_index.get(contract_id)
+        if index is None:
+            index = self._contract_index[contract_id] = len(self.contract_ids)
+            self.contract_ids.append(contract_id)
+        return index
+    
+    def append(self, turn: int, contract_ids: List[str], requested: np.ndarray, filled: np.ndarray,
+               value: np.ndarray):
+        """
+        Dopisuje rozliczenia jednej tury.
+        
+        Args:
+            value: wartość rozliczenia dla budżetu (dodatnia - przychód ze sprzedaży,
+                ujemna - koszt zakupu)
+        """
+        count = len(contract_ids)
+        end = self._size + count
+        capacity = len(self._columns['turn'])
+        if end > capacity:
+            while capacity < end:
+                capacity *= 2
+            for name, column in self._columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = grown
+        
+        self._columns['turn'][self._size:end] = turn
+        self._columns['contract'][self._size:end] = [self._intern(contract_id) for contract_id in contract_ids]
+        self._columns['requested'][self._size:end] = requested
+        self._columns['filled'][self._size:end] = filled
+        self._columns['value'][self._size:end] = value
+        self._size = end
+    
+    def column(self, name: str) -> np.ndarray:
+        """Widok kolumny ('turn', 'contract', 'requested', 'filled', 'value')"""
+        return self._columns[name][:self._size]
+    
+    def for_contract(self, contract_id: str) -> Dict[str, np.ndarray]:
+        """Wszystkie rozliczenia kontraktu"""
+        index = self._contract_index.get(contract_id)
+        rows = self.column('contract') == index if index is not None else np.zeros(self._size, dtype=bool)
+        return {name: self.column(name)[rows] for name, _ in self.COLUMNS if name != 'contract'}
+    
+    def save_to_dict(self) -> Dict:
+        data = {name: self.column(name).tolist() for name, _ in self.COLUMNS}
+        data['contract_ids'] = list(self.contract_ids)
+        return data
+    
+    def load_from_dict(self, data: Dict):
+        rows = data.get('contract', [])
+        self.__init__(max(256, len(rows)))
+        for contract_id in data.get('contract_ids', []):
+            self._intern(contract_id)
+        for name, _ in self.COLUMNS:
+            self._columns[name][:len(rows)] = data.get(name, [])
+        self._size = len(rows)
+
+def _fill_in_order(groups: np.ndarray, requested: np.ndarray, available: np.ndarray) -> np.ndarray:
+    """
+    Realizacja zleceń z dostępnej puli grupy w kolejności zleceń.
+    
+    Zlecenie dostaje tyle, ile zostało w puli jego grupy po wcześniejszych
+    zleceniach tej grupy (0 gdy pula wyczerpana, częściowo na granicy).
+    
+    Args:
+        groups: indeks grupy (puli) każdego zlecenia
+        requested: żądane ilości
+        available: wielkość puli dla każdej grupy
+    Returns:
+        np.ndarray: zrealizowane ilości (liczby całkowite)
+    """
+    if len(groups) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    sorted_requested = requested[order]
+    # Suma żądań wcześniejszych zleceń tej samej grupy
+    cumulative = np.cumsum(sorted_requested)
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    group_offset = np.repeat(cumulative[starts] - sorted_requested[starts], np.diff(np.r_[starts, len(order)]))
+    before = cumulative - sorted_requested - group_offset
+    filled = np.empty(len(order), dtype=np.int64)
+    filled[order] = np.floor(np.clip(available[sorted_groups] - before, 0, sorted_requested))
+    return filled
+
+# === PARAMETRY MODELU RYNKU ===
+OFFER_CHANCE = 0.3          # szansa na nową ofertę miasta w turze
+SPECIALIZATION_BUY_CHANCE = 0.3  # szansa, że miasto kupuje towar swojej specjalizacji
+MARKET_DEPTH = 2000         # ilość towaru, która przesuwa popyt/podaż o 1.0
+MARKET_FEEDBACK = 0.05      # wpływ przewagi popytu nad podażą na zmianę ceny w turze
+MARKET_RECOVERY = 0.1       # część odchylenia popytu/podaży wygasająca w każdej turze
+
+class TradeMarket:
+    """
+    Model rynku na tablicach NumPy.
+    
+    Przechowuje wektory cen, popytu i podaży towarów oraz macierz modyfikatorów
+    cen miasto x typ towaru (specjalizacje). Ceny wszystkich towarów i oferty
+    wszystkich miast w turze liczone są kilkoma operacjami na tablicach
+    z wsadowym losowaniem, więc koszt tury rośnie łagodnie z liczbą miast.
+    
+    Obiekty TradeGood pozostają źródłem prawdy między przebudowami modelu -
+    po każdej aktualizacji ceny, popyt i podaż są do nich zapisywane.
+    """
+    
+    def __init__(self, goods: Dict[str, TradeGood], cities: Dict[str, TradingCity]):
+        self.good_ids = list(goods)
+        self.goods = [goods[good_id] for good_id in self.good_ids]
+        self.good_types = list(TradeGoodType)
+        self.good_type_index = np.array([self.good_types.index(good.type) for good in self.goods], dtype=np.intp)
+        self.base_price = np.array([good.base_price for good in self.goods], dtype=np.float64)
+        self.volatility = np.array([good.volatility for good in self.goods], dtype=np.float64)
+        self.price = np.array([good.current_price for good in self.goods], dtype=np.float64)
+        self.demand = np.array([good.demand_modifier for good in self.goods], dtype=np.float64)
+        self.supply = np.array([good.supply_modifier for good in self.goods], dtype=np.float64)
+        
+        self.cities = list(cities.values())
+        self.specialization = np.array(
+            [self.good_types.index(city.specialization) for city in self.cities], dtype=np.intp)
+        # Modyfikatory specjalizacji: miasto x typ towaru
+        self.city_modifiers = np.array(
+            [[city.price_modifiers.get(good_type, 1.0) for good_type in self.good_types] for city in self.cities],
+            dtype=np.float64).reshape(len(self.cities), len(self.good_types))
+    
+    def matches(self, goods: Dict[str, TradeGood], cities: Dict[str, TradingCity]) -> bool:
+        """Czy model odpowiada aktualnym towarom i miastom (inaczej trzeba go przebudować)"""
+        return len(goods) == len(self.goods) and len(cities) == len(self.cities)
+    
+    def update_prices(self, generator: np.random.Generator):
+        """Losowe wahania cen w ramach volatility i nacisk popytu/podaży, ceny 50%-200% bazowej"""
+        price_change = generator.uniform(-self.volatility, self.volatility)
+        price_change += MARKET_FEEDBACK * (self.demand - self.supply)
+        self.price = np.clip(self.price * (1 + price_change), self.base_price * 0.5, self.base_price * 2.0)
+        # Odchylenia popytu i podaży wygasają stopniowo
+        self.demand = 1 + (self.demand - 1) * (1 - MARKET_RECOVERY)
+        self.supply = 1 + (self.supply - 1) * (1 - MARKET_RECOVERY)
+        self._write_back()
+    
+    def generate_offers(self, generator: np.random.Generator) -> Dict[str, np.ndarray]:
+        """
+        Losuje oferty wszystkich miast naraz.
+        
+        Returns:
+            Dict: tablice 'city' (indeks miasta), 'good' (indeks towaru), 'is_buying',
+                'quantity', 'price' i 'duration' (tury do wygaśnięcia) - jeden wiersz na ofertę
+        """
+        cities = np.flatnonzero(generator.random(len(self.cities)) < OFFER_CHANCE)
+        count = len(cities)
+        goods = generator.integers(0, len(self.goods), count)
+        good_types = self.good_type_index[goods]
+        
+        # Miasto częściej sprzedaje swoją specjalizację
+        buy_chance = np.where(good_types == self.specialization[cities], SPECIALIZATION_BUY_CHANCE, 0.5)
+        is_buying = generator.random(count) < buy_chance
+        quantity = generator.integers(50, 501, count)
+        
+        # Miasto kupujące oferuje wyższą cenę, sprzedające - niższą
+        markup = np.where(is_buying, generator.uniform(1.05, 1.2, count), generator.uniform(0.8, 0.95, count))
+        relationship = np.array([RELATIONSHIP_PRICE_MODIFIERS[self.cities[i].relationship] for i in cities],
+                                dtype=np.float64)
+        modifiers = self.city_modifiers[cities, good_types] * relationship
+        return {
+            'city': cities,
+            'good': goods,
+            'is_buying': is_buying,
+            'quantity': quantity,
+            'price': self.price[goods] * modifiers * markup,
+            'duration': generator.integers(3, 9, count),
         }
+    
+    def record_trade(self, good_id: str, good_type: TradeGoodType, quantity: float, city_is_buying: bool):
+        """
+        Uwzględnia wykonaną transakcję w popycie/podaży.
+        
+        Miasto kupujące od nas zwiększa popyt, sprzedające nam - podaż.
+        Bez id towaru zmiana rozkłada się na wszystkie towary danego typu.
+        """
+        if good_id in self.good_ids:
+            selected = [self.good_ids.index(good_id)]
+        else:
+            selected = np.flatnonzero(self.good_type_index == self.good_types.index(good_type))
+            quantity = quantity / max(1, len(selected))
+        target = self.demand if city_is_buying else self.supply
+        target[selected] += quantity / MARKET_DEPTH
+        self._write_back()
+    
+    def record_settlements(self, good_types: np.ndarray, quantities: np.ndarray, city_is_buying: np.ndarray):
+        """
+        Wsadowe sprzężenie popytu/podaży z rozliczonych kontraktów.
         
-        # Pomnóż modyfikatory
-        return base_modifier * relationship_bonus[self.relationship]
+        Args:
+            good_types: indeksy typów towarów (w kolejności TradeGoodType)
+            quantities: rozliczone ilości
+            city_is_buying: True gdy miasto-partner kupuje od nas (popyt), False - sprzedaje (podaż)
+        """
+        type_count = len(self.good_types)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        demand = np.bincount(good_types[city_is_buying], quantities[city_is_buying], type_count)
+        supply = np.bincount(good_types[~city_is_buying], quantities[~city_is_buying], type_count)
+        # Ilość rozkłada się na wszystkie towary danego typu
+        goods_per_type = np.maximum(1, np.bincount(self.good_type_index, minlength=type_count))
+        self.demand += (demand / goods_per_type)[self.good_type_index] / MARKET_DEPTH
+        self.supply += (supply / goods_per_type)[self.good_type_index] / MARKET_DEPTH
+        self._write_back()
+    
+    def _write_back(self):
+        for good, price, demand, supply in zip(self.goods, self.price.tolist(),
+                                               self.demand.tolist(), self.supply.tolist()):
+            good.current_price = price
+            good.demand_modifier = demand
+            good.supply_modifier = supply
 
 class TradeManager:
     """
@@ -215,21 +538,38 @@ class TradeManager:
     - Zarządzanie kontraktami długoterminowymi
     """
     
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
         """
         Inicjalizuje system handlu z pustymi kolekcjami i podstawowymi danymi.
+        
+        Args:
+            rng: strumień losowości cen i ofert (domyślnie nowy, nieziarnowany)
         """
+        self.rng = rng if rng is not None else random.Random()  # RandomStreams 'trade'
         self.trading_cities = {}  # słownik miast handlowych {city_id: TradingCity}
         self.trade_goods = {}  # słownik towarów {good_id: TradeGood}
-        self.active_offers = []  # lista aktywnych ofert handlowych
+        self.order_book = TradeOrderBook()  # aktywne oferty handlowe (indeksy po id, cenie i wygaśnięciu)
+        self._market: Optional[TradeMarket] = None  # model rynku NumPy (budowany leniwie)
         self.active_contracts = []  # lista aktywnych kontraktów
         self.trade_history = []  # historia wszystkich transakcji
+        self.contract_ledger = SettlementLedger()  # rozliczenia kontraktów (tura, kontrakt, ilości, wartość)
+        self.last_settlement = {}  # podsumowanie rozliczenia kontraktów z ostatniej tury
         self.current_turn = 0  # aktualny numer tury
         
+        # Bieżące sumy statystyk handlu (aktualizowane przy każdej transakcji)
+        self._total_trade_value = 0
+        self._city_stats = {}  # {nazwa miasta: {'trades': n, 'value': wartość}}
+        self._good_stats = {}  # {typ towaru: {'trades': n, 'value': wartość}}
+        
         # Inicjalizuj podstawowe dane
         self._initialize_trade_goods()
         self._initialize_trading_cities()
     
+    @property
+    def active_offers(self) -> List[TradeOffer]:
+        """Lista aktywnych ofert w kolejności dodania"""
+        return list(self.order_book)
+    
     def _initialize_trade_goods(self):
         """
         Inicjalizuje dostępne towary handlowe z cenami bazowymi.
@@ -317,10 +657,15 @@ class TradeManager:
         for city_id, name, specialization in cities_data:
             self.trading_cities[city_id] = TradingCity(city_id, name, specialization)
     
-    def update_turn(self):
+    def update_turn(self, economy=None, market: bool = True):
         """
         Aktualizuje system handlu na koniec tury.
         
+        Args:
+            economy: ekonomia miasta (Economy), w której rozliczane są kontrakty
+            market: False pomija ceny rynkowe i nowe oferty (tryb bezgłowy) -
+                kontrakty i relacje są aktualizowane zawsze
+        
         Wykonuje wszystkie operacje związane z upływem czasu:
         - Aktualizuje ceny towarów (fluktuacje rynkowe)
         - Generuje nowe oferty handlowe
@@ -330,104 +675,159 @@ class TradeManager:
         """
         self.current_turn += 1
         
-        # Aktualizuj ceny towarów na podstawie podaży i popytu
-        self._update_market_prices()
-        
-        # Wygeneruj nowe oferty handlowe od miast
-        self._generate_trade_offers()
+        if market:
+            generator = self._batch_generator()  # jeden generator na turę dla cen i ofert
+            
+            # Aktualizuj ceny towarów na podstawie podaży i popytu
+            self._update_market_prices(generator)
+            
+            # Wygeneruj nowe oferty handlowe od miast
+            self._generate_trade_offers(generator)
         
         # Usuń wygasłe oferty
         self._remove_expired_offers()
         
         # Wykonaj kontrakty
-        self._execute_contracts()
+        self._execute_contracts(economy)
         
         # Aktualizuj relacje
         self._update_relationships()
     
-    def _update_market_prices(self):
-        """Aktualizuje ceny rynkowe towarów"""
-        for good in self.trade_goods.values():
-            # Losowa zmiana ceny w ramach volatility
-            price_change = random.uniform(-good.volatility, good.volatility)
-            new_price = good.current_price * (1 + price_change)
-            
-            # Ograniczenia cenowe (50%-200% ceny bazowej)
-            min_price = good.base_price * 0.5
-            max_price = good.base_price * 2.0
-            good.current_price = max(min_price, min(max_price, new_price))
+    def _batch_generator(self) -> np.random.Generator:
+        """
+        Generator NumPy do wsadowych losowań w turze.
+        
+        Ziarno pobierane jest ze strumienia self.rng, więc przebieg rynku
+        zależy tylko od ziarna gry (także po reseed przy wczytaniu).
+        """
+        return np.random.default_rng(self.rng.getrandbits(64))
     
-    def _generate_trade_offers(self):
-        """Generuje nowe oferty handlowe"""
-        for city in self.trading_cities.values():
-            # Każde miasto ma 30% szansy na nową ofertę
-            if random.random() < 0.3:
-                self._create_city_offer(city)
+    @property
+    def market(self) -> TradeMarket:
+        """Model rynku NumPy (przebudowywany po zmianie towarów lub miast)"""
+        if self._market is None or not self._market.matches(self.trade_goods, self.trading_cities):
+            self._market = TradeMarket(self.trade_goods, self.trading_cities)
+        return self._market
     
-    def _create_city_offer(self, city: TradingCity):
-        """Tworzy ofertę dla konkretnego miasta"""
-        # Wybierz towar
-        available_goods = list(self.trade_goods.keys())
-        good_id = random.choice(available_goods)
-        good = self.trade_goods[good_id]
-        
-        # Określ czy miasto kupuje czy sprzedaje
-        is_buying = random.choice([True, False])
-        
-        # Miasto częściej sprzedaje swoją specjalizację
-        if good.type == city.specialization:
-            is_buying = random.random() < 0.3  # 30% szansy na kupowanie specjalizacji
-        
-        # Ilość i cena
-        quantity = random.randint(50, 500)
-        base_price = good.current_price
-        price_modifier = city.get_price_modifier(good.type)
-        
-        if is_buying:
-            # Miasto kupuje - oferuje wyższą cenę
-            price_per_unit = base_price * price_modifier * random.uniform(1.05, 1.2)
-        else:
-            # Miasto sprzedaje - oferuje niższą cenę
-            price_per_unit = base_price * price_modifier * random.uniform(0.8, 0.95)
-        
-        # Czas wygaśnięcia
-        expires_turn = self.current_turn + random.randint(3, 8)
-        
-        offer = TradeOffer(
-            id=f"{city.city_id}_{good_id}_{self.current_turn}_{len(self.active_offers)}",
-            city_id=city.city_id,
-            good_type=good.type,
-            quantity=quantity,
-            price_per_unit=price_per_unit,
-            is_buying=is_buying,
-            expires_turn=expires_turn
-        )
-        
-        self.active_offers.append(offer)
+    def add_trading_city(self, city_id: str, name: str, specialization: TradeGoodType) -> TradingCity:
+        """Dodaje miasto handlowe (np. region z wieloma miastami AI)"""
+        city = TradingCity(city_id, name, specialization)
+        self.trading_cities[city_id] = city
+        self._market = None
+        return city
+    
+    def _update_market_prices(self, generator: Optional[np.random.Generator] = None):
+        """Aktualizuje ceny rynkowe wszystkich towarów naraz (wahania i popyt/podaż)"""
+        self.market.update_prices(generator or self._batch_generator())
+    
+    def _generate_trade_offers(self, generator: Optional[np.random.Generator] = None):
+        """Generuje nowe oferty handlowe wszystkich miast jednym losowaniem wsadowym"""
+        market = self.market
+        offers = market.generate_offers(generator or self._batch_generator())
+        for city_index, good_index, is_buying, quantity, price, duration in zip(
+                offers['city'].tolist(), offers['good'].tolist(), offers['is_buying'].tolist(),
+                offers['quantity'].tolist(), offers['price'].tolist(), offers['duration'].tolist()):
+            city = market.cities[city_index]
+            good_id = market.good_ids[good_index]
+            self.order_book.add(TradeOffer(
+                id=f"{city.city_id}_{good_id}_{self.current_turn}_{len(self.order_book)}",
+                city_id=city.city_id,
+                good_type=market.goods[good_index].type,
+                quantity=quantity,
+                price_per_unit=price,
+                is_buying=is_buying,
+                expires_turn=self.current_turn + duration,
+                good_id=good_id
+            ))
     
     def _remove_expired_offers(self):
-        """Usuwa wygasłe oferty"""
-        self.active_offers = [
-            offer for offer in self.active_offers 
-            if offer.expires_turn > self.current_turn
-        ]
+        """Usuwa wygasłe oferty (expires_turn <= current_turn)"""
+        self.order_book.expire(self.current_turn)
     
-    def _execute_contracts(self):
-        """Wykonuje aktywne kontrakty"""
-        completed_contracts = []
+    def _execute_contracts(self, economy=None):
+        """
+        Wykonuje aktywne kontrakty - jedno wsadowe rozliczenie wszystkich kontraktów.
         
-        for contract in self.active_contracts:
-            contract.remaining_turns -= 1
-            
-            # Tutaj można dodać logikę automatycznego wykonania kontraktu
-            # (transfer zasobów, płatności itp.)
-            
-            if contract.remaining_turns <= 0:
-                completed_contracts.append(contract)
+        Z ekonomią miasta kontrakty są rozliczane w zasobach i pieniądzach
+        (_settle_contracts). Bez niej (np. sam TradeManager w testach) tylko upływa
+        ich czas. Ukończone kontrakty odfiltrowywane są jednym przebiegiem listy.
+        """
+        contracts = self.active_contracts
+        if not contracts:
+            return
+        if economy is not None:
+            self._settle_contracts(contracts, economy)
         
+        for contract in contracts:
+            contract.remaining_turns -= 1
         # Usuń ukończone kontrakty
-        for contract in completed_contracts:
-            self.active_contracts.remove(contract)
+        self.active_contracts = [contract for contract in contracts if contract.remaining_turns > 0]
+    
+    def _settle_contracts(self, contracts: List[TradeContract], economy):
+        """
+        Rozlicza kontrakty w zasobach i budżecie Economy.
+        
+        Kontrakty rozliczane są w kolejności zawarcia:
+        - sprzedaż - ograniczona zapasem towaru (częściowa realizacja przy braku)
+        - kupno - ograniczone wolnym miejscem w magazynie i budżetem
+          (po doliczeniu przychodu ze sprzedaży w tej turze)
+        Zmiany zasobów i pieniędzy sumowane są po typach towarów i stosowane
+        raz na zasób, a rozliczenia trafiają do self.contract_ledger.
+        """
+        good_types = list(TradeGoodType)
+        resources = [CONTRACT_RESOURCES.get(good_type) for good_type in good_types]
+        type_index = {good_type: index for index, good_type in enumerate(good_types)}
+        
+        goods = np.array([type_index[contract.good_type] for contract in contracts], dtype=np.intp)
+        requested = np.array([contract.quantity_per_turn for contract in contracts], dtype=np.int64)
+        price = np.array([contract.price_per_unit for contract in contracts], dtype=np.float64)
+        we_buy = np.array([contract.is_buying for contract in contracts], dtype=bool)
+        
+        # Zapasy i wolne miejsce według typu towaru (bez magazynu - bez ograniczeń)
+        stock = np.array([economy.get_resource_amount(resource) if resource else np.inf
+                          for resource in resources], dtype=np.float64)
+        free = np.array([economy.get_resource(resource).max_capacity - economy.get_resource_amount(resource)
+                         if resource else np.inf for resource in resources], dtype=np.float64)
+        
+        filled = np.zeros(len(contracts), dtype=np.int64)
+        sell = ~we_buy
+        filled[sell] = _fill_in_order(goods[sell], requested[sell], stock)
+        sold = np.bincount(goods[sell], filled[sell], len(good_types))
+        income = float(filled[sell] @ price[sell])
+        
+        # Kupno: najpierw miejsce w magazynie (zwolnione też przez sprzedaż), potem budżet
+        fits = _fill_in_order(goods[we_buy], requested[we_buy], free + sold)
+        cost = fits * price[we_buy]
+        spent_before = np.cumsum(cost) - cost
+        budget = max(0.0, economy.get_resource_amount('money') + income)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            affordable = np.where(price[we_buy] > 0, (budget - spent_before) / price[we_buy], np.inf)
+        filled[we_buy] = np.minimum(fits, np.floor(np.clip(affordable, 0, None)))
+        
+        # Zastosuj sumy zmian - jedna modyfikacja na zasób
+        resource_change = np.bincount(goods, np.where(we_buy, filled, -filled), len(good_types))
+        for resource, change in zip(resources, resource_change.tolist()):
+            if resource and change:
+                economy.modify_resource(resource, change)
+        value = np.where(we_buy, -filled * price, filled * price)
+        net_value = float(value.sum())
+        if net_value:
+            economy.modify_resource('money', net_value)
+        
+        self.contract_ledger.append(self.current_turn, [contract.id for contract in contracts],
+                                    requested, filled, value)
+        for contract, settled_value in zip(contracts, np.abs(value).tolist()):
+            if settled_value:
+                self.trading_cities[contract.city_id].trade_volume += settled_value
+        # Partner kupuje od nas, gdy my sprzedajemy
+        self.market.record_settlements(goods, filled, sell)
+        
+        self.last_settlement = {
+            'contracts': len(contracts),
+            'partial': int(np.count_nonzero(filled < requested)),
+            'income': float(value[value > 0].sum()),
+            'cost': float(-value[value < 0].sum()),
+        }
     
     def _update_relationships(self):
         """Aktualizuje relacje z miastami"""
@@ -439,28 +839,26 @@ class TradeManager:
                 city.update_relationship(1)
     
     def get_available_offers(self, good_type: TradeGoodType = None) -> List[TradeOffer]:
-        """Zwraca dostępne oferty handlowe"""
-        offers = self.active_offers
-        if good_type:
-            offers = [offer for offer in offers if offer.good_type == good_type]
-        return sorted(offers, key=lambda x: x.price_per_unit)
+        """Zwraca dostępne oferty handlowe posortowane po cenie"""
+        return self.order_book.sorted_offers(good_type)
     
     def accept_offer(self, offer_id: str) -> Tuple[bool, str]:
         """Akceptuje ofertę handlową"""
-        offer = next((o for o in self.active_offers if o.id == offer_id), None)
+        # Usuń ofertę z księgi
+        offer = self.order_book.remove(offer_id)
         if not offer:
             return False, "Oferta nie istnieje"
         
-        # Usuń ofertę z listy
-        self.active_offers.remove(offer)
-        
         # Aktualizuj relacje
         city = self.trading_cities[offer.city_id]
         city.update_relationship(5)  # Bonus za handel
         city.trade_volume += offer.quantity * offer.price_per_unit
         
+        # Sprzężenie zwrotne popytu/podaży na rynku
+        self.market.record_trade(offer.good_id, offer.good_type, offer.quantity, offer.is_buying)
+        
         # Dodaj do historii
-        self.trade_history.append({
+        trade = {
             'turn': self.current_turn,
             'city': city.name,
             'good_type': offer.good_type.value,
@@ -468,7 +866,9 @@ class TradeManager:
             'price': offer.price_per_unit,
             'total_value': offer.quantity * offer.price_per_unit,
             'is_buying': offer.is_buying
-        })
+        }
+        self.trade_history.append(trade)
+        self._add_trade_statistics(trade)
         
         return True, f"Handel z {city.name} zakończony sukcesem"
     
@@ -503,35 +903,37 @@ class TradeManager:
         
         return True, f"Kontrakt z {city.name} podpisany na {duration_turns} tur"
     
-    def get_trade_statistics(self) -> Dict:
-        """Zwraca statystyki handlowe"""
-        total_trade_value = sum(trade['total_value'] for trade in self.trade_history)
-        
-        # Handel według miast
-        city_stats = {}
-        for trade in self.trade_history:
-            city = trade['city']
-            if city not in city_stats:
-                city_stats[city] = {'trades': 0, 'value': 0}
-            city_stats[city]['trades'] += 1
-            city_stats[city]['value'] += trade['total_value']
-        
-        # Handel według towarów
-        good_stats = {}
+    def _add_trade_statistics(self, trade: Dict):
+        """Dolicza transakcję do bieżących sum statystyk"""
+        self._total_trade_value += trade['total_value']
+        # Handel według miast i według towarów
+        for stats, key in ((self._city_stats, trade['city']), (self._good_stats, trade['good_type'])):
+            entry = stats.setdefault(key, {'trades': 0, 'value': 0})
+            entry['trades'] += 1
+            entry['value'] += trade['total_value']
+    
+    def _rebuild_trade_statistics(self):
+        """Przelicza sumy statystyk od nowa z historii (po wczytaniu stanu)"""
+        self._total_trade_value = 0
+        self._city_stats = {}
+        self._good_stats = {}
         for trade in self.trade_history:
-            good = trade['good_type']
-            if good not in good_stats:
-                good_stats[good] = {'trades': 0, 'value': 0}
-            good_stats[good]['trades'] += 1
-            good_stats[good]['value'] += trade['total_value']
+            self._add_trade_statistics(trade)
+    
+    def get_trade_statistics(self) -> Dict:
+        """
+        Zwraca statystyki handlowe.
         
+        Sumy według miast i towarów są utrzymywane przy każdej transakcji,
+        więc koszt nie rośnie z długością historii handlu.
+        """
         return {
             'total_trades': len(self.trade_history),
-            'total_value': total_trade_value,
+            'total_value': self._total_trade_value,
             'active_contracts': len(self.active_contracts),
-            'active_offers': len(self.active_offers),
-            'city_stats': city_stats,
-            'good_stats': good_stats,
+            'active_offers': len(self.order_book),
+            'city_stats': {city: dict(stats) for city, stats in self._city_stats.items()},
+            'good_stats': {good: dict(stats) for good, stats in self._good_stats.items()},
             'relationships': {
                 city.name: {
                     'status': city.relationship.value,
@@ -547,6 +949,7 @@ class TradeManager:
         return {
             'current_turn': self.current_turn,
             'trade_history': self.trade_history,
+            'contract_ledger': self.contract_ledger.save_to_dict(),
             'trading_cities': {
                 city_id: {
                     'relationship_points': city.relationship_points,
@@ -574,6 +977,8 @@ class TradeManager:
         """Wczytuje stan handlu ze słownika"""
         self.current_turn = data.get('current_turn', 0)
         self.trade_history = data.get('trade_history', [])
+        self._rebuild_trade_statistics()
+        self.contract_ledger.load_from_dict(data.get('contract_ledger', {}))
         
         # Wczytaj miasta
         cities_data = data.get('trading_cities', {})
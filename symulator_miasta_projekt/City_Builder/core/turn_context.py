@@ -0,0 +1,116 @@
+"""
+Migawka stanu miasta z jednej tury współdzielona przez podsystemy i GUI.
+
+GameEngine.update_turn() liczy raz na turę to, czego potrzebują scenariusze,
+statystyki osiągnięć, panele, cele, raporty i zapisy do bazy danych: listę
+budynków, liczniki typów budynków, dochody i wydatki, demografię
+i zadowolenie. Zamiast wywoływać get_all_buildings(), calculate_taxes()
+czy get_total_population() wielokrotnie w jednej turze, odbiorcy czytają
+pola TurnContext.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from .tile import Building, BuildingType
+
+
+@dataclass
+class TurnContext:
+    """
+    Stan miasta po przetworzeniu tury.
+
+    Attributes:
+        turn (int): numer tury po jej zakończeniu (GameEngine.turn)
+        buildings (List[Building]): wszystkie budynki (GameEngine.get_all_buildings)
+        building_counts (Dict[BuildingType, int]): liczba budynków każdego typu
+        income (float): dochód z podatków w tej turze
+        expenses (float): wydatki w tej turze (bez spłat pożyczek)
+        loan_payments (float): miesięczne raty aktywnych pożyczek
+        population (int): całkowita populacja
+        satisfaction (float): średnie zadowolenie (0-100)
+        unemployment_rate (float): stopa bezrobocia (0-100)
+        demographics (Dict): PopulationManager.get_demographics()
+        money (float): stan budżetu
+        city_level (int): poziom miasta
+        scenario (Dict): wynik ScenarioManager.update_scenario ({} bez scenariusza)
+    """
+    turn: int
+    buildings: List[Building]
+    building_counts: Dict[BuildingType, int]
+    income: float
+    expenses: float
+    loan_payments: float = 0
+    population: int = 0
+    satisfaction: float = 0
+    unemployment_rate: float = 0
+    demographics: Dict = field(default_factory=dict)
+    money: float = 0
+    city_level: int = 1
+    scenario: Dict = field(default_factory=dict)
+
+    @classmethod
+    def capture(cls, engine, buildings: List[Building], income: float, expenses: float,
+                demographics: bool = True) -> 'TurnContext':
+        """
+        Tworzy migawkę z bieżącego stanu silnika gry (budynki, dochody i wydatki już policzone).
+
+        Z demographics=False (tryb bezgłowy) pole demographics pozostaje puste -
+        populacja, zadowolenie i bezrobocie liczone są bezpośrednio.
+        """
+        context = cls(
+            turn=engine.turn,
+            buildings=buildings,
+            building_counts={
+                building_type: len(bucket)
+                for building_type, bucket in engine.city_map.buildings_by_type.items()
+            },
+            income=income,
+            expenses=expenses,
+        )
+        context.refresh(engine, demographics)
+        return context
+
+    def refresh(self, engine, demographics: bool = True):
+        """
+        Odświeża pola zmieniające się także poza turą (populacja, budżet, pożyczki).
+
+        Np. po zastosowaniu skutków wydarzenia - budynki, dochody i wydatki tury
+        pozostają bez zmian.
+        """
+        if demographics:
+            self.demographics = engine.population.get_demographics()
+            self.population = self.demographics['total_population']
+            self.satisfaction = self.demographics['average_satisfaction']
+            self.unemployment_rate = self.demographics['unemployment_rate']
+        else:
+            population = engine.population
+            self.population = population.get_total_population()
+            self.satisfaction = population.get_average_satisfaction()
+            self.unemployment_rate = population.get_unemployment_rate()
+        self.refresh_budget(engine)
+
+    def refresh_budget(self, engine):
+        """Odświeża tylko budżet, raty pożyczek i poziom miasta (populacja bez zmian)."""
+        self.money = engine.economy.get_resource_amount('money')
+        self.loan_payments = sum(loan.monthly_payment for loan in engine.finance_manager.active_loans)
+        self.city_level = engine.city_level
+
+    @property
+    def total_expenses(self) -> float:
+        """Wydatki łącznie ze spłatami pożyczek (jak w raportach)."""
+        return self.expenses + self.loan_payments
+
+    @property
+    def net_income(self) -> float:
+        return self.income - self.expenses
+
+    def game_state(self) -> Dict:
+        """Stan gry w formacie ObjectiveManager / EventManager (bez technologii) z histogramem typów budynków."""
+        return {
+            'turn': self.turn,
+            'population': self.population,
+            'money': self.money,
+            'satisfaction': self.satisfaction,
+            'buildings': self.buildings,
+            'building_counts': self.building_counts,
+        }
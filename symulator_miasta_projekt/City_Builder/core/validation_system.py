@@ -739,7 +739,50 @@ class ValidationSystem:
             warnings=warnings,
             cleaned_data=data
         )
-    
+
+    def validate_save_file(self, file_path: str) -> ValidationResult:
+        """Waliduje plik zapisu gry (format 2.0 skompresowany lub stary JSON 1.0)"""
+        from .save_format import SAVE_EXTENSIONS, read_save_file
+
+        errors = []
+        warnings = []
+        data = {}
+
+        try:
+            path = Path(file_path)
+
+            if not path.exists():
+                errors.append(f"Plik nie istnieje: {file_path}")
+                return ValidationResult(False, errors, warnings, {})
+
+            # Sprawdzenie rozszerzenia
+            if path.suffix.lower() not in SAVE_EXTENSIONS:
+                warnings.append("Plik nie ma rozszerzenia zapisu gry (.sav lub .json)")
+
+            # Sprawdzenie rozmiaru pliku
+            if path.stat().st_size == 0:
+                errors.append("Plik jest pusty")
+                return ValidationResult(False, errors, warnings, {})
+            if path.stat().st_size > 50 * 1024 * 1024:  # 50MB
+                errors.append("Plik jest za duży (maksymalnie 50MB)")
+                return ValidationResult(False, errors, warnings, {})
+
+            data = read_save_file(str(path))
+
+        except json.JSONDecodeError as e:
+            errors.append(f"Błąd parsowania JSON: {str(e)}")
+        except UnicodeDecodeError:
+            errors.append("Błąd kodowania pliku - użyj UTF-8")
+        except Exception as e:
+            errors.append(f"Błąd odczytu pliku zapisu: {str(e)}")
+
+        return ValidationResult(
+            is_valid=len(errors) == 0,
+            errors=errors,
+            warnings=warnings,
+            cleaned_data=data
+        )
+
     def validate_money_amount(self, amount: Any) -> ValidationResult:
         """Waliduje kwotę pieniędzy"""
         errors = []
@@ -833,6 +876,10 @@ class ValidationSystem:
     
     def validate_game_save_data(self, save_data: Dict) -> ValidationResult:
         """Waliduje dane zapisu gry"""
+        # Format 2.0 przechowuje stan podsystemów w osobnej sekcji
+        if 'subsystems' in save_data:
+            save_data = {**save_data, **save_data['subsystems']}
+        
         schema = {
             'version': 'safe_filename',
             'turn': 'non_negative_int_required',
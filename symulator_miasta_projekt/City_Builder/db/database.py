@@ -1,4 +1,12 @@
+import logging  # logowanie błędów zapisu w tle
+import queue  # kolejka paczek zapisu dla wątku zapisującego
 import sqlite3  # moduł do pracy z bazą danych SQLite
+import threading  # wątek zapisujący w tle
+from contextlib import contextmanager  # menedżer kontekstu dla zapisów jednej tury
+from datetime import datetime  # czas rozpoczęcia rozgrywki
+
+# Metryki szeregu czasowego historii (kolumny tabeli turn_history)
+HISTORY_METRICS = ('population', 'money', 'satisfaction', 'unemployment', 'income', 'expenses')
 
 class Database:
     """
@@ -12,19 +20,45 @@ class Database:
     
     SQLite to lekka baza danych przechowywana w pojedynczym pliku.
     Nie wymaga instalacji serwera - idealnie nadaje się do gier.
+    
+    Zapisy jednej tury można zgrupować w bloku ``with db.turn():`` - wiersze
+    są wtedy buforowane i zatwierdzane jedną transakcją (jeden fsync zamiast
+    jednego na każdy zapis). Z background=True transakcję wykonuje wątek
+    zapisujący, więc wątek gry (GUI) nie czeka na dysk - błąd takiego zapisu
+    zgłaszany jest w wątku gry przy kolejnym flush(), wait() lub close().
     """
     
-    def __init__(self, db_name="city_builder.db"):
+    def __init__(self, db_name="city_builder.db", background=False):
         """
         Konstruktor - tworzy połączenie z bazą danych.
         
         Args:
             db_name (str): nazwa pliku bazy danych (domyślnie "city_builder.db")
+            background (bool): czy zatwierdzać zapisy tur w wątku w tle
         """
         self.db_name = db_name                      # nazwa pliku bazy danych
-        self.conn = sqlite3.connect(db_name)        # nawiąż połączenie z bazą (utworzy plik jeśli nie istnieje)
+        # nawiąż połączenie z bazą (utworzy plik jeśli nie istnieje);
+        # z połączenia korzysta też wątek zapisujący - dostęp chroni self._lock
+        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        # WAL - zapis nie blokuje odczytów, a synchronous=NORMAL robi fsync
+        # tylko przy punktach kontrolnych zamiast przy każdym commit
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
         self.cursor = self.conn.cursor()            # utwórz kursor do wykonywania zapytań SQL
+        self.logger = logging.getLogger('database')
+        self._lock = threading.RLock()              # połączenie używane z dwóch wątków
+        self._pending = []                          # zbuforowane zapisy bieżącej tury: (sql, parametry)
+        self._turn_depth = 0                        # zagnieżdżenie bloków turn()
+        self.last_error = None                      # ostatni błąd zapisu w tle
+        self._background_error = None               # błąd zapisu w tle jeszcze niezgłoszony w wątku gry
         self.create_tables()                        # utwórz tabele jeśli nie istnieją
+        
+        self._queue = None
+        self._writer = None
+        if background:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._writer_loop, name='database-writer', daemon=True)
+            self._writer.start()
 
     def create_tables(self):
         """
@@ -34,7 +68,7 @@ class Database:
         To zapobiega błędom przy ponownym uruchomieniu aplikacji.
         """
         
-        # Tabela przechowująca aktualny stan gry
+        # Tabela przechowująca aktualny stan gry (jeden wiersz, id = 1)
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS game_state (
                 id INTEGER PRIMARY KEY,         -- automatyczny klucz główny (auto-increment)
@@ -45,7 +79,7 @@ class Database:
             )
         ''')
 
-        # Tabela przechowująca historię rozgrywki (dla wykresów i analiz)
+        # Dawna tabela historii rozgrywki (nowe tury trafiają do turn_history)
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS history (
                 id INTEGER PRIMARY KEY,         -- automatyczny klucz główny
@@ -57,7 +91,7 @@ class Database:
             )
         ''')
 
-        # Tabela przechowująca różne statystyki gry
+        # Dawna tabela statystyk gry (nie jest już zapisywana co turę)
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS statistics (
                 id INTEGER PRIMARY KEY,         -- automatyczny klucz główny
@@ -66,25 +100,56 @@ class Database:
             )
         ''')
 
+        # Indeksy - zapytania po turze i nazwie statystyki bez przeglądania całej tabeli
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_turn ON history (turn)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_statistics_name ON statistics (name, id)')
+
+        # Rozgrywki - każda ma osobny szereg czasowy historii
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS saves (
+                id INTEGER PRIMARY KEY,         -- identyfikator rozgrywki (save_id)
+                name TEXT,                      -- nazwa rozgrywki
+                started TEXT                    -- czas rozpoczęcia (ISO 8601)
+            )
+        ''')
+
+        # Szereg czasowy historii - jeden wiersz na turę rozgrywki, klucz (save_id, turn)
+        # WITHOUT ROWID - wiersze leżą w kolejności klucza, zakres tur czytany jest sekwencyjnie
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS turn_history (
+                save_id INTEGER NOT NULL,       -- rozgrywka (saves.id)
+                turn INTEGER NOT NULL,          -- numer tury
+                population INTEGER NOT NULL,    -- liczba mieszkańców
+                money REAL NOT NULL,            -- stan budżetu
+                satisfaction REAL NOT NULL,     -- zadowolenie mieszkańców (0-100)
+                unemployment REAL NOT NULL,     -- stopa bezrobocia
+                income REAL NOT NULL,           -- dochody w turze
+                expenses REAL NOT NULL,         -- wydatki w turze
+                PRIMARY KEY (save_id, turn)
+            ) WITHOUT ROWID
+        ''')
+
         self.conn.commit()  # zatwierdź zmiany w bazie danych (zapisz na dysk)
 
     def save_game_state(self, population, money, satisfaction, resources):
         """
         Zapisuje aktualny stan gry do bazy danych.
         
+        Tabela przechowuje tylko najnowszy stan - wiersz jest nadpisywany,
+        więc zapis co turę nie powiększa bazy.
+        
         Args:
             population (int): liczba mieszkańców
             money (int): ilość pieniędzy
             satisfaction (int): poziom zadowolenia mieszkańców
             resources (str): zasoby miasta jako string JSON
         """
-        # INSERT INTO - dodaje nowy rekord do tabeli
+        # INSERT OR REPLACE z id = 1 - nadpisuje jedyny rekord stanu gry
         # Znaki ? to placeholdery - zapobiegają SQL injection attacks
-        self.cursor.execute('''
-            INSERT INTO game_state (population, money, satisfaction, resources)
-            VALUES (?, ?, ?, ?)
+        self._write('''
+            INSERT OR REPLACE INTO game_state (id, population, money, satisfaction, resources)
+            VALUES (1, ?, ?, ?, ?)
         ''', (population, money, satisfaction, resources))
-        self.conn.commit()  # zatwierdź zapis
 
     def load_game_state(self):
         """
@@ -96,12 +161,15 @@ class Database:
         # SELECT - pobiera dane z tabeli
         # ORDER BY id DESC - sortuje według ID malejąco (najnowsze pierwsze)
         # LIMIT 1 - pobiera tylko jeden (najnowszy) rekord
-        self.cursor.execute('SELECT * FROM game_state ORDER BY id DESC LIMIT 1')
-        return self.cursor.fetchone()  # zwraca jeden rekord jako krotkę lub None
+        rows = self._read('SELECT * FROM game_state ORDER BY id DESC LIMIT 1')
+        return rows[0] if rows else None  # zwraca jeden rekord jako krotkę lub None
 
     def save_history(self, turn, population, money, satisfaction, resources):
         """
-        Zapisuje stan gry w historii (dla każdej tury).
+        Zapisuje stan gry w dawnej tabeli historii.
+        
+        Historię tur zapisuje record_turn - ta metoda zostaje dla zgodności
+        ze starszym kodem i nie jest wywoływana co turę.
         
         Args:
             turn (int): numer tury
@@ -110,36 +178,43 @@ class Database:
             satisfaction (int): poziom zadowolenia
             resources (str): zasoby jako JSON string
         """
-        self.cursor.execute('''
+        self._write('''
             INSERT INTO history (turn, population, money, satisfaction, resources)
             VALUES (?, ?, ?, ?, ?)
         ''', (turn, population, money, satisfaction, resources))
-        self.conn.commit()
 
-    def load_history(self):
+    def load_history(self, limit=None):
         """
-        Ładuje całą historię gry z bazy danych.
+        Ładuje historię gry z dawnej tabeli history.
+        
+        Args:
+            limit (int): liczba ostatnich tur do pobrania (None = wszystkie)
         
         Returns:
             list[tuple]: lista krotek zawierających dane z każdej tury
+        
+        Historia nowych rozgrywek jest w turn_history - do odczytu służą
+        query_history i history_range.
         """
-        # ORDER BY turn - sortuje według numeru tury (od najstarszej)
-        self.cursor.execute('SELECT * FROM history ORDER BY turn')
-        return self.cursor.fetchall()  # zwraca wszystkie rekordy jako listę krotek
+        if limit is None:
+            # ORDER BY turn - sortuje według numeru tury (od najstarszej)
+            return self._read('SELECT * FROM history ORDER BY turn')
+        # Ostatnie tury z indeksu idx_history_turn, zwracane od najstarszej
+        return self._read('SELECT * FROM (SELECT * FROM history ORDER BY turn DESC LIMIT ?) ORDER BY turn',
+                          (limit,))
 
     def save_statistics(self, name, value):
         """
-        Zapisuje statystykę gry do bazy danych.
+        Zapisuje statystykę gry do bazy danych (dawna tabela, bez zapisów co turę).
         
         Args:
             name (str): nazwa statystyki
             value (int): wartość statystyki
         """
-        self.cursor.execute('''
+        self._write('''
             INSERT INTO statistics (name, value)
             VALUES (?, ?)
         ''', (name, value))
-        self.conn.commit()
 
     def load_statistics(self):
         """
@@ -148,8 +223,192 @@ class Database:
         Returns:
             list[tuple]: lista krotek (id, name, value) ze statystykami
         """
-        self.cursor.execute('SELECT * FROM statistics')
-        return self.cursor.fetchall()
+        return self._read('SELECT * FROM statistics')
+
+    def start_save(self, name="Nowa gra"):
+        """
+        Rozpoczyna nowy szereg czasowy historii (np. przy nowej grze).
+        
+        Args:
+            name (str): nazwa rozgrywki
+            
+        Returns:
+            int: identyfikator rozgrywki (save_id) dla record_turn i query_history
+        """
+        self.flush()
+        self.wait()
+        with self._lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    'INSERT INTO saves (name, started) VALUES (?, ?)',
+                    (name, datetime.now().isoformat())
+                )
+            return cursor.lastrowid
+
+    def record_turn(self, save_id, turn, population=0, money=0, satisfaction=0,
+                    unemployment=0, income=0, expenses=0):
+        """
+        Zapisuje metryki tury w szeregu czasowym historii.
+        
+        Ponowny zapis tej samej tury (np. po wczytaniu gry) nadpisuje wiersz.
+        W bloku turn() zapis trafia do transakcji tury.
+        """
+        self._write('''
+            INSERT OR REPLACE INTO turn_history
+                (save_id, turn, population, money, satisfaction, unemployment, income, expenses)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (save_id, turn, population, money, satisfaction, unemployment, income, expenses))
+
+    def history_range(self, save_id):
+        """
+        Zwraca zakres tur zapisanych w historii rozgrywki.
+        
+        Returns:
+            tuple: (pierwsza_tura, ostatnia_tura, liczba_tur) lub (None, None, 0)
+        """
+        return self._read(
+            'SELECT MIN(turn), MAX(turn), COUNT(*) FROM turn_history WHERE save_id = ?', (save_id,)
+        )[0]
+
+    def query_history(self, save_id, metrics=HISTORY_METRICS, start_turn=None, end_turn=None, buckets=None):
+        """
+        Pobiera zakres historii rozgrywki, opcjonalnie zagregowany w bazie danych.
+        
+        Args:
+            save_id (int): identyfikator rozgrywki
+            metrics (tuple): nazwy metryk z HISTORY_METRICS
+            start_turn (int): pierwsza tura zakresu (None = od początku)
+            end_turn (int): ostatnia tura zakresu (None = do końca)
+            buckets (int): liczba przedziałów (np. szerokość wykresu) - None = wszystkie tury
+            
+        Returns:
+            dict: {'turns': [...], metryka: [...]}; z buckets - 'turns' to pierwsza tura
+            przedziału, metryka to średnia, a metryka_min / metryka_max to skrajne
+            wartości w przedziale (zachowują szczyty)
+        """
+        unknown = set(metrics) - set(HISTORY_METRICS)
+        if unknown:
+            raise ValueError(f"Nieznane metryki historii: {sorted(unknown)}")
+        metrics = tuple(metrics)
+
+        first, last, count = self.history_range(save_id)
+        if not count:
+            return {'turns': [], **{metric: [] for metric in metrics}}
+        start_turn = first if start_turn is None else max(start_turn, first)
+        end_turn = last if end_turn is None else min(end_turn, last)
+        where = 'WHERE save_id = ? AND turn BETWEEN ? AND ?'
+        params = (save_id, start_turn, end_turn)
+
+        if not buckets or end_turn - start_turn + 1 <= buckets:
+            # Pełna rozdzielczość - jeden wiersz na turę
+            rows = self._read(f"SELECT turn, {', '.join(metrics)} FROM turn_history {where} ORDER BY turn", params)
+            columns = ('turns',) + metrics
+        else:
+            # Agregacja po przedziałach tur po stronie bazy danych
+            aggregates = ', '.join(f"AVG({metric}), MIN({metric}), MAX({metric})" for metric in metrics)
+            rows = self._read(f'''
+                SELECT MIN(turn), {aggregates}
+                FROM turn_history {where}
+                GROUP BY (turn - ?) * ? / ?
+                ORDER BY 1
+            ''', params + (start_turn, int(buckets), end_turn - start_turn + 1))
+            columns = ('turns',) + tuple(
+                name for metric in metrics for name in (metric, f"{metric}_min", f"{metric}_max")
+            )
+
+        result = {column: [] for column in columns}
+        for row in rows:
+            for column, value in zip(columns, row):
+                result[column].append(value)
+        return result
+
+    @contextmanager
+    def turn(self):
+        """
+        Grupuje zapisy jednej tury w jedną transakcję.
+        
+        Przykład:
+            with db.turn():
+                db.save_game_state(...)
+                db.save_history(...)
+                db.save_statistics('money', 1000)
+        
+        Zapisy są buforowane i zatwierdzane przy wyjściu z bloku. Wyjątek
+        w bloku odrzuca wszystkie jego zapisy (nic nie trafia do bazy)
+        i jest przekazywany dalej.
+        """
+        start = len(self._pending)
+        self._turn_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._turn_depth -= 1
+            del self._pending[start:]  # wycofaj zapisy przerwanego bloku
+            raise
+        self._turn_depth -= 1
+        if self._turn_depth == 0:
+            self.flush()
+
+    def _write(self, sql, params):
+        """Buforuje zapis w bloku turn(), poza nim zatwierdza go od razu."""
+        self._pending.append((sql, params))
+        if self._turn_depth == 0:
+            self.flush()
+
+    def flush(self):
+        """
+        Zatwierdza zbuforowane zapisy jedną transakcją (w tle, jeśli działa wątek zapisujący).
+        
+        Raises:
+            sqlite3.Error: błąd zapisu (także wcześniejszej paczki zatwierdzanej w tle)
+        """
+        batch, self._pending = self._pending, []
+        if batch:
+            if self._queue is not None:
+                self._queue.put(batch)
+            else:
+                self._commit_batch(batch)
+        self._raise_background_error()
+
+    def _raise_background_error(self):
+        """Zgłasza w wątku gry błąd zapisu z wątku w tle (jednokrotnie)."""
+        error, self._background_error = self._background_error, None
+        if error is not None:
+            raise error
+
+    def _commit_batch(self, batch):
+        with self._lock:
+            with self.conn:  # jedna transakcja - commit, a przy błędzie rollback
+                for sql, params in batch:
+                    self.conn.execute(sql, params)
+
+    def _writer_loop(self):
+        """Pętla wątku zapisującego - zatwierdza paczki tur po kolei."""
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:  # sygnał zakończenia
+                    return
+                self._commit_batch(batch)
+            except sqlite3.Error as e:
+                self.last_error = e
+                self._background_error = e
+                self.logger.error(f"Błąd zapisu tury do bazy danych: {e}")
+            finally:
+                self._queue.task_done()
+
+    def wait(self):
+        """Czeka, aż wątek zapisujący zatwierdzi wszystkie przekazane mu zapisy (i zgłasza jego błąd)."""
+        if self._queue is not None:
+            self._queue.join()
+        self._raise_background_error()
+
+    def _read(self, sql, params=()):
+        """Odczyt widzący wszystkie wcześniejsze zapisy (także te zlecone w tle)."""
+        self.flush()
+        self.wait()
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
 
     def close(self):
         """
@@ -157,5 +416,15 @@ class Database:
         
         WAŻNE: Zawsze należy zamknąć połączenie gdy skończy się praca z bazą.
         To zwalnia zasoby i zapewnia, że wszystkie dane zostały zapisane.
+        Zbuforowane zapisy są najpierw zatwierdzane, a wątek zapisujący kończony.
         """
-        self.conn.close() 
\ No newline at end of file
+        try:
+            self.flush()
+        finally:
+            if self._writer is not None:
+                self._queue.put(None)
+                self._writer.join()
+                self._writer = None
+                self._queue = None
+            self.conn.close()
+        self._raise_background_error() 
\ No newline at end of file
@@ -362,8 +362,8 @@ class AlertsPanel(QWidget):
         
         # Oblicz dochody i wydatki
         buildings = self.game_engine.get_all_buildings() if hasattr(self.game_engine, 'get_all_buildings') else []
-        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population) if buildings else 0
-        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population) if buildings else 0
+        income = self.game_engine.economy.calculate_taxes(buildings, self.game_engine.population, self.game_engine.city_map.ledger) if buildings else 0
+        expenses = self.game_engine.economy.calculate_expenses(buildings, self.game_engine.population, self.game_engine.city_map.ledger) if buildings else 0
         net_income = income - expenses
         
         # Alerty finansowe
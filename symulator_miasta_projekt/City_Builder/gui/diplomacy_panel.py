@@ -6,7 +6,6 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from typing import Dict, List
-import random
 
 class DiplomacyPanel(QWidget):
     """Panel zarządzania dyplomacją międzymiastową"""
@@ -21,7 +20,8 @@ class DiplomacyPanel(QWidget):
         # Initialize diplomacy system if not present
         if self.game_engine and not hasattr(self.game_engine, 'diplomacy_manager'):
             from core.diplomacy import DiplomacyManager
-            self.game_engine.diplomacy_manager = DiplomacyManager()
+            self.game_engine.diplomacy_manager = DiplomacyManager(
+                rng=self.game_engine.random_streams.get('diplomacy'))
         
         self.setup_ui()
         self.apply_styles()
@@ -174,7 +174,7 @@ class DiplomacyPanel(QWidget):
             for row, city in enumerate(cities):
                 self.cities_table.setItem(row, 0, QTableWidgetItem(city))
                 self.cities_table.setItem(row, 1, QTableWidgetItem("Neutralne"))
-                self.cities_table.setItem(row, 2, QTableWidgetItem(f"{random.randint(-20, 20)}/100"))
+                self.cities_table.setItem(row, 2, QTableWidgetItem("0/100"))
                 
                 action_btn = QPushButton("Negocjuj")
                 action_btn.clicked.connect(lambda checked, c=city: self.show_placeholder_action(c))
@@ -334,8 +334,7 @@ class DiplomacyPanel(QWidget):
         # Szansa sukcesu zależy od relacji
         success_chance = 0.5 + (city.relationship_points / 200)  # 50% + bonus za relacje
         
-        import random
-        if random.random() < success_chance:
+        if self.game_engine.diplomacy_manager.rng.random() < success_chance:
             # Sukces
             self.game_engine.economy.spend_money(cost)
             city.update_relationship(10, self.game_engine.turn)
@@ -391,8 +390,7 @@ class DiplomacyPanel(QWidget):
         # Szansa sukcesu
         success_chance = 0.3 + (city.relationship_points / 150)
         
-        import random
-        if random.random() < success_chance:
+        if self.game_engine.diplomacy_manager.rng.random() < success_chance:
             # Sukces
             self.game_engine.economy.spend_money(cost)
             city.update_relationship(30, self.game_engine.turn)
@@ -1,6 +1,7 @@
 import os  # operacje na plikach i ścieżkach
 import time  # pomiar czasu dla optymalizacji wydajności
 import random  # losowe operacje dla czyszczenia cache
+import numpy as np  # porównywanie tablic mapy przy wykrywaniu zmian
 from copy import deepcopy  # głębokie kopiowanie obiektów budynków
 from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QFrame  # widgety graficzne PyQt6
 from PyQt6.QtCore import pyqtSignal, Qt, QRectF, QPointF, QTimer  # podstawowe klasy PyQt6
@@ -8,6 +9,10 @@ from PyQt6.QtGui import QPixmap, QPainter, QColor, QBrush, QPen, QTransform, QIm
 
 from core.city_map import CityMap  # mapa miasta z kafelkami
 from core.tile import Building, TerrainType  # budynki i typy terenu
+from gui.sprite_cache import SpriteCache  # cache przeskalowanych i obróconych obrazków
+
+# Teren rysowany jest w kawałkach (chunkach) TERRAIN_CHUNK_SIZE x TERRAIN_CHUNK_SIZE kafelków
+TERRAIN_CHUNK_SIZE = 16
 
 class MapCanvas(QGraphicsView):
     """
@@ -30,21 +35,23 @@ class MapCanvas(QGraphicsView):
     building_placed = pyqtSignal(int, int, Building)       # emitowany przy postawieniu budynku
     building_sell_requested = pyqtSignal(int, int, Building)  # emitowany przy żądaniu sprzedaży
     
-    def __init__(self, city_map: CityMap):
+    def __init__(self, city_map: CityMap, sprite_cache: SpriteCache = None):
         """
         Konstruktor MapCanvas.
         
         Args:
             city_map: obiekt CityMap do wyświetlenia
+            sprite_cache: cache obrazków (None = domyślny, tylko w pamięci)
         """
         super().__init__()
         
         self.city_map = city_map  # mapa miasta do wyświetlenia
         self.tile_size = 32       # rozmiar jednego kafelka w pikselach
         
-        # Cache'owanie obrazków dla wydajności
-        self.image_cache = {}     # cache dla podstawowych obrazków
-        self.scaled_image_cache = {}  # cache dla przeskalowanych obrazów
+        # Cache'owanie obrazków dla wydajności (warianty per rotacja i poziom powiększenia)
+        self.sprite_cache = sprite_cache if sprite_cache is not None else SpriteCache()
+        self.zoom_factor = 1.0         # współczynnik powiększenia
+        self._sprite_zoom = self.sprite_cache.snap_zoom(self.zoom_factor)  # poziom obrazków budynków
         
         # Stan wyboru budynku i podglądu
         self.selected_building = None      # aktualnie wybrany budynek do postawienia
@@ -58,8 +65,20 @@ class MapCanvas(QGraphicsView):
         # Śledzenie elementów podglądu do czyszczenia
         self._preview_items = []
         
+        # Trwałe elementy graficzne mapy (przerysowywane tylko dla brudnych kafelków)
+        self._chunk_items = {}          # (cx, cy) -> element z obrazem kawałka terenu
+        self._terrain_tile_pixmaps = {} # kod terenu -> obraz jednego kafla terenu
+        self._helper_items = {}         # (x, y) -> tło pomocniczego kafla budynku
+        self._building_items = {}       # kafel główny -> elementy budynku
+        self._rendered_buildings = {}   # kafel główny -> narysowany budynek
+        self._dirty_tiles = set()       # kafelki (x, y) do przerysowania
+        self._rendered_map = None       # mapa, z której zbudowano scenę
+        self._rendered_terrain = None   # kopia CityMap.terrain z chwili rysowania
+        self._rendered_building_ids = None  # kopia CityMap.building_ids z chwili rysowania
+        self._rendered_version = None   # CityMap.version z chwili rysowania
+        
         # Konfiguracja widoku graficznego
-        self.scene = QGraphicsScene()  # scena graficzna PyQt6
+        self.scene = QGraphicsScene(self)  # scena graficzna PyQt6 (usuwana razem z widokiem)
         self.setScene(self.scene)      # ustaw scenę dla tego widoku
         
         # Włącz śledzenie myszy dla efektów najechania
@@ -76,9 +95,6 @@ class MapCanvas(QGraphicsView):
         self._last_update_time = 0     # czas ostatniej aktualizacji
         self._last_rotate_time = 0     # czas ostatniej rotacji budynku
         
-        # Ustawienia wyświetlania
-        self.zoom_factor = 1.0         # współczynnik powiększenia
-        
         # Konfiguracja pasków przewijania i renderowania
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)   # zawsze pokaż poziomy pasek
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)     # zawsze pokaż pionowy pasek
@@ -96,7 +112,7 @@ class MapCanvas(QGraphicsView):
     
     def get_tile_image(self, tile_path: str) -> QPixmap:
         """
-        Ładuje i cache'uje obrazek kafla dla wydajności.
+        Zwraca obrazek przeskalowany do rozmiaru kafla (z cache).
         
         Args:
             tile_path (str): ścieżka do pliku obrazka
@@ -104,36 +120,11 @@ class MapCanvas(QGraphicsView):
         Returns:
             QPixmap: załadowany i przeskalowany obrazek
         """
-        # Sprawdź czy obrazek jest już w cache
-        if tile_path in self.image_cache:
-            return self.image_cache[tile_path]
-        
-        # Pobierz ścieżkę bezwzględną do pliku
-        abs_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), tile_path)
-        
-        # Załaduj nowy obrazek
-        if os.path.exists(abs_path):
-            pixmap = QPixmap(abs_path)
-            if not pixmap.isNull():
-                # Przeskaluj do rozmiaru kafla z zachowaniem proporcji
-                scaled_pixmap = pixmap.scaled(
-                    self.tile_size, self.tile_size,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                # Zapisz w cache
-                self.image_cache[tile_path] = scaled_pixmap
-                return scaled_pixmap
-        
-        # Fallback - stwórz kolorowy prostokąt jeśli obrazek się nie załadował
-        fallback_pixmap = QPixmap(self.tile_size, self.tile_size)
-        fallback_pixmap.fill(QColor(255, 0, 255))  # magenta oznacza brak obrazka
-        self.image_cache[tile_path] = fallback_pixmap
-        return fallback_pixmap
+        return self.sprite_cache.get(tile_path, self.tile_size, self.tile_size)
 
     def get_scaled_image(self, tile_path: str, width: int, height: int) -> QPixmap:
         """
-        Ładuje i cache'uje przeskalowany obrazek dla wielokafelkowych budynków.
+        Zwraca przeskalowany obrazek dla wielokafelkowych budynków (z cache).
         
         Args:
             tile_path: ścieżka do pliku obrazka
@@ -143,33 +134,23 @@ class MapCanvas(QGraphicsView):
         Returns:
             QPixmap: przeskalowany obrazek
         """
-        cache_key = f"{tile_path}_{width}x{height}"
-        
-        # Sprawdź cache
-        if cache_key in self.scaled_image_cache:
-            return self.scaled_image_cache[cache_key]
-        
-        # Pobierz ścieżkę bezwzględną do pliku
-        abs_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), tile_path)
-        
-        # Załaduj i przeskaluj obrazek
-        if os.path.exists(abs_path):
-            pixmap = QPixmap(abs_path)
-            if not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(
-                    width, height,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                # Zapisz w cache
-                self.scaled_image_cache[cache_key] = scaled_pixmap
-                return scaled_pixmap
-        
-        # Fallback - zastępczy obrazek w przypadku błędu
-        fallback_pixmap = QPixmap(width, height)
-        fallback_pixmap.fill(QColor(255, 0, 255))  # magenta oznacza błąd ładowania
-        self.scaled_image_cache[cache_key] = fallback_pixmap
-        return fallback_pixmap
+        return self.sprite_cache.get(tile_path, width, height)
+
+    def get_sprite(self, tile_path: str, width: int, height: int, rotation: int = 0) -> QPixmap:
+        """
+        Zwraca obrazek budynku obrócony i przeskalowany dla bieżącego poziomu powiększenia.
+        
+        Obraz ma rozdzielczość poziomu powiększenia - element sceny trzeba
+        przeskalować przez 1 / self._sprite_zoom (patrz _add_sprite_item).
+        """
+        return self.sprite_cache.get(tile_path, width, height, rotation, self._sprite_zoom)
+
+    def _add_sprite_item(self, pixmap: QPixmap, pos_x: float, pos_y: float):
+        """Dodaje obrazek z get_sprite do sceny w rozmiarze jednostek sceny."""
+        item = self.scene.addPixmap(pixmap)
+        item.setScale(1 / self._sprite_zoom)
+        item.setPos(pos_x, pos_y)
+        return item
     
     def select_building(self, building: Building | None):
         """
@@ -194,7 +175,7 @@ class MapCanvas(QGraphicsView):
             # Przywróć normalny kursor
             self.setCursor(Qt.CursorShape.ArrowCursor)
             
-        # Natychmiastowe pełne przerysowanie mapy
+        # Odśwież podgląd i podświetlenia (kafelki mapy się nie zmieniły)
         self.draw_map()
     
     def rotate_building(self):
@@ -216,7 +197,7 @@ class MapCanvas(QGraphicsView):
         # Obrót o 90 stopni, modulo 360 (0, 90, 180, 270, 0, ...)
         self.preview_rotation = (self.preview_rotation + 90) % 360
         
-        # Pełne przerysowanie zamiast inkrementalnej aktualizacji
+        # Odśwież nakładki - przerysowywany jest tylko podgląd budynku
         self.draw_map()
         
         self._last_rotate_time = current_time  # zapisz czas ostatniej rotacji
@@ -267,130 +248,276 @@ class MapCanvas(QGraphicsView):
         # Wyślij sygnał aby GameEngine obsłużył faktyczne umieszczenie
         self.building_placed.emit(x, y, building_copy)
 
-        # Natychmiastowe pełne przerysowanie
+        # Odśwież mapę - przerysowane zostaną tylko kafelki nowego budynku
         self.draw_map()
     
     def draw_map(self):
-        """Rysuje mapę miasta ze wszystkimi kafelkami, budynkami i nakładkami"""
-        # --- CAŁKOWITE CZYSZCZENIE PRZED RYSOWANIEM ---
+        """
+        Odświeża mapę - przerysowuje tylko kafelki, które się zmieniły.
+        
+        Scena ma dwie trwałe warstwy: teren (obrazy kawałków TERRAIN_CHUNK_SIZE x
+        TERRAIN_CHUNK_SIZE kafelków, tworzone tylko dla widocznej części mapy)
+        i budynki (elementy na kaflach głównych). Gdy licznik CityMap.version
+        się zmienił, tablice mapy (teren, identyfikatory budynków) porównywane
+        są z kopiami z ostatniego rysowania, a zmienione kafelki trafiają do
+        zbioru brudnych kafelków - odświeżenie bez zmian mapy (np. ruch myszy
+        z wybranym budynkiem) nie przegląda całej mapy.
+        Nakładki (podgląd budynku, podświetlenia zaznaczenia i najechania) to
+        kilka elementów tworzonych od nowa przy każdym odświeżeniu.
+        
+        Pełna przebudowa sceny następuje tylko po podmianie mapy (nowa gra,
+        wczytanie zapisu, scenariusz).
+        """
+        if self._rendered_map is not self.city_map:
+            self.redraw_all()
+            return
         
+        self._collect_map_changes()
+        if self._dirty_tiles:
+            self._update_dirty_tiles()
+        
+        self._draw_overlays()
+    
+    def redraw_all(self):
+        """Przebudowuje całą scenę od zera (widoczne kawałki terenu i wszystkie budynki)"""
         # Wyczyść scenę całkowicie i zresetuj wszystkie elementy
         self.scene.clear()
         self._preview_items.clear()  # Zresetuj śledzenie podglądu
+        self._chunk_items = {}
+        self._terrain_tile_pixmaps = {}
+        self._helper_items = {}
+        self._building_items = {}
+        self._rendered_buildings = {}
+        self._dirty_tiles = set()
+        
+        city_map = self.city_map
+        for x, y in zip(*np.nonzero(city_map.occupied & ~city_map.main_tile)):
+            self._update_occupancy_items(int(x), int(y))
+        for anchor, building in city_map.buildings.items():
+            self._add_building_items(anchor, building)
+        
+        # Kopie stanu mapy z chwili rysowania - porównywane przy kolejnym odświeżeniu
+        self._rendered_map = city_map
+        self._rendered_terrain = city_map.terrain.copy()
+        self._rendered_building_ids = city_map.building_ids.copy()
+        self._rendered_version = city_map.version
         
-        # Cache często używanych wartości
+        # Ustaw prostokąt sceny raz na końcu
+        self.scene.setSceneRect(0, 0, city_map.width * self.tile_size, city_map.height * self.tile_size)
+        self._update_visible_chunks()
+        self._draw_overlays()
+    
+    def mark_dirty(self, x: int, y: int, width: int = 1, height: int = 1):
+        """Oznacza prostokąt kafelków do przerysowania przy najbliższym draw_map()"""
+        for tile_x in range(max(x, 0), min(x + width, self.city_map.width)):
+            for tile_y in range(max(y, 0), min(y + height, self.city_map.height)):
+                self._dirty_tiles.add((tile_x, tile_y))
+    
+    def _collect_map_changes(self):
+        """Dodaje do zbioru brudnych kafelków te, których teren lub budynek się zmienił"""
+        city_map = self.city_map
+        if city_map.version == self._rendered_version:
+            return  # mapa bez zmian od ostatniego rysowania
+        self._rendered_version = city_map.version
+        changed = ((city_map.terrain != self._rendered_terrain) |
+                   (city_map.building_ids != self._rendered_building_ids))
+        if changed.any():
+            xs, ys = np.nonzero(changed)
+            self._dirty_tiles.update(zip(xs.tolist(), ys.tolist()))
+    
+    def _update_dirty_tiles(self):
+        """Przerysowuje brudne kafelki i budynki, które na nich stały lub stoją"""
+        city_map = self.city_map
+        
+        # Budynki: usuń grafikę zburzonych, dodaj nowe (rejestr mapy ma O(liczba budynków))
+        for anchor, building in list(self._rendered_buildings.items()):
+            if city_map.buildings.get(anchor) is not building:
+                self._remove_building_items(anchor)
+        for anchor, building in city_map.buildings.items():
+            if anchor not in self._rendered_buildings:
+                self._add_building_items(anchor, building)
+        
+        stale_chunks = set()
+        for x, y in self._dirty_tiles:
+            if city_map.terrain[x, y] != self._rendered_terrain[x, y]:
+                stale_chunks.add((x // TERRAIN_CHUNK_SIZE, y // TERRAIN_CHUNK_SIZE))
+            self._update_occupancy_items(x, y)
+            self._rendered_terrain[x, y] = city_map.terrain[x, y]
+            self._rendered_building_ids[x, y] = city_map.building_ids[x, y]
+        self._dirty_tiles.clear()
+        
+        # Zmieniony teren - usuń nieaktualne kawałki, widoczne zostaną narysowane od nowa
+        for chunk in stale_chunks:
+            item = self._chunk_items.pop(chunk, None)
+            if item is not None:
+                self.scene.removeItem(item)
+        if stale_chunks:
+            self._update_visible_chunks()
+    
+    def _update_visible_chunks(self):
+        """
+        Tworzy elementy kawałków terenu widocznych w oknie i usuwa niewidoczne.
+        
+        Wywoływana po przewinięciu, zmianie rozmiaru i powiększeniu widoku.
+        Zachowywany jest margines jednego kawałka wokół widoku, aby przy
+        przewijaniu nowe kawałki były gotowe zanim pojawią się na ekranie.
+        """
+        if self._rendered_map is None:
+            return  # scena jeszcze nie zbudowana
+        
+        span = TERRAIN_CHUNK_SIZE * self.tile_size
+        chunks_x = -(-self.city_map.width // TERRAIN_CHUNK_SIZE)   # zaokrąglenie w górę
+        chunks_y = -(-self.city_map.height // TERRAIN_CHUNK_SIZE)
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        
+        first_x = max(int(visible.left() // span) - 1, 0)
+        last_x = min(int(visible.right() // span) + 1, chunks_x - 1)
+        first_y = max(int(visible.top() // span) - 1, 0)
+        last_y = min(int(visible.bottom() // span) + 1, chunks_y - 1)
+        wanted = {(cx, cy) for cx in range(first_x, last_x + 1) for cy in range(first_y, last_y + 1)}
+        
+        for chunk in list(self._chunk_items):
+            if chunk not in wanted:
+                self.scene.removeItem(self._chunk_items.pop(chunk))
+        for chunk in wanted:
+            if chunk not in self._chunk_items:
+                item = self.scene.addPixmap(self._render_terrain_chunk(*chunk))
+                item.setPos(chunk[0] * span, chunk[1] * span)
+                item.setZValue(0)  # teren pod wszystkimi warstwami
+                self._chunk_items[chunk] = item
+    
+    def _render_terrain_chunk(self, chunk_x: int, chunk_y: int) -> QPixmap:
+        """Rysuje teren kawałka mapy (razem z siatką) do jednego obrazu"""
         tile_size = self.tile_size
-        map_width = self.city_map.width
-        map_height = self.city_map.height
+        x0, y0 = chunk_x * TERRAIN_CHUNK_SIZE, chunk_y * TERRAIN_CHUNK_SIZE
+        codes = self.city_map.terrain[x0:x0 + TERRAIN_CHUNK_SIZE, y0:y0 + TERRAIN_CHUNK_SIZE]
+        width, height = codes.shape
+        
+        pixmap = QPixmap(width * tile_size, height * tile_size)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        for code in np.unique(codes):
+            xs, ys = np.nonzero(codes == code)
+            tile_pixmap = self._get_terrain_tile_pixmap(int(code), x0 + int(xs[0]), y0 + int(ys[0]))
+            for dx, dy in zip(xs.tolist(), ys.tolist()):
+                painter.drawPixmap(dx * tile_size, dy * tile_size, tile_pixmap)
+        
+        # Siatka kafelków - taka sama ramka jak wokół budynków
+        painter.setPen(QPen(Qt.GlobalColor.black, 1))
+        for dx in range(width + 1):
+            painter.drawLine(dx * tile_size, 0, dx * tile_size, height * tile_size)
+        for dy in range(height + 1):
+            painter.drawLine(0, dy * tile_size, width * tile_size, dy * tile_size)
+        painter.end()
+        return pixmap
+    
+    def _get_terrain_tile_pixmap(self, code: int, x: int, y: int) -> QPixmap:
+        """Zwraca (z cache) obraz kafla terenu o danym kodzie; (x, y) to dowolny kafel z tym terenem"""
+        if code in self._terrain_tile_pixmaps:
+            return self._terrain_tile_pixmaps[code]
         
-        # Wstępnie oblicz prostokąt sceny
-        scene_width = map_width * tile_size
-        scene_height = map_height * tile_size
+        tile = self.city_map.get_tile(x, y)
+        terrain_image_path = tile.get_image_path()
+        if terrain_image_path:
+            tile_pixmap = self.get_tile_image(terrain_image_path)
+        else:
+            # Fallback do koloru terenu
+            tile_pixmap = QPixmap(self.tile_size, self.tile_size)
+            tile_pixmap.fill(QColor(tile.get_color()))
+        self._terrain_tile_pixmaps[code] = tile_pixmap
+        return tile_pixmap
+    
+    def _update_occupancy_items(self, x: int, y: int):
+        """Aktualizuje tło pomocniczego kafla budynku (warstwa budynków)"""
+        occupied = bool(self.city_map.occupied[x, y])
+        rect = QRectF(x * self.tile_size, y * self.tile_size, self.tile_size, self.tile_size)
+        
+        # Pomocniczy kafel - tylko subtelne ciemniejsze tło bez linii
+        helper = occupied and not self.city_map.main_tile[x, y]
+        helper_item = self._helper_items.get((x, y))
+        if helper and helper_item is None:
+            bg_color = QColor(60, 80, 60, 80)  # Jeszcze bardziej przezroczyste ciemno-zielone tło
+            pen = QPen(Qt.GlobalColor.transparent)  # Przezroczysta ramka (praktycznie niewidoczna)
+            helper_item = self.scene.addRect(rect, pen, QBrush(bg_color))
+            helper_item.setZValue(0.05)  # Jeszcze niższy Z-index, prawie niewidoczne
+            self._helper_items[(x, y)] = helper_item
+        elif not helper and helper_item is not None:
+            self.scene.removeItem(self._helper_items.pop((x, y)))
+    
+    def _add_building_items(self, anchor: tuple, building: Building):
+        """Tworzy grafikę budynku na jego kaflu głównym (poziom Z 1)"""
+        tile_size = self.tile_size
+        pos_x = anchor[0] * tile_size
+        pos_y = anchor[1] * tile_size
+        building_path = building.get_image_path()
+        building_width, building_height = building.get_building_size()
+        scaled_width = building_width * tile_size
+        scaled_height = building_height * tile_size
+        items = []
         
-        for x in range(map_width):
-            for y in range(map_height):
-                tile = self.city_map.get_tile(x, y)
-                if not tile:
-                    continue
-                
-                # Oblicz pozycję raz
-                pos_x = x * tile_size
-                pos_y = y * tile_size
-                rect = QRectF(pos_x, pos_y, tile_size, tile_size)
-                
-                # Rysuj teren jako pierwszy (poziom Z 0)
-                terrain_image_path = tile.get_image_path()
-                if terrain_image_path:
-                    # Rysuj obrazek terenu
-                    terrain_pixmap = self.get_tile_image(terrain_image_path)
-                    terrain_item = self.scene.addPixmap(terrain_pixmap)
-                    terrain_item.setPos(pos_x, pos_y)
-                    terrain_item.setZValue(0)
-                else:
-                    # Fallback do kolorowego prostokąta dla terenu
-                    terrain_color = tile.get_color()
-                    terrain_brush = QBrush(QColor(terrain_color))
-                    terrain_rect = self.scene.addRect(rect, QPen(Qt.GlobalColor.black, 1), terrain_brush)
-                    terrain_rect.setZValue(0)
-                
-                # Rysuj budynek jeśli jest obecny (poziom Z 1)
-                if tile.building:
-                    # Sprawdź czy to główny kafel budynku czy pomocniczy
-                    is_main_tile = getattr(tile, 'is_main_tile', True)
-                    
-                    if is_main_tile:
-                        # Rysuj pełny budynek tylko na głównym kaflu
-                        building_path = tile.building.get_image_path()
-                        building_width, building_height = tile.building.get_building_size()
-                        
-                        if building_path:
-                            # Spróbuj załadować obrazek budynku
-                            if building_width > 1 or building_height > 1:
-                                # Dla większych budynków użyj cache'owanego przeskalowanego obrazu
-                                scaled_width = building_width * tile_size
-                                scaled_height = building_height * tile_size
-                                building_pixmap = self.get_scaled_image(building_path, scaled_width, scaled_height)
-                            else:
-                                # Dla budynków 1x1 użyj standardowej metody
-                                building_pixmap = self.get_tile_image(building_path)
-                            
-                            # Zastosuj rotację jeśli budynek ma rotację
-                            if hasattr(tile.building, 'rotation') and tile.building.rotation != 0:
-                                transform = QTransform()
-                                transform.translate(building_pixmap.width()/2, building_pixmap.height()/2)
-                                transform.rotate(tile.building.rotation)
-                                transform.translate(-building_pixmap.width()/2, -building_pixmap.height()/2)
-                                building_pixmap = building_pixmap.transformed(transform, Qt.TransformationMode.SmoothTransformation)
-                            
-                            building_item = self.scene.addPixmap(building_pixmap)
-                            building_item.setPos(pos_x, pos_y)
-                            building_item.setZValue(1)
-                            
-                            # Dodaj ramkę wokół całego budynku - taka sama jak siatka trawy
-                            building_outline_width = building_width * tile_size
-                            building_outline_height = building_height * tile_size
-                            building_outline_rect = QRectF(pos_x, pos_y, building_outline_width, building_outline_height)
-                            outline_pen = QPen(Qt.GlobalColor.black, 1)  # Taka sama ramka jak siatka
-                            building_outline = self.scene.addRect(building_outline_rect, outline_pen, QBrush(Qt.BrushStyle.NoBrush))
-                            building_outline.setZValue(1.1)  # Nad budynkiem
-                        else:
-                            # Fallback do kolorowego prostokąta dla głównego kafla
-                            scaled_width = building_width * tile_size
-                            scaled_height = building_height * tile_size
-                            
-                            building_rect = QRectF(pos_x, pos_y, scaled_width, scaled_height)
-                            color = QColor(tile.building.get_color())
-                            brush = QBrush(color)
-                            pen = QPen(Qt.GlobalColor.black, 1)  # Taka sama ramka jak siatka
-                            building_rect_item = self.scene.addRect(building_rect, pen, brush)
-                            building_rect_item.setZValue(1)
-                    else:
-                        # Pomocniczy kafel - tylko subtelne ciemniejsze tło bez linii
-                        bg_color = QColor(60, 80, 60, 80)  # Jeszcze bardziej przezroczyste ciemno-zielone tło
-                        brush = QBrush(bg_color)
-                        pen = QPen(Qt.GlobalColor.transparent)  # Przezroczysta ramka (praktycznie niewidoczna)
-                        rect_item = self.scene.addRect(rect, pen, brush)
-                        rect_item.setZValue(0.05)  # Jeszcze niższy Z-index, prawie niewidoczne
-                
-                # Pokaż podgląd tylko dla kafla pod myszą z wybranym budynkiem
-                if (self.selected_building and 
-                    x == self.hover_tile_x and y == self.hover_tile_y and
-                    self.hover_tile_x >= 0 and self.hover_tile_y >= 0):
-                    
-                    self._draw_building_preview(pos_x, pos_y, rect)
-                
-                # Dodaj ramkę kafla (poziom Z 2) - tylko dla pustych kafelków
-                if not tile.building:
-                    # Rysuj ramkę siatki dla pustych kafelków - taka sama jak dla budynków
-                    border_pen = QPen(Qt.GlobalColor.black, 1)  # Jednolita grubość ramki
-                    border_rect = self.scene.addRect(rect, border_pen, QBrush(Qt.BrushStyle.NoBrush))
-                    border_rect.setZValue(0.5)  # Pod budynkami
-                
-                # Dodaj podświetlenia (poziom Z 3)
-                self._draw_tile_highlights(x, y, rect)
+        if building_path:
+            # Obrazek już obrócony i przeskalowany - z cache wariantów
+            rotation = getattr(building, 'rotation', 0)
+            building_pixmap = self.get_sprite(building_path, scaled_width, scaled_height, rotation)
+            building_item = self._add_sprite_item(building_pixmap, pos_x, pos_y)
+            building_item.setZValue(1)
+            items.append(building_item)
+            
+            # Dodaj ramkę wokół całego budynku - taka sama jak siatka trawy
+            building_outline_rect = QRectF(pos_x, pos_y, scaled_width, scaled_height)
+            outline_pen = QPen(Qt.GlobalColor.black, 1)  # Taka sama ramka jak siatka
+            building_outline = self.scene.addRect(building_outline_rect, outline_pen, QBrush(Qt.BrushStyle.NoBrush))
+            building_outline.setZValue(1.1)  # Nad budynkiem
+            items.append(building_outline)
+        else:
+            # Fallback do kolorowego prostokąta dla głównego kafla
+            building_rect = QRectF(pos_x, pos_y, scaled_width, scaled_height)
+            brush = QBrush(QColor(building.get_color()))
+            pen = QPen(Qt.GlobalColor.black, 1)  # Taka sama ramka jak siatka
+            building_rect_item = self.scene.addRect(building_rect, pen, brush)
+            building_rect_item.setZValue(1)
+            items.append(building_rect_item)
+        
+        self._building_items[anchor] = items
+        self._rendered_buildings[anchor] = building
+    
+    def _remove_building_items(self, anchor: tuple):
+        """Usuwa grafikę budynku z kafla głównego"""
+        for item in self._building_items.pop(anchor, []):
+            self.scene.removeItem(item)
+        self._rendered_buildings.pop(anchor, None)
+    
+    def _draw_overlays(self):
+        """Rysuje od nowa nakładki: podgląd budynku i podświetlenia (kilka elementów)"""
+        self._cleanup_all_previews_immediate()
         
-        # Ustaw prostokąt sceny raz na końcu
-        self.scene.setSceneRect(0, 0, scene_width, scene_height)
+        hover_on_map = (0 <= self.hover_tile_x < self.city_map.width and
+                        0 <= self.hover_tile_y < self.city_map.height)
+        
+        # Pokaż podgląd tylko dla kafla pod myszą z wybranym budynkiem
+        if self.selected_building and hover_on_map:
+            pos_x = self.hover_tile_x * self.tile_size
+            pos_y = self.hover_tile_y * self.tile_size
+            rect = QRectF(pos_x, pos_y, self.tile_size, self.tile_size)
+            self._draw_building_preview(pos_x, pos_y, rect)
+            
+            # Zielony dla możliwości budowy, czerwony dla braku możliwości budowy
+            can_build = self.can_build(self.hover_tile_x, self.hover_tile_y)
+            self._draw_highlight(rect, Qt.GlobalColor.green if can_build else Qt.GlobalColor.red)
+        
+        # Zaznaczony kafel (tylko gdy nie mamy wybranego budynku)
+        selected_tile = self.city_map.get_selected_tile()
+        if selected_tile is not None and not self.selected_building:
+            rect = QRectF(selected_tile.x * self.tile_size, selected_tile.y * self.tile_size,
+                          self.tile_size, self.tile_size)
+            self._draw_highlight(rect, Qt.GlobalColor.yellow)
+    
+    def _draw_highlight(self, rect: QRectF, color):
+        """Rysuje ramkę podświetlenia kafelka (poziom Z 3)"""
+        highlight_pen = QPen(color, 3)
+        highlight_rect = self.scene.addRect(rect, highlight_pen, QBrush(Qt.BrushStyle.NoBrush))
+        highlight_rect.setZValue(3)
+        self._preview_items.append(highlight_rect)
     
     def _draw_building_preview(self, pos_x: float, pos_y: float, rect: QRectF):
         """Rysuje podgląd budynku na pozycji pod myszą"""
@@ -401,28 +528,16 @@ class MapCanvas(QGraphicsView):
         
         if building_path:
             # Zawsze używaj obrazków w podglądzie - tak jak będą wyglądać po postawieniu
-            if building_width > 1 or building_height > 1:
-                # Dla większych budynków użyj przeskalowanego obrazu
-                scaled_width = building_width * self.tile_size
-                scaled_height = building_height * self.tile_size
-                preview_pixmap = self.get_scaled_image(building_path, scaled_width, scaled_height)
-            else:
-                # Dla budynków 1x1 użyj standardowego obrazu
-                preview_pixmap = self.get_tile_image(building_path)
-            
-            # Zastosuj podgląd rotacji używając preview_rotation
-            if self.preview_rotation != 0:
-                transform = QTransform()
-                transform.translate(preview_pixmap.width()/2, preview_pixmap.height()/2)
-                transform.rotate(self.preview_rotation)
-                transform.translate(-preview_pixmap.width()/2, -preview_pixmap.height()/2)
-                preview_pixmap = preview_pixmap.transformed(transform, Qt.TransformationMode.SmoothTransformation)
+            scaled_width = building_width * self.tile_size
+            scaled_height = building_height * self.tile_size
+            # Podgląd rotacji (preview_rotation) - gotowy wariant z cache
+            preview_pixmap = self.get_sprite(building_path, scaled_width, scaled_height, self.preview_rotation)
             
             # Dodaj półprzezroczysty podgląd
-            preview_item = self.scene.addPixmap(preview_pixmap)
-            preview_item.setPos(pos_x, pos_y)
+            preview_item = self._add_sprite_item(preview_pixmap, pos_x, pos_y)
             preview_item.setOpacity(0.7)  # Półprzezroczysty podgląd
             preview_item.setZValue(1.5)  # Między budynkiem a ramką
+            self._preview_items.append(preview_item)
             
             # Dodaj subtelną białą ramkę tylko wokół całego budynku
             if building_width > 1 or building_height > 1:
@@ -432,6 +547,7 @@ class MapCanvas(QGraphicsView):
                 outline_pen = QPen(Qt.GlobalColor.white, 2)  # Biała ramka
                 outline_item = self.scene.addRect(outline_rect, outline_pen, QBrush(Qt.BrushStyle.NoBrush))
                 outline_item.setZValue(1.6)  # Nad obrazkiem
+                self._preview_items.append(outline_item)
         else:
             # Fallback dla budynków bez obrazków - użyj kolorowych prostokątów
             preview_width = building_width * self.tile_size
@@ -444,6 +560,7 @@ class MapCanvas(QGraphicsView):
             pen = QPen(Qt.GlobalColor.white, 3)  # Biała gruba ramka dla widoczności
             preview_rect_item = self.scene.addRect(preview_rect, pen, brush)
             preview_rect_item.setZValue(1.5)
+            self._preview_items.append(preview_rect_item)
             
             # Dodaj tekst z nazwą i rozmiarem budynku
             from PyQt6.QtWidgets import QGraphicsTextItem
@@ -464,6 +581,7 @@ class MapCanvas(QGraphicsView):
             size_text.setPos(text_x, text_y)
             size_text.setZValue(2.0)
             self.scene.addItem(size_text)
+            self._preview_items.append(size_text)
         
         # Dodaj wskaźnik rotacji dla obracalnych budynków
         if self.preview_rotation != 0:
@@ -499,32 +617,7 @@ class MapCanvas(QGraphicsView):
         arrow_item = self.scene.addPixmap(arrow_pixmap)
         arrow_item.setPos(pos_x + self.tile_size - arrow_size * 2, pos_y)
         arrow_item.setZValue(2.5)  # Na wierzchu wszystkiego
-    
-    def _draw_tile_highlights(self, x: int, y: int, rect: QRectF):
-        """Rysuje podświetlenia kafelków dla zaznaczenia i najechania"""
-        tile = self.city_map.get_tile(x, y)
-        highlight_needed = False
-        highlight_color = Qt.GlobalColor.yellow
-        
-        # Sprawdź czy to kafel pod myszą z wybranym budynkiem
-        if (self.selected_building and 
-            x == self.hover_tile_x and y == self.hover_tile_y and
-            self.hover_tile_x >= 0 and self.hover_tile_y >= 0):
-            highlight_needed = True
-            if self.can_build(x, y):
-                highlight_color = Qt.GlobalColor.green  # Zielony dla możliwości budowy
-            else:
-                highlight_color = Qt.GlobalColor.red    # Czerwony dla braku możliwości budowy
-        
-        # Sprawdź czy to zaznaczony kafel (tylko gdy nie mamy wybranego budynku)
-        elif tile == self.city_map.get_selected_tile() and not self.selected_building:
-            highlight_needed = True
-            highlight_color = Qt.GlobalColor.yellow  # Żółty dla zaznaczonego
-        
-        if highlight_needed:
-            highlight_pen = QPen(highlight_color, 3)
-            highlight_rect = self.scene.addRect(rect, highlight_pen, QBrush(Qt.BrushStyle.NoBrush))
-            highlight_rect.setZValue(3)
+        self._preview_items.append(arrow_item)
     
     def mousePressEvent(self, event: QMouseEvent):
         """Obsługuje zdarzenia kliknięć myszy"""
@@ -588,7 +681,7 @@ class MapCanvas(QGraphicsView):
             if self.city_map.get_selected_tile():
                 self.city_map.deselect_tile()
                 
-            # Pełne przerysowanie po zmianie stanu
+            # Odśwież nakładki po zmianie stanu
             self.draw_map()
         else:
             super().keyPressEvent(event)
@@ -619,8 +712,7 @@ class MapCanvas(QGraphicsView):
                 
                 # Przerysuj tylko jeśli mamy wybrany budynek
                 if self.selected_building:
-                    # Rozwiązanie radykalne: pełne przerysowanie mapy za każdym razem
-                    # Eliminuje wszystkie artefakty kosztem wydajności
+                    # Odświeżenie przesuwa tylko nakładki - kafelki mapy są trwałe
                     self.draw_map()
                     self._last_update_time = current_time
         
@@ -699,19 +791,11 @@ class MapCanvas(QGraphicsView):
             # Rysuj podgląd budynku
             building_path = self.selected_building.get_image_path()
             if building_path:
-                preview_pixmap = self.get_tile_image(building_path)
-                
-                # Zastosuj podgląd rotacji
-                if self.preview_rotation != 0:
-                    transform = QTransform()
-                    transform.translate(self.tile_size/2, self.tile_size/2)
-                    transform.rotate(self.preview_rotation)
-                    transform.translate(-self.tile_size/2, -self.tile_size/2)
-                    preview_pixmap = preview_pixmap.transformed(transform, Qt.TransformationMode.SmoothTransformation)
+                # Podgląd rotacji - gotowy wariant z cache
+                preview_pixmap = self.get_sprite(building_path, self.tile_size, self.tile_size, self.preview_rotation)
                 
                 # Dodaj półprzezroczysty podgląd
-                preview_item = self.scene.addPixmap(preview_pixmap)
-                preview_item.setPos(pos_x, pos_y)
+                preview_item = self._add_sprite_item(preview_pixmap, pos_x, pos_y)
                 preview_item.setOpacity(0.7)
                 preview_item.setZValue(1.5)
                 self._preview_items.append(preview_item)
@@ -813,6 +897,27 @@ class MapCanvas(QGraphicsView):
         self.scene.addItem(rotation_text)
         return rotation_text
 
+    def scrollContentsBy(self, dx: int, dy: int):
+        """Po przewinięciu widoku dorysowuje kawałki terenu, które stały się widoczne"""
+        super().scrollContentsBy(dx, dy)
+        self._update_visible_chunks()
+    
+    def resizeEvent(self, event):
+        """Po zmianie rozmiaru widoku aktualizuje widoczne kawałki terenu"""
+        super().resizeEvent(event)
+        self._update_visible_chunks()
+    
+    def _update_sprite_zoom(self):
+        """Po zmianie poziomu powiększenia (ui_settings.zoom_levels) podmienia obrazki budynków"""
+        sprite_zoom = self.sprite_cache.snap_zoom(self.zoom_factor)
+        if sprite_zoom == self._sprite_zoom:
+            return
+        self._sprite_zoom = sprite_zoom
+        for anchor, building in list(self._rendered_buildings.items()):
+            self._remove_building_items(anchor)
+            self._add_building_items(anchor, building)
+        self._draw_overlays()
+    
     def wheelEvent(self, event: QWheelEvent):
         """Obsługuje zdarzenia kółka myszy dla powiększania"""
         if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
@@ -823,6 +928,8 @@ class MapCanvas(QGraphicsView):
             # Zastosuj powiększenie
             self.scale(factor, factor)
             self.zoom_factor *= factor
+            self._update_visible_chunks()
+            self._update_sprite_zoom()
         else:
             # Normalne przewijanie
             super().wheelEvent(event) 
\ No newline at end of file
@@ -7,6 +7,49 @@ import csv
 import os
 from datetime import datetime
 
+from core.downsampling import DownsampleCache
+
+# Liczba punktów wykresu przy pobieraniu całej historii z bazy danych (przedziały tur)
+HISTORY_CHART_POINTS = 200
+
+# Minimalna liczba punktów serii na wykresie (gdy okno nie ma jeszcze rozmiaru)
+MIN_CHART_POINTS = 50
+
+# Zapas zakresu osi przy jego rozszerzaniu (część rozpiętości danych) - kolejne
+# tury mieszczą się w zakresie i są dorysowywane przez blitting
+CHART_HEADROOM = 0.5
+MIN_TURN_HEADROOM = 5  # minimalny zapas osi tur (w turach)
+# Zakres osi jest zawężany, gdy jest ponad tyle razy szerszy niż potrzebny (np. po zmianie zakresu tur)
+CHART_MAX_SLACK = 2.0
+
+
+def stepped_limits(low, high, current, min_headroom=0.0, lower_headroom=True):
+    """
+    Zakres osi zmieniany skokowo - zwraca current, jeśli dane [low, high] się w nim mieszczą.
+
+    W przeciwnym razie (albo gdy current jest ponad CHART_MAX_SLACK razy za szeroki)
+    zwraca nowy zakres z zapasem CHART_HEADROOM rozpiętości danych (co najmniej
+    min_headroom); lower_headroom=False daje po lewej tylko pół jednostki (oś tur).
+    """
+    headroom = max((high - low) * CHART_HEADROOM, min_headroom) or max(abs(high) * 0.1, 1.0)
+    new_low = low - headroom if lower_headroom else low - 0.5
+    new_high = high + headroom
+    cur_low, cur_high = current
+    if cur_low <= low and high <= cur_high and cur_high - cur_low <= CHART_MAX_SLACK * (new_high - new_low):
+        return current
+    return new_low, new_high
+
+
+# Klucze history_data -> metryki szeregu czasowego w bazie danych (Database.query_history)
+HISTORY_COLUMNS = {
+    'population': 'population',
+    'budget': 'money',
+    'satisfaction': 'satisfaction',
+    'unemployment': 'unemployment',
+    'income': 'income',
+    'expenses': 'expenses',
+}
+
 class ReportsPanel(QWidget):
     """
     Panel raportów i statystyk miasta.
@@ -45,6 +88,11 @@ class ReportsPanel(QWidget):
             'income': [],         # dochody z podatków
             'expenses': []        # wydatki miasta
         }
+        # Cache serii zredukowanych do szerokości wykresu
+        self.downsample_cache = DownsampleCache()
+        # Pełna historia w bazie danych (Database z szeregiem czasowym, save_id rozgrywki)
+        self.history_source = None
+        self.history_save_id = None
         self.init_ui()  # inicjalizuj interfejs użytkownika
 
     def init_ui(self):
@@ -95,6 +143,16 @@ class ReportsPanel(QWidget):
         self.ax4 = self.figure.add_subplot(234)  # pozycja 4 (dół lewo)
         self.ax5 = self.figure.add_subplot(235)  # pozycja 5 (dół środek)
         self.ax6 = self.figure.add_subplot(236)  # pozycja 6 (dół prawo)
+        self.axes = [self.ax1, self.ax2, self.ax3, self.ax4, self.ax5, self.ax6]
+        self._create_chart_artists()
+        self._autoscale_y_axes = [ax for ax in self.axes if ax.get_autoscaley_on()]  # bez stałego zakresu Y
+        self.figure.tight_layout()  # automatycznie dostosuj odstępy między wykresami
+        
+        # Blitting - tło wykresów zapamiętywane po każdym pełnym przerysowaniu
+        self._chart_backgrounds = None
+        self._charts_stale = False  # czy pominięto aktualizację, gdy panel był ukryty
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('resize_event', self._on_resize)
 
         self.setLayout(layout)  # ustaw główny układ
         self.setWindowTitle("Raporty i Statystyki Miasta")
@@ -132,6 +190,49 @@ class ReportsPanel(QWidget):
                 # Zachowaj tylko ostatnie max_points elementów
                 self.history_data[key] = self.history_data[key][-max_points:]
 
+    def set_history_source(self, database, save_id):
+        """
+        Ustawia bazę danych z pełną historią rozgrywki.
+        
+        Args:
+            database: obiekt Database (db/database.py)
+            save_id: identyfikator rozgrywki z Database.start_save
+            
+        Dla zakresu "Wszystkie dane" wykresy pobierają wtedy całą historię
+        z bazy, zagregowaną do HISTORY_CHART_POINTS przedziałów - history_data
+        przechowuje tylko ostatnie 200 tur.
+        """
+        self.history_source = database
+        self.history_save_id = save_id
+        self.downsample_cache.clear()  # nowy szereg może mieć te same numery tur
+
+    def reset_history(self):
+        """Czyści historię panelu (nowa gra, wczytanie zapisu) razem z cache redukcji."""
+        for values in self.history_data.values():
+            values.clear()
+        self.downsample_cache.clear()
+
+    def _query_history_source(self):
+        """Pobiera całą historię z bazy danych w rozdzielczości wykresu."""
+        rows = self.history_source.query_history(
+            self.history_save_id, tuple(HISTORY_COLUMNS.values()), buckets=HISTORY_CHART_POINTS
+        )
+        data = {'turns': rows['turns']}
+        for key, metric in HISTORY_COLUMNS.items():
+            data[key] = rows[metric]
+        return data
+
+    def turn_window(self):
+        """Liczba ostatnich tur wybrana w time_range_combo (None dla "Wszystkie dane")."""
+        range_text = self.time_range_combo.currentText()  # pobierz aktualny wybór
+        if range_text == "Ostatnie 10 tur":
+            return 10
+        elif range_text == "Ostatnie 25 tur":
+            return 25
+        elif range_text == "Ostatnie 50 tur":
+            return 50
+        return None
+
     def get_filtered_data(self):
         """
         Zwraca dane przefiltrowane według wybranego zakresu czasowego.
@@ -142,16 +243,11 @@ class ReportsPanel(QWidget):
         Filtruje dane na podstawie wyboru w time_range_combo.
         Pozwala na wyświetlanie tylko ostatnich N tur.
         """
-        range_text = self.time_range_combo.currentText()  # pobierz aktualny wybór
-        
         # Określ limit na podstawie wyboru użytkownika
-        if range_text == "Ostatnie 10 tur":
-            limit = 10
-        elif range_text == "Ostatnie 25 tur":
-            limit = 25
-        elif range_text == "Ostatnie 50 tur":
-            limit = 50
-        else:  # "Wszystkie dane"
+        limit = self.turn_window()
+        if limit is None:  # "Wszystkie dane"
+            if self.history_source is not None:
+                return self.downsample_for_chart(self._query_history_source())
             limit = len(self.history_data['turns'])  # bez limitu
         
         # Utwórz nowy słownik z przefiltrowanymi danymi
@@ -160,91 +256,170 @@ class ReportsPanel(QWidget):
             # Weź ostatnie 'limit' elementów z każdej listy
             filtered_data[key] = values[-limit:] if len(values) > limit else values
         
-        return filtered_data
+        return self.downsample_for_chart(filtered_data)
+
+    def chart_width(self):
+        """Szerokość obszaru jednego wykresu w pikselach (docelowa liczba punktów serii)."""
+        return max(MIN_CHART_POINTS, int(self.ax1.bbox.width))
+
+    def downsample_for_chart(self, data):
+        """
+        Redukuje serie dłuższe niż szerokość wykresu (LTTB, zachowuje szczyty).
+        
+        Wszystkie serie mają wspólną oś tur, więc wybierana jest suma punktów
+        wybranych dla każdej z nich. Wynik dla danego okna tur jest cache'owany.
+        """
+        turns = data['turns']
+        series = {key: values for key, values in data.items() if key != 'turns'}
+        indices = self.downsample_cache.downsample(turns, series, self.chart_width())
+        if len(indices) == len(turns):
+            return data
+        return {key: [values[i] for i in indices] for key, values in data.items()}
+
+    def _create_chart_artists(self):
+        """
+        Tworzy stałe elementy wykresów (tytuły, osie, siatkę) i linie serii danych.
+        
+        Linie tworzone są raz - update_charts podmienia tylko ich dane (set_data).
+        Są animowane (animated=True), więc nie trafiają do tła wykresów
+        i mogą być dorysowywane przez blitting bez przerysowania całej figury.
+        """
+        line_style = dict(linewidth=2, animated=True)
+        self.series_lines = {
+            # 'b-' = niebieska linia, marker='o'=kółka na punktach
+            'population': self.ax1.plot([], [], 'b-', marker='o', markersize=4, **line_style)[0],
+            # 'g-' = zielona linia, marker='s'=kwadraciki
+            'budget': self.ax2.plot([], [], 'g-', marker='s', markersize=4, **line_style)[0],
+            # 'orange' = pomarańczowa linia, marker='^'=trójkąty
+            'satisfaction': self.ax3.plot([], [], 'orange', marker='^', markersize=4, **line_style)[0],
+            # 'r-' = czerwona linia, marker='v'=trójkąty w dół
+            'unemployment': self.ax4.plot([], [], 'r-', marker='v', markersize=4, **line_style)[0],
+            # Dochody vs Wydatki - dwie linie na jednym wykresie, label= etykiety dla legendy
+            'income': self.ax5.plot([], [], 'g-', label='Dochody', marker='o', markersize=3, **line_style)[0],
+            'expenses': self.ax5.plot([], [], 'r-', label='Wydatki', marker='s', markersize=3, **line_style)[0],
+        }
+        self.balance_bars = []  # słupki bilansu budżetowego (wykres 6)
+
+        titles = [
+            (self.ax1, 'Populacja', 'Mieszkańcy'),
+            (self.ax2, 'Budżet Miasta', 'Pieniądze ($)'),
+            (self.ax3, 'Zadowolenie Mieszkańców', 'Zadowolenie (%)'),
+            (self.ax4, 'Stopa Bezrobocia', 'Bezrobocie (%)'),
+            (self.ax5, 'Ekonomia - Dochody vs Wydatki', 'Pieniądze ($)'),
+            (self.ax6, 'Bilans Budżetowy', 'Bilans ($)'),
+        ]
+        for ax, title, ylabel in titles:
+            ax.set_title(title, fontsize=12, fontweight='bold')
+            ax.set_ylabel(ylabel)       # etykieta osi Y
+            ax.set_xlabel('Tura')
+            ax.grid(True, alpha=0.3)    # siatka z przezroczystością 30%
+        self.ax3.set_ylim(0, 100)  # ustaw zakres osi Y na 0-100%
+        self.ax3.set_autoscaley_on(False)
+        self.ax5.legend()  # pokaż legendę z etykietami
+        self.ax6.axhline(y=0, color='black', linestyle='-', alpha=0.5)  # linia na poziomie 0
+
+    def _update_balance_bars(self, turns, income, expenses):
+        """Aktualizuje słupki bilansu (dochody - wydatki) - nowe słupki tylko gdy zmieni się ich liczba."""
+        if len(income) != len(expenses):  # sprawdź czy listy mają tę samą długość
+            balance = []
+        else:
+            # zip łączy dwie listy w pary: [(inc1,exp1), (inc2,exp2), ...]
+            balance = [inc - exp for inc, exp in zip(income, expenses)]
+
+        if len(self.balance_bars) != len(balance):
+            for bar in self.balance_bars:
+                bar.remove()
+            self.balance_bars = list(self.ax6.bar(turns, balance, alpha=0.7, animated=True)) if balance else []
+
+        for bar, turn, value in zip(self.balance_bars, turns, balance):
+            bar.set_x(turn - bar.get_width() / 2)
+            bar.set_height(value)
+            # Zielone słupki dla zysku, czerwone dla straty
+            bar.set_color('g' if value >= 0 else 'r')
+
+    def _animated_artists(self, ax):
+        """Elementy danych danego wykresu (rysowane przez blitting)."""
+        artists = [line for line in self.series_lines.values() if line.axes is ax]
+        if ax is self.ax6:
+            artists.extend(self.balance_bars)
+        return artists
+
+    def _on_draw(self, event):
+        """Po pełnym przerysowaniu zapamiętaj tło wykresów i dorysuj dane."""
+        self._chart_backgrounds = {ax: self.canvas.copy_from_bbox(ax.bbox) for ax in self.axes}
+        for ax in self.axes:
+            for artist in self._animated_artists(ax):
+                ax.draw_artist(artist)
+
+    def _on_resize(self, event):
+        """Układ wykresów liczony tylko przy zmianie rozmiaru (a nie w każdej turze)."""
+        self.figure.tight_layout()
+
+    def _blit_charts(self):
+        """Dorysowuje same dane na zapamiętanym tle - bez przerysowania osi, tytułów i siatki."""
+        for ax in self.axes:
+            self.canvas.restore_region(self._chart_backgrounds[ax])
+            for artist in self._animated_artists(ax):
+                ax.draw_artist(artist)
+            self.canvas.blit(ax.bbox)
+
+    def showEvent(self, event):
+        """Po pokazaniu panelu nadrabia aktualizacje pominięte, gdy był ukryty."""
+        super().showEvent(event)
+        if self._charts_stale:
+            self.update_charts()
 
     def update_charts(self):
         """
         Aktualizuje wszystkie wykresy na podstawie aktualnych danych.
         
-        Główna metoda odpowiedzialna za generowanie wykresów:
+        Główna metoda odpowiedzialna za odświeżanie wykresów:
         1. Pobiera przefiltrowane dane
-        2. Czyści poprzednie wykresy
-        3. Generuje 6 różnych wykresów
-        4. Aktualizuje wyświetlanie
-        """
-        data = self.get_filtered_data()  # pobierz dane do wyświetlenia
+        2. Podmienia dane istniejących linii i słupków (bez ax.clear())
+        3. Jeśli dane wyszły poza zakresy osi - rozszerza je skokowo z zapasem
+           (stepped_limits) i przerysowuje całą figurę, w przeciwnym razie
+           dorysowuje same dane (blitting)
         
-        # Jeśli brak danych, nie rysuj niczego
-        if not data['turns']:
+        Gdy panel jest ukryty, aktualizacja jest odkładana do jego pokazania.
+        """
+        if not self.isVisible():
+            self._charts_stale = True
             return
-        
-        # Wyczyść poprzednie wykresy - usuń wszystkie linie i punkty
-        for ax in [self.ax1, self.ax2, self.ax3, self.ax4, self.ax5, self.ax6]:
-            ax.clear()
+        self._charts_stale = False
 
+        data = self.get_filtered_data()  # pobierz dane do wyświetlenia
         turns = data['turns']  # oś X dla wszystkich wykresów (numery tur)
+        for key, line in self.series_lines.items():
+            line.set_data(turns, data[key])
+        self._update_balance_bars(turns, data['income'], data['expenses'])
 
-        # Wykres 1: Populacja miasta w czasie
-        self.ax1.plot(turns, data['population'], 'b-', linewidth=2, marker='o', markersize=4)
-        # 'b-' = niebieska linia, linewidth=grubość, marker='o'=kółka na punktach
-        self.ax1.set_title('Populacja', fontsize=12, fontweight='bold')
-        self.ax1.set_ylabel('Mieszkańcy')  # etykieta osi Y
-        self.ax1.grid(True, alpha=0.3)  # siatka z przezroczystością 30%
-
-        # Wykres 2: Budżet miasta
-        self.ax2.plot(turns, data['budget'], 'g-', linewidth=2, marker='s', markersize=4)
-        # 'g-' = zielona linia, marker='s'=kwadraciki
-        self.ax2.set_title('Budżet Miasta', fontsize=12, fontweight='bold')
-        self.ax2.set_ylabel('Pieniądze ($)')
-        self.ax2.grid(True, alpha=0.3)
-
-        # Wykres 3: Zadowolenie mieszkańców
-        self.ax3.plot(turns, data['satisfaction'], 'orange', linewidth=2, marker='^', markersize=4)
-        # 'orange' = pomarańczowa linia, marker='^'=trójkąty
-        self.ax3.set_title('Zadowolenie Mieszkańców', fontsize=12, fontweight='bold')
-        self.ax3.set_ylabel('Zadowolenie (%)')
-        self.ax3.set_ylim(0, 100)  # ustaw zakres osi Y na 0-100%
-        self.ax3.grid(True, alpha=0.3)
-
-        # Wykres 4: Stopa bezrobocia
-        self.ax4.plot(turns, data['unemployment'], 'r-', linewidth=2, marker='v', markersize=4)
-        # 'r-' = czerwona linia, marker='v'=trójkąty w dół
-        self.ax4.set_title('Stopa Bezrobocia', fontsize=12, fontweight='bold')
-        self.ax4.set_ylabel('Bezrobocie (%)')
-        self.ax4.grid(True, alpha=0.3)
-
-        # Wykres 5: Dochody vs Wydatki - dwie linie na jednym wykresie
-        self.ax5.plot(turns, data['income'], 'g-', linewidth=2, label='Dochody', marker='o', markersize=3)
-        self.ax5.plot(turns, data['expenses'], 'r-', linewidth=2, label='Wydatki', marker='s', markersize=3)
-        # label= etykiety dla legendy
-        self.ax5.set_title('Ekonomia - Dochody vs Wydatki', fontsize=12, fontweight='bold')
-        self.ax5.set_ylabel('Pieniądze ($)')
-        self.ax5.legend()  # pokaż legendę z etykietami
-        self.ax5.grid(True, alpha=0.3)
-
-        # Wykres 6: Bilans budżetowy (dochody - wydatki) jako wykres słupkowy
-        if len(data['income']) == len(data['expenses']):  # sprawdź czy listy mają tę samą długość
-            # Oblicz bilans dla każdej tury
-            balance = [inc - exp for inc, exp in zip(data['income'], data['expenses'])]
-            # zip łączy dwie listy w pary: [(inc1,exp1), (inc2,exp2), ...]
-            
-            # Ustaw kolory słupków: zielone dla zysku, czerwone dla straty
-            colors = ['g' if b >= 0 else 'r' for b in balance]  # lista comprehension
-            
-            # Utwórz wykres słupkowy
-            self.ax6.bar(turns, balance, color=colors, alpha=0.7)  # alpha=przezroczystość
-            self.ax6.set_title('Bilans Budżetowy', fontsize=12, fontweight='bold')
-            self.ax6.set_ylabel('Bilans ($)')
-            self.ax6.axhline(y=0, color='black', linestyle='-', alpha=0.5)  # linia na poziomie 0
-            self.ax6.grid(True, alpha=0.3)
-
-        # Ustaw etykiety osi X dla wszystkich wykresów
-        for ax in [self.ax1, self.ax2, self.ax3, self.ax4, self.ax5, self.ax6]:
-            ax.set_xlabel('Tura')
+        # Dopasuj zakresy osi do nowych danych (skokowo - dopisanie tury zwykle mieści się w zakresie)
+        # Oś tur od początku obejmuje całe wybrane okno - nowe tury nie zmieniają jej zakresu
+        window = self.turn_window()
+        span = turns[-1] - turns[0] if len(turns) else 0
+        turn_headroom = max(MIN_TURN_HEADROOM, window - 1 - span if window else 0)
+        limits_changed = False
+        for ax in self.axes:
+            ax.relim()
+            data_limits = ax.dataLim
+            if not (data_limits.width >= 0 and data_limits.height >= 0):
+                continue  # brak danych na wykresie
+            xlim = stepped_limits(*data_limits.intervalx, ax.get_xlim(),
+                                  min_headroom=turn_headroom, lower_headroom=False)
+            if xlim != ax.get_xlim():
+                ax.set_xlim(xlim)
+                limits_changed = True
+            if ax in self._autoscale_y_axes:
+                ylim = stepped_limits(*data_limits.intervaly, ax.get_ylim())
+                if ylim != ax.get_ylim():
+                    ax.set_ylim(ylim)
+                    limits_changed = True
 
-        # Dostosuj układ wykresów i odśwież wyświetlanie
-        self.figure.tight_layout()  # automatycznie dostosuj odstępy między wykresami
-        self.canvas.draw()  # odśwież canvas Qt
+        if limits_changed or self._chart_backgrounds is None:
+            # Nowe podziałki osi - pełne przerysowanie (tło zapamiętane w _on_draw)
+            self.canvas.draw()
+        else:
+            self._blit_charts()
 
     def export_to_csv(self):
         """
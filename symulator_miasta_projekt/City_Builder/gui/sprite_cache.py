@@ -0,0 +1,196 @@
+"""
+Cache obrazków (sprite'ów) budynków i terenu dla MapCanvas.
+
+Każdy wariant obrazka - (ścieżka, rozmiar, rotacja, poziom powiększenia) -
+jest skalowany i obracany tylko raz:
+- poziom powiększenia zaokrąglany jest do najbliższego z ui_settings.zoom_levels
+  (mipmapy), więc przy zoomie obrazek ma rozdzielczość zbliżoną do ekranowej
+- rotacje 0/90/180/270 liczone są z góry (precompute) zamiast wywoływać
+  QPixmap.transformed() przy każdym rysowaniu budynku
+- liczba wariantów w pamięci ograniczona jest przez performance_settings.cache_size,
+  najdawniej używane są usuwane (LRU)
+- przeskalowane warianty mogą być zapisane na dysk (persist) i wczytane
+  przy następnym uruchomieniu zamiast ponownego skalowania
+- z atlasem tekstur (TextureAtlas) obrazki źródłowe pochodzą z atlasu
+  wczytanego przy starcie, bez dostępu do plików przy rysowaniu
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Iterable, Optional, Sequence
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor, QPainter, QPixmap, QTransform
+
+from gui.texture_atlas import APP_DIR, TextureAtlas
+
+ROTATIONS = (0, 90, 180, 270)
+CACHE_FILE_FORMAT = 'PNG'
+
+
+class SpriteCache:
+    """
+    Ograniczony cache LRU przeskalowanych i obróconych obrazków.
+
+    Klucz wariantu: (ścieżka, szerokość, wysokość, rotacja, poziom_powiększenia),
+    gdzie szerokość i wysokość to rozmiar w jednostkach sceny (powiększenie 1.0).
+    Zwracany obraz ma rozmiar pomnożony przez poziom powiększenia.
+    """
+
+    def __init__(self, max_size: int = 100, zoom_levels: Sequence[float] = (1.0,),
+                 cache_dir: Optional[str] = None, atlas: Optional[TextureAtlas] = None):
+        """
+        Args:
+            max_size: maksymalna liczba wariantów w pamięci (performance_settings.cache_size)
+            zoom_levels: poziomy powiększenia, dla których tworzone są warianty (ui_settings.zoom_levels)
+            cache_dir: katalog cache na dysku (None = bez zapisu na dysk)
+            atlas: wczytany atlas tekstur (None = obrazki wczytywane z plików)
+        """
+        self.max_size = max(1, int(max_size))
+        self.zoom_levels = tuple(sorted(float(level) for level in zoom_levels)) or (1.0,)
+        self.cache_dir = cache_dir
+        self.atlas = atlas
+        self._variants: "OrderedDict[tuple, QPixmap]" = OrderedDict()
+        self._persisted = set()      # klucze wariantów już zapisanych na dysku
+        self._sources = {}           # ścieżka -> oryginalny obraz (None = brak pliku)
+        self.hits = 0
+        self.misses = 0
+
+    def snap_zoom(self, zoom: float) -> float:
+        """Zwraca poziom powiększenia z zoom_levels najbliższy podanemu."""
+        return min(self.zoom_levels, key=lambda level: abs(level - zoom))
+
+    def get(self, path: str, width: int, height: int, rotation: int = 0, zoom: float = 1.0) -> QPixmap:
+        """
+        Zwraca przeskalowany (KeepAspectRatio) i obrócony obrazek.
+
+        Args:
+            path: ścieżka obrazka względna do katalogu aplikacji
+            width, height: docelowy rozmiar w jednostkach sceny
+            rotation: rotacja w stopniach (wielokrotność 90)
+            zoom: powiększenie widoku - zaokrąglane do najbliższego poziomu
+        """
+        key = (path, int(width), int(height), int(rotation) % 360, self.snap_zoom(zoom))
+        pixmap = self._variants.get(key)
+        if pixmap is not None:
+            self._variants.move_to_end(key)
+            self.hits += 1
+            return pixmap
+
+        self.misses += 1
+        pixmap = self._load_from_disk(key)
+        if pixmap is None:
+            pixmap = self._render(*key)
+        self._store(key, pixmap)
+        return pixmap
+
+    def precompute(self, path: str, width: int, height: int,
+                   rotations: Iterable[int] = ROTATIONS, zoom_levels: Optional[Iterable[float]] = None):
+        """Tworzy z góry warianty obrazka dla podanych rotacji i poziomów powiększenia."""
+        for zoom in (zoom_levels if zoom_levels is not None else self.zoom_levels):
+            for rotation in rotations:
+                self.get(path, width, height, rotation, zoom)
+
+    def clear(self):
+        """Czyści cache w pamięci (pliki na dysku pozostają)."""
+        self._variants.clear()
+        self._sources.clear()
+
+    def __len__(self) -> int:
+        return len(self._variants)
+
+    def _store(self, key: tuple, pixmap: QPixmap):
+        self._variants[key] = pixmap
+        while len(self._variants) > self.max_size:
+            self._variants.popitem(last=False)  # usuń najdawniej używany wariant
+
+    def _source(self, path: str) -> Optional[QPixmap]:
+        """Zwraca obrazek źródłowy spoza atlasu wczytany (raz) z pliku."""
+        if path not in self._sources:
+            abs_path = os.path.join(APP_DIR, path)
+            pixmap = QPixmap(abs_path) if os.path.exists(abs_path) else None
+            self._sources[path] = pixmap if pixmap is not None and not pixmap.isNull() else None
+        return self._sources[path]
+
+    def _render(self, path: str, width: int, height: int, rotation: int, zoom: float) -> QPixmap:
+        """Skaluje i obraca obrazek (kosztowna operacja wykonywana raz na wariant)."""
+        target_width = max(1, round(width * zoom))
+        target_height = max(1, round(height * zoom))
+        if self.atlas is not None and path in self.atlas:
+            pixmap = self._render_from_atlas(path, target_width, target_height)
+        else:
+            source = self._source(path)
+            if source is None:
+                # Fallback - magenta oznacza brak obrazka
+                pixmap = QPixmap(target_width, target_height)
+                pixmap.fill(QColor(255, 0, 255))
+                return pixmap
+
+            pixmap = source.scaled(
+                target_width, target_height,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+        if rotation:
+            transform = QTransform()
+            transform.translate(pixmap.width()/2, pixmap.height()/2)
+            transform.rotate(rotation)
+            transform.translate(-pixmap.width()/2, -pixmap.height()/2)
+            pixmap = pixmap.transformed(transform, Qt.TransformationMode.SmoothTransformation)
+        return pixmap
+
+    def _render_from_atlas(self, path: str, target_width: int, target_height: int) -> QPixmap:
+        """Rysuje obrazek wprost ze strony atlasu w rozmiarze celu (z zachowaniem proporcji)."""
+        page, source = self.atlas.get(path, max(target_width, target_height))
+        size = source.size().scaled(target_width, target_height, Qt.AspectRatioMode.KeepAspectRatio)
+        pixmap = QPixmap(max(1, size.width()), max(1, size.height()))
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawPixmap(pixmap.rect(), page, source)
+        painter.end()
+        return pixmap
+
+    # === Cache na dysku ===
+
+    def _disk_path(self, key: tuple) -> Optional[str]:
+        """Ścieżka pliku wariantu - nazwa zależy też od wersji oryginału (mtime lub skrót atlasu)."""
+        if not self.cache_dir:
+            return None
+        path = key[0]
+        if self.atlas is not None and path in self.atlas:
+            version = self.atlas.assets_hash  # skrót zawartości obrazków - bez dostępu do pliku
+        else:
+            abs_path = os.path.join(APP_DIR, path)
+            version = os.path.getmtime(abs_path) if os.path.exists(abs_path) else 0
+        digest = hashlib.sha1(repr((key, version)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def _load_from_disk(self, key: tuple) -> Optional[QPixmap]:
+        disk_path = self._disk_path(key)
+        if disk_path is None or not os.path.exists(disk_path):
+            return None
+        pixmap = QPixmap(disk_path)
+        if pixmap.isNull():
+            return None
+        self._persisted.add(key)
+        return pixmap
+
+    def persist(self) -> int:
+        """
+        Zapisuje na dysk warianty z pamięci, których jeszcze tam nie ma.
+
+        Returns:
+            int: liczba zapisanych plików
+        """
+        if not self.cache_dir:
+            return 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        saved = 0
+        for key, pixmap in self._variants.items():
+            if key in self._persisted:
+                continue
+            if pixmap.save(self._disk_path(key), CACHE_FILE_FORMAT):
+                self._persisted.add(key)
+                saved += 1
+        return saved
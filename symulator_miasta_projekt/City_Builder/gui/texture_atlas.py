@@ -0,0 +1,225 @@
+"""
+Atlas tekstur - wszystkie obrazki z assets/tiles w kilku dużych obrazach.
+
+Zamiast wczytywać każdy obrazek osobno (os.path.exists + QPixmap przy rysowaniu)
+atlas wczytywany jest raz przy starcie:
+- każdy obrazek skalowany jest do każdego rozmiaru komórki (tile_size * poziom
+  powiększenia z ui_settings.zoom_levels) i pakowany półkami na strony atlasu
+- indeks (ścieżka, rozmiar komórki) -> (strona, x, y, szerokość, wysokość)
+  wskazuje obszar strony z obrazkiem - rysowany jest wprost ze strony
+  (QPainter.drawPixmap(cel, strona, obszar)), bez osobnych kopii obrazków
+- gotowe strony i indeks zapisywane są w katalogu cache pod nazwą zależną
+  od skrótu zawartości plików - zmiana dowolnego obrazka wymusza przebudowę
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QPainter, QPixmap
+
+# Katalog aplikacji - ścieżki obrazków (np. assets/tiles/...) są względne do niego
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSET_DIRS = (os.path.join("assets", "tiles"),)
+IMAGE_EXTENSIONS = ('.png',)
+MAX_PAGE_SIZE = 2048
+
+
+class TextureAtlas:
+    """
+    Atlas obrazków kafli i budynków dla kilku rozmiarów komórek.
+
+    Klucze indeksu to ścieżki względne do katalogu aplikacji - takie same
+    jak zwracane przez Building.get_image_path() i Tile.get_image_path().
+    """
+
+    def __init__(self, cell_sizes: Sequence[int] = (32,), asset_dirs: Sequence[str] = ASSET_DIRS,
+                 cache_dir: Optional[str] = None, base_dir: str = APP_DIR,
+                 max_page_size: int = MAX_PAGE_SIZE):
+        """
+        Args:
+            cell_sizes: rozmiary komórek w pikselach (np. tile_size * każdy z zoom_levels)
+            asset_dirs: katalogi z obrazkami (względne do base_dir)
+            cache_dir: katalog gotowych stron atlasu (None = bez zapisu na dysk)
+            base_dir: katalog, względem którego liczone są ścieżki obrazków
+            max_page_size: maksymalny bok strony atlasu w pikselach
+        """
+        self.cell_sizes = tuple(sorted({max(1, int(size)) for size in cell_sizes}))
+        if not self.cell_sizes or self.cell_sizes[-1] > max_page_size:
+            raise ValueError("Rozmiar komórki atlasu musi mieścić się na stronie")
+        self.asset_dirs = tuple(asset_dirs)
+        self.cache_dir = cache_dir
+        self.base_dir = base_dir
+        self.max_page_size = max_page_size
+        self.logger = logging.getLogger('texture_atlas')
+
+        self.pages: List[QPixmap] = []
+        self.index: Dict[Tuple[str, int], Tuple[int, int, int, int, int]] = {}
+        self.assets_hash: Optional[str] = None
+
+    def __contains__(self, path: str) -> bool:
+        return (path, self.cell_sizes[0]) in self.index
+
+    def __len__(self) -> int:
+        """Liczba obrazków (ścieżek) w atlasie."""
+        return len(self.index) // len(self.cell_sizes)
+
+    def _asset_paths(self) -> List[str]:
+        paths = []
+        for asset_dir in self.asset_dirs:
+            abs_dir = os.path.join(self.base_dir, asset_dir)
+            if not os.path.isdir(abs_dir):
+                continue
+            for name in sorted(os.listdir(abs_dir)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(asset_dir, name))
+        return paths
+
+    def _compute_hash(self, paths: Iterable[str]) -> str:
+        """Skrót nazw i zawartości obrazków oraz parametrów pakowania."""
+        digest = hashlib.sha1(repr((self.cell_sizes, self.max_page_size)).encode('utf-8'))
+        for path in paths:
+            digest.update(path.encode('utf-8'))
+            with open(os.path.join(self.base_dir, path), 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def _cache_paths(self) -> Tuple[str, str]:
+        """Ścieżki indeksu i wzorca nazw stron w katalogu cache."""
+        prefix = os.path.join(self.cache_dir, f"atlas_{self.assets_hash}")
+        return f"{prefix}.json", prefix + "_{}.png"
+
+    def load(self) -> 'TextureAtlas':
+        """
+        Wczytuje atlas z cache lub buduje go od nowa (i zapisuje w cache).
+
+        Returns:
+            TextureAtlas: self (do łączenia wywołań)
+        """
+        paths = self._asset_paths()
+        self.assets_hash = self._compute_hash(paths)
+        if not (self.cache_dir and self._load_cached()):
+            self.build(paths)
+            if self.cache_dir:
+                self.save()
+        return self
+
+    def build(self, paths: Sequence[str]):
+        """Skaluje obrazki do każdego rozmiaru komórki i pakuje je półkami na strony."""
+        images = []
+        for path in paths:
+            source = QPixmap(os.path.join(self.base_dir, path))
+            if source.isNull():
+                self.logger.warning(f"Nie można wczytać obrazka do atlasu: {path}")
+                continue
+            for cell in self.cell_sizes:
+                images.append(((path, cell), source.scaled(
+                    cell, cell,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation
+                )))
+
+        # Najpierw największe komórki - półki mają wtedy równą wysokość
+        images.sort(key=lambda entry: -entry[0][1])
+        placements = self._pack([(key[1], key[1]) for key, _ in images])
+
+        page_sizes = {}
+        for page, x, y, w, h in placements:
+            width, height = page_sizes.get(page, (0, 0))
+            page_sizes[page] = (max(width, x + w), max(height, y + h))
+        self.pages = []
+        painters = []
+        for page in range(len(page_sizes)):
+            pixmap = QPixmap(*page_sizes[page])
+            pixmap.fill(Qt.GlobalColor.transparent)
+            self.pages.append(pixmap)
+            painters.append(QPainter(pixmap))
+
+        self.index = {}
+        for ((path, cell), image), (page, x, y, _, _) in zip(images, placements):
+            painters[page].drawPixmap(x, y, image)
+            self.index[(path, cell)] = (page, x, y, image.width(), image.height())
+        for painter in painters:
+            painter.end()
+        self.logger.info(f"Zbudowano atlas: {len(self)} obrazków, {len(self.pages)} stron")
+
+    def _pack(self, sizes: Sequence[Tuple[int, int]]) -> List[Tuple[int, int, int, int, int]]:
+        """Pakowanie półkowe: (strona, x, y, szerokość, wysokość) dla każdego rozmiaru."""
+        placements = []
+        page, x, y, shelf_height = 0, 0, 0, 0
+        for w, h in sizes:
+            if x + w > self.max_page_size:  # nowa półka
+                x, y, shelf_height = 0, y + shelf_height, 0
+            if y + h > self.max_page_size:  # nowa strona
+                page, x, y, shelf_height = page + 1, 0, 0, 0
+            placements.append((page, x, y, w, h))
+            x += w
+            shelf_height = max(shelf_height, h)
+        return placements
+
+    def save(self):
+        """Zapisuje strony i indeks atlasu w katalogu cache."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path, page_pattern = self._cache_paths()
+        for number, page in enumerate(self.pages):
+            page.save(page_pattern.format(number), 'PNG')
+        document = {
+            'pages': len(self.pages),
+            'index': [[path, cell, *region] for (path, cell), region in self.index.items()],
+        }
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+
+    def _load_cached(self) -> bool:
+        index_path, page_pattern = self._cache_paths()
+        if not os.path.exists(index_path):
+            return False
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            pages = [QPixmap(page_pattern.format(number)) for number in range(document['pages'])]
+            if any(page.isNull() for page in pages):
+                return False
+            self.pages = pages
+            self.index = {(path, cell): tuple(region) for path, cell, *region in document['index']}
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Uszkodzony cache atlasu {index_path}: {e}")
+            return False
+
+    def cell_for(self, size: int) -> int:
+        """Najmniejszy rozmiar komórki nie mniejszy niż size (lub największy dostępny)."""
+        for cell in self.cell_sizes:
+            if cell >= size:
+                return cell
+        return self.cell_sizes[-1]
+
+    def get(self, path: str, size: int) -> Optional[Tuple[QPixmap, QRect]]:
+        """
+        Zwraca położenie obrazka w atlasie w rozdzielczości wystarczającej dla rozmiaru size.
+
+        Returns:
+            Tuple[QPixmap, QRect] | None: (strona atlasu, obszar obrazka na stronie)
+                lub None, gdy ścieżki nie ma w atlasie
+        """
+        entry = self.index.get((path, self.cell_for(size)))
+        if entry is None:
+            return None
+        page, x, y, w, h = entry
+        return self.pages[page], QRect(x, y, w, h)
+
+    def draw(self, painter: QPainter, target: QRect, path: str) -> bool:
+        """
+        Rysuje obrazek z atlasu w prostokącie target (wprost ze strony atlasu).
+
+        Returns:
+            bool: False, gdy ścieżki nie ma w atlasie
+        """
+        region = self.get(path, max(target.width(), target.height()))
+        if region is None:
+            return False
+        page, source = region
+        painter.drawPixmap(target, page, source)
+        return True
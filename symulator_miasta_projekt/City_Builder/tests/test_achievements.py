@@ -0,0 +1,90 @@
+"""
+Testy jednostkowe dla indeksowanego sprawdzania osiągnięć
+"""
+import pytest
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.achievements import Achievement, AchievementCategory, AchievementManager, AchievementRarity
+
+
+def custom_achievement(achievement_id, condition, depends_on=None):
+    """Osiągnięcie z własnym warunkiem - jak dodawane przez mody"""
+    return Achievement(achievement_id, achievement_id, "", AchievementCategory.SPECIAL,
+                       AchievementRarity.COMMON, 10, condition_function=condition, depends_on=depends_on)
+
+
+class TestAchievementManager:
+    """Test sprawdzania osiągnięć zależnych od zmienionych statystyk"""
+
+    def setup_method(self):
+        self.manager = AchievementManager()
+
+    def test_thresholds_unlock_in_order(self):
+        """Test osiągnięć progowych - testowany tylko najbliższy próg"""
+        pending = self.manager._thresholds['population']['>=']
+        assert [ach.threshold for ach in pending] == [10000, 5000, 1000, 500, 100, 1]
+
+        unlocked = self.manager.check_achievements({'population': 600})
+        assert [ach.id for ach in unlocked] == ['first_citizen', 'small_town', 'growing_city']
+        assert [ach.threshold for ach in pending] == [10000, 5000, 1000]
+
+        # Porównania inne niż >= (money > 0, pollution_level <= 0)
+        unlocked = self.manager.check_achievements({'population': 600, 'money': 5, 'pollution_level': 3})
+        assert [ach.id for ach in unlocked] == ['first_dollar']
+        unlocked = self.manager.check_achievements({'population': 600, 'money': 5, 'pollution_level': 0})
+        assert [ach.id for ach in unlocked] == ['eco_warrior']
+
+    def test_only_changed_stats_are_evaluated(self):
+        """Test warunków sprawdzanych tylko po zmianie statystyk, od których zależą"""
+        calls = []
+
+        def condition(stats):
+            calls.append(stats['parks_built'])
+            return stats['parks_built'] >= 3
+
+        self.manager.add_achievement(custom_achievement('park_lover', condition, depends_on=('parks_built',)))
+        stats = {'parks_built': 1, 'building_types_built': {'House'}}
+        self.manager.check_achievements(stats)
+        self.manager.check_achievements(stats)
+        assert calls == [1]
+
+        # Zbiór zmieniany w miejscu też jest wykrywany jako zmiana
+        stats['building_types_built'].add('Park')
+        stats['parks_built'] = 3
+        unlocked = self.manager.check_achievements(stats)
+        assert [ach.id for ach in unlocked] == ['park_lover']
+        assert calls == [1, 3]
+        assert self.manager._last_stats['building_types_built'] == {'House', 'Park'}
+
+    def test_unindexed_and_failing_conditions(self, caplog):
+        """Test osiągnięć bez zależności (co turę) i błędów warunków w logu"""
+        calls = []
+        self.manager.add_achievement(custom_achievement('every_turn', lambda stats: calls.append(1)))
+        self.manager.add_achievement(custom_achievement('broken', lambda stats: stats['missing'], ('money',)))
+
+        self.manager.check_achievements({'money': 0})
+        self.manager.check_achievements({'money': 0})
+        assert len(calls) == 2
+        assert 'broken' in caplog.text
+        assert not self.manager.achievements['broken'].is_unlocked
+
+    def test_load_rebuilds_index(self):
+        """Test wczytania stanu - odblokowane osiągnięcia znikają z indeksu"""
+        self.manager.check_achievements({'population': 150})
+        saved = self.manager.save_to_dict()
+
+        loaded = AchievementManager()
+        loaded.load_from_dict(saved)
+        assert [ach.threshold for ach in loaded._thresholds['population']['>=']] == [10000, 5000, 1000, 500]
+        assert loaded.check_achievements({'population': 150}) == []
+        assert [ach.id for ach in loaded.check_achievements({'population': 500})] == ['growing_city']
+
+    def test_invalid_comparison(self):
+        """Test nieznanego porównania w osiągnięciu progowym"""
+        with pytest.raises(ValueError):
+            Achievement('x', 'x', '', AchievementCategory.SPECIAL, AchievementRarity.COMMON, 1,
+                        stat='money', threshold=1, comparison='==')
@@ -0,0 +1,100 @@
+"""
+Testy jednostkowe dla wektorowego losowania wydarzeń (EventTable)
+"""
+import random
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.advanced_events import AdvancedEventManager, EventCategory, EventSeverity, GameEvent
+
+
+def modded_event(index, category, required_buildings=None):
+    """Wydarzenie dodawane przez moda"""
+    event = GameEvent(f"mod_{index}", f"Mod {index}", "", category, EventSeverity.MINOR,
+                      0.01 + (index % 7) / 100, [])
+    event.min_population = (index % 5) * 1000
+    event.min_money = (index % 3) * 2000
+    event.max_satisfaction = 100 - index % 40
+    event.required_buildings = required_buildings or []
+    return event
+
+
+class TestEventTable:
+    """Test prawdopodobieństw wszystkich wydarzeń liczonych jedną operacją"""
+
+    def setup_method(self):
+        self.manager = AdvancedEventManager(rng=random.Random(1))
+        categories = list(EventCategory)
+        for index in range(300):
+            required = ['hospital'] if index % 10 == 0 else None
+            self.manager.add_event(modded_event(index, categories[index % len(categories)], required))
+
+    def test_matches_per_event_probabilities(self):
+        """Test zgodności z calculate_event_probability dla różnych stanów gry"""
+        table = self.manager.event_table
+        assert len(table) == 304
+        for population in (0, 1000, 4999, 5000, 12000):
+            for money in (0, 2000, 4999, 5000, 20000):
+                for satisfaction in (10, 50, 61, 90):
+                    for buildings in ([], [{'type': 'hospital'}]):
+                        state = {'population': population, 'money': money,
+                                 'satisfaction': satisfaction, 'buildings': buildings}
+                        expected = [self.manager.calculate_event_probability(event, state)
+                                    for event in table.events]
+                        assert table.probabilities(state).tolist() == expected
+
+    def test_cache_by_state_bucket(self):
+        """Test cache - warunki stanu bez przekroczenia progu nie są sprawdzane od nowa"""
+        table = self.manager.event_table
+        first = table.probabilities({'population': 20000, 'money': 50000, 'satisfaction': 70})
+        # Populacja powyżej progów, inny budżet w tym samym przedziale
+        second = table.probabilities({'population': 25000, 'money': 60000, 'satisfaction': 70})
+        assert second.tolist() == first.tolist()
+        assert table.hits == 1
+
+        # Przekroczenie progu zadowolenia (max_satisfaction) sprawdza warunki od nowa
+        table.probabilities({'population': 25000, 'money': 60000, 'satisfaction': 61.5})
+        assert table.hits == 1
+
+    def test_growing_city_hits_cache(self):
+        """Test rosnącego miasta - zmiana modyfikatorów bez przekroczenia progu korzysta z cache"""
+        table = self.manager.event_table
+        for population in range(5000, 9000, 20):
+            state = {'population': population, 'money': 3000, 'satisfaction': 30 + population % 7}
+            expected = [self.manager.calculate_event_probability(event, state) for event in table.events]
+            assert table.probabilities(state).tolist() == expected
+        assert table.hits == 199
+
+    def test_added_event_rebuilds_table(self):
+        """Test przebudowy tablicy po dodaniu lub zastąpieniu wydarzenia"""
+        table = self.manager.event_table
+        replaced = modded_event(0, EventCategory.ECONOMIC)
+        replaced.base_probability = 0.9
+        self.manager.add_event(replaced)
+        assert self.manager.event_table is not table
+        state = {'population': 5000, 'money': 50000, 'satisfaction': 70}
+        probabilities = dict(zip(self.manager.event_table.ids,
+                                 self.manager.event_table.probabilities(state).tolist()))
+        assert probabilities['mod_0'] == 0.9
+
+    def test_weighted_sampling(self):
+        """Test losowania ważonego - powtarzalne przy tym samym ziarnie i zgodne z wagami"""
+        state = {'population': 8000, 'money': 3000, 'satisfaction': 30, 'buildings': []}
+        runs = []
+        for _ in range(2):
+            manager = AdvancedEventManager(rng=random.Random(42))
+            runs.append([(event or {}).get('event_id') for event in
+                         (manager.trigger_random_event(state, turn) for turn in range(50))])
+        assert runs[0] == runs[1]
+        assert manager.event_probabilities['protests'] == 0.05 * 1.6 * 1.2  # populacja i niezadowolenie
+
+        # Tylko jedno możliwe wydarzenie z pewnym wystąpieniem
+        manager = AdvancedEventManager(rng=random.Random(0))
+        manager.events.clear()
+        certain = modded_event(1, EventCategory.ECONOMIC)
+        certain.base_probability = 1.0
+        manager.add_event(certain)
+        assert manager.trigger_random_event(state, 1)['event_id'] == 'mod_1'
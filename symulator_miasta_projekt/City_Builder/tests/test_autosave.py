@@ -0,0 +1,161 @@
+"""
+Testy jednostkowe dla autozapisu w tle
+"""
+import pytest
+import sys
+import os
+import threading
+import numpy as np
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.autosave import AutosaveService
+from core.game_engine import GameEngine
+from core.tile import Building, BuildingType
+
+
+class FakeClock:
+    """Zegar sterowany ręcznie"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAutosaveService:
+    """Test usługi autozapisu"""
+
+    def setup_method(self):
+        self.engine = GameEngine(map_width=20, map_height=20, seed=3)
+        self.clock = FakeClock()
+
+    def test_autosave_after_interval(self, tmp_path):
+        """Test autozapisu dopiero po upływie interwału"""
+        service = AutosaveService(self.engine, str(tmp_path), interval=300, slots=2, clock=self.clock)
+        try:
+            assert service.tick() is None
+
+            self.clock.now = 300
+            assert service.tick() is not None
+            results = service.wait()
+            assert [r.success for r in results] == [True]
+            assert results[0].autosave
+            assert os.path.exists(service.slot_path(1))
+
+            # Zapis jest atomowy - w katalogu nie zostają pliki tymczasowe
+            assert sorted(os.listdir(tmp_path)) == ["autosave_1.sav"]
+
+            loaded = GameEngine(map_width=10, map_height=10)
+            assert loaded.load_game(service.slot_path(1))
+            assert loaded.game_seed == 3
+        finally:
+            service.shutdown()
+
+    def test_slots_rotate(self, tmp_path):
+        """Test rotacji slotów - nadpisywany jest najstarszy"""
+        service = AutosaveService(self.engine, str(tmp_path), interval=10, slots=2, clock=self.clock)
+        try:
+            paths = []
+            for turn in range(3):
+                self.engine.turn = turn
+                self.clock.now += 10
+                paths.append(service.tick().result().filepath)
+            assert paths == [service.slot_path(1), service.slot_path(2), service.slot_path(1)]
+
+            loaded = GameEngine(map_width=10, map_height=10)
+            assert loaded.load_game(service.slot_path(1))
+            assert loaded.turn == 2
+        finally:
+            service.shutdown()
+
+        # Nowa usługa kontynuuje od najstarszego slotu
+        os.utime(service.slot_path(2), (0, 0))
+        restarted = AutosaveService(self.engine, str(tmp_path), slots=2)
+        try:
+            assert restarted.autosave().result().filepath == restarted.slot_path(2)
+        finally:
+            restarted.shutdown()
+
+    def test_snapshot_is_independent_of_later_turns(self, tmp_path):
+        """Test migawki - zmiany stanu po zleceniu zapisu nie trafiają do pliku"""
+        service = AutosaveService(self.engine, str(tmp_path), interval=0)
+        try:
+            path = str(tmp_path / "manual.sav")
+            money = self.engine.economy.get_resource_amount('money')
+            future = service.save(path)
+            self.engine.economy.resources['money'].amount = money + 12345
+            self.engine.alerts.append({'message': 'po zapisie'})
+            result = future.result()
+            assert result.success and not result.autosave
+            assert service.tick() is None  # interwał 0 wyłącza autozapis
+
+            loaded = GameEngine(map_width=10, map_height=10)
+            assert loaded.load_game(path)
+            assert loaded.economy.get_resource_amount('money') == money
+        finally:
+            service.shutdown()
+
+    def test_snapshot_copies_raw_map_data(self, tmp_path):
+        """Test migawki - surowe dane mapy w wątku gry, kodowanie dopiero przy zapisie"""
+        self.engine.city_map.terrain[:, :] = 0
+        house = Building("Dom", BuildingType.HOUSE, 500, {"population": 35})
+        self.engine.city_map.add_building(2, 3, house)
+
+        snapshot = self.engine.create_save_snapshot()
+        assert isinstance(snapshot['map']['terrain'], np.ndarray)
+        self.engine.city_map.terrain[0, 0] = 1
+        house.effects['population'] = 1000
+
+        path = str(tmp_path / "raw.sav")
+        assert self.engine.write_save_snapshot(snapshot, path) == []
+        loaded = GameEngine(map_width=10, map_height=10)
+        assert loaded.load_game(path)
+        assert loaded.city_map.terrain[0, 0] == 0
+        assert loaded.city_map.buildings[(2, 3)].effects == {"population": 35}
+
+    def test_autosave_skipped_while_previous_runs(self, tmp_path):
+        """Test kolejnego autozapisu - pomijany, dopóki poprzedni trwa w tle"""
+        release = threading.Event()
+        write_save_snapshot = self.engine.write_save_snapshot
+
+        def slow_write(snapshot, filepath):
+            release.wait(timeout=10)
+            return write_save_snapshot(snapshot, filepath)
+        self.engine.write_save_snapshot = slow_write
+        service = AutosaveService(self.engine, str(tmp_path), interval=10, clock=self.clock)
+        try:
+            self.clock.now = 10
+            assert service.tick() is not None
+            self.clock.now = 20
+            assert service.autosave_in_progress()
+            assert service.tick() is None
+
+            release.set()
+            service.wait()
+            assert not service.autosave_in_progress()
+            assert service.tick() is not None
+            service.wait()
+        finally:
+            release.set()
+            service.shutdown()
+
+    def test_failed_write_is_reported(self, tmp_path):
+        """Test błędu zapisu - wynik zamiast wyjątku w wątku gry"""
+        self.engine.save_compression = 'unknown'
+        service = AutosaveService(self.engine, str(tmp_path), clock=self.clock)
+        try:
+            service.autosave()
+            results = service.wait()
+            assert not results[0].success
+            assert "kompresja" in results[0].error
+            assert os.listdir(tmp_path) == []
+        finally:
+            service.shutdown()
+
+    def test_invalid_slot_count(self, tmp_path):
+        """Test walidacji liczby slotów"""
+        with pytest.raises(ValueError):
+            AutosaveService(self.engine, str(tmp_path), slots=0)
@@ -0,0 +1,80 @@
+"""
+Testy jednostkowe dla kohortowego modelu populacji
+"""
+import random
+import sys
+import os
+
+import numpy as np
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.cohorts import AGE_BANDS, SOCIAL_CLASSES
+from core.population import PopulationManager, SocialClass
+
+
+class TestCohortModel:
+    """Test operacji macierzowych modelu kohortowego"""
+
+    def setup_method(self):
+        self.population = PopulationManager(rng=random.Random(1))
+        self.initial = self.population.get_total_population()
+        self.population.enable_cohort_model()
+        self.model = self.population.cohorts
+
+    def test_built_from_groups(self):
+        """Test rozkładu grup na przedziały wieku - liczebności klas bez zmian"""
+        assert self.model.counts.shape == (len(AGE_BANDS), len(SOCIAL_CLASSES))
+        assert self.population.get_total_population() == self.initial
+        assert self.model.class_totals()[SocialClass.WORKER] == 150
+
+    def test_step_flows(self):
+        """Test urodzeń, zgonów, starzenia i przejść między klasami"""
+        before = self.model.counts.copy()
+        result = self.model.step(birth_rate=0.025, death_rate=0.002, migration=0, job_finding_rate=0.1)
+        # Na profilu domyślnym łączne urodzenia/zgony jak w modelu grup
+        assert np.isclose(result['births'], 0.025 * self.initial)
+        assert np.isclose(result['deaths'], 0.002 * self.initial)
+        assert np.isclose(self.model.total(), self.initial + result['births'] - result['deaths'])
+        # Starzenie przesuwa ludzi z przedziału 0-4 (1/5 na turę), urodzenia go uzupełniają
+        assert self.model.counts[0].sum() > before[0].sum() * 0.75
+        # Bezrobotni w wieku produkcyjnym znajdują pracę, studenci kończą studia
+        unemployed = SOCIAL_CLASSES.index(SocialClass.UNEMPLOYED)
+        assert self.model.counts[3, unemployed] < before[3, unemployed]
+        assert (self.model.counts >= 0).all()
+
+    def test_migration_and_decline_limit(self):
+        """Test migracji według profilu i ograniczenia spadku populacji do 2%"""
+        self.model.step(birth_rate=0, death_rate=0, migration=1000)
+        assert np.isclose(self.model.total(), self.initial + 1000)
+        unemployed = SOCIAL_CLASSES.index(SocialClass.UNEMPLOYED)
+        assert self.model.class_totals()[SocialClass.UNEMPLOYED] == round(self.model.counts[:, unemployed].sum())
+
+        total = self.model.total()
+        self.model.step(birth_rate=0, death_rate=0.5, migration=-10 ** 6)
+        assert np.isclose(self.model.total(), total * 0.98)
+
+    def test_millions_and_persistence(self):
+        """Test dużej populacji, demografii i zapisu modelu"""
+        self.population.add_instant_population(5_000_000)
+        for _ in range(20):
+            self.population.update_population_dynamics()
+        total = self.population.get_total_population()
+        assert total > 5_000_000
+        assert total == sum(self.model.class_totals().values())
+
+        cohorts = self.population.get_demographics()['cohorts']
+        assert sum(cohorts['age_bands'].values()) == round(self.model.total())
+        assert 0 < cohorts['median_age'] < 80
+        assert cohorts['dependency_ratio'] > 0
+
+        loaded = PopulationManager()
+        loaded.load_from_dict(self.population.save_to_dict())
+        assert loaded.cohorts.counts.tolist() == self.model.counts.tolist()
+        assert loaded.get_total_population() == total
+
+        # Reset odtwarza model z grup początkowych
+        self.population.reset_to_initial_state()
+        assert self.population.cohorts is not None
+        assert self.population.get_total_population() == self.initial
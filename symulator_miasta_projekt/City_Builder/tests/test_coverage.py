@@ -0,0 +1,110 @@
+"""
+Testy jednostkowe dla map zasięgu usług publicznych
+"""
+import random
+import sys
+import os
+
+import numpy as np
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.city_map import CityMap
+from core.coverage import ServiceCoverage, coverage_kernel
+from core.population import PopulationManager
+from core.tile import Building, BuildingType
+
+
+def school():
+    return Building("Szkoła", BuildingType.SCHOOL, 1500, {"education": 30, "jobs": 20, "happiness": 10})
+
+
+def house(population=50):
+    return Building("Dom", BuildingType.HOUSE, 500, {"population": population})
+
+
+class TestServiceCoverage:
+    """Test warstw zasięgu - przyrostowo, nakładaniem jąder i splotem FFT"""
+
+    def test_kernel(self):
+        """Test jądra - 1.0 do połowy promienia, spadek do 0 za promieniem"""
+        kernel = coverage_kernel(4)
+        assert kernel.shape == (9, 9)
+        assert kernel[4, 4] == kernel[4, 5] == kernel[4, 6] == 1.0  # sąsiednie kafelki w pełni
+        assert kernel[0, 0] == 0.0  # odległość > 4
+        assert 0 < kernel[4, 0] < kernel[4, 1] < 1.0
+
+    def test_incremental_matches_rebuild(self):
+        """Test zgodności warstw przyrostowych z przeliczeniem od zera (także przy krawędziach)"""
+        rng = random.Random(4)
+        city_map = CityMap(40, 30, rng=random.Random(0))
+        types = [BuildingType.SCHOOL, BuildingType.HOSPITAL, BuildingType.POLICE,
+                 BuildingType.FIRE_STATION, BuildingType.PARK, BuildingType.HOUSE]
+        for _ in range(60):
+            x, y = rng.randrange(40), rng.randrange(30)
+            if city_map.get_building_at(x, y) is None:
+                building_type = rng.choice(types)
+                effects = {"population": 20} if building_type is BuildingType.HOUSE else {"safety": 10, "health": 5}
+                city_map.add_building(x, y, Building("B", building_type, 100, effects))
+        for anchor in list(city_map.buildings)[:15]:
+            city_map.remove_building(*anchor)
+
+        incremental = {need: layer.copy() for need, layer in city_map.coverage.layers.items()}
+        residents = city_map.coverage.residents.copy()
+        city_map.rebuild_ledger()
+        for use_fft in (True, False):
+            city_map.coverage.rebuild(city_map.buildings.items(), use_fft=use_fft)
+            for need, layer in city_map.coverage.layers.items():
+                assert np.allclose(layer, incremental[need], atol=1e-9)
+            assert np.array_equal(city_map.coverage.residents, residents)
+
+    def test_rebuild_large_map(self):
+        """Test przeliczenia mapy 500x500"""
+        coverage = ServiceCoverage(500, 500)
+        rng = random.Random(1)
+        buildings = [((rng.randrange(500), rng.randrange(500)), school()) for _ in range(3000)]
+        coverage.rebuild(buildings)  # gęsta grupa - splot FFT
+        assert coverage.service_supply['education'] == 3000 * 30
+        assert coverage.access('education').max() == 1.0
+        fft_layer = coverage.layers['education'].copy()
+        coverage.rebuild(buildings, use_fft=False)
+        assert np.allclose(coverage.layers['education'], fft_layer, atol=1e-9)
+
+
+class TestCoverageNeeds:
+    """Test podaży potrzeb ważonej położeniem mieszkańców"""
+
+    def setup_method(self):
+        self.city_map = CityMap(60, 60, rng=random.Random(0))
+        self.population = PopulationManager(rng=random.Random(0))
+
+    def education(self):
+        self.population.calculate_needs([], self.city_map.ledger, self.city_map.coverage)
+        return self.population.needs['education']['current']
+
+    def test_served_share(self):
+        """Test szkoły blisko i daleko od domów"""
+        # Bez domów położenie mieszkańców nieznane - cała podaż
+        self.city_map.add_building(50, 50, school())
+        assert self.education() == 30
+
+        self.city_map.add_building(5, 5, house())
+        self.city_map.add_building(6, 5, house())
+        assert self.city_map.coverage.served_share('education') == 0.0
+        assert self.education() == 0
+
+        # Druga szkoła obok domów - wszyscy mieszkańcy w pełnym zasięgu
+        self.city_map.add_building(5, 6, school())
+        assert self.city_map.coverage.served_share('education') == 1.0
+        assert self.education() == 60
+
+        # Dom na skraju zasięgu - podaż obu szkół mnożona przez udział mieszkańców w zasięgu
+        self.city_map.add_building(5, 13, house())
+        share = self.city_map.coverage.served_share('education')
+        assert 2 / 3 < share < 1.0
+        assert np.isclose(self.education(), 60 * share)
+
+        # Usunięcie szkoły przywraca poprzedni stan
+        self.city_map.remove_building(5, 6)
+        assert self.education() == 0
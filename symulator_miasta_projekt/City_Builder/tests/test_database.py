@@ -0,0 +1,189 @@
+"""
+Testy jednostkowe dla zapisów tur w bazie danych SQLite
+"""
+import pytest
+import sqlite3
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from db.database import Database
+
+
+def save_turn(db, save_id, turn):
+    """Zapisy jednej tury - takie jak w MainWindow.update_game"""
+    db.save_game_state(100 + turn, 5000, 60, "5000")
+    db.record_turn(save_id, turn, population=100 + turn, money=5000, satisfaction=60)
+
+
+def saved_turns(db, save_id):
+    return db.query_history(save_id, ('population',))['turns']
+
+
+class TestDatabase:
+    """Test buforowanych zapisów tury"""
+
+    def test_wal_mode(self, tmp_path):
+        """Test trybu WAL i synchronous=NORMAL"""
+        db = Database(str(tmp_path / "game.db"))
+        try:
+            assert db.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert db.conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        finally:
+            db.close()
+
+    def test_turn_commits_once(self, tmp_path):
+        """Test bloku turn() - zapisy niewidoczne dla innych połączeń do końca bloku"""
+        path = str(tmp_path / "game.db")
+        db = Database(path)
+        save_id = db.start_save()
+        reader = sqlite3.connect(path)
+        try:
+            with db.turn():
+                save_turn(db, save_id, 1)
+                assert reader.execute('SELECT COUNT(*) FROM turn_history').fetchone()[0] == 0
+            assert reader.execute('SELECT COUNT(*) FROM turn_history').fetchone()[0] == 1
+            assert db.load_game_state()[1] == 101
+
+            # Poza blokiem turn() zapis zatwierdzany jest od razu
+            db.record_turn(save_id, 2)
+            assert reader.execute('SELECT COUNT(*) FROM turn_history').fetchone()[0] == 2
+        finally:
+            reader.close()
+            db.close()
+
+    def test_failed_turn_is_rolled_back(self, tmp_path):
+        """Test błędnego zapisu - cała tura wycofana jedną transakcją"""
+        db = Database(str(tmp_path / "game.db"))
+        save_id = db.start_save()
+        try:
+            with pytest.raises(sqlite3.Error):
+                with db.turn():
+                    save_turn(db, save_id, 1)
+                    db._write('INSERT INTO brak_tabeli VALUES (?)', (1,))
+            assert saved_turns(db, save_id) == []
+            assert db.load_game_state() is None
+        finally:
+            db.close()
+
+    def test_exception_in_turn_discards_writes(self, tmp_path):
+        """Test wyjątku w bloku turn() - żaden zapis tury nie trafia do bazy"""
+        db = Database(str(tmp_path / "game.db"))
+        save_id = db.start_save()
+        try:
+            with pytest.raises(RuntimeError):
+                with db.turn():
+                    save_turn(db, save_id, 1)
+                    raise RuntimeError("błąd w trakcie tury")
+            assert db._pending == []
+            assert saved_turns(db, save_id) == []
+            assert db.load_game_state() is None
+
+            # Zagnieżdżony blok - wycofane tylko jego zapisy
+            with db.turn():
+                save_turn(db, save_id, 2)
+                with pytest.raises(RuntimeError):
+                    with db.turn():
+                        db.record_turn(save_id, 3)
+                        raise RuntimeError("błąd w bloku wewnętrznym")
+            assert saved_turns(db, save_id) == [2]
+            assert db.load_game_state()[1] == 102
+        finally:
+            db.close()
+
+    def test_legacy_history_limit(self, tmp_path):
+        """Test odczytu dawnej tabeli history - ostatnie tury zamiast wszystkich wierszy"""
+        db = Database(str(tmp_path / "game.db"))
+        try:
+            with db.turn():
+                for turn in range(1, 51):
+                    db.save_history(turn, 100 + turn, 5000, 60, "5000")
+            assert [row[1] for row in db.load_history(limit=3)] == [48, 49, 50]
+            assert len(db.load_history()) == 50
+        finally:
+            db.close()
+
+    def test_background_error_is_raised(self, tmp_path):
+        """Test błędu zapisu w tle - zgłaszany w wątku gry przy wait()"""
+        db = Database(str(tmp_path / "game.db"), background=True)
+        try:
+            with db.turn():
+                db._write('INSERT INTO brak_tabeli VALUES (?)', (1,))
+            with pytest.raises(sqlite3.Error):
+                db.wait()
+            assert db.last_error is not None
+            db.wait()  # błąd zgłaszany jednokrotnie
+        finally:
+            db.close()
+
+    def test_background_writer(self, tmp_path):
+        """Test wątku zapisującego - odczyty widzą zapisy zlecone w tle"""
+        path = str(tmp_path / "game.db")
+        db = Database(path, background=True)
+        save_id = db.start_save()
+        for turn in range(1, 21):
+            with db.turn():
+                save_turn(db, save_id, turn)
+        assert saved_turns(db, save_id) == list(range(1, 21))
+        assert db._read('SELECT COUNT(*) FROM game_state') == [(1,)]  # tylko najnowszy stan
+        db.close()
+        assert db.last_error is None
+
+        reopened = Database(path)
+        try:
+            assert reopened.load_game_state()[1] == 120
+        finally:
+            reopened.close()
+
+
+class TestHistoryTimeSeries:
+    """Test szeregu czasowego historii z zapytaniami zakresowymi"""
+
+    def setup_method(self):
+        self.db = Database(":memory:")
+        self.save_id = self.db.start_save("Test")
+        with self.db.turn():
+            for turn in range(1, 10001):
+                self.db.record_turn(self.save_id, turn, population=turn, money=1000 - turn,
+                                    satisfaction=50, income=turn % 7, expenses=1)
+
+    def teardown_method(self):
+        self.db.close()
+
+    def test_range_query(self):
+        """Test zapytania o zakres tur w pełnej rozdzielczości"""
+        rows = self.db.query_history(self.save_id, ('population', 'money'), start_turn=101, end_turn=105)
+        assert rows == {
+            'turns': [101, 102, 103, 104, 105],
+            'population': [101, 102, 103, 104, 105],
+            'money': [899, 898, 897, 896, 895],
+        }
+        assert self.db.history_range(self.save_id) == (1, 10000, 10000)
+
+        # Osobny szereg dla każdej rozgrywki
+        other = self.db.start_save("Inna")
+        assert self.db.query_history(other)['turns'] == []
+        with pytest.raises(ValueError):
+            self.db.query_history(self.save_id, ('brak',))
+
+    def test_downsampled_query(self):
+        """Test agregacji w bazie - min/max/średnia w przedziale tur"""
+        rows = self.db.query_history(self.save_id, ('population', 'income'), buckets=200)
+        assert len(rows['turns']) == 200
+        assert rows['turns'][:2] == [1, 51]
+        assert rows['population'][0] == 25.5
+        assert (rows['population_min'][0], rows['population_max'][0]) == (1, 50)
+        assert max(rows['income_max']) == 6  # szczyty zachowane
+        assert rows['population_max'][-1] == 10000
+
+    def test_report_manager_loads_history(self):
+        """Test wczytania historii do ReportManager w rozdzielczości raportu"""
+        from core.reports import ReportManager
+        manager = ReportManager()
+        manager.load_history_from_database(self.db, self.save_id, buckets=100)
+        assert len(manager.historical_data) == 100
+        report = manager.generate_population_report()
+        assert report.data['turns'][0] == 1
+        assert report.data['population_growth'] > 0
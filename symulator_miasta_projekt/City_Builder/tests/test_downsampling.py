@@ -0,0 +1,93 @@
+"""
+Testy jednostkowe dla redukcji punktów serii do szerokości wykresu
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.downsampling import DownsampleCache, downsample_indices, lttb_indices, minmax_indices
+
+
+class TestDownsampling:
+    """Test LTTB i obwiedni min/max"""
+
+    def setup_method(self):
+        self.x = np.arange(10000)
+        self.y = np.sin(self.x / 500.0) * 100
+        self.y[1234] = 1000   # pojedynczy szczyt
+        self.y[8765] = -1000  # pojedynczy dołek
+
+    def test_lttb_keeps_peaks_and_ends(self):
+        """Test LTTB - zadana liczba punktów, końce i szczyty zachowane"""
+        indices = lttb_indices(self.x, self.y, 300)
+        assert len(indices) == 300
+        assert indices[0] == 0 and indices[-1] == 9999
+        assert np.all(np.diff(indices) > 0)
+        assert 1234 in indices and 8765 in indices
+
+    def test_minmax_envelope(self):
+        """Test obwiedni - minimum i maksimum każdego przedziału"""
+        indices = minmax_indices(self.y, 100)
+        assert len(indices) <= 202
+        assert 1234 in indices and 8765 in indices
+        assert self.y[indices].max() == self.y.max()
+
+    def test_short_series_unchanged(self):
+        """Test krótkiej serii - bez redukcji"""
+        assert list(downsample_indices(range(5), [1, 5, 2, 4, 3], 10)) == [0, 1, 2, 3, 4]
+        with pytest.raises(ValueError):
+            downsample_indices(self.x, self.y, 100, method='brak')
+
+    def test_cache_shared_axis(self):
+        """Test cache - wspólne indeksy serii i ponowne użycie dla tego samego okna"""
+        cache = DownsampleCache()
+        series = {'a': self.y, 'b': -self.y}
+        indices = cache.downsample(self.x, series, 200)
+        assert 200 <= len(indices) <= 400
+        assert cache.indices('a', self.x, self.y, 200) is cache.indices('a', self.x, self.y, 200)
+        assert len(cache._entries) == 2
+
+        # Nowa tura zmienia okno - redukcja liczona od nowa
+        cache.downsample(np.arange(10001), {'a': np.append(self.y, 0)}, 200)
+        assert len(cache._entries) == 3
+
+
+class TestReportManagerDownsampling:
+    """Test redukcji serii w raportach ReportManager"""
+
+    def test_population_report_series_reduced(self):
+        """Test raportu - trendy z pełnych danych, serie w rozdzielczości wykresu"""
+        from core.reports import ReportManager
+        manager = ReportManager()
+        manager.chart_points = 50
+        for turn in range(1, 201):
+            manager.record_turn_data(turn, {'population': turn * 10, 'satisfaction': 60})
+        report = manager.generate_population_report()
+        assert len(report.data['turns']) < 200
+        assert report.data['turns'][0] == 1 and report.data['turns'][-1] == 200
+        assert report.data['population_growth'] == pytest.approx(19900.0)
+        assert report.data['current_population'] == 2000
+
+    def test_loaded_history_is_not_served_from_cache(self):
+        """Test wczytania historii z tymi samymi turami - szczyt z nowych danych"""
+        from core.reports import ReportManager
+        manager = ReportManager()
+        manager.chart_points = 50
+
+        def history(peak_turn):
+            return {'historical_data': [
+                {'turn': turn, 'population': 10 ** 6 if turn == peak_turn else 0,
+                 'satisfaction': 60, 'unemployment_rate': 0}
+                for turn in range(1, 1001)
+            ]}
+
+        manager.load_from_dict(history(100))
+        assert 100 in manager.generate_population_report().data['turns']
+        manager.load_from_dict(history(900))
+        report = manager.generate_population_report()
+        assert max(report.data['population']) == 10 ** 6
+        assert 900 in report.data['turns']
@@ -224,6 +224,332 @@ class TestGameEngine:
         if placed_count >= 1:
             assert "House 1" in building_names or "House 2" in building_names or "Shop" in building_names
     
+    def test_building_registry_multi_tile(self):
+        """Test rejestru budynków dla budynku wielokafelkowego"""
+        # Przygotuj czysty teren 2x2
+        for x in range(2):
+            for y in range(2):
+                self.engine.city_map.get_tile(x, y).terrain_type = TerrainType.GRASS
+        
+        school = Building("School", BuildingType.SCHOOL, 1500, {"education": 30}, size=(2, 2))
+        assert self.engine.place_building(0, 0, school)
+        
+        # Budynek 2x2 jest zarejestrowany raz, pod kaflem głównym
+        assert self.engine.get_all_buildings() == [school]
+        assert self.engine.city_map.buildings == {(0, 0): school}
+        assert self.engine.city_map.get_buildings_by_type(BuildingType.SCHOOL) == [school]
+        assert self.engine.city_map.get_building_anchor(1, 1) == (0, 0)
+        assert self.engine.get_city_summary()['building_types'] == {'school': 1}
+        
+        # Sprzedaż przez pomocniczy kafel zwalnia cały budynek
+        assert self.engine.remove_building(1, 1)
+        assert self.engine.get_all_buildings() == []
+        assert self.engine.city_map.buildings_by_type == {}
+        for x in range(2):
+            for y in range(2):
+                tile = self.engine.city_map.get_tile(x, y)
+                assert tile.building is None
+                assert not tile.is_occupied
+
+    def test_tile_arrays(self):
+        """Test tablic kafelków mapy i widoków Tile"""
+        city_map = self.engine.city_map
+        assert city_map.terrain.shape == (city_map.width, city_map.height)
+        assert sum(city_map.count_terrain().values()) == city_map.width * city_map.height
+
+        for x in range(2):
+            for y in range(2):
+                city_map.get_tile(x, y).terrain_type = TerrainType.GRASS
+        assert city_map.get_buildable_mask()[0:2, 0:2].all()
+
+        school = Building("School", BuildingType.SCHOOL, 1500, {"education": 30}, size=(2, 2))
+        tile = city_map.get_tile(1, 1)  # widok pobrany przed budową
+        assert self.engine.place_building(0, 0, school)
+
+        # Widok czyta aktualny stan tablic
+        assert tile.building is school
+        assert tile.is_occupied and not tile.is_main_tile
+        assert city_map.get_tile(0, 0).is_main_tile
+        assert city_map.get_tile(1, 1) == tile
+        assert int(city_map.occupied.sum()) == 4
+        assert not city_map.get_buildable_mask()[0:2, 0:2].any()
+
+        city_map.clear_buildings()
+        assert not city_map.occupied.any()
+        assert (city_map.building_ids == -1).all()
+        assert tile.building is None
+
+    def test_building_registry_reset_and_load(self, tmp_path):
+        """Test synchronizacji rejestru przy resecie i wczytaniu gry"""
+        for x in range(2):
+            for y in range(2):
+                self.engine.city_map.get_tile(x, y).terrain_type = TerrainType.GRASS
+        
+        school = Building("School", BuildingType.SCHOOL, 1500, {"education": 30}, size=(2, 2))
+        self.engine.place_building(0, 0, school)
+        
+        save_path = str(tmp_path / "registry.json")
+        assert self.engine.save_game(save_path)
+        
+        self.engine.reset_game_state()
+        assert self.engine.get_all_buildings() == []
+        assert not self.engine.city_map.get_tile(1, 1).is_occupied
+        
+        assert self.engine.load_game(save_path)
+        buildings = self.engine.get_all_buildings()
+        assert len(buildings) == 1
+        assert buildings[0].size == (2, 2)
+        assert self.engine.city_map.get_building_anchor(1, 0) == (0, 0)
+
+    @pytest.mark.parametrize("compression", ["gzip", "lzma", "none"])
+    def test_compact_save_round_trip(self, tmp_path, compression):
+        """Test kompaktowego formatu zapisu dużej mapy"""
+        import numpy as np
+        from core.save_format import SAVE_FORMAT_VERSION, read_save_file
+
+        engine = GameEngine(map_width=500, map_height=500, seed=7)
+        engine.save_compression = compression
+        engine.economy.resources['money'].amount = 10 ** 9
+        house = Building("Dom", BuildingType.HOUSE, 500, {"population": 35})
+        placed = 0
+        for x, y in zip(*np.nonzero(engine.city_map.get_buildable_mask()[:, :20])):
+            engine.place_building(int(x), int(y), Building(house.name, house.building_type, house.cost,
+                                                           dict(house.effects)))
+            placed += 1
+            if placed == 2000:
+                break
+
+        save_path = str(tmp_path / "big.sav")
+        assert engine.save_game(save_path)
+        loaded = GameEngine(map_width=10, map_height=10)
+        assert loaded.load_game(save_path)
+
+        # Format dokumentu: teren jako serie RLE, budynki w kolumnach z jednym szablonem
+        document = read_save_file(save_path)
+        assert document['version'] == SAVE_FORMAT_VERSION
+        assert set(document['map']['terrain']) == {'values', 'lengths'}
+        assert len(document['map']['buildings']['templates']) == 1
+        assert len(document['map']['buildings']['x']) == placed
+
+        assert np.array_equal(loaded.city_map.terrain, engine.city_map.terrain)
+        assert np.array_equal(loaded.city_map.occupied, engine.city_map.occupied)
+        assert len(loaded.get_all_buildings()) == placed
+        assert os.path.getsize(save_path) < 200 * 1024
+
+    def test_load_legacy_json_save(self, tmp_path):
+        """Test wczytania starego zapisu JSON (format 1.0, słownik na kafelek)"""
+        import json
+
+        tiles = [{'x': x, 'y': y, 'terrain_type': 'grass', 'is_occupied': False,
+                  'is_main_tile': True, 'building': None} for x in range(3) for y in range(3)]
+        tiles[4]['terrain_type'] = 'water'
+        school = {'name': 'School', 'building_type': 'school', 'cost': 1500,
+                  'effects': {'education': 30}, 'rotation': 0, 'size': [2, 2]}
+        tiles[0].update(is_occupied=True, building=school)
+        tiles[1].update(is_occupied=True, is_main_tile=False, building=school)
+        legacy = {'version': '1.0', 'turn': 5, 'difficulty': 'Normal', 'city_level': 1,
+                  'statistics': {}, 'alerts': [], 'map': {'width': 3, 'height': 3, 'tiles': tiles},
+                  'economy': self.engine.economy.save_to_dict(),
+                  'population': self.engine.population.save_to_dict()}
+        save_path = str(tmp_path / "legacy.json")
+        with open(save_path, 'w', encoding='utf-8') as f:
+            json.dump(legacy, f, indent=2)
+
+        assert self.engine.load_game(save_path)
+        assert self.engine.turn == 5
+        assert self.engine.city_map.get_tile(1, 1).terrain_type == TerrainType.WATER
+        assert len(self.engine.get_all_buildings()) == 1
+        assert self.engine.city_map.get_building_anchor(0, 1) == (0, 0)
+
+    def test_building_ledger_matches_recompute(self):
+        """Test księgi agregatów - zgodność z pełnym przeliczeniem po zmianach"""
+        house = Building("House", BuildingType.HOUSE, 500, {"population": 35, "happiness": 12})
+        park = Building("Park", BuildingType.PARK, 800, {"happiness": 20, "environment": 15})
+        plant = Building("Plant", BuildingType.POWER_PLANT, 3000, {"energy": 150, "pollution": -10})
+        for building in (house, park, plant):
+            place_building_safely(self.engine, building)
+        
+        ledger = self.engine.city_map.ledger
+        buildings = self.engine.get_all_buildings()
+        assert ledger.verify(buildings) == []
+        assert ledger.need_supply['housing'] == 35
+        assert ledger.need_supply['entertainment'] == 20  # tylko park liczy się jako rozrywka
+        assert ledger.production['energy'] == 150
+        assert ledger.consumption['pollution'] == 10
+        
+        # Podatki i koszty z księgi równe przeliczeniu z listy budynków
+        economy = self.engine.economy
+        population = self.engine.population
+        assert economy.calculate_taxes(buildings, population, ledger) == pytest.approx(
+            economy.calculate_taxes(buildings, population))
+        assert economy.calculate_expenses(buildings, population, ledger) == pytest.approx(
+            economy.calculate_expenses(buildings, population))
+        
+        # Zmiana efektów budynku aktualizuje księgę
+        anchor = next(a for a, b in self.engine.city_map.buildings.items() if b is house)
+        assert self.engine.city_map.update_building_effects(*anchor, {"population": 50})
+        assert ledger.need_supply['housing'] == 50
+        assert ledger.verify(self.engine.get_all_buildings()) == []
+        
+        # Usunięcie wszystkich budynków zeruje sumy
+        for anchor in list(self.engine.city_map.buildings):
+            self.engine.remove_building(*anchor)
+        assert ledger.maintenance == 0
+        assert all(value == 0 for value in ledger.need_supply.values())
+    
+    def test_ledger_debug_mode_repairs_drift(self):
+        """Test trybu debugowania księgi - wykrycie i naprawa rozbieżności"""
+        house = Building("House", BuildingType.HOUSE, 500, {"population": 35})
+        place_building_safely(self.engine, house)
+        
+        # Symuluj rozjechanie się księgi
+        self.engine.city_map.ledger.need_supply['housing'] += 100
+        self.engine.ledger_debug = True
+        
+        mismatches = self.engine._verify_ledger(self.engine.get_all_buildings())
+        assert any('housing' in mismatch for mismatch in mismatches)
+        assert self.engine.city_map.ledger.need_supply['housing'] == 35
+        
+        self.engine.update_turn()  # po naprawie tura przebiega normalnie
+        assert self.engine.city_map.ledger.verify(self.engine.get_all_buildings()) == []
+
+    def test_update_turn_returns_context(self):
+        """Test migawki tury (TurnContext) zwracanej przez update_turn"""
+        house = Building("House", BuildingType.HOUSE, 500, {"population": 35})
+        place_building_safely(self.engine, house)
+
+        context = self.engine.update_turn()
+        assert context is self.engine.last_turn_context
+        assert context.turn == self.engine.turn == 1
+        assert context.buildings == self.engine.get_all_buildings()
+        assert context.building_counts == {BuildingType.HOUSE: 1}
+        assert context.population == self.engine.population.get_total_population()
+        assert context.satisfaction == self.engine.population.get_average_satisfaction()
+        assert context.unemployment_rate == self.engine.population.get_unemployment_rate()
+        assert context.money == self.engine.economy.get_resource_amount('money')
+        assert context.income == self.engine.economy.calculate_taxes(
+            context.buildings, self.engine.population, self.engine.city_map.ledger)
+        assert context.game_state()['buildings'] is context.buildings
+
+        # Skutki spoza tury (np. wydarzenia) - refresh() odświeża populację i budżet
+        self.engine.economy.earn_money(1000)
+        context.refresh(self.engine)
+        assert context.money == self.engine.economy.get_resource_amount('money')
+
+        self.engine.pause_game()
+        assert self.engine.update_turn() is None
+        assert self.engine.turn == 1
+
+    def test_simulate_headless(self):
+        """Test bezgłowej symulacji wielu tur"""
+        house = Building("House", BuildingType.HOUSE, 500, {"population": 35})
+        place_building_safely(self.engine, house)
+        self.engine.clear_alerts()
+
+        metrics = self.engine.simulate(20)
+        assert self.engine.turn == 20
+        assert list(metrics['turn']) == list(range(1, 21))
+        assert metrics['buildings'][-1] == 1
+        assert metrics['money'][-1] == self.engine.economy.get_resource_amount('money')
+
+        # Alerty, raporty finansowe i historia ekonomii są pomijane
+        assert self.engine.alerts == []
+        assert self.engine.finance_manager.financial_reports == []
+        assert self.engine.economy.history == []
+        assert self.engine.alerts_enabled
+        # Opcjonalne podsystemy: statystyki osiągnięć, pełna demografia
+        assert self.engine.statistics['max_population'] == 0
+        assert self.engine.last_turn_context.demographics == {}
+        assert self.engine.last_turn_context.population == metrics['population'][-1]
+
+        self.engine.simulate(10, {'achievements': True, 'demographics': True})
+        assert self.engine.statistics['max_population'] > 0
+        assert self.engine.last_turn_context.demographics['total_population'] > 0
+
+        # Wybrane metryki i włączone alerty
+        metrics = self.engine.simulate(5, {'metrics': ('turn', 'money'), 'alerts': True})
+        assert set(metrics) == {'turn', 'money'}
+        assert len(metrics['money']) == 5
+
+        with pytest.raises(ValueError):
+            self.engine.simulate(5, {'metrics': ('unknown',)})
+        with pytest.raises(ValueError):
+            self.engine.simulate(5, {'render': True})
+
+    def test_simulate_matches_update_turn(self):
+        """Test bezgłowej symulacji - ta sama rozgrywka co kolejne update_turn()"""
+        engines = [GameEngine(map_width=20, map_height=20, seed=7) for _ in range(2)]
+        for engine in engines:
+            place_building_safely(engine, Building("House", BuildingType.HOUSE, 500, {"population": 35}))
+        metrics = engines[0].simulate(30)
+        money = []
+        for _ in range(30):
+            engines[1].update_turn()
+            money.append(engines[1].economy.get_resource_amount('money'))
+
+        assert list(metrics['money']) == money
+        assert engines[0].population.get_total_population() == engines[1].population.get_total_population()
+        assert [o.id for o in engines[0].trade_manager.active_offers] == \
+            [o.id for o in engines[1].trade_manager.active_offers]
+
+    def test_simulate_stops_on_scenario_end(self):
+        """Test przerwania symulacji po zakończeniu scenariusza"""
+        success, _ = self.engine.start_scenario("challenge_speed_build")
+        assert success
+
+        metrics = self.engine.simulate(200, {'stop_on_scenario_end': True})
+        assert 0 < len(metrics['turn']) < 200
+        assert self.engine.turn == len(metrics['turn'])
+
+    def test_seeded_games_are_reproducible(self, tmp_path):
+        """Test powtarzalności rozgrywki dla tego samego ziarna"""
+        def terrain(engine):
+            return engine.city_map.terrain.tolist()
+
+        first = GameEngine(map_width=20, map_height=20, seed=1234)
+        second = GameEngine(map_width=20, map_height=20, seed=1234)
+        assert first.game_seed == 1234
+        assert terrain(first) == terrain(second)
+
+        first_metrics = first.simulate(30)
+        second_metrics = second.simulate(30)
+        for name in first_metrics:
+            assert list(first_metrics[name]) == list(second_metrics[name])
+        assert [o.id for o in first.trade_manager.active_offers] == \
+            [o.id for o in second.trade_manager.active_offers]
+
+        # Wczytana gra odtwarza ziarno i kontynuuje tak samo jak oryginał po wczytaniu
+        save_path = str(tmp_path / "seeded.json")
+        assert first.save_game(save_path)
+        loaded = GameEngine(map_width=20, map_height=20, seed=1)
+        assert loaded.load_game(save_path)
+        assert loaded.game_seed == 1234
+        assert first.load_game(save_path)
+        assert list(loaded.simulate(10)['population']) == list(first.simulate(10)['population'])
+
+    def test_seeded_events_are_reproducible(self):
+        """Test powtarzalności wydarzeń i decyzji banku dla tego samego ziarna"""
+        from core.events import EventManager
+        from core.finance import LoanType
+
+        def play(seed):
+            engine = GameEngine(map_width=20, map_height=20, seed=seed)
+            events = EventManager(rng=engine.random_streams.get('events'))
+            titles = []
+            for turn in range(8, 200, 8):
+                game_state = {'turn': turn, 'money': 1000 * (turn % 7), 'population': 500, 'satisfaction': 50}
+                titles.append(events.trigger_random_event(game_state).title)
+            titles.append(events.trigger_random_event().title)
+            offer = engine.finance_manager.get_loan_offer(LoanType.STANDARD, 1000, engine.economy, engine.population)
+            loans = [engine.finance_manager.take_loan(dict(offer, approval_chance=0.5), turn)[0]
+                     for turn in range(20)]
+            return titles, loans
+
+        first = play(99)
+        assert first == play(99)
+        assert len(set(first[0])) > 1
+        assert first != play(100)
+
     def test_pause_resume(self):
         """Test pauzowania i wznawiania gry"""
         assert not self.engine.paused
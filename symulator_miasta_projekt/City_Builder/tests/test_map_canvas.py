@@ -0,0 +1,112 @@
+"""
+Testy jednostkowe dla przyrostowego rysowania MapCanvas
+"""
+import pytest
+from PyQt6.QtWidgets import QApplication
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# QApplication musi istnieć przed importem gui (backend Qt dla matplotlib w reports_panel)
+app = QApplication.instance() or QApplication(sys.argv)
+
+from core.city_map import CityMap
+from core.tile import Building, BuildingType, TerrainType
+from PyQt6.QtGui import QColor
+from gui.map_canvas import MapCanvas
+
+
+class TestMapCanvas:
+    """Test rysowania tylko zmienionych kafelków"""
+
+    def setup_method(self):
+        """Setup przed każdym testem"""
+        self.city_map = CityMap(12, 12)
+        self.city_map.terrain[:, :] = 0  # sama trawa - każdy kafel jest budowlany
+        self.canvas = MapCanvas(self.city_map)
+
+    def test_refresh_without_changes_keeps_items(self):
+        """Test odświeżenia bez zmian - elementy kafelków nie są tworzone od nowa"""
+        chunk_item = self.canvas._chunk_items[(0, 0)]
+        items_before = len(self.canvas.scene.items())
+
+        self.canvas.draw_map()
+
+        assert self.canvas._chunk_items[(0, 0)] is chunk_item
+        assert len(self.canvas.scene.items()) == items_before
+
+    def test_building_placement_updates_only_its_tiles(self):
+        """Test stawiania i usuwania budynku - przerysowane są tylko jego kafelki"""
+        chunk_item = self.canvas._chunk_items[(0, 0)]
+        school = Building("School", BuildingType.SCHOOL, 1500, {"education": 30}, size=(2, 2))
+        self.city_map.add_building(1, 1, school)
+
+        self.canvas.draw_map()
+        assert (1, 1) in self.canvas._building_items
+        assert set(self.canvas._helper_items) == {(1, 2), (2, 1), (2, 2)}
+        assert self.canvas._chunk_items[(0, 0)] is chunk_item  # teren nie jest przerysowywany
+
+        self.city_map.remove_building(2, 2)
+        self.canvas.draw_map()
+        assert self.canvas._building_items == {}
+        assert self.canvas._helper_items == {}
+
+    def test_terrain_change_rerenders_chunk(self):
+        """Test zmiany terenu kafelka - przerysowany zostaje jego kawałek terenu"""
+        old_item = self.canvas._chunk_items[(0, 0)]
+        self.city_map.get_tile(4, 5).terrain_type = TerrainType.WATER
+
+        self.canvas.draw_map()
+
+        assert self.canvas._chunk_items[(0, 0)] is not old_item
+        assert old_item.scene() is None
+        image = self.canvas._chunk_items[(0, 0)].pixmap().toImage()
+        tile_size = self.canvas.tile_size
+        assert image.pixelColor(4 * tile_size + tile_size // 2, 5 * tile_size + tile_size // 2) == QColor("#4169E1")
+
+    def test_unchanged_map_is_not_compared(self):
+        """Test odświeżenia bez zmiany CityMap.version - tablice mapy nie są porównywane"""
+        version = self.city_map.version
+        self.city_map.terrain[4, 5] = 1  # zapis z pominięciem mark_changed()
+        self.canvas.draw_map()
+        assert self.canvas._rendered_terrain[4, 5] == 0
+
+        self.city_map.mark_changed()
+        assert self.city_map.version == version + 1
+        self.canvas.draw_map()
+        assert self.canvas._rendered_terrain[4, 5] == 1
+
+    def test_only_visible_chunks_are_materialized(self):
+        """Test kawałków terenu dużej mapy - tylko widoczne (z marginesem) mają elementy"""
+        canvas = MapCanvas(CityMap(200, 200))
+        canvas.resize(400, 300)
+        canvas.centerOn(0, 0)
+        canvas._update_visible_chunks()
+        assert 0 < len(canvas._chunk_items) < 13 * 13
+        assert (0, 0) in canvas._chunk_items
+
+        # Przewinięcie na koniec mapy podmienia kawałki
+        canvas.centerOn(200 * canvas.tile_size, 200 * canvas.tile_size)
+        assert (12, 12) in canvas._chunk_items
+        assert (0, 0) not in canvas._chunk_items
+
+    def test_selection_highlight_is_overlay(self):
+        """Test zaznaczenia - podświetlenie to jedyny nowy element"""
+        items_before = len(self.canvas.scene.items())
+        self.city_map.select_tile(2, 3)
+        self.canvas.draw_map()
+        assert len(self.canvas.scene.items()) == items_before + 1
+
+        self.city_map.deselect_tile()
+        self.canvas.draw_map()
+        assert len(self.canvas.scene.items()) == items_before
+
+    def test_new_map_rebuilds_scene(self):
+        """Test podmiany mapy (wczytanie gry) - pełna przebudowa sceny"""
+        self.canvas.city_map = CityMap(5, 5)
+        self.canvas.draw_map()
+
+        assert list(self.canvas._chunk_items) == [(0, 0)]
+        assert self.canvas.scene.sceneRect().width() == 5 * self.canvas.tile_size
@@ -445,5 +445,73 @@ class TestObjective:
         assert objective.current_value >= objective.target_value
 
 
+class TestCompiledObjectives:
+    """Test deklaratywnych celów kompilowanych do funkcji oceny"""
+
+    def setup_method(self):
+        self.manager = ObjectiveManager()
+
+    def state(self, turn, **values):
+        game_state = {'turn': turn, 'population': 0, 'money': 10000, 'satisfaction': 50, 'buildings': []}
+        game_state.update(values)
+        return game_state
+
+    def test_building_histogram_shared(self):
+        """Test celów budowlanych liczonych z histogramu typów budynków"""
+        manager = self.manager
+        objective = manager.objectives['first_roads']
+        roads = [Building("Road", BuildingType.ROAD, 10, {}) for _ in range(15)]
+        curves = [Building("Curve", BuildingType.ROAD_CURVE, 10, {}) for _ in range(5)]
+        manager.update_objectives(self.state(2, buildings=roads))
+        assert objective.current_value == 15
+
+        # Histogram z TurnContext (building_counts) zamiast przeglądania listy budynków
+        manager.update_objectives(self.state(3, buildings=roads + curves,
+                                             building_counts={BuildingType.ROAD: 15, BuildingType.ROAD_CURVE: 5}))
+        assert objective.status == ObjectiveStatus.COMPLETED
+
+    def test_grouped_buildings_with_cap(self):
+        """Test grup typów budynków z limitem liczonym na grupę"""
+        objective = Objective("mix", "Mix", "", ObjectiveType.BUILDINGS, target_value=4,
+                              building_filters=(("house",), ("factory",)), building_cap=2)
+        self.manager.add_objective(objective)
+        counts = {BuildingType.HOUSE: 5, BuildingType.FACTORY: 1, BuildingType.PARK: 3}
+        self.manager.update_objectives(self.state(2, building_counts=counts))
+        assert objective.current_value == 3
+        counts[BuildingType.FACTORY] = 2
+        self.manager.update_objectives(self.state(3, building_counts=counts))
+        assert objective.status == ObjectiveStatus.COMPLETED
+
+    def test_streak_resets(self):
+        """Test serii - liczba kolejnych tur spełniających warunek, zerowana po przerwie"""
+        objective = self.manager.objectives['crisis_survival']
+        for turn, money in enumerate([500, 500, 2000, 500, 500, 500, 500], start=2):
+            self.manager.update_objectives(self.state(turn, money=money))
+        assert objective.state['streak'] == 4
+        assert objective.status == ObjectiveStatus.ACTIVE
+        self.manager.update_objectives(self.state(9, money=0))
+        assert objective.status == ObjectiveStatus.COMPLETED
+
+    def test_stateful_metrics(self):
+        """Test metryk ze stanem - cykle budżetu i odbudowa populacji"""
+        cycles = Objective("cycles", "Cykle", "", ObjectiveType.CHALLENGE, target_value=2,
+                           metric="money_cycles", params={"low": 10, "high": 100})
+        phoenix = Objective("phoenix", "Feniks", "", ObjectiveType.CHALLENGE, target_value=1,
+                            metric="population_recovery", params={"low": 5, "high": 50})
+        self.manager.add_objective(cycles)
+        self.manager.add_objective(phoenix)
+        for turn, (money, population) in enumerate([(5, 100), (200, 3), (150, 20), (5, 60), (500, 0)], start=2):
+            self.manager.update_objectives(self.state(turn, money=money, population=population))
+        assert cycles.status == ObjectiveStatus.COMPLETED
+        assert phoenix.status == ObjectiveStatus.COMPLETED
+
+    def test_invalid_declarations(self):
+        """Test nieznanej metryki lub porównania - błąd przy dodaniu celu"""
+        with pytest.raises(ValueError):
+            self.manager.add_objective(Objective("x", "X", "", ObjectiveType.CHALLENGE, 1, metric="unknown"))
+        with pytest.raises(ValueError):
+            self.manager.add_objective(Objective("y", "Y", "", ObjectiveType.ECONOMY, 1, comparator="=="))
+
+
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file
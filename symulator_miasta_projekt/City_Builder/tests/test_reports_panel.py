@@ -0,0 +1,137 @@
+"""
+Testy jednostkowe dla przyrostowego odświeżania wykresów ReportsPanel
+"""
+import pytest
+from PyQt6.QtWidgets import QApplication
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# QApplication musi istnieć przed importem gui (backend Qt dla matplotlib w reports_panel)
+app = QApplication.instance() or QApplication(sys.argv)
+
+import matplotlib.pyplot as plt
+from gui.reports_panel import ReportsPanel
+
+
+def add_turns(panel, turns):
+    for turn in turns:
+        panel.add_data_point(turn, 100 + turn, 5000 - turn, 60, 5, 300 + turn % 3, 200)
+
+
+class TestReportsPanel:
+    """Test aktualizacji wykresów bez ich przebudowy"""
+
+    def setup_method(self):
+        self.panel = ReportsPanel()
+        self.panel.time_range_combo.setCurrentText("Ostatnie 10 tur")
+        self.full_draws = 0
+        original_draw = self.panel.canvas.draw
+
+        def counting_draw():
+            self.full_draws += 1
+            original_draw()
+        self.panel.canvas.draw = counting_draw
+
+    def teardown_method(self):
+        # Panel i figura (zarejestrowana w pyplot) nie mogą przeżyć QApplication
+        plt.close(self.panel.figure)
+        self.panel.deleteLater()
+        app.processEvents()
+
+    def test_hidden_panel_skips_redraw(self):
+        """Test ukrytego panelu - wykresy odświeżane dopiero po pokazaniu"""
+        add_turns(self.panel, range(1, 6))
+        self.panel.update_charts()
+        assert self.full_draws == 0
+        assert self.panel._charts_stale
+
+        self.panel.show()
+        assert self.full_draws == 1
+        assert not self.panel._charts_stale
+        assert list(self.panel.series_lines['population'].get_xdata()) == [1, 2, 3, 4, 5]
+
+    def test_artists_are_reused(self):
+        """Test stałych linii i słupków - dane podmieniane w miejscu"""
+        self.panel.show()
+        add_turns(self.panel, range(1, 11))
+        self.panel.update_charts()
+        line = self.panel.series_lines['budget']
+        bars = list(self.panel.balance_bars)
+        assert len(bars) == 10
+
+        add_turns(self.panel, range(11, 13))
+        self.panel.update_charts()
+        assert self.panel.series_lines['budget'] is line
+        assert self.panel.balance_bars == bars  # ta sama liczba słupków - bez nowych elementów
+        assert list(line.get_xdata()) == list(range(3, 13))
+        assert [bar.get_height() for bar in bars][-1] == 300 + 12 % 3 - 200
+        assert list(self.panel.ax1.lines) == [self.panel.series_lines["population"]]
+
+    def test_unchanged_limits_use_blitting(self):
+        """Test blittingu - bez zmiany zakresów osi brak pełnego przerysowania"""
+        self.panel.show()
+        add_turns(self.panel, range(1, 11))
+        self.panel.update_charts()
+        draws = self.full_draws
+
+        # Te same dane - zakresy osi bez zmian
+        self.panel.update_charts()
+        assert self.full_draws == draws
+        assert self.panel._chart_backgrounds is not None
+
+    def test_long_series_downsampled_to_chart_width(self):
+        """Test długiej serii - liczba punktów zależy od szerokości wykresu, szczyty zachowane"""
+        turns = list(range(1, 5001))
+        data = {key: [0] * len(turns) for key in self.panel.history_data}
+        data['turns'] = turns
+        data['population'] = [turn % 100 for turn in turns]
+        data['budget'][2500] = 10 ** 6
+
+        reduced = self.panel.downsample_for_chart(data)
+        width = self.panel.chart_width()
+        assert len(reduced['turns']) <= 6 * width
+        assert max(reduced['budget']) == 10 ** 6
+        assert all(len(values) == len(reduced['turns']) for values in reduced.values())
+        assert self.panel.downsample_for_chart(data)['turns'] == reduced['turns']
+
+    def test_appended_turns_use_blitting(self):
+        """Test dopisywania tur - zakresy osi rozszerzane skokowo, większość tur przez blitting"""
+        self.panel.time_range_combo.setCurrentText("Ostatnie 50 tur")
+        self.panel.show()
+        blits = []
+        original_blit = self.panel._blit_charts
+
+        def counting_blit():
+            blits.append(1)
+            original_blit()
+        self.panel._blit_charts = counting_blit
+
+        for turn in range(1, 61):
+            add_turns(self.panel, [turn])
+            self.panel.update_charts()
+        assert self.full_draws + len(blits) == 61  # pierwsze rysowanie przy show()
+        assert self.full_draws < 15
+        # Dane mieszczą się w zakresach osi
+        xmin, xmax = self.panel.ax1.get_xlim()
+        assert xmin <= 11 and 60 <= xmax
+        ymin, ymax = self.panel.ax2.get_ylim()
+        assert ymin <= 5000 - 60 and 5000 - 11 <= ymax
+
+    def test_replaced_history_is_not_served_from_cache(self):
+        """Test nowej historii z tymi samymi turami - cache redukcji czyszczony"""
+        turns = list(range(1, 5001))
+        data = {key: [0] * len(turns) for key in self.panel.history_data}
+        data['turns'] = turns
+        data['budget'][1000] = 10 ** 6
+        self.panel.downsample_for_chart(data)
+
+        self.panel.reset_history()
+        assert all(values == [] for values in self.panel.history_data.values())
+        data['budget'][1000] = 0
+        data['budget'][4000] = 10 ** 6
+        reduced = self.panel.downsample_for_chart(data)
+        assert max(reduced['budget']) == 10 ** 6
+        assert 4001 in reduced['turns']
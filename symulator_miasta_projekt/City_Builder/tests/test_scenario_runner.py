@@ -0,0 +1,91 @@
+"""
+Testy jednostkowe dla runnera Monte Carlo scenariuszy
+"""
+import pytest
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.scenario_runner import (BalancedBuildPolicy, RESULT_COLUMNS, OUTCOME_BANKRUPT,
+                                  OUTCOME_COMPLETED, OUTCOME_FAILED, OUTCOME_TIMEOUT,
+                                  load_results, run_monte_carlo, run_scenario_once,
+                                  summarize_results)
+
+OUTCOMES = {OUTCOME_COMPLETED, OUTCOME_FAILED, OUTCOME_BANKRUPT, OUTCOME_TIMEOUT}
+
+
+class TestScenarioRunner:
+    """Test runnera Monte Carlo"""
+
+    def test_single_run_is_consistent_and_deterministic(self):
+        """Test pojedynczego przebiegu - spójny wiersz wyników, to samo ziarno daje ten sam wynik"""
+        row = run_scenario_once("challenge_speed_build", seed=1, max_turns=100, map_size=(15, 15))
+
+        assert set(row) == set(RESULT_COLUMNS)
+        assert row['outcome'] in OUTCOMES
+        assert row['outcome'] != OUTCOME_TIMEOUT  # wyzwanie z limitem czasu rozstrzyga się przed 100 turą
+        assert 0 < row['turns'] <= 100 + 1  # numer tury po ostatniej rozegranej
+        if row['outcome'] == OUTCOME_COMPLETED:
+            assert row['completion_turn'] == row['turns']
+        else:
+            assert row['completion_turn'] == -1
+        assert row['min_money'] <= row['final_money']
+        assert row['final_population'] <= row['max_population']
+        assert row['buildings'] > 0  # strategia budowała
+
+        again = run_scenario_once("challenge_speed_build", seed=1, max_turns=100, map_size=(15, 15))
+        assert again == row
+
+    def test_policy_respects_reserve(self):
+        """Test strategii - nie wydaje pieniędzy poniżej rezerwy"""
+        row = run_scenario_once("challenge_speed_build", seed=1, max_turns=10,
+                                policy=BalancedBuildPolicy(reserve=10 ** 9), map_size=(15, 15))
+        assert row['buildings'] == 0
+
+    def test_monte_carlo_columns_and_summary(self, tmp_path):
+        """Test agregacji wyników i zapisu do pliku kolumnowego"""
+        output = tmp_path / "balance.npz"
+        results = run_monte_carlo(["sandbox", "challenge_speed_build"], runs_per_scenario=2,
+                                  max_turns=40, workers=0, map_size=(15, 15), output_path=str(output))
+
+        assert list(results['scenario']) == ["sandbox"] * 2 + ["challenge_speed_build"] * 2
+        assert list(results['seed']) == [0, 1, 2, 3]
+        assert set(results['outcome']) <= OUTCOMES
+
+        loaded = load_results(str(output))
+        assert set(loaded) == set(RESULT_COLUMNS)
+        assert list(loaded['outcome']) == list(results['outcome'])
+
+        summary = summarize_results(results)
+        assert set(summary) == {"sandbox", "challenge_speed_build"}
+        for scenario_summary in summary.values():
+            assert scenario_summary['runs'] == 2
+            rates = [scenario_summary[key] for key in
+                     ('completion_rate', 'failure_rate', 'bankruptcy_rate', 'timeout_rate')]
+            assert sum(rates) == pytest.approx(1.0)
+        assert summary['sandbox']['completion_rate'] == 1.0  # brak celów - ukończony od razu
+        sandbox_turns = summary['sandbox']['turns_to_completion']
+        assert sandbox_turns['p10'] <= sandbox_turns['p50'] <= sandbox_turns['p90']
+
+        repeated = run_monte_carlo(["sandbox", "challenge_speed_build"], runs_per_scenario=2,
+                                   max_turns=40, workers=0, map_size=(15, 15))
+        for column in RESULT_COLUMNS:
+            assert list(repeated[column]) == list(results[column])
+
+    def test_process_pool_matches_in_process_run(self):
+        """Test równoległego uruchomienia - te same ziarna dają te same wyniki"""
+        kwargs = dict(scenario_ids=["challenge_speed_build"], runs_per_scenario=2,
+                      max_turns=40, map_size=(15, 15))
+        sequential = run_monte_carlo(workers=0, **kwargs)
+        parallel = run_monte_carlo(workers=2, **kwargs)
+
+        assert list(parallel['seed']) == list(sequential['seed'])
+        assert list(parallel['turns']) == list(sequential['turns'])
+        assert list(parallel['buildings']) == list(sequential['buildings'])
+
+    def test_unknown_scenario(self):
+        """Test nieznanego scenariusza"""
+        with pytest.raises(KeyError):
+            run_scenario_once("no_such_scenario", seed=0, max_turns=1)
@@ -0,0 +1,154 @@
+"""
+Testy jednostkowe dla cache obrazków budynków (SpriteCache) i atlasu tekstur
+"""
+import pytest
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QPainter, QPixmap
+from PyQt6.QtWidgets import QApplication
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# QApplication musi istnieć przed importem gui (backend Qt dla matplotlib w reports_panel)
+app = QApplication.instance() or QApplication(sys.argv)
+
+from core.city_map import CityMap
+from core.tile import Building, BuildingType
+from gui.map_canvas import MapCanvas
+from gui.sprite_cache import SpriteCache, ROTATIONS
+from gui.texture_atlas import APP_DIR, TextureAtlas
+
+HOUSE = "assets/tiles/domek1.png"
+
+
+class TestSpriteCache:
+    """Test wariantów obrazków per rotacja i poziom powiększenia"""
+
+    def test_zoom_is_snapped_to_levels(self):
+        """Test zaokrąglania powiększenia do najbliższego poziomu"""
+        cache = SpriteCache(zoom_levels=[2.0, 0.5, 1.0])
+        assert cache.snap_zoom(0.6) == 0.5
+        assert cache.snap_zoom(1.1) == 1.0
+        assert cache.snap_zoom(5.0) == 2.0
+
+        pixmap = cache.get(HOUSE, 32, 32, zoom=1.9)
+        assert max(pixmap.width(), pixmap.height()) == 64
+        assert cache.get(HOUSE, 32, 32, zoom=2.1) is pixmap  # ten sam poziom - ten sam wariant
+
+    def test_lru_eviction(self):
+        """Test ograniczenia rozmiaru - usuwany jest najdawniej używany wariant"""
+        cache = SpriteCache(max_size=2)
+        cache.get(HOUSE, 32, 32, rotation=0)
+        cache.get(HOUSE, 32, 32, rotation=90)
+        cache.get(HOUSE, 32, 32, rotation=0)    # odświeża wariant 0
+        cache.get(HOUSE, 32, 32, rotation=180)  # usuwa wariant 90
+        assert len(cache) == 2
+        assert (cache.hits, cache.misses) == (1, 3)
+
+        cache.get(HOUSE, 32, 32, rotation=0)
+        assert cache.hits == 2
+        cache.get(HOUSE, 32, 32, rotation=90)
+        assert cache.misses == 4
+
+    def test_precompute_and_missing_image(self):
+        """Test tworzenia z góry wszystkich rotacji i poziomów oraz obrazka zastępczego"""
+        cache = SpriteCache(zoom_levels=[1.0, 2.0])
+        cache.precompute(HOUSE, 64, 32)
+        assert len(cache) == len(ROTATIONS) * 2
+        assert cache.get(HOUSE, 64, 32, rotation=270, zoom=2.0) is not None
+        assert cache.hits == 1
+
+        missing = cache.get("assets/tiles/brak.png", 32, 16)
+        assert (missing.width(), missing.height()) == (32, 16)
+
+    def test_persist_and_reload(self, tmp_path):
+        """Test zapisu wariantów na dysk i wczytania ich w kolejnym uruchomieniu"""
+        cache = SpriteCache(zoom_levels=[1.0, 1.5], cache_dir=str(tmp_path))
+        cache.precompute(HOUSE, 32, 32, rotations=(0, 90))
+        assert cache.persist() == 4
+        assert cache.persist() == 0  # już zapisane
+        assert len(os.listdir(tmp_path)) == 4
+
+        reloaded = SpriteCache(zoom_levels=[1.0, 1.5], cache_dir=str(tmp_path))
+        pixmap = reloaded.get(HOUSE, 32, 32, rotation=90, zoom=1.5)
+        original = cache.get(HOUSE, 32, 32, rotation=90, zoom=1.5)
+        assert pixmap.size() == original.size()
+        assert reloaded._sources == {}  # oryginał nie był wczytywany ani skalowany
+        assert reloaded.persist() == 0
+
+
+class TestMapCanvasSprites:
+    """Test użycia cache obrazków w MapCanvas"""
+
+    def test_zoom_level_change_swaps_building_sprites(self):
+        """Test zmiany poziomu powiększenia - budynki dostają obrazek o wyższej rozdzielczości"""
+        city_map = CityMap(8, 8)
+        city_map.terrain[:, :] = 0
+        house = Building("House", BuildingType.HOUSE, 100, {"population": 10})
+        house.rotation = 90
+        city_map.add_building(2, 2, house)
+        canvas = MapCanvas(city_map, SpriteCache(zoom_levels=[1.0, 2.0]))
+
+        sprite = canvas._building_items[(2, 2)][0]
+        assert sprite.scale() == 1.0
+        assert sprite.sceneBoundingRect().width() == canvas.tile_size
+
+        canvas.zoom_factor = 1.9
+        canvas._update_sprite_zoom()
+        sprite = canvas._building_items[(2, 2)][0]
+        assert sprite.pixmap().width() == 2 * canvas.tile_size
+        assert sprite.sceneBoundingRect().width() == canvas.tile_size  # rozmiar na scenie bez zmian
+
+
+class TestTextureAtlas:
+    """Test atlasu tekstur z assets/tiles"""
+
+    def test_atlas_packs_all_assets_per_cell_size(self):
+        """Test budowy atlasu - każdy obrazek w każdym rozmiarze, na kilku stronach"""
+        atlas = TextureAtlas(cell_sizes=[16, 32, 64]).load()
+        asset_count = len(os.listdir(os.path.join(APP_DIR, "assets", "tiles")))
+        assert len(atlas) == asset_count
+        assert len(atlas.index) == asset_count * 3
+        assert len(atlas.pages) < len(atlas.index)
+        assert HOUSE in atlas and "assets/tiles/brak.png" not in atlas
+
+        # Wybierany jest najmniejszy rozmiar komórki wystarczający dla celu
+        page, source = atlas.get(HOUSE, 20)
+        assert page in atlas.pages and source.width() == 32
+        assert atlas.get(HOUSE, 200)[1].width() == 64
+        assert atlas.get("assets/tiles/brak.png", 32) is None
+
+        # Rysowanie wprost ze strony atlasu
+        target = QPixmap(32, 32)
+        target.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(target)
+        assert atlas.draw(painter, QRect(0, 0, 32, 32), HOUSE)
+        assert not atlas.draw(painter, QRect(0, 0, 32, 32), "assets/tiles/brak.png")
+        painter.end()
+        assert target.toImage() == page.copy(source).toImage()
+
+    def test_small_pages_and_cached_atlas(self, tmp_path):
+        """Test podziału na strony i wczytania atlasu z cache zamiast przebudowy"""
+        atlas = TextureAtlas(cell_sizes=[32], cache_dir=str(tmp_path), max_page_size=128).load()
+        assert len(atlas.pages) == -(-len(atlas) // 16)  # 4 x 4 komórki na stronę
+        for page, x, y, w, h in atlas.index.values():
+            assert x + w <= 128 and y + h <= 128
+
+        cached = TextureAtlas(cell_sizes=[32], cache_dir=str(tmp_path), max_page_size=128)
+        cached.build = None  # przebudowa nie może być wywołana
+        cached.load()
+        assert cached.assets_hash == atlas.assets_hash
+        assert cached.index == atlas.index
+        (cached_page, source), (page, _) = cached.get(HOUSE, 32), atlas.get(HOUSE, 32)
+        assert cached_page.copy(source).toImage() == page.copy(source).toImage()
+
+    def test_sprite_cache_uses_atlas(self):
+        """Test cache obrazków z atlasem - bez wczytywania plików przy rysowaniu"""
+        atlas = TextureAtlas(cell_sizes=[32, 64]).load()
+        cache = SpriteCache(zoom_levels=[1.0, 2.0], atlas=atlas)
+        assert cache.get(HOUSE, 32, 32, zoom=2.0).width() == 64
+        assert cache._sources == {}
+        cache.get("assets/tiles/brak.png", 32, 32)  # spoza atlasu - fallback do pliku
+        assert list(cache._sources) == ["assets/tiles/brak.png"]
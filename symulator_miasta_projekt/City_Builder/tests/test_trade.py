@@ -0,0 +1,201 @@
+"""
+Testy jednostkowe dla systemu handlu (księga ofert, statystyki)
+"""
+import random
+import sys
+import os
+
+# Dodaj ścieżkę do modułów projektu - MUSI być przed importami z core
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.resources import Economy
+from core.trade import TradeGoodType, TradeManager, TradeOffer, TradeOrderBook
+
+
+def make_offer(index, good_type, price, expires_turn):
+    return TradeOffer(f"offer_{index}", "agropolis", good_type, 100, price, True, expires_turn)
+
+
+class TestTradeOrderBook:
+    """Test księgi ofert indeksowanej po id, cenie i turze wygaśnięcia"""
+
+    def setup_method(self):
+        rng = random.Random(3)
+        goods = list(TradeGoodType)
+        self.offers = [make_offer(i, rng.choice(goods), rng.choice([10, 12.5, 20, 35]), rng.randint(1, 10))
+                       for i in range(200)]
+        self.book = TradeOrderBook()
+        for offer in self.offers:
+            self.book.add(offer)
+
+    def test_sorted_like_full_sort(self):
+        """Test kolejności - jak sorted() po cenie (stabilne względem kolejności dodania)"""
+        assert self.book.sorted_offers() == sorted(self.offers, key=lambda x: x.price_per_unit)
+        for good_type in TradeGoodType:
+            expected = sorted((o for o in self.offers if o.good_type == good_type), key=lambda x: x.price_per_unit)
+            assert self.book.sorted_offers(good_type) == expected
+
+    def test_remove_and_expire(self):
+        """Test usunięcia po id i wygasania z kopca (zaakceptowane oferty pomijane)"""
+        assert self.book.remove('offer_5') is self.offers[5]
+        assert self.book.remove('offer_5') is None
+        assert 'offer_5' not in self.book
+
+        expired = self.book.expire(4)
+        assert {o.id for o in expired} == {o.id for o in self.offers if o.expires_turn <= 4} - {'offer_5'}
+        remaining = [o for o in self.offers if o.expires_turn > 4 and o.id != 'offer_5']
+        assert list(self.book) == remaining
+        assert self.book.sorted_offers() == sorted(remaining, key=lambda x: x.price_per_unit)
+        assert self.book.expire(4) == []
+
+
+class TestTradeManager:
+    """Test ofert i statystyk menedżera handlu"""
+
+    def setup_method(self):
+        self.manager = TradeManager(rng=random.Random(7))
+        for _ in range(30):
+            self.manager.update_turn()
+
+    def test_offers_expire_each_turn(self):
+        """Test aktywnych ofert - żadna nie jest przeterminowana"""
+        assert len(self.manager.active_offers) > 0
+        assert all(o.expires_turn > self.manager.current_turn for o in self.manager.active_offers)
+        assert self.manager.get_trade_statistics()['active_offers'] == len(self.manager.active_offers)
+
+    def test_running_statistics(self):
+        """Test bieżących sum statystyk - zgodne z przeliczeniem całej historii"""
+        for offer in self.manager.get_available_offers():
+            success, _ = self.manager.accept_offer(offer.id)
+            assert success
+        assert self.manager.accept_offer('brak')[0] is False
+        assert self.manager.active_offers == []
+
+        stats = self.manager.get_trade_statistics()
+        history = self.manager.trade_history
+        assert stats['total_trades'] == len(history)
+        assert stats['total_value'] == sum(trade['total_value'] for trade in history)
+        assert sum(s['trades'] for s in stats['city_stats'].values()) == len(history)
+        assert sum(s['trades'] for s in stats['good_stats'].values()) == len(history)
+
+        # Wczytany stan przelicza sumy z historii
+        loaded = TradeManager(rng=random.Random(0))
+        loaded.load_from_dict(self.manager.save_to_dict())
+        assert loaded.get_trade_statistics()['city_stats'] == stats['city_stats']
+        assert loaded.get_trade_statistics()['total_value'] == stats['total_value']
+
+
+class TestTradeMarket:
+    """Test wektorowego modelu rynku dla wielu miast"""
+
+    def setup_method(self):
+        self.manager = TradeManager(rng=random.Random(11))
+        goods = list(TradeGoodType)
+        for index in range(200):
+            self.manager.add_trading_city(f"ai_{index}", f"AI {index}", goods[index % len(goods)])
+
+    def test_offers_for_many_cities(self):
+        """Test ofert wszystkich miast - ceny zgodne z modyfikatorami miast i narzutem"""
+        market = self.manager.market
+        assert market.city_modifiers.shape == (206, len(TradeGoodType))
+        self.manager.trading_cities['ai_0'].update_relationship(50)  # przyjazne - 10% taniej
+
+        self.manager.current_turn = 1
+        self.manager._update_market_prices()
+        prices = {good_id: good.current_price for good_id, good in self.manager.trade_goods.items()}
+        self.manager._generate_trade_offers()
+        offers = self.manager.active_offers
+        assert 30 < len(offers) < 100  # ~30% z 206 miast
+
+        for offer in offers:
+            city = self.manager.trading_cities[offer.city_id]
+            markup = offer.price_per_unit / (prices[offer.good_id] * city.get_price_modifier(offer.good_type))
+            low, high = (1.05, 1.2) if offer.is_buying else (0.8, 0.95)
+            assert low - 1e-9 <= markup <= high + 1e-9
+            assert 50 <= offer.quantity <= 500
+            assert 4 <= offer.expires_turn <= 9
+
+        # Ceny w granicach 50%-200% ceny bazowej po wielu turach
+        for _ in range(100):
+            self.manager.update_turn()
+        for good in self.manager.trade_goods.values():
+            assert good.base_price * 0.5 <= good.current_price <= good.base_price * 2.0
+
+    def test_same_seed_same_market(self):
+        """Test powtarzalności losowań wsadowych przy tym samym ziarnie"""
+        other = TradeManager(rng=random.Random(11))
+        for index in range(200):
+            other.add_trading_city(f"ai_{index}", f"AI {index}", list(TradeGoodType)[index % 6])
+        for _ in range(5):
+            self.manager.update_turn()
+            other.update_turn()
+        assert [o.id for o in self.manager.active_offers] == [o.id for o in other.active_offers]
+        assert self.manager.market.price.tolist() == other.market.price.tolist()
+
+    def test_trade_feedback(self):
+        """Test sprzężenia popytu - sprzedaż miastom podnosi popyt i cenę towaru"""
+        steel = self.manager.trade_goods['steel']
+        steel.volatility = 0.0
+        self.manager._market = None  # przebuduj model ze zmienioną zmiennością
+        start_price = steel.current_price
+
+        offer = TradeOffer('buy_steel', 'agropolis', TradeGoodType.MATERIALS, 1000, 40.0, True, 10, good_id='steel')
+        self.manager.order_book.add(offer)
+        assert self.manager.accept_offer('buy_steel')[0]
+        assert steel.demand_modifier == 1.5
+
+        self.manager._update_market_prices()
+        assert steel.current_price == start_price * (1 + 0.05 * 0.5)
+        assert 1.0 < steel.demand_modifier < 1.5  # odchylenie wygasa
+
+
+class TestContractSettlement:
+    """Test wsadowego rozliczania kontraktów w zasobach i budżecie"""
+
+    def setup_method(self):
+        self.manager = TradeManager(rng=random.Random(5))
+        self.economy = Economy(initial_money=1000)  # żywność 80/800, materiały 50/500
+
+    def sign(self, good_type, quantity, price, duration, is_buying, city_id='agropolis'):
+        assert self.manager.create_contract(city_id, good_type, quantity, price, duration, is_buying)[0]
+
+    def test_partial_fills(self):
+        """Test częściowej realizacji przy braku zapasu, miejsca w magazynie i pieniędzy"""
+        self.sign(TradeGoodType.FOOD, 50, 10.0, 3, False)          # sprzedaż 50 żywności
+        self.sign(TradeGoodType.FOOD, 50, 10.0, 3, False, 'luxuria')  # tylko 30 zostało
+        self.sign(TradeGoodType.MATERIALS, 300, 1.0, 3, True)      # kupno 300 materiałów
+        self.sign(TradeGoodType.MATERIALS, 300, 1.0, 3, True)      # tylko 150 miejsca
+        self.sign(TradeGoodType.TECHNOLOGY, 10, 200.0, 3, True)    # budżet: 1000 + 800 - 450 = 1350
+
+        self.manager._execute_contracts(self.economy)
+        settled = {name: self.manager.contract_ledger.column(name).tolist() for name in ('requested', 'filled')}
+        assert settled == {'requested': [50, 50, 300, 300, 10], 'filled': [50, 30, 300, 150, 6]}
+        assert self.economy.get_resource_amount('food') == 0
+        assert self.economy.get_resource_amount('materials') == 500
+        assert self.economy.get_resource_amount('money') == 1000 + 800 - 450 - 1200
+        assert self.manager.last_settlement == {'contracts': 5, 'partial': 3, 'income': 800.0, 'cost': 1650.0}
+        assert self.manager.trading_cities['luxuria'].trade_volume == 300
+
+    def test_contracts_expire_and_ledger_persists(self):
+        """Test wygasania kontraktów i zapisu księgi rozliczeń"""
+        self.sign(TradeGoodType.ENERGY, 10, 2.0, 2, False)
+        self.sign(TradeGoodType.SERVICES, 5, 3.0, 4, False, 'servicetown')
+        for _ in range(4):
+            self.manager.update_turn(self.economy)
+        assert self.manager.active_contracts == []
+        assert len(self.manager.contract_ledger) == 6
+        energy = self.manager.contract_ledger.for_contract(self.manager.contract_ledger.contract_ids[0])
+        assert energy['filled'].tolist() == [10, 10]
+        assert self.economy.get_resource_amount('energy') == 80
+        assert self.economy.get_resource_amount('money') == 1000 + 2 * 20 + 4 * 15
+
+        loaded = TradeManager(rng=random.Random(0))
+        loaded.load_from_dict(self.manager.save_to_dict())
+        assert loaded.contract_ledger.column('value').tolist() == self.manager.contract_ledger.column('value').tolist()
+        assert loaded.contract_ledger.contract_ids == self.manager.contract_ledger.contract_ids
+
+        # Bez ekonomii kontrakty tylko upływają
+        self.sign(TradeGoodType.FOOD, 10, 1.0, 1, False)
+        self.manager.update_turn()
+        assert self.manager.active_contracts == []
+        assert len(self.manager.contract_ledger) == 6